@@ -11,19 +11,82 @@ Each analyzed STEP file's results are compiled into a Pandas DataFrame and expor
 """
 
 import os
+from functools import partial
 import pandas as pd
-import numpy as np
-from OCC.Core.STEPControl import STEPControl_Reader
-from OCC.Core.TopExp import TopExp_Explorer
-from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX
-from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
-from OCC.Core.GeomAbs import GeomAbs_Plane, GeomAbs_Cylinder
-from OCC.Core.BRep import BRep_Tool
-from OCC.Core.Bnd import Bnd_Box
-from OCC.Core.BRepBndLib import brepbndlib
-from OCC.Core.GeomLProp import GeomLProp_SLProps
-from OCC.Core.GProp import GProp_GProps
-from OCC.Core.BRepGProp import brepgprop_VolumeProperties
+from scripts.analysis_pipeline import (
+    analyze_file,
+    analyzer_key,
+    count_cylindrical_faces,
+    count_topology,
+    curvature_summary,
+    load_step_shape,
+    register_analyzer,
+    shape_bounding_box,
+    shape_curvature,
+    shape_topology,
+    shape_volume,
+)
+from scripts.batch_analysis import DEFAULT_TIMEOUT, run_batch
+from scripts.result_cache import ResultCache
+from scripts.result_writer import ResultWriter
+
+# Analyzers run for each file; the order fixes the column order of the CSV
+COMPLEXITY_ANALYZERS = ("face_edge_complexity", "curvature_complexity", "volume", "holes")
+
+# Same columns, with the curvature statistics taken from the area-weighted curvature field
+FIELD_COMPLEXITY_ANALYZERS = ("face_edge_complexity", "curvature_field_complexity", "volume", "holes")
+
+# Columns of the output CSV
+RESULT_COLUMNS = [
+    "File Name", "Total Faces", "Curved Faces", "Total Edges", "Vertices", "Complexity (Face/Edge)",
+    "Bounding Box Volume", "Mean Curvature", "Curvature Std Dev", "Complexity (Curvature)",
+    "Volume", "Hole Count", "Error",
+]
+
+def face_edge_complexity(counts):
+    """
+    Labels a shape from its face, curved face and vertex counts.
+
+    :param counts: Dictionary returned by `count_topology`.
+    :return: The counts extended with the complexity label.
+    """
+    face_count, curved_face_count, vert_count = counts["Total Faces"], counts["Curved Faces"], counts["Vertices"]
+
+    # Define complexity based on thresholds
+    complexity = "Simple" if face_count < 20 and curved_face_count < 9 and vert_count < 60 else "Complex"
+    return {**counts, "Complexity (Face/Edge)": complexity}
+
+def curvature_complexity(summary):
+    """
+    Labels a shape from its curvature variation and bounding box volume.
+
+    The bounding box volume depends on the orientation of the part unless the analysis runs
+    with an oriented box (`bbox_mode="obb"`).
+
+    :param summary: Dictionary returned by `curvature_summary`.
+    :return: The summary extended with the complexity label.
+    """
+    simple = summary["Curvature Std Dev"] < 0.1 and summary["Bounding Box Volume"] < 1.0
+    return {**summary, "Complexity (Curvature)": "Simple" if simple else "Complex"}
+
+@register_analyzer("face_edge_complexity")
+def _face_edge_complexity_analyzer(context):
+    return face_edge_complexity(count_topology(context.shape, shape_topology(context)))
+
+@register_analyzer("curvature_complexity")
+def _curvature_complexity_analyzer(context):
+    length, width, height = shape_bounding_box(context)
+    return curvature_complexity(curvature_summary(context.shape, shape_topology(context), length * width * height))
+
+@register_analyzer("curvature_field_complexity")
+def _curvature_field_complexity_analyzer(context):
+    _, part = shape_curvature(context)
+    length, width, height = shape_bounding_box(context)
+    return curvature_complexity({
+        "Bounding Box Volume": length * width * height,
+        "Mean Curvature": part["mean"],
+        "Curvature Std Dev": part["mean_std"],
+    })
 
 def analyze_step_file(file_path):
     """
@@ -32,56 +95,7 @@ def analyze_step_file(file_path):
     :param file_path: Path to the STEP file.
     :return: Dictionary containing face, edge, vertex counts, and complexity label.
     """
-    step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(file_path)
-    if status != 1:
-        raise ValueError("Error reading STEP file")
-
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-
-    # Initialize counters
-    face_count = 0
-    curved_face_count = 0
-    edge_count = 0
-    vert_count = 0
-
-    # Count vertices
-    vertices_explorer = TopExp_Explorer(shape, TopAbs_VERTEX)
-    while vertices_explorer.More():
-        vert_count += 1
-        vertices_explorer.Next()
-
-    # Count faces and detect curved surfaces
-    face_explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    while face_explorer.More():
-        face = face_explorer.Current()
-        face_count += 1
-        
-        # Check if the face is curved
-        surface = BRepAdaptor_Surface(face)
-        if surface.GetType() != GeomAbs_Plane:
-            curved_face_count += 1
-        
-        face_explorer.Next()
-
-    # Count edges
-    edge_explorer = TopExp_Explorer(shape, TopAbs_EDGE)
-    while edge_explorer.More():
-        edge = edge_explorer.Current()
-        edge_count += 1
-        edge_explorer.Next()
-
-    # Define complexity based on thresholds
-    complexity = "Simple" if face_count < 20 and curved_face_count < 9 and vert_count < 60 else "Complex"
-
-    return {
-        "Total Faces": face_count,
-        "Curved Faces": curved_face_count,
-        "Total Edges": edge_count,
-        "Vertices": vert_count,
-        "Complexity (Face/Edge)": complexity
-    }
+    return face_edge_complexity(count_topology(load_step_shape(file_path)))
 
 def detect_holes(step_file_path):
     """
@@ -90,33 +104,13 @@ def detect_holes(step_file_path):
     :param step_file_path: Path to the STEP file.
     :return: Number of detected holes.
     """
-    step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(step_file_path)
-    if status != 1:
+    try:
+        shape = load_step_shape(step_file_path)
+    except ValueError:
         print(f"Error reading file: {step_file_path}")
         return None
 
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-
-    # Initialize hole count
-    explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    hole_count = 0
-    hole_faces = []
-
-    # Iterate over faces to detect cylindrical holes
-    explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    while explorer.More():
-        face = explorer.Current()
-        surface = BRepAdaptor_Surface(face)
-
-        # Cylindrical surfaces often represent holes
-        if surface.GetType() == GeomAbs_Cylinder:
-            hole_count += 1
-
-        explorer.Next()
-
-    return hole_count
+    return count_cylindrical_faces(shape)
 
 def get_volume(file_path):
     """
@@ -125,14 +119,7 @@ def get_volume(file_path):
     :param file_path: Path to the STEP file.
     :return: Volume of the shape.
     """
-    step_reader = STEPControl_Reader()
-    step_reader.ReadFile(file_path)
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-    
-    props = GProp_GProps()
-    brepgprop_VolumeProperties(shape, props)
-    return props.Mass()
+    return shape_volume(load_step_shape(file_path))
 
 def analyze_complexity_by_curvature(file_path):
     """
@@ -141,87 +128,79 @@ def analyze_complexity_by_curvature(file_path):
     :param file_path: Path to the STEP file.
     :return: Dictionary with bounding box volume, curvature stats, and complexity label.
     """
-    step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(file_path)
-    if status != 1:
-        raise ValueError("Error reading STEP file")
-    
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-    
-    # Compute bounding box
-    bbox = Bnd_Box()
-    brepbndlib.Add(shape, bbox)
-    xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
-    bbox_volume = (xmax - xmin) * (ymax - ymin) * (zmax - zmin)
-    
-    curvatures = []
-    face_explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    
-    # Compute curvature variation
-    while face_explorer.More():
-        face = face_explorer.Current()
-        geom_surface = BRep_Tool.Surface(face)
-        surface = BRepAdaptor_Surface(face)
-        u_min, u_max, v_min, v_max = surface.FirstUParameter(), surface.LastUParameter(), surface.FirstVParameter(), surface.LastVParameter()
-
-        # Sample curvature at the midpoint
-        u_sample, v_sample = (u_min + u_max) / 2, (v_min + v_max) / 2
-        props = GeomLProp_SLProps(geom_surface, u_sample, v_sample, 2, 0.01)
-        
-        if props.IsCurvatureDefined():
-            curvatures.append(props.MeanCurvature())
-        
-        face_explorer.Next()
-    
-    # Compute curvature statistics
-    curvature_std_dev = np.std(curvatures)
-    curvature_mean = np.mean(curvatures)
-    complexity = "Simple" if curvature_std_dev < 0.1 and bbox_volume < 1.0 else "Complex"
-
-    return {
-        "Bounding Box Volume": bbox_volume,
-        "Mean Curvature": curvature_mean,
-        "Curvature Std Dev": curvature_std_dev,
-        "Complexity (Curvature)": complexity
-    }
-
-def run_analysis_for_folder(folder_path):
+    return curvature_complexity(curvature_summary(load_step_shape(file_path)))
+
+def analyze_complexity_file(file_path, analyzers=COMPLEXITY_ANALYZERS, options=None):
+    """
+    Loads a STEP file once and runs all complexity analyzers over it.
+
+    :param file_path: Path to the STEP file.
+    :param analyzers: Analyzer names, `COMPLEXITY_ANALYZERS` or `FIELD_COMPLEXITY_ANALYZERS`.
+    :param options: Analyzer options, e.g. {"curvature_grid": 7}.
+    :return: Dictionary with the counts, curvature stats, volume, hole count and complexity labels.
+    """
+    return analyze_file(file_path, analyzers, options)
+
+def run_analysis_for_folder(folder_path, workers=None, timeout=DEFAULT_TIMEOUT, cache_path=None,
+                            output_path='analysis_df.csv', resume=True, curvature_grid=None,
+                            adaptive_curvature=False, bbox_mode=None):
     """
     Runs analysis on all STEP files in a folder and saves results to a CSV file.
 
+    Rows are appended to the CSV as each file finishes and checkpointed regularly, so an
+    interrupted run loses nothing and a restarted run skips the files already written.
+
     :param folder_path: Path to the folder containing STEP files.
+    :param workers: Number of worker processes; None analyzes the files serially. In parallel
+        mode files that fail, hang or crash are kept as rows with an "Error" column.
+    :param timeout: Wall-clock limit per file in parallel mode, in seconds.
+    :param cache_path: Path to a result cache database; unchanged files are not analyzed again.
+    :param output_path: Path to the output CSV file.
+    :param resume: Continue an interrupted run instead of overwriting the output file.
+    :param curvature_grid: If set, the curvature statistics are area-weighted over a grid of
+        `curvature_grid` x `curvature_grid` samples per face instead of one midpoint sample.
+    :param adaptive_curvature: Refine the curvature grid where the curvature varies.
+    :param bbox_mode: Bounding box used for "Bounding Box Volume": "aabb" (default), "optimal"
+        or "obb" (see `analysis_pipeline.bounding_box_extents`).
     :return: Pandas DataFrame containing analysis results.
     """
-    all_results = []
-    
-    # Iterate through each STEP file in the folder
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".step"):  # Check if file is a STEP file
-            file_path = os.path.join(folder_path, filename)
-            
-            # Run all analysis functions
-            face_edge_result = analyze_step_file(file_path)
-            curvature_result = analyze_complexity_by_curvature(file_path)
-            volume = get_volume(file_path)
-            holes = detect_holes(file_path)
-            
-            # Merge results
-            combined_result = {
-                "File Name": filename,
-                **face_edge_result,
-                **curvature_result,
-                "Volume": volume,
-                "Hole Count": holes
-            }
-            all_results.append(combined_result)
-    
-    # Convert results into a DataFrame and save as CSV
-    df = pd.DataFrame(all_results)
-    df.to_csv('analysis_df.csv', index=False)
-    return df
+    file_paths = {}
+    if curvature_grid is None:
+        analyzers, options = COMPLEXITY_ANALYZERS, {}
+    else:
+        analyzers = FIELD_COMPLEXITY_ANALYZERS
+        options = {"curvature_grid": curvature_grid, "curvature_adaptive": adaptive_curvature}
+    if bbox_mode is not None:
+        options["bbox_mode"] = bbox_mode
+    analyze = partial(analyze_complexity_file, analyzers=analyzers, options=options)
+    cache = ResultCache(cache_path, analyzer_key(analyzers, options)) if cache_path else None
+
+    with ResultWriter(output_path, RESULT_COLUMNS, resume=resume) as writer:
+        # Collect every STEP file in the folder that is neither written nor cached
+        for entry in os.scandir(folder_path):
+            if entry.name.endswith(".step") and entry.name not in writer.done:  # Check if file is a STEP file
+                cached_result = cache.get(entry.path) if cache else None
+                if cached_result is not None:
+                    writer.write(cached_result)
+                else:
+                    file_paths[entry.name] = entry.path
+
+        if workers is None:
+            # Load each file once and run all analysis functions over it
+            new_results = (analyze(file_path) for file_path in file_paths.values())
+        else:
+            new_results = run_batch(file_paths.values(), analyze, workers, timeout)
+
+        for result in new_results:
+            writer.write(result)
+            if cache and "Error" not in result:
+                cache.put(file_paths[result["File Name"]], result)
+
+    # Load the complete CSV, including rows written by earlier runs
+    return pd.read_csv(output_path)
 
 # Example usage
-folder_path = "All"  # Change to your folder path
-result_df = run_analysis_for_folder(folder_path)
-print(result_df)
+if __name__ == "__main__":
+    folder_path = "All"  # Change to your folder path
+    result_df = run_analysis_for_folder(folder_path)
+    print(result_df)
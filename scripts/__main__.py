@@ -0,0 +1,4 @@
+import sys
+from scripts.cli import main
+
+sys.exit(main())
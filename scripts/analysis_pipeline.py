@@ -0,0 +1,636 @@
+"""
+Single-Load STEP Analysis Pipeline
+
+This module reads each STEP file once and runs a pluggable set of analyzers over the shared
+shape. Parsing (`ReadFile`) and transfer (`TransferRoots`) dominate the run time on the ABC
+shards, so every metric is computed from the same transferred shape instead of reloading the
+file per metric.
+
+- `load_step_shape` reads and transfers a STEP file.
+- `shape_topology` walks the faces once (see `topology.walk_topology`); the counting, curvature
+  and hole analyzers all read from that single traversal.
+- The optional "hole_features" analyzer groups the cylindrical faces of that traversal into
+  holes (see `hole_recognition`); the "holes" analyzer keeps the legacy cylinder count.
+- The optional "mesh" and "mesh_volume" analyzers compute approximate metrics from a cached
+  triangle mesh (see `tessellation`); "mesh_volume" can replace the exact "volume" analyzer.
+- The bounding box is axis-aligned with the default gap ("aabb") unless the "bbox_mode" option
+  asks for a tight axis-aligned ("optimal") or oriented ("obb") box, which does not change
+  when the part is rotated. The optional "shape_descriptors" analyzer derives the fill ratio,
+  aspect ratios and surface-to-volume ratio from the oriented box.
+- The optional "face_graph" analyzer reports how the faces connect (see `face_graph`).
+- Analyzers are functions taking a `ShapeContext` and returning a dictionary of columns. They
+  are registered by name with `register_analyzer`.
+- `analyze_file` loads a file, runs the selected analyzers in order and returns one combined
+  record, in the same layout as `step_analysis.run_analysis_for_folder`.
+"""
+
+import os
+from contextlib import nullcontext
+from OCC.Core.STEPControl import STEPControl_Reader
+from OCC.Core.Bnd import Bnd_Box, Bnd_OBB
+from OCC.Core.BRepBndLib import brepbndlib
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.BRepGProp import brepgprop
+from scripts.curvature_field import DEFAULT_GRID, shape_curvature_field
+from scripts.face_graph import build_face_graph
+from scripts.hole_recognition import recognize_holes
+from scripts.step_scanner import scan_step_file
+from scripts.tessellation import DEFAULT_ANGULAR_DEFLECTION, DEFAULT_DEFLECTION, MeshCache, tessellate_shape
+from scripts.topology import SURFACE_TYPE_NAMES, walk_topology
+
+# Bump whenever an analyzer changes the values it produces
+ANALYZER_VERSION = 1
+
+# Registered analyzers, by name
+ANALYZERS = {}
+
+# Analyzers run by `analyze_file` when none are given; the order fixes the column order
+DEFAULT_ANALYZERS = ("face_edge", "curvature", "volume", "holes", "file_info")
+
+
+class ShapeContext:
+    """
+    Holds the shape loaded from one STEP file and the values shared between analyzers.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        shape (TopoDS_Shape): Shape transferred from the file.
+        options (dict, optional): Settings read by the analyzers, e.g. {"curvature_grid": 7}.
+    """
+
+    def __init__(self, file_path, shape, options=None):
+        self.file_path = file_path
+        self.shape = shape
+        self.options = options or {}
+        self._memo = {}
+
+    def memo(self, key, compute):
+        """
+        Returns the value stored under `key`, computing it with `compute()` on first use.
+        """
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def stored(self):
+        """
+        Returns the values computed so far, by key.
+        """
+        return dict(self._memo)
+
+
+# Decorator used to make an analyzer available to the pipeline
+def register_analyzer(name):
+    """
+    Registers a function as a named analyzer.
+
+    Args:
+        name (str): Name used to select the analyzer in `analyze_file`.
+
+    Returns:
+        function: Decorator storing the function in `ANALYZERS`.
+    """
+    def decorator(func):
+        ANALYZERS[name] = func
+        return func
+    return decorator
+
+
+def _stage(timer, name):
+    # Times a pipeline stage when profiling (see `profiling.StageTimer`)
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+# Function to read a STEP file and transfer its shape
+def load_step_shape(file_path, timer=None):
+    """
+    Reads a STEP file and transfers all roots into a single shape.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        timer (StageTimer, optional): Records the "read" and "transfer" stages.
+
+    Returns:
+        TopoDS_Shape: The transferred shape.
+    """
+    step_reader = STEPControl_Reader()
+    with _stage(timer, "read"):
+        status = step_reader.ReadFile(file_path)
+    if status != 1:
+        raise ValueError("Error reading STEP file")
+
+    with _stage(timer, "transfer"):
+        step_reader.TransferRoots()
+        return step_reader.Shape()
+
+
+# Function to count the faces, edges, and vertices of a shape
+def count_topology(shape, summary=None):
+    """
+    Counts the faces, curved faces, edges, and vertices of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        summary (TopologySummary, optional): Result of `walk_topology` to reuse.
+
+    Returns:
+        dict: Contains the total number of faces, curved faces, edges, and vertices.
+    """
+    summary = summary or walk_topology(shape, sample_curvature=False)
+    return {
+        "Total Faces": summary.face_count,
+        "Curved Faces": summary.curved_face_count,
+        "Total Edges": summary.edge_count,
+        "Vertices": summary.vertex_count,
+    }
+
+
+# Bounding box modes: default axis-aligned box, tight axis-aligned box, oriented box
+BOUNDING_BOX_MODES = ("aabb", "optimal", "obb")
+
+
+# Function to build a bounding box of a shape
+def build_bounding_box(shape, mode="aabb"):
+    """
+    Builds a bounding box of a shape.
+
+    Boxes of several shapes are united with their `Add` method, e.g. to bound an assembly
+    from the boxes of its roots.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        mode (str): "aabb" for the axis-aligned box with the default gap, "optimal" for the
+            tight axis-aligned box computed from the exact geometry, or "obb" for an oriented
+            box, which does not depend on the orientation of the part.
+
+    Returns:
+        Bnd_Box or Bnd_OBB: The bounding box.
+    """
+    if mode == "obb":
+        obb = Bnd_OBB()
+        brepbndlib.AddOBB(shape, obb, False, False, False)
+        return obb
+
+    bbox = Bnd_Box()
+    if mode == "aabb":
+        brepbndlib.Add(shape, bbox)
+    elif mode == "optimal":
+        brepbndlib.AddOptimal(shape, bbox, False, False)
+    else:
+        raise ValueError(f"Unknown bounding box mode: {mode}")
+    return bbox
+
+
+# Function to read the dimensions of a bounding box
+def box_extents(box):
+    """
+    Returns the dimensions of a box built by `build_bounding_box`, largest first.
+    """
+    if box.IsVoid():
+        return (0.0, 0.0, 0.0)
+    if isinstance(box, Bnd_OBB):
+        return tuple(sorted((2 * box.XHSize(), 2 * box.YHSize(), 2 * box.ZHSize()), reverse=True))
+    xmin, ymin, zmin, xmax, ymax, zmax = box.Get()
+    return tuple(sorted((xmax - xmin, ymax - ymin, zmax - zmin), reverse=True))
+
+
+# Function to compute the bounding box dimensions of a shape
+def bounding_box_extents(shape, mode="aabb"):
+    """
+    Computes the dimensions of a bounding box of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        mode (str): Bounding box mode (see `build_bounding_box`).
+
+    Returns:
+        tuple: Box dimensions, largest first.
+    """
+    return box_extents(build_bounding_box(shape, mode))
+
+
+# Function to compute the volume of the bounding box of a shape
+def bounding_box_volume(shape, mode="aabb"):
+    """
+    Computes the volume of a bounding box of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        mode (str): Bounding box mode (see `bounding_box_extents`).
+
+    Returns:
+        float: Bounding box volume.
+    """
+    length, width, height = bounding_box_extents(shape, mode)
+    return length * width * height
+
+
+# Function to compute the bounding box volume and curvature statistics of a shape
+def curvature_summary(shape, summary=None, bbox_volume=None):
+    """
+    Computes the bounding box volume and the mean curvature statistics of a shape.
+
+    Curvature is sampled at the UV midpoint of every face. The mean and standard deviation are
+    NaN when no face has a defined curvature.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        summary (TopologySummary, optional): Result of `walk_topology` to reuse.
+        bbox_volume (float, optional): Bounding box volume to report. Defaults to the volume of
+            the axis-aligned box.
+
+    Returns:
+        dict: Contains bounding box volume, mean curvature, and curvature standard deviation.
+    """
+    curvatures = (summary or walk_topology(shape)).curvature_moments
+    return {
+        "Bounding Box Volume": bounding_box_volume(shape) if bbox_volume is None else bbox_volume,
+        "Mean Curvature": curvatures.statistics()["mean"],
+        "Curvature Std Dev": curvatures.std,
+    }
+
+
+# Function to compute the surface area of a shape
+def shape_surface_area(shape):
+    """
+    Computes the total area of the faces of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+
+    Returns:
+        float: Surface area of the shape.
+    """
+    props = GProp_GProps()
+    brepgprop.SurfaceProperties(shape, props)
+    return props.Mass()
+
+
+# Function to compute the volume of a shape
+def shape_volume(shape):
+    """
+    Computes the volume of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+
+    Returns:
+        float: Volume of the shape.
+    """
+    props = GProp_GProps()
+    brepgprop.VolumeProperties(shape, props)
+    return props.Mass()
+
+
+# Function to count the cylindrical faces of a shape
+def count_cylindrical_faces(shape, summary=None):
+    """
+    Counts the cylindrical faces of a shape, which likely represent holes.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        summary (TopologySummary, optional): Result of `walk_topology` to reuse.
+
+    Returns:
+        int: Number of cylindrical faces.
+    """
+    return (summary or walk_topology(shape, sample_curvature=False)).cylinder_count
+
+
+# Function to check if the STEP file represents an assembly based on the presence of PRODUCT entities
+def is_assembly_by_entity_count(file_path):
+    """
+    Determines if a STEP file is an assembly by counting the PRODUCT entities.
+
+    Args:
+        file_path (str): Path to the STEP file.
+
+    Returns:
+        bool: True if the file represents an assembly, False if it's a part.
+    """
+    try:
+        return scan_step_file(file_path).is_assembly  # More than one product indicates an assembly
+    except Exception as e:
+        print(f"Error reading file for entity count: {e}")
+        return None
+
+
+# Function to walk the topology of a context's shape once for all analyzers
+def shape_topology(context):
+    """
+    Returns the `TopologySummary` of the context's shape, walking the faces on first use.
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+
+    Returns:
+        TopologySummary: Counts, surface types and curvature samples of the shape.
+    """
+    return context.memo("topology", lambda: walk_topology(context.shape, keep_cylinders=True))
+
+
+@register_analyzer("face_edge")
+def _face_edge_analyzer(context):
+    return count_topology(context.shape, shape_topology(context))
+
+
+# Function to compute the bounding box of a context's shape once for all analyzers
+def shape_bounding_box(context, mode=None):
+    """
+    Returns the bounding box dimensions of the context's shape, computed on first use.
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+        mode (str, optional): Bounding box mode (see `bounding_box_extents`). Defaults to the
+            context option "bbox_mode", or "aabb".
+
+    Returns:
+        tuple: Box dimensions, largest first.
+    """
+    mode = mode or context.options.get("bbox_mode", "aabb")
+    return context.memo(f"bounding_box:{mode}", lambda: bounding_box_extents(context.shape, mode))
+
+
+# Function to compute the volume of a context's shape once for all analyzers
+def solid_volume(context):
+    """
+    Returns the volume of the context's shape, computed on first use.
+    """
+    return context.memo("volume", lambda: shape_volume(context.shape))
+
+
+# Function to compute the surface area of a context's shape once for all analyzers
+def surface_area(context):
+    """
+    Returns the surface area of the context's shape, computed on first use.
+    """
+    return context.memo("surface_area", lambda: shape_surface_area(context.shape))
+
+
+@register_analyzer("curvature")
+def _curvature_analyzer(context):
+    length, width, height = shape_bounding_box(context)
+    return curvature_summary(context.shape, shape_topology(context), length * width * height)
+
+
+@register_analyzer("volume")
+def _volume_analyzer(context):
+    return {"Volume": solid_volume(context)}
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator > 0 else float("nan")
+
+
+# Fill ratio, aspect ratios and surface-to-volume ratio, from the oriented bounding box
+@register_analyzer("shape_descriptors")
+def _shape_descriptors_analyzer(context):
+    length, width, height = shape_bounding_box(context, "obb")
+    volume, area = solid_volume(context), surface_area(context)
+    obb_volume = length * width * height
+    return {
+        "OBB Volume": obb_volume,
+        "Fill Ratio": _ratio(volume, obb_volume),
+        "Aspect Ratio (Long/Mid)": _ratio(length, width),
+        "Aspect Ratio (Long/Short)": _ratio(length, height),
+        "Surface Area": area,
+        "Surface to Volume Ratio": _ratio(area, volume),
+    }
+
+
+# Legacy hole count: every cylindrical face. "hole_features" reports the recognized holes.
+@register_analyzer("holes")
+def _holes_analyzer(context):
+    return {"Hole Count": count_cylindrical_faces(context.shape, shape_topology(context))}
+
+
+# Function to recognize the holes of a context's shape once for all analyzers
+def shape_holes(context):
+    """
+    Returns the holes of the context's shape, recognized from the cylindrical faces of the
+    topology walk on first use.
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+
+    Returns:
+        list of Hole: Recognized holes (see `hole_recognition.recognize_holes`).
+    """
+    return context.memo("holes", lambda: recognize_holes(context.shape, shape_topology(context).cylinder_faces))
+
+
+@register_analyzer("hole_features")
+def _hole_features_analyzer(context):
+    holes = shape_holes(context)
+    diameters = [hole.diameter for hole in holes]
+    return {
+        "Recognized Holes": len(holes),
+        "Through Holes": sum(hole.through for hole in holes),
+        "Blind Holes": sum(not hole.through for hole in holes),
+        "Min Hole Diameter": min(diameters) if diameters else float("nan"),
+        "Max Hole Diameter": max(diameters) if diameters else float("nan"),
+    }
+
+
+@register_analyzer("surface_types")
+def _surface_types_analyzer(context):
+    surface_types = shape_topology(context).surface_types
+    return {f"{name} Faces": surface_types[name] for name in SURFACE_TYPE_NAMES.values()}
+
+
+# Function to sample the curvature field of a context's shape once for all analyzers
+def shape_curvature(context):
+    """
+    Returns the area-weighted curvature statistics of the context's shape, sampling every face
+    over its UV domain on first use.
+
+    The sampling is configured by the context options "curvature_grid" (cells per direction,
+    default 5), "curvature_adaptive" (default False), "curvature_tolerance" and
+    "curvature_max_depth".
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+
+    Returns:
+        tuple: Per-face and per-part statistics (see `curvature_field.shape_curvature_field`).
+    """
+    options = context.options
+    return context.memo("curvature_field", lambda: shape_curvature_field(
+        context.shape,
+        grid=options.get("curvature_grid", DEFAULT_GRID),
+        adaptive=options.get("curvature_adaptive", False),
+        tolerance=options.get("curvature_tolerance", 0.1),
+        max_depth=options.get("curvature_max_depth", 3),
+    ))
+
+
+@register_analyzer("curvature_field")
+def _curvature_field_analyzer(context):
+    _, part = shape_curvature(context)
+    return {
+        "Area-Weighted Mean Curvature": part["mean"],
+        "Area-Weighted Curvature Std Dev": part["mean_std"],
+        "Area-Weighted Gaussian Curvature": part["gaussian"],
+        "Mean Max Principal Curvature": part["max_principal"],
+        "Mean Min Principal Curvature": part["min_principal"],
+        "Sampled Area": part["area"],
+    }
+
+
+# Function to tessellate a context's shape once for all analyzers
+def shape_mesh(context):
+    """
+    Returns the triangle mesh of the context's shape, tessellating it on first use.
+
+    The mesh is configured by the context options "mesh_deflection", "mesh_angular_deflection"
+    and "mesh_cache" (a cache folder; cached meshes are read instead of tessellated).
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+
+    Returns:
+        TriangleMesh: Mesh of the shape (see `tessellation.tessellate_shape`).
+    """
+    options = context.options
+    deflection = options.get("mesh_deflection", DEFAULT_DEFLECTION)
+    angular_deflection = options.get("mesh_angular_deflection", DEFAULT_ANGULAR_DEFLECTION)
+
+    def compute():
+        if options.get("mesh_cache"):
+            return MeshCache(options["mesh_cache"]).get(context.file_path, deflection, angular_deflection,
+                                                         shape=context.shape)
+        return tessellate_shape(context.shape, deflection, angular_deflection)
+
+    return context.memo("mesh", compute)
+
+
+@register_analyzer("mesh")
+def _mesh_analyzer(context):
+    return shape_mesh(context).metrics()
+
+
+# Approximate drop-in replacement of the "volume" analyzer
+@register_analyzer("mesh_volume")
+def _mesh_volume_analyzer(context):
+    return {"Volume": shape_mesh(context).volume()}
+
+
+# Function to build the face adjacency graph of a context's shape once for all analyzers
+def shape_face_graph(context):
+    """
+    Returns the face adjacency graph of the context's shape, built on first use.
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+
+    Returns:
+        FaceGraph: Face adjacency graph (see `face_graph.build_face_graph`).
+    """
+    return context.memo("face_graph", lambda: build_face_graph(context.shape))
+
+
+@register_analyzer("face_graph")
+def _face_graph_analyzer(context):
+    statistics = shape_face_graph(context).statistics()
+    return {
+        "Graph Components": statistics["components"],
+        "Cycle Rank": statistics["cycle_rank"],
+        "Mean Face Degree": statistics["mean_degree"],
+        "Max Face Degree": statistics["max_degree"],
+        "Convex Edges": statistics["convex"],
+        "Concave Edges": statistics["concave"],
+        "Smooth Edges": statistics["smooth"],
+    }
+
+
+# Function to scan the raw text of a context's file once for all analyzers
+def file_scan(context):
+    """
+    Returns the `StepScan` of the context's file, scanning the raw text on first use.
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+
+    Returns:
+        StepScan: Header entries and entity type histogram of the file.
+    """
+    return context.memo("scan", lambda: scan_step_file(context.file_path))
+
+
+@register_analyzer("file_info")
+def _file_info_analyzer(context):
+    scan = file_scan(context)
+    return {
+        "size": scan.file_size / 1024,  # File size in KB
+        "ispart": 0 if scan.is_assembly else 1,
+    }
+
+
+# Function to run a set of analyzers over an already loaded shape
+def analyze_shape(context, analyzers=None, timer=None):
+    """
+    Runs the selected analyzers over a loaded shape and merges their columns.
+
+    Args:
+        context (ShapeContext): Loaded shape and its file path.
+        analyzers (iterable of str, optional): Analyzer names, in column order.
+            Defaults to `DEFAULT_ANALYZERS`.
+        timer (StageTimer, optional): Records the shared topology walk as the "topology" stage
+            and every analyzer as a stage of its own name.
+
+    Returns:
+        dict: Combined columns of all analyzers.
+    """
+    analyzers = analyzers or DEFAULT_ANALYZERS
+    for name in analyzers:
+        if name not in ANALYZERS:
+            raise KeyError(f"Unknown analyzer: {name}")
+
+    if timer is not None:
+        # Walk the topology up front so its time is not charged to the first analyzer using it
+        with timer.stage("topology"):
+            shape_topology(context)
+
+    record = {}
+    for name in analyzers:
+        with _stage(timer, name):
+            record.update(ANALYZERS[name](context))
+    return record
+
+
+# Function to identify the analyzer version and set that produced a record
+def analyzer_key(analyzers=None, options=None):
+    """
+    Builds the key identifying which analyzers, at which version and with which options,
+    produced a record.
+
+    Args:
+        analyzers (iterable of str, optional): Analyzer names. Defaults to `DEFAULT_ANALYZERS`.
+        options (dict, optional): Analyzer options.
+
+    Returns:
+        str: Key such as "v1:face_edge,curvature,volume,holes,file_info".
+    """
+    key = f"v{ANALYZER_VERSION}:" + ",".join(analyzers or DEFAULT_ANALYZERS)
+    if options:
+        key += ":" + ",".join(f"{name}={value}" for name, value in sorted(options.items()))
+    return key
+
+
+# Function to load a STEP file once and run all analyzers over it
+def analyze_file(file_path, analyzers=None, options=None, timer=None):
+    """
+    Loads a STEP file once and runs the selected analyzers over the shared shape.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        analyzers (iterable of str, optional): Analyzer names, in column order.
+            Defaults to `DEFAULT_ANALYZERS`.
+        options (dict, optional): Settings read by the analyzers (see `ShapeContext`).
+        timer (StageTimer, optional): Records the time spent in each stage (see `profiling`).
+
+    Returns:
+        dict: Combined analysis record, starting with the file name.
+    """
+    context = ShapeContext(file_path, load_step_shape(file_path, timer), options)
+    return {"File Name": os.path.basename(file_path), **analyze_shape(context, analyzers, timer)}
@@ -0,0 +1,317 @@
+"""
+Assembly Breakdown
+
+The regular analysis runs every metric on the single compound transferred from a file, which
+is meaningless for assemblies and other multi-body files: the curvature statistics mix
+unrelated bodies, and a part used ten times counts once in one column and ten times in another.
+This module analyzes such files component by component instead.
+
+- `collect_components` transfers the leaf products of a file one at a time (see
+  `large_files.iter_component_shapes`) and walks the solids of each (a product without solids
+  is one component). Instances of the same component share their underlying shape and differ
+  only by placement, so they are grouped and each distinct component is analyzed once.
+- `analyze_assembly` writes every distinct component to a temporary `.brep` file and analyzes
+  them in worker processes (see `batch_analysis.run_batch`), with the same analyzers and
+  options as the regular pipeline. "file_info" is file-level and only reported for the
+  assembly.
+- The result is a hierarchical table: one assembly row (Level 0) followed by one row per
+  distinct component (Level 1) with its number of instances. The assembly row rolls the
+  components up, weighted by their instance counts: counts, volumes and areas are summed,
+  curvature statistics merged exactly, hole diameters reduced to their extremes, and the
+  bounding box is that of all placed instances.
+
+Components that fail are kept as rows with an "Error" column and left out of the roll-up; the
+assembly row counts them in "Failed Components".
+"""
+
+import os
+import tempfile
+from functools import partial
+import pandas as pd
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepTools import breptools
+from OCC.Core.TopAbs import TopAbs_FORWARD, TopAbs_SOLID
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import TopoDS_Shape
+from scripts.analysis_pipeline import (
+    DEFAULT_ANALYZERS,
+    ShapeContext,
+    analyze_shape,
+    box_extents,
+    build_bounding_box,
+)
+from scripts.batch_analysis import DEFAULT_TIMEOUT, failed_record, run_batch
+from scripts.large_files import iter_component_shapes, placed_shape
+from scripts.online_stats import RunningMoments
+from scripts.step_scanner import scan_step_file
+
+# Analyzers run on every component when none are given
+COMPONENT_ANALYZERS = tuple(name for name in DEFAULT_ANALYZERS if name != "file_info")
+
+# Component columns summed over all instances in the assembly row
+ADDITIVE_COLUMNS = (
+    "Total Faces", "Curved Faces", "Total Edges", "Vertices", "Volume", "Hole Count",
+    "Recognized Holes", "Through Holes", "Blind Holes", "Surface Area", "Sampled Area",
+    "Plane Faces", "Cylinder Faces", "Cone Faces", "Sphere Faces", "Torus Faces", "Bezier Faces",
+    "BSpline Faces", "Revolution Faces", "Extrusion Faces", "Offset Faces", "Other Faces",
+    "Mesh Volume", "Mesh Surface Area", "Mesh Triangles",
+    "Graph Components", "Cycle Rank", "Convex Edges", "Concave Edges", "Smooth Edges",
+)
+
+# Columns leading every row of the hierarchical table, then the assembly-only counts
+HIERARCHY_COLUMNS = ["File Name", "Level", "Component", "Instances", "Components", "Failed Components"]
+
+# Key of the curvature moments a component record carries for the roll-up
+_MOMENTS_KEY = "Curvature Moments"
+
+
+class Component:
+    """
+    A distinct body of an assembly and all its placed instances.
+
+    Attributes:
+        name (str): Name of the first instance, e.g. "Bracket / Solid 1", or "Root 2" for a
+            file without an assembly structure.
+        shape (TopoDS_Shape): Shape of the first instance.
+        instances (list of tuple): (name, shape) of every instance, the first included.
+    """
+
+    def __init__(self, name, shape):
+        self.name = name
+        self.shape = shape
+        self.instances = [(name, shape)]
+
+    def __repr__(self):
+        return f"Component({self.name!r}, instances={len(self.instances)})"
+
+
+def _instance_key(shape):
+    # Instances share the underlying shape (TShape) and differ by location and orientation
+    return shape.Located(TopLoc_Location()).Oriented(TopAbs_FORWARD)
+
+
+# Function to group the bodies of a STEP file into distinct components
+def collect_components(file_path):
+    """
+    Transfers the leaf products of a STEP file and groups their solids into distinct components.
+
+    Args:
+        file_path (str): Path to the STEP file.
+
+    Returns:
+        list of Component: Distinct components, in the order their first instance was found.
+    """
+    components = {}
+    for name, shape, placements in iter_component_shapes(file_path):
+        bodies = []
+        explorer = TopExp_Explorer(shape, TopAbs_SOLID)
+        while explorer.More():
+            bodies.append(explorer.Current())
+            explorer.Next()
+        if len(bodies) == 1:
+            named = [(name, bodies[0])]
+        elif bodies:
+            named = [(f"{name} / Solid {index}", body) for index, body in enumerate(bodies, start=1)]
+        else:
+            named = [(name, shape)]
+
+        for placement in placements:
+            for body_name, body in named:
+                instance = placed_shape(body, placement)
+                key = _instance_key(instance)
+                if key in components:
+                    components[key].instances.append((body_name, instance))
+                else:
+                    components[key] = Component(body_name, instance)
+    return list(components.values())
+
+
+# Function to analyze one component written to a BRep file
+def analyze_component(brep_path, analyzers=None, options=None):
+    """
+    Loads a component from a `.brep` file and runs the analyzers over it.
+
+    Args:
+        brep_path (str): Path to the `.brep` file.
+        analyzers (iterable of str, optional): Analyzer names, in column order.
+            Defaults to `COMPONENT_ANALYZERS`.
+        options (dict, optional): Settings read by the analyzers (see `ShapeContext`).
+
+    Returns:
+        dict: Analysis record starting with the `.brep` file name. The curvature moments of
+            the component are attached for the roll-up when the topology was walked.
+    """
+    shape = TopoDS_Shape()
+    if not breptools.Read(shape, brep_path, BRep_Builder()):
+        raise ValueError("Error reading BRep file")
+    context = ShapeContext(brep_path, shape, options)
+    record = {"File Name": os.path.basename(brep_path), **analyze_shape(context, analyzers or COMPONENT_ANALYZERS)}
+    topology = context.stored().get("topology")
+    if topology is not None:
+        record[_MOMENTS_KEY] = topology.curvature_moments.to_dict()
+    return record
+
+
+# Function to roll the component records up into the assembly record
+def rollup_components(records, instances):
+    """
+    Combines the records of distinct components into the columns of the whole assembly.
+
+    Args:
+        records (list of dict): Successful component records (see `analyze_component`).
+        instances (list of int): Number of instances of each component.
+
+    Returns:
+        dict: Summed columns, the hole diameter extremes and the merged curvature statistics.
+    """
+    rollup = {}
+    for column in ADDITIVE_COLUMNS:
+        values = [(record[column], count) for record, count in zip(records, instances) if column in record]
+        if values:
+            rollup[column] = sum(value * count for value, count in values)
+
+    for column, reduce in (("Min Hole Diameter", min), ("Max Hole Diameter", max)):
+        values = [record[column] for record in records if column in record and record[column] == record[column]]
+        if any(column in record for record in records):
+            rollup[column] = reduce(values) if values else float("nan")
+
+    moments = RunningMoments()
+    for record, count in zip(records, instances):
+        if _MOMENTS_KEY in record:
+            # `count` instances of the same samples: same mean, every sum scaled
+            component = RunningMoments.from_dict(record[_MOMENTS_KEY])
+            component.count, component.weight, component.m2 = (
+                component.count * count, component.weight * count, component.m2 * count
+            )
+            component.undefined *= count
+            moments.merge(component)
+    if any(_MOMENTS_KEY in record for record in records):
+        rollup["Mean Curvature"] = moments.statistics()["mean"]
+        rollup["Curvature Std Dev"] = moments.std
+    return rollup
+
+
+# Function to analyze an assembly component by component
+def analyze_assembly(file_path, analyzers=None, options=None, workers=None, timeout=DEFAULT_TIMEOUT,
+                     memory_limit_mb=None):
+    """
+    Analyzes every distinct component of a STEP file and rolls the results up.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        analyzers (iterable of str, optional): Analyzers run on each component. Defaults to
+            `COMPONENT_ANALYZERS`; "file_info" is only reported on the assembly row.
+        options (dict, optional): Analyzer options (see `analysis_pipeline.ShapeContext`).
+        workers (int, optional): Number of worker processes. If None, components are analyzed
+            serially in this process.
+        timeout (float, optional): Wall-clock limit per component in parallel mode, in seconds.
+        memory_limit_mb (float, optional): Address space limit of each worker, in MB.
+
+    Returns:
+        DataFrame: The assembly row followed by one row per distinct component.
+    """
+    options = options or {}
+    analyzers = tuple(name for name in analyzers or COMPONENT_ANALYZERS if name != "file_info")
+    file_name = os.path.basename(file_path)
+    components = collect_components(file_path)
+
+    # Write each distinct component once, and analyze the files in workers
+    with tempfile.TemporaryDirectory(prefix="assembly-") as folder:
+        brep_paths = []
+        for index, component in enumerate(components):
+            brep_path = os.path.join(folder, f"component-{index:05d}.brep")
+            if not breptools.Write(component.shape, brep_path):
+                raise ValueError(f"Error writing component {component.name}")
+            brep_paths.append(brep_path)
+
+        analyze = partial(analyze_component, analyzers=analyzers, options=options)
+        if workers is None:
+            records = []
+            for brep_path in brep_paths:
+                try:
+                    records.append(analyze(brep_path))
+                except Exception as e:
+                    records.append(failed_record(brep_path, f"{type(e).__name__}: {e}"))
+        else:
+            records = list(run_batch(brep_paths, analyze, workers, timeout, memory_limit_mb=memory_limit_mb))
+
+    by_brep = {record["File Name"]: record for record in records}
+    component_rows, analyzed, instances = [], [], []
+    for brep_path, component in zip(brep_paths, components):
+        record = dict(by_brep[os.path.basename(brep_path)])
+        del record["File Name"]
+        if "Error" not in record:
+            analyzed.append(dict(record))
+            instances.append(len(component.instances))
+        record.pop(_MOMENTS_KEY, None)
+        component_rows.append({"File Name": file_name, "Level": 1, "Component": component.name,
+                               "Instances": len(component.instances), **record})
+
+    # The assembly box holds every placed instance, not just one per component
+    mode = options.get("bbox_mode", "aabb")
+    box = None
+    for component in components:
+        for _, shape in component.instances:
+            instance_box = build_bounding_box(shape, mode)
+            if box is None:
+                box = instance_box
+            else:
+                box.Add(instance_box)
+    length, width, height = box_extents(box) if box is not None else (0.0, 0.0, 0.0)
+
+    scan = scan_step_file(file_path)
+    assembly_row = {
+        "File Name": file_name,
+        "Level": 0,
+        "Component": "Assembly",
+        "Instances": sum(len(component.instances) for component in components),
+        "Components": len(components),
+        "Failed Components": len(components) - len(analyzed),
+        **rollup_components(analyzed, instances),
+        "Bounding Box Volume": length * width * height,
+        "size": scan.file_size / 1024,  # File size in KB
+        "ispart": 0 if scan.is_assembly else 1,
+    }
+
+    # Metric columns in analyzer order, as in the component rows
+    columns = list(HIERARCHY_COLUMNS)
+    for row in component_rows + [assembly_row]:
+        columns.extend(column for column in row if column not in columns)
+    return pd.DataFrame([assembly_row] + component_rows, columns=columns)
+
+
+# Function to break several STEP files down into their components
+def analyze_assemblies(file_paths, analyzers=None, options=None, workers=None, timeout=DEFAULT_TIMEOUT,
+                       output_path=None):
+    """
+    Runs `analyze_assembly` on several files and stacks their hierarchical tables.
+
+    Files that cannot be read are kept as assembly rows with an "Error" column.
+
+    Args:
+        file_paths (iterable of str): Paths to the STEP files.
+        analyzers (iterable of str, optional): Analyzers run on each component.
+        options (dict, optional): Analyzer options.
+        workers (int, optional): Number of worker processes analyzing the components of a file.
+        timeout (float, optional): Wall-clock limit per component in parallel mode, in seconds.
+        output_path (str, optional): If given, the table is also written to this CSV file.
+
+    Returns:
+        DataFrame: Assembly and component rows of all files.
+    """
+    tables = []
+    for file_path in file_paths:
+        try:
+            tables.append(analyze_assembly(file_path, analyzers, options, workers, timeout))
+            print(f"Assembly breakdown successful for {os.path.basename(file_path)} file")
+        except Exception as e:
+            print(f"Assembly breakdown failed for {os.path.basename(file_path)} file: {e}")
+            tables.append(pd.DataFrame([{
+                "File Name": os.path.basename(file_path), "Level": 0, "Component": "Assembly",
+                "Error": f"{type(e).__name__}: {e}",
+            }]))
+    data = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=HIERARCHY_COLUMNS)
+    if output_path:
+        data.to_csv(output_path, index=False)
+    return data
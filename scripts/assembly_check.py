@@ -9,23 +9,36 @@ Methods included:
 3. Entity count-based classification (validated and accurate)
 
 Only Method 3 is used for classification in this script.
+
+`classify_files` classifies many files at once: the entity counts of every file are scanned in a
+process pool, and only the files whose counts are ambiguous (several PRODUCT entities but a
+single body) are escalated to the OCC check, in worker processes with a timeout. Each file gets
+a label, a confidence and the method that decided it.
 """
 
 import os
-import re
-from OCC.Core.STEPControl import STEPControl_Reader
-from OCC.Core.TopoDS import TopoDS_Compound
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from scripts.step_scanner import scan_step_file
+
+# Confidence of the labels decided from the entity counts alone
+CONFIDENT = 0.95
+PROBABLE = 0.9
+LIKELY = 0.8
+AMBIGUOUS = 0.5
 
-def is_assembly_by_keywords(file_path):
+# Batches smaller than this are scanned without a pool
+SERIAL_BATCH_SIZE = 16
+
+def is_assembly_by_keywords(file_path, scan=None):
     """
-    Check for assembly-specific keywords in the file content.
+    Check for assembly-specific keywords in the entity types of the file.
+    Pass the `StepScan` of the file as `scan` to reuse an existing scan.
     """
     try:
-        with open(file_path, 'r') as file:
-            content = file.read()
-        if 'ASSEMBLY' in content or 'PRODUCT' in content:
+        entity_types = (scan or scan_step_file(file_path)).entity_counts
+        if any('ASSEMBLY' in name or 'PRODUCT' in name for name in entity_types):
             return True
-        if 'MANIFOLD_SOLID_BREP' in content:
+        if 'MANIFOLD_SOLID_BREP' in entity_types:
             return False
         return None  # Could not determine
     except Exception as e:
@@ -36,6 +49,10 @@ def is_assembly_with_occ(file_path):
     """
     Use python-occ to determine if the file is an assembly.
     """
+    # OCC is only imported here, so that the text-based methods start without it
+    from OCC.Core.STEPControl import STEPControl_Reader
+    from OCC.Core.TopoDS import TopoDS_Compound
+
     try:
         reader = STEPControl_Reader()
         status = reader.ReadFile(file_path)
@@ -51,15 +68,13 @@ def is_assembly_with_occ(file_path):
         print(f"Error processing file with OCC: {e}")
         return None
 
-def is_assembly_by_entity_count(file_path):
+def is_assembly_by_entity_count(file_path, scan=None):
     """
     Count the number of PRODUCT entities in the STEP file.
+    Pass the `StepScan` of the file as `scan` to reuse an existing scan.
     """
     try:
-        with open(file_path, 'r') as file:
-            content = file.read()
-        product_count = len(re.findall(r'PRODUCT\(', content))
-        return product_count > 1  # More than one product indicates an assembly
+        return (scan or scan_step_file(file_path)).is_assembly  # More than one product indicates an assembly
     except Exception as e:
         print(f"Error counting entities in file: {e}")
         return None
@@ -88,6 +103,110 @@ def classify_step_file(file_path):
 
     return "Unknown"  # If all methods fail
 
+def entity_count_label(scan):
+    """
+    Classify a file from the entity counts of its `StepScan`.
+    Returns (label, confidence, ambiguous). Keyword matching is not used here: every file
+    contains PRODUCT_DEFINITION, so it carries no information.
+    """
+    counts = scan.entity_counts
+    products = counts["PRODUCT"]
+    usages = counts["NEXT_ASSEMBLY_USAGE_OCCURRENCE"]
+    solids = counts["MANIFOLD_SOLID_BREP"] + counts["BREP_WITH_VOIDS"]
+    bodies = solids + counts["SHELL_BASED_SURFACE_MODEL"]
+
+    if products <= 1 and usages == 0:
+        # A single product; several bodies make it a multi-body part
+        return "Part", CONFIDENT if bodies <= 1 else LIKELY, False
+    if solids > 1:
+        return "Assembly", CONFIDENT if usages else PROBABLE, False
+    # Several products, but at most one solid: the counts disagree
+    return "Assembly", AMBIGUOUS, True
+
+def classify_by_scan(file_path):
+    """
+    Classify a file from its raw entity counts. Returns a result row.
+    """
+    try:
+        label, confidence, ambiguous = entity_count_label(scan_step_file(file_path))
+    except Exception as e:
+        return {"File Name": os.path.basename(file_path), "Label": "Unknown", "Confidence": 0.0,
+                "Method": "entity_count", "Ambiguous": True, "Error": f"{type(e).__name__}: {e}"}
+    return {"File Name": os.path.basename(file_path), "Label": label, "Confidence": confidence,
+            "Method": "entity_count", "Ambiguous": ambiguous}
+
+def classify_with_occ(file_path):
+    """
+    Classify a file from the shape OCC transfers: a compound with several top-level shapes is
+    an assembly. Returns a result row; meant to run in a `batch_analysis.WorkerPool`.
+    """
+    from OCC.Core.STEPControl import STEPControl_Reader
+    from OCC.Core.TopAbs import TopAbs_COMPOUND
+    from OCC.Core.TopoDS import TopoDS_Iterator
+
+    reader = STEPControl_Reader()
+    if reader.ReadFile(file_path) != 1:
+        raise ValueError("Error reading STEP file")
+    reader.TransferRoots()
+    shape = reader.OneShape()
+
+    children = 0
+    if shape.ShapeType() == TopAbs_COMPOUND:
+        iterator = TopoDS_Iterator(shape)
+        while iterator.More() and children < 2:
+            children += 1
+            iterator.Next()
+    return {"File Name": os.path.basename(file_path), "Label": "Assembly" if children > 1 else "Part",
+            "Confidence": PROBABLE,
+            "Method": "occ_shape_type", "Ambiguous": False}
+
+def classify_files(file_paths, workers=None, use_threads=False, escalate=True, occ_workers=None, timeout=120):
+    """
+    Classify many STEP files as "Part" or "Assembly".
+    The text scan runs in a process pool (or a thread pool with `use_threads`), ambiguous files
+    are escalated to `classify_with_occ` when `escalate` is set. Rows are returned in input order
+    with "File Name", "Label", "Confidence", "Method" and "Ambiguous" columns.
+    """
+    from scripts.batch_analysis import WorkerPool  # Only needed for escalation
+
+    file_paths = list(file_paths)
+    if len(file_paths) < SERIAL_BATCH_SIZE or workers == 1:
+        # Starting a pool costs more than scanning a handful of files
+        rows = [classify_by_scan(file_path) for file_path in file_paths]
+    else:
+        executor = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+        with executor(workers) as pool:
+            rows = list(pool.map(classify_by_scan, file_paths, chunksize=64))
+
+    # Rows are matched back by full path: files in different folders may share a name
+    ambiguous = {}
+    for index, (path, row) in enumerate(zip(file_paths, rows)):
+        if row["Ambiguous"] and "Error" not in row:
+            ambiguous.setdefault(path, []).append(index)
+    if escalate and ambiguous:
+        with WorkerPool(classify_with_occ, occ_workers, timeout) as occ_pool:
+            for path in ambiguous:
+                occ_pool.submit(path)
+            while occ_pool.busy:
+                for path, row in occ_pool.poll_paths():
+                    for index in ambiguous[path]:
+                        if "Error" in row:
+                            # Keep the entity count label, noting that OCC could not confirm it
+                            rows[index]["Method"] = "entity_count (occ failed)"
+                        else:
+                            rows[index] = dict(row)
+    return rows
+
+def classify_folder(folder_path, **options):
+    """
+    Classify all STEP files in a folder with `classify_files`.
+    """
+    file_paths = [
+        entry.path for entry in os.scandir(folder_path)
+        if entry.name.lower().endswith(('.step', '.stp'))
+    ]
+    return classify_files(sorted(file_paths), **options)
+
 def test_directory(directory_or_file):
     """
     Test and classify STEP files in a directory or classify a single file.
@@ -0,0 +1,342 @@
+"""
+Multi-Process Batch Analysis
+
+This module analyzes STEP files in a pool of worker processes. It is meant for long runs over
+thousands of files, where a single malformed file must not stop the whole run:
+- Every file gets a wall-clock timeout. A worker that exceeds it is killed and replaced.
+- A worker that crashes inside OCC (segfault, abort) only loses the file it was working on.
+- Workers exit after a fixed number of files, which keeps OCC memory bounded.
+- Workers can be given an address space limit. A file needing more memory fails with a
+  MemoryError (or crashes its worker) instead of pushing the machine into swap.
+
+Failed files are returned as rows holding the file name and an "Error" column, so they show up
+in the result table next to the successful ones.
+
+Each worker owns a dedicated pipe, so the parent always knows which file a worker holds and
+when it started it. A worker can be killed at any time without corrupting a shared queue.
+"""
+
+import os
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+# Default wall-clock limit for a single file, in seconds
+DEFAULT_TIMEOUT = 300
+
+# Default number of files a worker analyzes before it is replaced
+DEFAULT_MAX_FILES_PER_WORKER = 50
+
+
+# Function building the result row of a file that could not be analyzed
+def failed_record(file_path, error):
+    """
+    Builds the result row of a file whose analysis failed.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        error (str): Description of the failure.
+
+    Returns:
+        dict: Row containing the file name and the error.
+    """
+    return {"File Name": os.path.basename(file_path), "Error": error}
+
+
+def _limit_address_space(limit_mb):
+    # Caps the virtual memory of the worker process; not available on Windows
+    try:
+        import resource
+    except ImportError:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = int(limit_mb * 1024 * 1024)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _worker_main(conn, analyze, max_files, memory_limit_mb=None):
+    """
+    Worker loop: receives file paths over `conn` and sends back `(record, error)` pairs.
+    """
+    if memory_limit_mb is not None:
+        _limit_address_space(memory_limit_mb)
+    completed = 0
+    while max_files is None or completed < max_files:
+        file_path = conn.recv()
+        if file_path is None:
+            break
+        try:
+            conn.send((analyze(file_path), None))
+        except Exception as e:
+            conn.send((None, f"{type(e).__name__}: {e}"))
+        completed += 1
+    conn.close()
+
+
+class _Worker:
+    """
+    Parent-side handle of a worker process and the file it is currently analyzing.
+    """
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.file_path = None
+        self.started = None
+        self.completed = 0
+
+
+class WorkerPool:
+    """
+    Pool of worker processes analyzing STEP files with per-file timeouts and crash isolation.
+
+    Files are queued with `submit` and results are collected with `poll`, which returns one row
+    per finished file, successful or not.
+
+    Args:
+        analyze (callable): Function taking a file path and returning a result dict. Must be
+            importable by the workers (a module-level function or a `functools.partial` of one).
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        timeout (float, optional): Wall-clock limit per file, in seconds. None disables it.
+        max_files_per_worker (int, optional): Files analyzed before a worker is replaced.
+            None keeps workers alive for the whole run.
+        mp_context (multiprocessing context, optional): Context used to start the workers.
+        memory_limit_mb (float, optional): Address space limit of each worker, in MB
+            (`RLIMIT_AS`). It bounds the resident memory from above; shared libraries and
+            reserved but untouched memory count against it too. None leaves workers unlimited.
+    """
+
+    def __init__(self, analyze, workers=None, timeout=DEFAULT_TIMEOUT,
+                 max_files_per_worker=DEFAULT_MAX_FILES_PER_WORKER, mp_context=None, memory_limit_mb=None):
+        self.analyze = analyze
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_files_per_worker = max_files_per_worker
+        self.memory_limit_mb = memory_limit_mb
+        self._mp = mp_context or multiprocessing.get_context()
+        self._queue = deque()
+        self._pool = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def queued(self):
+        """Number of submitted files not yet handed to a worker."""
+        return len(self._queue)
+
+    @property
+    def in_flight(self):
+        """Number of files currently being analyzed."""
+        return sum(1 for worker in self._pool if worker.file_path is not None)
+
+    @property
+    def busy(self):
+        """True while files are queued or being analyzed."""
+        return bool(self._queue) or self.in_flight > 0
+
+    def submit(self, file_path):
+        """
+        Queues a file for analysis.
+
+        Args:
+            file_path (str): Path to the STEP file.
+        """
+        self._queue.append(file_path)
+
+    def poll(self, timeout=None):
+        """
+        Hands queued files to idle workers and collects the rows of finished files.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for a result, in seconds.
+                None waits until at least one file finishes.
+
+        Returns:
+            list of dict: Rows of the files that finished, successful or failed.
+        """
+        return [row for _, row in self.poll_paths(timeout)]
+
+    def poll_paths(self, timeout=None):
+        """
+        Like `poll`, but pairs every row with the path its file was submitted under, for callers
+        that have to tell apart files with the same name in different folders.
+
+        Returns:
+            list of tuple: (file path, row) of the files that finished.
+        """
+        self._dispatch()
+        busy = [worker for worker in self._pool if worker.file_path is not None]
+        if not busy:
+            return []
+
+        wait_time = timeout
+        if self.timeout is not None:
+            now = time.monotonic()
+            next_deadline = min(worker.started + self.timeout for worker in busy) - now
+            wait_time = max(0.0, next_deadline if wait_time is None else min(wait_time, next_deadline))
+
+        handles = {}
+        for worker in busy:
+            handles[worker.conn] = worker
+            handles[worker.process.sentinel] = worker
+        ready = wait(list(handles), wait_time)
+
+        results = []
+        finished = []
+        for handle in ready:
+            worker = handles[handle]
+            if worker in finished:
+                continue
+            finished.append(worker)
+            file_path = worker.file_path
+            results.append((file_path, self._collect(worker)))
+
+        # Kill the workers that exceeded the per-file timeout
+        if self.timeout is not None:
+            now = time.monotonic()
+            for worker in busy:
+                if worker in finished or now - worker.started < self.timeout:
+                    continue
+                file_path = worker.file_path
+                self._discard(worker)
+                results.append((file_path, failed_record(file_path, f"Timed out after {self.timeout}s")))
+
+        self._dispatch()
+        return results
+
+    def close(self):
+        """
+        Stops all workers. Files still queued or in flight are dropped.
+        """
+        self._queue.clear()
+        for worker in list(self._pool):
+            if worker.file_path is None:
+                try:
+                    worker.conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                worker.process.join(1)
+            self._discard(worker)
+
+    def _spawn(self):
+        parent_conn, child_conn = self._mp.Pipe()
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(child_conn, self.analyze, self.max_files_per_worker, self.memory_limit_mb),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        self._pool.append(worker)
+        return worker
+
+    def _discard(self, worker):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        self._pool.remove(worker)
+
+    def _dispatch(self):
+        idle = [worker for worker in self._pool if worker.file_path is None]
+        while self._queue:
+            if idle:
+                worker = idle.pop()
+            elif len(self._pool) < self.workers:
+                worker = self._spawn()
+            else:
+                break
+            worker.file_path = self._queue.popleft()
+            worker.started = time.monotonic()
+            worker.conn.send(worker.file_path)
+
+    def _collect(self, worker):
+        file_path = worker.file_path
+        try:
+            record, error = worker.conn.recv()
+        except (EOFError, OSError):
+            # The worker died before answering: OCC crashed on this file
+            worker.process.join()
+            self._discard(worker)
+            error = f"Worker crashed (exit code {worker.process.exitcode})"
+            if self.memory_limit_mb is not None:
+                error += f" with a memory limit of {self.memory_limit_mb:g} MB"
+            return failed_record(file_path, error)
+
+        worker.file_path = None
+        worker.completed += 1
+        if self.max_files_per_worker is not None and worker.completed >= self.max_files_per_worker:
+            # The worker exits on its own after its last file; replace it on demand
+            self._discard(worker)
+
+        if error is not None:
+            return failed_record(file_path, error)
+        return record
+
+
+# Function to analyze a list of STEP files in parallel
+def run_batch(file_paths, analyze, workers=None, timeout=DEFAULT_TIMEOUT,
+              max_files_per_worker=DEFAULT_MAX_FILES_PER_WORKER, memory_limit_mb=None):
+    """
+    Analyzes STEP files in a pool of worker processes and yields one row per file.
+
+    Rows are yielded in completion order. Files that raise, time out or crash their worker
+    are yielded as rows with an "Error" column (see `failed_record`).
+
+    Args:
+        file_paths (iterable of str): Paths to the STEP files.
+        analyze (callable): Function taking a file path and returning a result dict.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        timeout (float, optional): Wall-clock limit per file, in seconds.
+        max_files_per_worker (int, optional): Files analyzed before a worker is replaced.
+        memory_limit_mb (float, optional): Address space limit of each worker, in MB.
+
+    Yields:
+        dict: Result row of each file.
+    """
+    with WorkerPool(analyze, workers, timeout, max_files_per_worker,
+                    memory_limit_mb=memory_limit_mb) as pool:
+        for file_path in file_paths:
+            pool.submit(file_path)
+        while pool.busy:
+            yield from pool.poll()
+
+
+# Function to analyze groups of STEP files in separate pools running side by side
+def run_lanes(lanes, poll_interval=0.1):
+    """
+    Analyzes groups of STEP files in separate worker pools at the same time and yields one row
+    per file, in completion order.
+
+    Each lane keeps its own concurrency, timeout and memory limit, e.g. many workers for
+    regular files next to a single worker for large files, so a slow large file
+    never holds up the regular ones.
+
+    Args:
+        lanes (iterable of tuple): (WorkerPool, file paths) pairs. The pools are closed at the end.
+        poll_interval (float): Time waited on one pool before checking the others, in seconds.
+
+    Yields:
+        dict: Result row of each file.
+    """
+    lanes = list(lanes)
+    try:
+        for pool, file_paths in lanes:
+            for file_path in file_paths:
+                pool.submit(file_path)
+        busy = [pool for pool, _ in lanes if pool.busy]
+        while busy:
+            for pool in busy:
+                yield from pool.poll(poll_interval if len(busy) > 1 else None)
+            busy = [pool for pool in busy if pool.busy]
+    finally:
+        for pool, _ in lanes:
+            pool.close()
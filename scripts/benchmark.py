@@ -0,0 +1,369 @@
+"""
+Benchmark Suite
+
+This module benchmarks the analysis pipeline on a pinned corpus of the STEP files shipped with
+the repository (`Simple_selected`, `results/Complex_selected` and `data/Selected_Manually`), so
+runs are reproducible offline on any machine:
+- The corpus is a fixed subset of those folders, bucketed by file size and by the face count of
+  the raw entity scan. Within each bucket the files are picked in a stable hash order, and the
+  content hash of every file is stored with the baseline, so a changed corpus is detected.
+- Every file is analyzed in a fresh worker process (see `profiling.profile_file`), which gives
+  per-stage times for each analyzer and a peak memory that belongs to that file alone. The
+  suite runs the optional analyzers as well (`BENCHMARK_ANALYZERS`), so the report breaks the
+  time down per analyzer.
+- The full `file_selection` pipeline is timed on a copy of the corpus.
+- The report holds throughput (files/s, faces/s), latency percentiles per bucket and per stage,
+  peak memory, the analysis results and the selected files.
+
+Comparing against a saved baseline flags slower stages, higher memory and any change in the
+analysis results or the selection, and the command exits with a non-zero status:
+
+    python -m scripts.benchmark --update-baseline     # record results/benchmark_baseline.json
+    python -m scripts.benchmark                       # compare against it
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+from functools import partial
+import numpy as np
+from scripts.analysis_pipeline import DEFAULT_ANALYZERS
+from scripts.batch_analysis import WorkerPool
+from scripts.profiling import profile_file
+from scripts.result_cache import file_content_hash
+from scripts.step_scanner import scan_step_file
+
+# Repository root, the corpus paths are relative to it
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Folders the corpus is drawn from
+CORPUS_FOLDERS = ("Simple_selected", os.path.join("results", "Complex_selected"),
+                  os.path.join("data", "Selected_Manually"))
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "results", "benchmark_baseline.json")
+
+# Analyzers of the suite: the default ones and the optional ones, each timed as its own stage.
+# "mesh_volume" runs first so the exact "Volume" of the "volume" analyzer is the one reported.
+BENCHMARK_ANALYZERS = ("mesh_volume",) + DEFAULT_ANALYZERS + ("hole_features", "curvature_field", "face_graph")
+
+# Bucket upper bounds: file size in KB and face count of the raw scan (terciles of the corpus)
+SIZE_BUCKETS = (("small", 80), ("medium", 160), ("large", float("inf")))
+FACE_BUCKETS = (("few", 32), ("some", 60), ("many", float("inf")))
+
+# Result columns compared with the baseline, and the relative tolerance of the float columns
+COMPARED_COLUMNS = ("Total Faces", "Curved Faces", "Total Edges", "Vertices", "Hole Count",
+                    "Volume", "Bounding Box Volume", "Mean Curvature", "size", "ispart",
+                    "Recognized Holes", "Through Holes", "Area-Weighted Mean Curvature", "Sampled Area",
+                    "Graph Components", "Cycle Rank")
+RESULT_TOLERANCE = 1e-6
+
+# A timing regresses when it exceeds the baseline by this fraction and by at least `MIN_SLOWDOWN`
+DEFAULT_TOLERANCE = 0.25
+MIN_SLOWDOWN = 0.005
+
+PERCENTILES = (50, 90, 99)
+
+
+def _bucket(value, buckets):
+    return next(name for name, upper in buckets if value < upper)
+
+
+def _stable_order(relative_path):
+    # Order independent of the file system listing and of the platform's path separator
+    return hashlib.sha1(relative_path.replace(os.sep, "/").encode()).hexdigest()
+
+
+# Function to pick the pinned benchmark corpus
+def build_corpus(per_bucket=3, folders=CORPUS_FOLDERS, root=REPO_ROOT):
+    """
+    Picks a fixed subset of the repository's STEP files, `per_bucket` files for every
+    combination of source folder, size bucket and face bucket.
+
+    Args:
+        per_bucket (int): Files per bucket.
+        folders (tuple of str): Source folders, relative to `root`.
+        root (str): Repository root.
+
+    Returns:
+        list of dict: One entry per file with "path" (relative to `root`), "bucket", "sha256"
+            and "size" in KB.
+    """
+    buckets = {}
+    for folder in folders:
+        for directory, _, names in os.walk(os.path.join(root, folder)):
+            for name in names:
+                if not name.lower().endswith((".step", ".stp")):
+                    continue
+                path = os.path.join(directory, name)
+                scan = scan_step_file(path)
+                faces = scan.entity_counts["ADVANCED_FACE"] + scan.entity_counts["FACE_SURFACE"]
+                bucket = f"{_bucket(scan.file_size / 1024, SIZE_BUCKETS)}/{_bucket(faces, FACE_BUCKETS)}"
+                buckets.setdefault((folder, bucket), []).append(os.path.relpath(path, root))
+
+    corpus = []
+    for (folder, bucket), paths in sorted(buckets.items()):
+        for relative_path in sorted(paths, key=_stable_order)[:per_bucket]:
+            path = os.path.join(root, relative_path)
+            corpus.append({
+                "path": relative_path.replace(os.sep, "/"),
+                "bucket": bucket,
+                "sha256": file_content_hash(path),
+                "size": os.path.getsize(path) / 1024,
+            })
+    return corpus
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    return {f"p{q}": float(np.percentile(values, q)) for q in PERCENTILES}
+
+
+# Function to analyze every corpus file in its own worker process
+def benchmark_analyzers(corpus, root=REPO_ROOT, timeout=600, analyzers=BENCHMARK_ANALYZERS):
+    """
+    Analyzes every corpus file in a fresh worker process and collects its profile.
+
+    Args:
+        corpus (list of dict): Corpus built by `build_corpus`.
+        root (str): Repository root.
+        timeout (float): Wall-clock limit per file, in seconds.
+        analyzers (iterable of str): Analyzers to run and time.
+
+    Returns:
+        dict: {relative path: result row}, each successful row holding its "Profile".
+    """
+    by_path = {os.path.join(root, entry["path"]): entry["path"] for entry in corpus}
+    rows = {}
+    # One file per worker, so the peak RSS of a worker is the peak RSS of its file
+    analyze = partial(profile_file, analyzers=analyzers)
+    with WorkerPool(analyze, workers=1, timeout=timeout, max_files_per_worker=1) as pool:
+        for path in by_path:
+            pool.submit(path)
+        while pool.busy:
+            # Matched by full path: files of different corpus folders may share a name
+            for path, row in pool.poll_paths():
+                rows[by_path[path]] = row
+    return rows
+
+
+# Function to time the full file selection on a copy of the corpus
+def benchmark_selection(corpus, root=REPO_ROOT):
+    """
+    Runs `step_analysis.file_selection` on a temporary copy of the corpus.
+
+    Args:
+        corpus (list of dict): Corpus built by `build_corpus`.
+        root (str): Repository root.
+
+    Returns:
+        dict: "seconds" taken and sorted "selected" file names.
+    """
+    from scripts.step_analysis import file_selection
+
+    with tempfile.TemporaryDirectory() as temp:
+        source, destination = os.path.join(temp, "source"), os.path.join(temp, "selected")
+        os.makedirs(source)
+        for entry in corpus:
+            # Files of different folders may share a name; the flat copy keeps the first one
+            target = os.path.join(source, os.path.basename(entry["path"]))
+            if not os.path.exists(target):
+                shutil.copy(os.path.join(root, entry["path"]), target)
+        start = time.perf_counter()
+        file_selection(source, destination)
+        seconds = time.perf_counter() - start
+        return {"seconds": seconds, "selected": sorted(os.listdir(destination))}
+
+
+# Function to aggregate the benchmark measurements into a report
+def build_report(corpus, rows, selection=None):
+    """
+    Aggregates the measurements of a benchmark run.
+
+    Args:
+        corpus (list of dict): Corpus built by `build_corpus`.
+        rows (dict): Rows returned by `benchmark_analyzers`.
+        selection (dict, optional): Result of `benchmark_selection`.
+
+    Returns:
+        dict: Report with the environment, throughput, latency percentiles per bucket and
+            stage, peak memory, per-file results and the selection.
+    """
+    profiles = {path: row["Profile"] for path, row in rows.items() if "Profile" in row}
+    buckets = {entry["path"]: entry["bucket"] for entry in corpus}
+    total_time = sum(profile["wall"] for profile in profiles.values())
+    total_faces = sum(profile["faces"] or 0 for profile in profiles.values())
+
+    stages = {}
+    for profile in profiles.values():
+        for name, times in profile["stages"].items():
+            stages.setdefault(name, []).append(times["wall"])
+    by_bucket = {}
+    for path, profile in profiles.items():
+        by_bucket.setdefault(buckets[path], []).append(profile["wall"])
+    memory = [profile["peak_rss_mb"] for profile in profiles.values() if profile["peak_rss_mb"] is not None]
+
+    return {
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "corpus": corpus,
+        "files": len(corpus),
+        "failed": sorted(path for path, row in rows.items() if "Error" in row),
+        "throughput": {
+            "files_per_s": len(profiles) / total_time if total_time else 0.0,
+            "faces_per_s": total_faces / total_time if total_time else 0.0,
+        },
+        "latency": {"total": _percentiles([profile["wall"] for profile in profiles.values()]),
+                    **{f"stage:{name}": _percentiles(values) for name, values in sorted(stages.items())},
+                    **{f"bucket:{name}": _percentiles(values) for name, values in sorted(by_bucket.items())}},
+        "memory": {"peak_rss_mb": _percentiles(memory), "max_rss_mb": max(memory) if memory else None},
+        "results": {path: {column: row.get(column) for column in COMPARED_COLUMNS}
+                    for path, row in sorted(rows.items()) if "Error" not in row},
+        "selection": selection,
+    }
+
+
+def _values_differ(current, baseline):
+    if current is None or baseline is None:
+        return current is not baseline
+    if isinstance(baseline, float) or isinstance(current, float):
+        # NaN compares unequal to everything, itself included
+        if np.isnan(current) or np.isnan(baseline):
+            return not (np.isnan(current) and np.isnan(baseline))
+        return abs(current - baseline) > RESULT_TOLERANCE * max(abs(baseline), 1.0)
+    return current != baseline
+
+
+# Function to compare a benchmark report with a baseline
+def compare_reports(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Lists the regressions of a report relative to a baseline.
+
+    Args:
+        report (dict): Current report.
+        baseline (dict): Baseline report.
+        tolerance (float): Allowed relative slowdown and memory growth.
+
+    Returns:
+        list of str: Description of every regression. Empty if there is none.
+    """
+    problems = []
+    baseline_hashes = {entry["path"]: entry["sha256"] for entry in baseline["corpus"]}
+    current_hashes = {entry["path"]: entry["sha256"] for entry in report["corpus"]}
+    if baseline_hashes != current_hashes:
+        changed = sorted(set(baseline_hashes.items()) ^ set(current_hashes.items()))
+        problems.append(f"Corpus differs from the baseline ({len(changed)} entries); re-record the baseline")
+        return problems
+
+    for path in sorted(set(report["failed"]) - set(baseline["failed"])):
+        problems.append(f"{path}: analysis now fails")
+    for path, expected in baseline["results"].items():
+        actual = report["results"].get(path)
+        if actual is None:
+            continue
+        for column, value in expected.items():
+            if _values_differ(actual.get(column), value):
+                problems.append(f"{path}: {column} changed from {value} to {actual.get(column)}")
+
+    for name, expected in baseline["latency"].items():
+        for key, value in expected.items():
+            current = report["latency"].get(name, {}).get(key)
+            if current is not None and current > value * (1 + tolerance) and current - value > MIN_SLOWDOWN:
+                problems.append(f"Latency {name} {key} regressed: {value:.4f}s -> {current:.4f}s")
+
+    expected_memory, current_memory = baseline["memory"]["max_rss_mb"], report["memory"]["max_rss_mb"]
+    if expected_memory and current_memory and current_memory > expected_memory * (1 + tolerance):
+        problems.append(f"Peak memory regressed: {expected_memory:.1f}MB -> {current_memory:.1f}MB")
+
+    if baseline.get("selection") and report.get("selection"):
+        if baseline["selection"]["selected"] != report["selection"]["selected"]:
+            problems.append("Selected files differ from the baseline")
+        expected, current = baseline["selection"]["seconds"], report["selection"]["seconds"]
+        if current > expected * (1 + tolerance) and current - expected > MIN_SLOWDOWN:
+            problems.append(f"file_selection regressed: {expected:.2f}s -> {current:.2f}s")
+    return problems
+
+
+# Function to print the main numbers of a report
+def format_report(report):
+    """
+    Formats the main numbers of a benchmark report.
+
+    Args:
+        report (dict): Benchmark report.
+
+    Returns:
+        str: Human readable summary.
+    """
+    lines = [
+        f"Benchmarked {report['files']} files ({len(report['failed'])} failed)",
+        f"Throughput: {report['throughput']['files_per_s']:.2f} files/s, "
+        f"{report['throughput']['faces_per_s']:.1f} faces/s",
+    ]
+    for name, values in report["latency"].items():
+        lines.append(f"  {name:<24}" + "  ".join(f"{key}={value:.4f}s" for key, value in values.items()))
+    if report["memory"]["max_rss_mb"] is not None:
+        lines.append(f"Peak RSS: max {report['memory']['max_rss_mb']:.1f}MB, "
+                     f"p50 {report['memory']['peak_rss_mb']['p50']:.1f}MB")
+    if report.get("selection"):
+        lines.append(f"file_selection: {report['selection']['seconds']:.2f}s, "
+                     f"{len(report['selection']['selected'])} selected")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the STEP analysis pipeline on the pinned corpus.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the run as the new baseline")
+    parser.add_argument("--per-bucket", type=int, default=3, help="Files per source folder and bucket")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown and memory growth")
+    parser.add_argument("--no-selection", action="store_true", help="Skip the file_selection benchmark")
+    parser.add_argument("--output", help="Also write the report of this run to this JSON file")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+    # Reuse the pinned corpus of the baseline; only a new baseline picks the files again
+    if baseline is None:
+        corpus = build_corpus(args.per_bucket)
+    else:
+        corpus = [dict(entry, sha256=file_content_hash(os.path.join(REPO_ROOT, entry["path"])))
+                  for entry in baseline["corpus"] if os.path.exists(os.path.join(REPO_ROOT, entry["path"]))]
+        if len(corpus) != len(baseline["corpus"]):
+            print("Some corpus files of the baseline are missing")
+
+    rows = benchmark_analyzers(corpus)
+    selection = None if args.no_selection else benchmark_selection(corpus)
+    report = build_report(corpus, rows, selection)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.update_baseline or baseline is None:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    problems = compare_reports(report, baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION: {problem}")
+    if not problems:
+        print("No regressions against the baseline")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""
+Command-Line Interface
+
+A single entry point for the analysis scripts:
+
+    python -m scripts analyze   FOLDER -o results.csv [--workers N] [--cache cache.db]
+                                [--large-file-mb 5] [--large-workers 1] [--memory-limit MB]
+    python -m scripts select    FOLDER DESTINATION [--prefilter] [--mesh-volume] [--descriptors] [--bbox-mode obb]
+                                [--criteria criteria.json]
+    python -m scripts select    --from-results results.csv [--criteria criteria.json]
+    python -m scripts classify  FILE_OR_FOLDER ... [--no-escalate]
+    python -m scripts holes     FILE_OR_FOLDER ... [--recognize]
+    python -m scripts volume    FILE_OR_FOLDER ... [--mesh] [--mesh-cache DIR]
+    python -m scripts curvature FILE_OR_FOLDER ... [--grid N] [--plot | --corpus]
+    python -m scripts merge     FOLDER [--store results_store]
+    python -m scripts watch     FOLDER -o results.csv [--destination DIR]
+    python -m scripts dedupe    RESULTS_CSV ... [--index fingerprints.npz] [--threshold 0.05] [--folders FOLDER ...]
+    python -m scripts assembly  FILE_OR_FOLDER ... -o components.csv [--workers N]
+    python -m scripts organize  split FOLDER | rename FOLDER | selected TEXT SOURCE SIMPLE COMPLEX
+                                [--journal journal.jsonl] [--dry-run]
+    python -m scripts organize  resume JOURNAL | rollback JOURNAL
+
+Each subcommand imports what it needs when it runs. Importing this module only loads
+`argparse`, so `classify`, which reads the raw STEP text, starts without loading OCC, pandas or
+matplotlib; OCC is only loaded for the files whose entity counts are ambiguous.
+"""
+
+import os
+import sys
+import argparse
+
+# File extensions accepted for STEP files (compared case-insensitively)
+STEP_EXTENSIONS = (".step", ".stp")
+
+
+def _step_files(paths):
+    # Expands folders into the STEP files they contain, in name order
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(STEP_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def _load_criteria(path):
+    if path is None:
+        return None, None
+    from scripts.selection_criteria import load_criteria
+    return load_criteria(path)
+
+
+def _analyze(args):
+    if args.complexity:
+        from scripts.Complexity_analysis import run_analysis_for_folder
+        data = run_analysis_for_folder(args.folder, workers=args.workers, cache_path=args.cache,
+                                       output_path=args.output, resume=not args.restart,
+                                       curvature_grid=args.curvature_grid, bbox_mode=args.bbox_mode)
+        print(f"{len(data)} rows in {args.output}")
+        return 0
+
+    from scripts.step_analysis import stream_analysis_for_folder
+    large_lane = {
+        name: value for name, value in (("large_file_mb", args.large_file_mb), ("large_workers", args.large_workers),
+                                        ("memory_limit_mb", args.memory_limit))
+        if value is not None
+    }
+    rows = stream_analysis_for_folder(args.folder, args.output, workers=args.workers, cache_path=args.cache,
+                                      resume=not args.restart, retry_errors=not args.keep_errors,
+                                      profile_path=args.profile,
+                                      options={"bbox_mode": args.bbox_mode} if args.bbox_mode else None,
+                                      **large_lane)
+    print(f"{rows} rows in {args.output}")
+    return 0
+
+
+def _select(args):
+    criteria, file_min_criteria_met = _load_criteria(args.criteria)
+    min_criteria_met = args.min_criteria_met if args.min_criteria_met is not None else file_min_criteria_met
+
+    if args.from_results:
+        from scripts.selection_criteria import select_from_results
+        selected = select_from_results(args.from_results, criteria, min_criteria_met,
+                                       folder_path=args.folder, destination_folder=args.destination)
+        for file_name, met in zip(selected["File Name"], selected["Criteria Met"]):
+            print(f"File meets {met} criteria: {file_name}")
+        return 0
+
+    if args.folder is None or args.destination is None:
+        print("select needs FOLDER and DESTINATION, or --from-results", file=sys.stderr)
+        return 2
+    from scripts.analysis_pipeline import DEFAULT_ANALYZERS
+    from scripts.selection_criteria import DEFAULT_MIN_CRITERIA_MET
+    from scripts.step_analysis import file_selection
+    analyzers = DEFAULT_ANALYZERS + ("shape_descriptors",) if args.descriptors else None
+    data = file_selection(args.folder, args.destination, workers=args.workers, cache_path=args.cache,
+                          prefilter=args.prefilter, criteria=criteria,
+                          min_criteria_met=DEFAULT_MIN_CRITERIA_MET if min_criteria_met is None else min_criteria_met,
+                          mesh_volume=args.mesh_volume, mesh_cache=args.mesh_cache, analyzers=analyzers,
+                          options={"bbox_mode": args.bbox_mode} if args.bbox_mode else None,
+                          assembly_breakdown=args.assembly_breakdown)
+    if args.output:
+        data.to_csv(args.output, index=False)
+    return 0
+
+
+def _classify(args):
+    from scripts.assembly_check import classify_files
+
+    rows = classify_files(_step_files(args.paths), workers=args.workers, escalate=not args.no_escalate)
+    for row in rows:
+        print(f"{row['File Name']}: {row['Label']} (confidence {row['Confidence']:.2f}, {row['Method']})")
+    return 0
+
+
+def _print_per_file(args, analyze):
+    # Runs `analyze` on each file and prints one line per file
+    status = 0
+    for file_path in _step_files(args.paths):
+        try:
+            record = analyze(file_path)
+        except Exception as e:
+            print(f"{os.path.basename(file_path)}: error: {e}")
+            status = 1
+            continue
+        values = ", ".join(f"{name}={value}" for name, value in record.items() if name != "File Name")
+        print(f"{record['File Name']}: {values}")
+    return status
+
+
+def _per_file(args, analyzers, options=None):
+    # Runs pipeline analyzers on each file
+    from scripts.analysis_pipeline import analyze_file
+    return _print_per_file(args, lambda file_path: analyze_file(file_path, analyzers, options))
+
+
+def _holes(args):
+    return _per_file(args, ["holes", "hole_features"] if args.recognize else ["holes"])
+
+
+def _volume(args):
+    if not args.mesh:
+        return _per_file(args, ["volume"])
+
+    from scripts.tessellation import file_mesh_metrics
+    return _print_per_file(args, lambda file_path: file_mesh_metrics(file_path, args.mesh_cache, args.deflection))
+
+
+def _curvature(args):
+    if args.corpus:
+        from scripts.curvature_analysis import corpus_curvature_statistics, format_corpus_curvature
+        corpus = corpus_curvature_statistics(_step_files(args.paths), args.workers, grid=args.grid,
+                                             adaptive=args.adaptive)
+        print(format_corpus_curvature(corpus))
+        return 0
+
+    if not args.plot:
+        options = {"curvature_grid": args.grid, "curvature_adaptive": args.adaptive} if args.grid else None
+        return _per_file(args, ["curvature_field" if args.grid else "curvature"], options)
+
+    from scripts.curvature_analysis import curvature_analysis, plot_curvatures
+    curvature_data = {
+        file_path: curvature_analysis(file_path, args.grid, args.adaptive) for file_path in _step_files(args.paths)
+    }
+    plot_curvatures(curvature_data)
+    return 0
+
+
+def _merge(args):
+    if args.store:
+        from scripts.merge_csv import merge_into_store
+        shards = merge_into_store(args.folder, args.store)
+        print(f"Imported {len(shards)} files into {args.store}")
+    else:
+        from scripts.merge_csv import merge_csv_folder
+        data = merge_csv_folder(args.folder, args.output)
+        print(f"Merged {len(data)} rows into {os.path.join(args.folder, args.output)}")
+    return 0
+
+
+def _watch(args):
+    from scripts.folder_watcher import watch_folder
+    criteria, file_min_criteria_met = _load_criteria(args.criteria)
+    options = {"workers": args.workers, "cache_path": args.cache, "store_root": args.store, "criteria": criteria}
+    if file_min_criteria_met is not None:
+        options["min_criteria_met"] = file_min_criteria_met
+    watch_folder(args.folder, args.output, args.destination, duration=args.duration, **options)
+    return 0
+
+
+def _dedupe(args):
+    from scripts.fingerprint import DEFAULT_THRESHOLD, duplicate_clusters, update_index
+
+    if args.folders and len(args.folders) != len(args.results):
+        print("--folders needs one folder per RESULTS_CSV", file=sys.stderr)
+        return 2
+    folders = args.folders or [None] * len(args.results)
+    for results, folder in zip(args.results, folders):
+        index, added = update_index(args.index, results, args.threshold or DEFAULT_THRESHOLD, folder)
+        print(f"Indexed {added} new files from {results} ({len(index)} in {args.index})")
+    for cluster in duplicate_clusters(index, args.threshold):
+        print(f"{len(cluster)} near-duplicates: {', '.join(cluster)}")
+    return 0
+
+
+def _assembly(args):
+    from scripts.assembly_analysis import COMPONENT_ANALYZERS, analyze_assemblies
+
+    analyzers = COMPONENT_ANALYZERS + ("shape_descriptors",) if args.descriptors else None
+    data = analyze_assemblies(_step_files(args.paths), analyzers,
+                              {"bbox_mode": args.bbox_mode} if args.bbox_mode else None,
+                              workers=args.workers, output_path=args.output)
+    for row in data.itertuples(index=False):
+        indent = "  " * int(row.Level)
+        print(f"{row[0]}: {indent}{row.Component} x{row.Instances}")
+    return 0
+
+
+def _organize(args):
+    import scripts.file_organizer as organizer
+
+    if args.action == "resume":
+        summary = organizer.resume_journal(args.journal_file, args.workers)
+    elif args.action == "rollback":
+        summary = organizer.rollback_journal(args.journal_file)
+    else:
+        if args.action == "split":
+            operations = organizer.plan_split(args.folder, args.per_folder, max_folders=args.max_folders)
+        elif args.action == "rename":
+            from scripts.rename_files_folder import base_name, sequential_name
+            rename = base_name if args.sequential is None else sequential_name(args.sequential)
+            operations = organizer.plan_rename(args.folder, rename)
+        else:
+            from scripts.organize_selected_files import plan_selected_files
+            operations = plan_selected_files(args.text_file, args.source, args.simple, args.complex)
+        summary = organizer.execute_plan(operations, args.journal, args.workers, args.link_mode,
+                                         overwrite=args.action == "selected", dry_run=args.dry_run)
+    print(", ".join(f"{name}: {count}" for name, count in summary.items()))
+    return 1 if summary.get("failed") else 0
+
+
+# Function to build the argument parser of all subcommands
+def build_parser():
+    """
+    Builds the argument parser of the command-line interface.
+
+    Returns:
+        argparse.ArgumentParser: Parser with one subcommand per tool.
+    """
+    parser = argparse.ArgumentParser(prog="python -m scripts", description="3D STEP file analysis tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("analyze", help="Analyze all STEP files of a folder into a CSV file")
+    command.add_argument("folder")
+    command.add_argument("-o", "--output", default="analysis_df.csv", help="Output CSV file")
+    command.add_argument("--workers", type=int, help="Worker processes (serial if omitted)")
+    command.add_argument("--cache", help="Result cache database")
+    command.add_argument("--restart", action="store_true", help="Overwrite the output instead of resuming")
+    command.add_argument("--keep-errors", action="store_true",
+                         help="When resuming, keep the rows of failed files instead of analyzing them again")
+    command.add_argument("--profile", help="Write per-stage timings to this JSON lines log")
+    command.add_argument("--complexity", action="store_true", help="Run the complexity analysis instead")
+    command.add_argument("--curvature-grid", type=int, help="With --complexity, area-weighted curvature grid")
+    command.add_argument("--bbox-mode", choices=("aabb", "optimal", "obb"),
+                         help="Bounding box behind \"Bounding Box Volume\" (default aabb)")
+    command.add_argument("--large-file-mb", type=float,
+                         help="Analyze files above this size component by component in a separate lane (default 5)")
+    command.add_argument("--large-workers", type=int, help="Large files analyzed at the same time (default 1)")
+    command.add_argument("--memory-limit", type=float,
+                         help="Address space (not resident memory) limit of a large-file worker in MB (default none)")
+    command.set_defaults(handler=_analyze)
+
+    command = commands.add_parser("select", help="Select STEP files that meet the criteria")
+    command.add_argument("folder", nargs="?")
+    command.add_argument("destination", nargs="?")
+    command.add_argument("--from-results", help="Re-run the selection on a results CSV without analyzing")
+    command.add_argument("--criteria", help="Criteria JSON file")
+    command.add_argument("--min-criteria-met", type=float, help="Minimum weighted number of criteria met")
+    command.add_argument("--prefilter", action="store_true", help="Reject files from the raw scan first")
+    command.add_argument("--mesh-volume", action="store_true",
+                         help="Use mesh volumes; only files near a volume bound get the exact volume")
+    command.add_argument("--mesh-cache", help="With --mesh-volume, folder the meshes are cached in")
+    command.add_argument("--descriptors", action="store_true",
+                         help="Also compute the fill ratio, aspect ratios and surface-to-volume ratio")
+    command.add_argument("--bbox-mode", choices=("aabb", "optimal", "obb"),
+                         help="Bounding box behind \"Bounding Box Volume\" (default aabb)")
+    command.add_argument("--workers", type=int, help="Worker processes (serial if omitted)")
+    command.add_argument("--cache", help="Result cache database")
+    command.add_argument("-o", "--output", help="Also write the analysis results to this CSV file")
+    command.add_argument("--assembly-breakdown", metavar="CSV",
+                         help="Break the assemblies down into components and write the table here")
+    command.set_defaults(handler=_select)
+
+    command = commands.add_parser("classify", help="Classify STEP files as part or assembly")
+    command.add_argument("paths", nargs="+", metavar="FILE_OR_FOLDER")
+    command.add_argument("--workers", type=int, help="Processes scanning the files (CPU count if omitted)")
+    command.add_argument("--no-escalate", action="store_true",
+                         help="Do not check ambiguous files with OCC; only the raw text is read")
+    command.set_defaults(handler=_classify)
+
+    command = commands.add_parser("holes", help="Count the holes of STEP files")
+    command.add_argument("paths", nargs="+", metavar="FILE_OR_FOLDER")
+    command.add_argument("--recognize", action="store_true", help="Also report the recognized hole features")
+    command.set_defaults(handler=_holes)
+
+    command = commands.add_parser("volume", help="Compute the volume of STEP files")
+    command.add_argument("paths", nargs="+", metavar="FILE_OR_FOLDER")
+    command.add_argument("--mesh", action="store_true", help="Approximate volume, area and boxes from a mesh")
+    command.add_argument("--mesh-cache", help="With --mesh, folder the meshes are cached in")
+    command.add_argument("--deflection", type=float, default=0.1, help="With --mesh, linear deflection")
+    command.set_defaults(handler=_volume)
+
+    command = commands.add_parser("curvature", help="Compute curvature statistics of STEP files")
+    command.add_argument("paths", nargs="+", metavar="FILE_OR_FOLDER")
+    command.add_argument("--grid", type=int, help="Sample each face on a grid x grid UV grid")
+    command.add_argument("--adaptive", action="store_true", help="Refine the grid where the curvature varies")
+    command.add_argument("--plot", action="store_true", help="Plot the curvature of every face")
+    command.add_argument("--corpus", action="store_true",
+                         help="Report corpus-wide moments and quantiles instead of per-file values")
+    command.add_argument("--workers", type=int, help="With --corpus, worker processes (CPU count if omitted)")
+    command.set_defaults(handler=_curvature)
+
+    command = commands.add_parser("merge", help="Merge the result CSV files of a folder")
+    command.add_argument("folder")
+    command.add_argument("--output", default="combined_file.csv", help="Name of the combined CSV file")
+    command.add_argument("--store", help="Import into this results store instead")
+    command.set_defaults(handler=_merge)
+
+    command = commands.add_parser("watch", help="Analyze and select STEP files as they arrive in a folder")
+    command.add_argument("folder")
+    command.add_argument("-o", "--output", default="analysis_df.csv", help="Output CSV file")
+    command.add_argument("--destination", help="Folder the selected files are copied to")
+    command.add_argument("--criteria", help="Criteria JSON file")
+    command.add_argument("--workers", type=int, help="Worker processes (CPU count if omitted)")
+    command.add_argument("--cache", help="Result cache database")
+    command.add_argument("--store", help="Results store the rows are appended to")
+    command.add_argument("--duration", type=float, help="Stop after this many seconds")
+    command.set_defaults(handler=_watch)
+
+    command = commands.add_parser("dedupe", help="Find near-duplicate parts from analysis results")
+    command.add_argument("results", nargs="+", metavar="RESULTS_CSV")
+    command.add_argument("--index", default="fingerprints.npz", help="Fingerprint index, updated in place")
+    command.add_argument("--threshold", type=float, help="Maximum fingerprint distance (default 0.05)")
+    command.add_argument("--folders", nargs="+", metavar="FOLDER",
+                         help="STEP folder of each RESULTS_CSV, in the same order; files are keyed by path")
+    command.set_defaults(handler=_dedupe)
+
+    command = commands.add_parser("assembly", help="Analyze assemblies component by component")
+    command.add_argument("paths", nargs="+", metavar="FILE_OR_FOLDER")
+    command.add_argument("-o", "--output", help="Write the assembly and component rows to this CSV file")
+    command.add_argument("--workers", type=int, help="Worker processes analyzing the components (serial if omitted)")
+    command.add_argument("--descriptors", action="store_true",
+                         help="Also compute the fill ratio, aspect ratios and surface-to-volume ratio")
+    command.add_argument("--bbox-mode", choices=("aabb", "optimal", "obb"),
+                         help="Bounding box behind \"Bounding Box Volume\" (default aabb)")
+    command.set_defaults(handler=_assembly)
+
+    command = commands.add_parser("organize", help="Split, rename or copy STEP files with a journal")
+    actions = command.add_subparsers(dest="action", required=True)
+    action = actions.add_parser("split", help="Move the files of a folder into numbered subfolders")
+    action.add_argument("folder")
+    action.add_argument("--per-folder", type=int, default=1000, help="Files per subfolder")
+    action.add_argument("--max-folders", type=int, help="Stop after this many subfolders")
+    plan_actions = [action]
+    action = actions.add_parser("rename", help="Rename the STEP files of a folder to their base name")
+    action.add_argument("folder")
+    action.add_argument("--sequential", type=int, metavar="START", help="Number the files abc_<n>.step from START")
+    plan_actions.append(action)
+    action = actions.add_parser("selected", help="Copy the files of a classification text file")
+    action.add_argument("text_file")
+    action.add_argument("source")
+    action.add_argument("simple")
+    action.add_argument("complex")
+    plan_actions.append(action)
+    for action in plan_actions:
+        action.add_argument("--journal", help="Journal to resume or roll back the run with")
+        action.add_argument("--link-mode", choices=("auto", "reflink", "hardlink", "copy"), default="auto",
+                            help="How copies are made (default: reflink or hardlink where possible)")
+        action.add_argument("--dry-run", action="store_true", help="Only print the planned operations")
+    for name in ("resume", "rollback"):
+        action = actions.add_parser(name, help=f"{name.capitalize()} a journaled run")
+        action.add_argument("journal_file", metavar="JOURNAL")
+        plan_actions.append(action)
+    for action in plan_actions[:-1]:
+        action.add_argument("--workers", type=int, help="I/O threads (default 8)")
+    command.set_defaults(handler=_organize)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the command-line interface.
+
+    Args:
+        argv (list of str, optional): Arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Exit status.
+    """
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -7,12 +7,18 @@ This script analyzes the curvature properties of STEP files, computing both:
 
 The curvature values are extracted for each face in the STEP file and plotted for comparison.
 
+For a whole corpus, `corpus_curvature_statistics` reduces every file to running moments and a
+quantile sketch in the worker processes (see `online_stats`) and merges them exactly, so the
+corpus-wide mean, spread and quantiles are available without keeping every face value.
+
 Dependencies:
 - OpenCascade (pythonOCC)
 - Matplotlib
 - NumPy
 """
 
+import os
+from functools import partial
 from OCC.Core.STEPControl import STEPControl_Reader
 from OCC.Core.BRep import BRep_Tool
 from OCC.Core.GeomAbs import GeomAbs_CurveType
@@ -21,14 +27,21 @@ from OCC.Core.BRepTools import breptools_UVBounds
 from OCC.Core.BRepLProp import BRepLProp_SLProps
 from OCC.Core.TopExp import TopExp_Explorer
 from OCC.Core.TopAbs import TopAbs_FACE
-import matplotlib.pyplot as plt
-import numpy as np
+from scripts.batch_analysis import DEFAULT_TIMEOUT, run_batch
+from scripts.curvature_field import shape_curvature_field
+from scripts.online_stats import QuantileSketch, RunningMoments
+
+# Curvature quantities aggregated by `corpus_curvature_statistics`
+CURVATURE_QUANTITIES = ("Mean Curvature", "Gaussian Curvature")
 
-def curvature_analysis(step_file_path):
+def curvature_analysis(step_file_path, grid=None, adaptive=False):
     """
     Computes the mean and Gaussian curvature for each face in a given STEP file.
 
     :param step_file_path: Path to the STEP file.
+    :param grid: If set, each face is sampled on a `grid` x `grid` UV grid and its area-weighted
+        mean and Gaussian curvature are returned instead of the values at the UV midpoint.
+    :param adaptive: Refine the grid where the curvature varies (only used with `grid`).
     :return: Two lists containing mean curvatures and Gaussian curvatures of faces.
     """
     
@@ -38,6 +51,12 @@ def curvature_analysis(step_file_path):
     step_reader.TransferRoots()
     shape = step_reader.Shape()
 
+    if grid is not None:
+        # Area-weighted statistics over the whole UV domain of each face
+        face_statistics, _ = shape_curvature_field(shape, grid=grid, adaptive=adaptive)
+        defined = [stats for stats in face_statistics if stats["samples"] > 0]
+        return [stats["mean"] for stats in defined], [stats["gaussian"] for stats in defined]
+
     # Initialize lists to store curvature values
     mean_curvatures = []
     gaussian_curvatures = []
@@ -66,48 +85,124 @@ def curvature_analysis(step_file_path):
 
     return mean_curvatures, gaussian_curvatures
 
-# List of STEP files to analyze (Modify paths as needed)
-file_paths = [
-    'abc_0000_data/abc_00000001.step',
-    'abc_0000_data/abc_00000002.step',
-    'abc_0000_data/abc_00000003.step',
-    'abc_0000_data/abc_00000004.step',
-    'abc_0000_data/abc_00000005.step',
-    'abc_0000_data/abc_00000006.step',
-    'abc_0000_data/abc_00000007.step',
-    'abc_0000_data/abc_00000008.step'
-]
-
-# Dictionary to store curvature data for each file
-curvature_data = {}
-
-# Process each file and store curvature results
-for file_path in file_paths:
-    mean_curvatures, gaussian_curvatures = curvature_analysis(file_path)
-    curvature_data[file_path] = (mean_curvatures, gaussian_curvatures)
-
-# Print curvature values for a specific file
-print(curvature_data['abc_0000_data/abc_00000004.step'])
-
-# Visualize curvature comparisons using Matplotlib
-fig, ax = plt.subplots(2, 1, figsize=(14, 10))
-
-# Plot Mean Curvature for each file
-for file_path, (mean_curvatures, _) in curvature_data.items():
-    ax[0].plot(range(len(mean_curvatures)), mean_curvatures, label=file_path)
-ax[0].set_title("Mean Curvature Comparison")
-ax[0].set_xlabel("Face Index")
-ax[0].set_ylabel("Mean Curvature")
-ax[0].legend()
-
-# Plot Gaussian Curvature for each file
-for file_path, (_, gaussian_curvatures) in curvature_data.items():
-    ax[1].plot(range(len(gaussian_curvatures)), gaussian_curvatures, label=file_path)
-ax[1].set_title("Gaussian Curvature Comparison")
-ax[1].set_xlabel("Face Index")
-ax[1].set_ylabel("Gaussian Curvature")
-ax[1].legend()
-
-# Adjust layout and show plots
-plt.tight_layout()
-plt.show()
+def curvature_statistics(step_file_path, grid=None, adaptive=False):
+    """
+    Reduces the face curvatures of a STEP file to mergeable statistics.
+
+    :param step_file_path: Path to the STEP file.
+    :param grid: UV grid per face, as in `curvature_analysis`.
+    :param adaptive: Refine the grid where the curvature varies.
+    :return: Dictionary with the file name and, for each of `CURVATURE_QUANTITIES`, the
+        running moments and quantile sketch of the face values as plain dictionaries.
+    """
+    record = {"File Name": os.path.basename(step_file_path)}
+    for name, values in zip(CURVATURE_QUANTITIES, curvature_analysis(step_file_path, grid, adaptive)):
+        moments, sketch = RunningMoments(), QuantileSketch()
+        moments.add_array(values)
+        sketch.add_array(values)
+        record[name] = {"moments": moments.to_dict(), "sketch": sketch.to_dict()}
+    return record
+
+def corpus_curvature_statistics(file_paths, workers=None, timeout=DEFAULT_TIMEOUT, grid=None, adaptive=False):
+    """
+    Aggregates the face curvatures of many STEP files in constant memory.
+
+    Each file is reduced to moments and quantile sketches in a worker process; the results
+    are merged exactly as they arrive, so memory does not grow with the number of faces.
+
+    :param file_paths: Paths to the STEP files.
+    :param workers: Number of worker processes. Defaults to the CPU count.
+    :param timeout: Wall-clock limit per file, in seconds.
+    :param grid: UV grid per face, as in `curvature_analysis`.
+    :param adaptive: Refine the grid where the curvature varies.
+    :return: Dictionary mapping each of `CURVATURE_QUANTITIES` to its merged
+        (RunningMoments, QuantileSketch), plus "files" and "failed" counts.
+    """
+    corpus = {name: (RunningMoments(), QuantileSketch()) for name in CURVATURE_QUANTITIES}
+    corpus["files"] = corpus["failed"] = 0
+    analyze = partial(curvature_statistics, grid=grid, adaptive=adaptive)
+    for record in run_batch(file_paths, analyze, workers, timeout):
+        if "Error" in record:
+            print(f"Curvature analysis failed for {record['File Name']} file: {record['Error']}")
+            corpus["failed"] += 1
+            continue
+        corpus["files"] += 1
+        for name in CURVATURE_QUANTITIES:
+            moments, sketch = corpus[name]
+            moments.merge(RunningMoments.from_dict(record[name]["moments"]))
+            sketch.merge(QuantileSketch.from_dict(record[name]["sketch"]))
+    return corpus
+
+def format_corpus_curvature(corpus, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """
+    Formats the result of `corpus_curvature_statistics` as a readable report.
+
+    :param corpus: Result of `corpus_curvature_statistics`.
+    :param quantiles: Quantiles to report.
+    :return: Multi-line report.
+    """
+    lines = [f"{corpus['files']} files ({corpus['failed']} failed)"]
+    for name in CURVATURE_QUANTITIES:
+        moments, sketch = corpus[name]
+        stats = moments.statistics()
+        lines.append(f"{name}: {stats['count']} faces ({stats['undefined']} undefined), "
+                     f"mean {stats['mean']:.6g}, std {stats['std']:.6g}, min {stats['min']:.6g}, max {stats['max']:.6g}")
+        lines.append("    " + ", ".join(f"p{q * 100:g} {value:.6g}" for q, value in sketch.quantiles(quantiles).items()))
+    return "\n".join(lines)
+
+def plot_curvatures(curvature_data):
+    """
+    Plots the mean and Gaussian curvature of every face for several STEP files.
+
+    :param curvature_data: Dictionary mapping each file path to its (mean curvatures, Gaussian curvatures).
+    """
+    import matplotlib.pyplot as plt  # Only needed for plotting
+
+    # Visualize curvature comparisons using Matplotlib
+    fig, ax = plt.subplots(2, 1, figsize=(14, 10))
+
+    # Plot Mean Curvature for each file
+    for file_path, (mean_curvatures, _) in curvature_data.items():
+        ax[0].plot(range(len(mean_curvatures)), mean_curvatures, label=file_path)
+    ax[0].set_title("Mean Curvature Comparison")
+    ax[0].set_xlabel("Face Index")
+    ax[0].set_ylabel("Mean Curvature")
+    ax[0].legend()
+
+    # Plot Gaussian Curvature for each file
+    for file_path, (_, gaussian_curvatures) in curvature_data.items():
+        ax[1].plot(range(len(gaussian_curvatures)), gaussian_curvatures, label=file_path)
+    ax[1].set_title("Gaussian Curvature Comparison")
+    ax[1].set_xlabel("Face Index")
+    ax[1].set_ylabel("Gaussian Curvature")
+    ax[1].legend()
+
+    # Adjust layout and show plots
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == "__main__":
+    # List of STEP files to analyze (Modify paths as needed)
+    file_paths = [
+        'abc_0000_data/abc_00000001.step',
+        'abc_0000_data/abc_00000002.step',
+        'abc_0000_data/abc_00000003.step',
+        'abc_0000_data/abc_00000004.step',
+        'abc_0000_data/abc_00000005.step',
+        'abc_0000_data/abc_00000006.step',
+        'abc_0000_data/abc_00000007.step',
+        'abc_0000_data/abc_00000008.step'
+    ]
+
+    # Dictionary to store curvature data for each file
+    curvature_data = {}
+
+    # Process each file and store curvature results
+    for file_path in file_paths:
+        mean_curvatures, gaussian_curvatures = curvature_analysis(file_path)
+        curvature_data[file_path] = (mean_curvatures, gaussian_curvatures)
+
+    # Print curvature values for a specific file
+    print(curvature_data['abc_0000_data/abc_00000004.step'])
+
+    plot_curvatures(curvature_data)
@@ -0,0 +1,316 @@
+"""
+Curvature Field Sampling
+
+This module samples the curvature of every face over its whole UV domain instead of only at
+the UV midpoint, and returns area-weighted statistics per face and per part.
+
+- Each face's UV domain is split into a `grid` x `grid` array of cells, sampled at the cell
+  centres (midpoint rule). Every sample is weighted by the surface area element
+  |dS/du x dS/dv| du dv, so the statistics are area-weighted.
+- The UV domain is the bounding rectangle of the face. Samples outside the trimmed face (in
+  holes or beyond the trim curves) are dropped with `BRepTopAdaptor_FClass2d`, and the weights
+  are scaled so that they add up to the exact face area (`brepgprop.SurfaceProperties`). When
+  no cell centre lies inside a narrow face, the grid is doubled until one does.
+- In adaptive mode each cell is sampled at its four quarter centres. Cells in which the mean
+  curvature varies by more than `tolerance` (relative), or which straddle the face boundary,
+  are split into four and refined again, up to `max_depth` times. Flat or uniformly curved
+  regions stay coarse; fillets, blends, free-form regions and trim curves get more samples.
+- A single `BRepLProp_SLProps` object is reused per face and the samples are written straight
+  into NumPy arrays. Planes and cylinders have constant curvature, so they are evaluated once
+  and weighted by the face area.
+- The part statistics are merged face by face into running moments (see `online_stats`), so
+  the samples of a face are released once its statistics are computed.
+
+Curvature signs follow the parametric surface normal, as in `analysis_pipeline.curvature_summary`.
+"""
+
+import numpy as np
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
+from OCC.Core.BRepGProp import brepgprop
+from OCC.Core.BRepLProp import BRepLProp_SLProps
+from OCC.Core.BRepTopAdaptor import BRepTopAdaptor_FClass2d
+from OCC.Core.GeomAbs import GeomAbs_Plane, GeomAbs_Cylinder
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_OUT
+from OCC.Core.gp import gp_Pnt2d
+from scripts.online_stats import RunningMoments
+
+# Default number of UV cells per direction
+DEFAULT_GRID = 5
+
+# Smallest curvature magnitude the adaptive refinement compares against, in 1/length
+CURVATURE_FLOOR = 1e-3
+
+# Largest grid tried when no cell centre of a face lies inside the trimmed face
+MAX_FALLBACK_GRID = 64
+
+# Surface types whose curvature does not depend on (u, v)
+_CONSTANT_SURFACES = (GeomAbs_Plane, GeomAbs_Cylinder)
+
+
+class CurvatureSamples:
+    """
+    Curvature samples of one face (or of a whole part), stored as parallel NumPy arrays.
+
+    Attributes:
+        mean (ndarray): Mean curvature H at each sample.
+        gaussian (ndarray): Gaussian curvature K at each sample.
+        max_principal (ndarray): Maximum principal curvature k1 at each sample.
+        min_principal (ndarray): Minimum principal curvature k2 at each sample.
+        weights (ndarray): Surface area represented by each sample.
+    """
+
+    def __init__(self, mean, gaussian, max_principal, min_principal, weights):
+        self.mean = mean
+        self.gaussian = gaussian
+        self.max_principal = max_principal
+        self.min_principal = min_principal
+        self.weights = weights
+
+    @classmethod
+    def concatenate(cls, samples):
+        """Merges the samples of several faces into one set."""
+        samples = list(samples)
+        if not samples:
+            empty = np.empty(0)
+            return cls(empty, empty, empty, empty, empty)
+        return cls(*(np.concatenate([getattr(s, name) for s in samples])
+                     for name in ("mean", "gaussian", "max_principal", "min_principal", "weights")))
+
+    def statistics(self):
+        """
+        Computes the area-weighted curvature statistics of the samples.
+
+        Returns:
+            dict: Area, weighted means of H, K, k1 and k2, and the weighted std dev of H.
+                Statistics are NaN when no sample has a defined curvature.
+        """
+        area = float(self.weights.sum())
+        if area <= 0:
+            nan = float("nan")
+            return {"area": area, "mean": nan, "mean_std": nan, "gaussian": nan,
+                    "max_principal": nan, "min_principal": nan, "samples": 0}
+        mean = float(np.average(self.mean, weights=self.weights))
+        return {
+            "area": area,
+            "mean": mean,
+            "mean_std": float(np.sqrt(np.average((self.mean - mean) ** 2, weights=self.weights))),
+            "gaussian": float(np.average(self.gaussian, weights=self.weights)),
+            "max_principal": float(np.average(self.max_principal, weights=self.weights)),
+            "min_principal": float(np.average(self.min_principal, weights=self.weights)),
+            "samples": int(np.count_nonzero(self.weights)),
+        }
+
+
+def _evaluate(props, us, vs, cell_areas, out, offset):
+    # Evaluates the samples (us[i], vs[i]) into the arrays of `out`, starting at `offset`
+    mean, gaussian, max_principal, min_principal, weights = out
+    for i, (u, v) in enumerate(zip(us, vs)):
+        props.SetParameters(u, v)
+        j = offset + i
+        if not props.IsCurvatureDefined():
+            weights[j] = 0.0
+            continue
+        jacobian = props.D1U().Crossed(props.D1V()).Magnitude()
+        mean[j] = props.MeanCurvature()
+        gaussian[j] = props.GaussianCurvature()
+        max_principal[j] = props.MaxCurvature()
+        min_principal[j] = props.MinCurvature()
+        weights[j] = jacobian * cell_areas[i]
+
+
+def _grid_centres(u_min, u_max, v_min, v_max, grid):
+    du, dv = (u_max - u_min) / grid, (v_max - v_min) / grid
+    us = u_min + (np.arange(grid) + 0.5) * du
+    vs = v_min + (np.arange(grid) + 0.5) * dv
+    uu, vv = np.meshgrid(us, vs, indexing="ij")
+    return uu.ravel(), vv.ravel(), np.full(grid * grid, du * dv)
+
+
+def _allocate(size):
+    return tuple(np.zeros(size) for _ in range(5))
+
+
+def _inside(classifier, us, vs):
+    # True for the (u, v) points inside the trimmed face or on its boundary
+    return np.array([classifier.Perform(gp_Pnt2d(float(u), float(v))) != TopAbs_OUT for u, v in zip(us, vs)],
+                    dtype=bool)
+
+
+def _face_area(face):
+    props = GProp_GProps()
+    brepgprop.SurfaceProperties(face, props)
+    return props.Mass()
+
+
+def _scale_to_area(samples, area):
+    # The midpoint rule over the cells inside the face approximates its area; scale the weights
+    # to the exact area while keeping their proportions
+    total = samples.weights.sum()
+    if total > 0 and area > 0:
+        samples.weights = samples.weights * (area / total)
+    return samples
+
+
+# Function to sample the curvature field of one face
+def sample_face_curvature(face, surface=None, grid=DEFAULT_GRID, adaptive=False, tolerance=0.1, max_depth=3,
+                          area=None):
+    """
+    Samples the curvature of a face over its trimmed UV domain.
+
+    Args:
+        face (TopoDS_Face): Face to sample.
+        surface (BRepAdaptor_Surface, optional): Adaptor of the face, if already built.
+        grid (int): Number of UV cells per direction.
+        adaptive (bool): Refine the cells where the curvature varies (see the module docstring).
+        tolerance (float): Relative variation of the mean curvature that triggers refinement.
+        max_depth (int): Maximum number of refinements of an initial cell.
+        area (float, optional): Area of the face, if already computed.
+
+    Returns:
+        CurvatureSamples: Area-weighted curvature samples of the face. The weights add up to the
+            face area, unless the curvature is undefined at every sample.
+    """
+    surface = surface or BRepAdaptor_Surface(face)
+    u_min, u_max = surface.FirstUParameter(), surface.LastUParameter()
+    v_min, v_max = surface.FirstVParameter(), surface.LastVParameter()
+    props = BRepLProp_SLProps(surface, 2, 1e-6)
+    area = _face_area(face) if area is None else area
+
+    if surface.GetType() in _CONSTANT_SURFACES:
+        # One evaluation describes the whole face, weighted by its exact area
+        out = _allocate(1)
+        _evaluate(props, [(u_min + u_max) / 2], [(v_min + v_max) / 2], [1.0], out, 0)
+        return _scale_to_area(CurvatureSamples(*out), area)
+
+    # Refine the grid until at least one cell centre lies inside the trimmed face
+    classifier = BRepTopAdaptor_FClass2d(face, BRep_Tool.Tolerance(face))
+    while True:
+        us, vs, cell_areas = _grid_centres(u_min, u_max, v_min, v_max, grid)
+        inside = _inside(classifier, us, vs)
+        if inside.any() or grid >= MAX_FALLBACK_GRID:
+            break
+        grid *= 2
+
+    if not adaptive:
+        us, vs, cell_areas = us[inside], vs[inside], cell_areas[inside]
+        out = _allocate(len(us))
+        _evaluate(props, us, vs, cell_areas, out, 0)
+        return _scale_to_area(CurvatureSamples(*out), area)
+
+    # Adaptive mode: every pending cell is sampled at its four quarter centres
+    samples = []
+    du, dv = (u_max - u_min) / grid, (v_max - v_min) / grid
+    pending = [(u_min + i * du, v_min + j * dv, du, dv, 0) for i in range(grid) for j in range(grid)]
+    while pending:
+        cells = np.array([cell[:4] for cell in pending])
+        offsets = np.array([[0.25, 0.25], [0.25, 0.75], [0.75, 0.25], [0.75, 0.75]])
+        us = (cells[:, None, 0] + offsets[None, :, 0] * cells[:, None, 2]).ravel()
+        vs = (cells[:, None, 1] + offsets[None, :, 1] * cells[:, None, 3]).ravel()
+        cell_areas = np.repeat(cells[:, 2] * cells[:, 3] / 4, 4)
+        inside = _inside(classifier, us, vs)
+        out = _allocate(len(us))
+        _evaluate(props, us, vs, cell_areas, out, 0)
+
+        # Relative spread of the mean curvature over the samples of each cell inside the face
+        cell_inside = inside.reshape(-1, 4)
+        cell_mean = out[0].reshape(-1, 4)
+        highest = np.where(cell_inside, cell_mean, -np.inf).max(axis=1)
+        spread = highest - np.where(cell_inside, cell_mean, np.inf).min(axis=1)
+        scale = np.maximum(np.abs(np.where(cell_inside, cell_mean, 0.0)).max(axis=1), CURVATURE_FLOOR)
+        depths = np.array([cell[4] for cell in pending])
+        straddles = cell_inside.any(axis=1) & ~cell_inside.all(axis=1)
+        refine = ((spread > tolerance * scale) | straddles) & (depths < max_depth)
+
+        keep = np.repeat(~refine, 4) & inside
+        samples.append(CurvatureSamples(*(array[keep] for array in out)))
+
+        next_pending = []
+        for (u0, v0, cu, cv, depth) in (cell for cell, split in zip(pending, refine) if split):
+            half_u, half_v = cu / 2, cv / 2
+            next_pending.extend([
+                (u0, v0, half_u, half_v, depth + 1),
+                (u0, v0 + half_v, half_u, half_v, depth + 1),
+                (u0 + half_u, v0, half_u, half_v, depth + 1),
+                (u0 + half_u, v0 + half_v, half_u, half_v, depth + 1),
+            ])
+        pending = next_pending
+
+    return _scale_to_area(CurvatureSamples.concatenate(samples), area)
+
+
+# Function to sample the curvature field of every face of a shape
+def shape_curvature_field(shape, grid=DEFAULT_GRID, adaptive=False, tolerance=0.1, max_depth=3):
+    """
+    Samples the curvature field of every face of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        grid (int): Number of UV cells per direction.
+        adaptive (bool): Refine the cells where the curvature varies.
+        tolerance (float): Relative variation of the mean curvature that triggers refinement.
+        max_depth (int): Maximum number of refinements of an initial cell.
+
+    Returns:
+        tuple: (face_statistics, part_statistics) where `face_statistics` lists the statistics
+            of each face in explorer order and `part_statistics` covers all samples of the shape.
+    """
+    face_statistics = []
+    moments = {name: RunningMoments() for name in ("mean", "gaussian", "max_principal", "min_principal")}
+    explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    while explorer.More():
+        samples = sample_face_curvature(explorer.Current(), None, grid, adaptive, tolerance, max_depth)
+        face_statistics.append(samples.statistics())
+        for name, running in moments.items():
+            running.add_array(getattr(samples, name), samples.weights)
+        explorer.Next()
+
+    return face_statistics, _part_statistics(moments)
+
+
+def _part_statistics(moments):
+    # Same layout as `CurvatureSamples.statistics`, from the moments merged over all faces
+    mean = moments["mean"]
+    return {
+        "area": mean.weight,
+        "mean": mean.statistics()["mean"],
+        "mean_std": mean.std,
+        "gaussian": moments["gaussian"].statistics()["mean"],
+        "max_principal": moments["max_principal"].statistics()["mean"],
+        "min_principal": moments["min_principal"].statistics()["mean"],
+        "samples": mean.count,
+    }
+
+
+# Function to merge the curvature fields of several disjoint shapes
+def merge_curvature_fields(fields):
+    """
+    Merges the results of `shape_curvature_field` for several shapes, e.g. the roots of an
+    assembly, into the result for all of them.
+
+    The part means are combined weighted by sampled area, and the standard deviation of the
+    mean curvature with Chan's formula, so the result matches sampling the shapes together.
+
+    Args:
+        fields (iterable of tuple): (face_statistics, part_statistics) of each shape.
+
+    Returns:
+        tuple: (face_statistics, part_statistics) of all the shapes.
+    """
+    face_statistics = []
+    moments = {name: RunningMoments() for name in ("mean", "gaussian", "max_principal", "min_principal")}
+    for faces, part in fields:
+        face_statistics.extend(faces)
+        if not part["area"] > 0:
+            continue
+        for name, running in moments.items():
+            if np.isnan(part[name]):
+                continue
+            other = RunningMoments()
+            other.count, other.weight, other.mean = part["samples"], part["area"], part[name]
+            if name == "mean":
+                other.m2 = part["mean_std"] ** 2 * part["area"]
+            running.merge(other)
+    return face_statistics, _part_statistics(moments)
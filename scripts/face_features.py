@@ -0,0 +1,240 @@
+"""
+Per-Face Feature Tables
+
+This module exports one fixed-size record per face into a NumPy structured array, for training
+models on face-level data instead of the hand thresholds of `Complexity_analysis`.
+
+A feature table is a folder holding:
+
+    faces.bin       Raw records of all parts, back to back (dtype `FACE_DTYPE`)
+    offsets.npy     int64 array; the faces of part i are faces[offsets[i]:offsets[i + 1]]
+    meta.json       Record layout, face count, part file names and surface type names
+
+`load_face_features` memory-maps `faces.bin`, so a loader reads millions of faces without
+copying them or building Python rows. Slicing a part or selecting a column returns a view.
+
+Each record holds the part index, the surface type (an index into `meta["surface_types"]`),
+whether the face is reversed, the face area, its UV bounds, the mean and Gaussian curvature
+and the number of neighbouring faces (faces sharing an edge with it).
+"""
+
+import os
+import json
+from functools import partial
+import numpy as np
+from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
+from OCC.Core.BRepGProp import brepgprop
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.TopAbs import TopAbs_REVERSED
+from OCC.Core.TopoDS import topods
+from scripts.analysis_pipeline import load_step_shape
+from scripts.batch_analysis import DEFAULT_TIMEOUT, run_batch
+from scripts.curvature_field import sample_face_curvature
+from scripts.topology import SURFACE_TYPE_NAMES, edge_face_incidence, face_neighbour_pairs
+
+# Version of the table layout, stored in meta.json
+FEATURE_VERSION = 1
+
+# Surface type names, indexed by the "surface_type" field
+SURFACE_TYPES = list(SURFACE_TYPE_NAMES.values())
+_SURFACE_TYPE_CODES = {surface_type: code for code, surface_type in enumerate(SURFACE_TYPE_NAMES)}
+
+# Layout of one face record (packed, little-endian)
+FACE_DTYPE = np.dtype([
+    ("part", "<u4"),
+    ("surface_type", "u1"),
+    ("reversed", "u1"),
+    ("degree", "<u2"),
+    ("area", "<f8"),
+    ("u_min", "<f4"),
+    ("u_max", "<f4"),
+    ("v_min", "<f4"),
+    ("v_max", "<f4"),
+    ("mean_curvature", "<f4"),
+    ("gaussian_curvature", "<f4"),
+])
+
+
+# Function to compute the feature records of all faces of a shape
+def shape_face_features(shape, curvature_grid=1):
+    """
+    Computes one feature record per distinct face of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        curvature_grid (int): UV cells per direction used to sample the curvature. 1 samples
+            the UV midpoint only, or the first finer grid with a sample inside the trimmed face;
+            larger grids give area-weighted averages.
+
+    Returns:
+        ndarray: Records of dtype `FACE_DTYPE`, in `edge_face_incidence` face order. The "part"
+            field is left at 0.
+    """
+    faces, _, edge_index, face_index = edge_face_incidence(shape)
+    records = np.zeros(faces.Size(), dtype=FACE_DTYPE)
+
+    pairs = face_neighbour_pairs(edge_index, face_index)
+    records["degree"] = np.bincount(pairs.ravel(), minlength=len(records))
+
+    props = GProp_GProps()
+    for index in range(len(records)):
+        face = topods.Face(faces.FindKey(index + 1))
+        surface = BRepAdaptor_Surface(face)
+        brepgprop.SurfaceProperties(face, props)
+        statistics = sample_face_curvature(face, surface, grid=curvature_grid, area=props.Mass()).statistics()
+
+        record = records[index]
+        record["surface_type"] = _SURFACE_TYPE_CODES.get(surface.GetType(), len(SURFACE_TYPES) - 1)
+        record["reversed"] = face.Orientation() == TopAbs_REVERSED
+        record["area"] = props.Mass()
+        record["u_min"], record["u_max"] = surface.FirstUParameter(), surface.LastUParameter()
+        record["v_min"], record["v_max"] = surface.FirstVParameter(), surface.LastVParameter()
+        record["mean_curvature"] = statistics["mean"]
+        record["gaussian_curvature"] = statistics["gaussian"]
+
+    return records
+
+
+# Function to compute the face feature records of a STEP file
+def file_face_features(file_path, curvature_grid=1):
+    """
+    Loads a STEP file and computes the feature records of its faces.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        curvature_grid (int): UV cells per direction used to sample the curvature.
+
+    Returns:
+        dict: "File Name" and "Faces", the records of the file. Runs in batch workers.
+    """
+    records = shape_face_features(load_step_shape(file_path), curvature_grid)
+    return {"File Name": os.path.basename(file_path), "Faces": records}
+
+
+class FaceFeatureWriter:
+    """
+    Appends the face records of parts to a feature table folder.
+
+    Args:
+        root (str): Folder of the table. An existing table is overwritten.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.parts = []
+        self._offsets = [0]
+        self._file = open(os.path.join(root, "faces.bin"), 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def faces_written(self):
+        """Number of face records written so far."""
+        return self._offsets[-1]
+
+    def write(self, file_name, records):
+        """
+        Appends the records of one part.
+
+        Args:
+            file_name (str): Name of the part's STEP file.
+            records (ndarray): Face records of dtype `FACE_DTYPE`.
+        """
+        records = np.asarray(records, dtype=FACE_DTYPE).copy()
+        records["part"] = len(self.parts)
+        records.tofile(self._file)
+        self.parts.append(file_name)
+        self._offsets.append(self._offsets[-1] + len(records))
+
+    def close(self):
+        """
+        Writes the offsets and metadata and closes the table.
+        """
+        if self._file.closed:
+            return
+        self._file.close()
+        np.save(os.path.join(self.root, "offsets.npy"), np.array(self._offsets, dtype=np.int64))
+        meta = {
+            "version": FEATURE_VERSION,
+            "dtype": [list(field) for field in FACE_DTYPE.descr],
+            "count": self._offsets[-1],
+            "parts": self.parts,
+            "surface_types": SURFACE_TYPES,
+        }
+        with open(os.path.join(self.root, "meta.json"), 'w') as file:
+            json.dump(meta, file, indent=2)
+
+
+# Function to export the face features of many STEP files
+def export_face_features(file_paths, root, workers=None, timeout=DEFAULT_TIMEOUT, curvature_grid=1):
+    """
+    Computes the face records of STEP files in worker processes and writes them to a table.
+
+    Parts are stored in the order they finish. Files that fail are reported and left out.
+
+    Args:
+        file_paths (iterable of str): Paths to the STEP files.
+        root (str): Folder of the feature table.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        timeout (float, optional): Wall-clock limit per file, in seconds.
+        curvature_grid (int): UV cells per direction used to sample the curvature.
+
+    Returns:
+        int: Number of faces written.
+    """
+    analyze = partial(file_face_features, curvature_grid=curvature_grid)
+    with FaceFeatureWriter(root) as writer:
+        for row in run_batch(file_paths, analyze, workers, timeout):
+            if "Error" in row:
+                print(f"Face export failed for {row['File Name']} file: {row['Error']}")
+                continue
+            writer.write(row["File Name"], row["Faces"])
+        return writer.faces_written
+
+
+# Function to open a feature table without reading it into memory
+def load_face_features(root, mmap=True):
+    """
+    Opens a feature table.
+
+    Args:
+        root (str): Folder of the table.
+        mmap (bool): Memory-map the records instead of reading them.
+
+    Returns:
+        tuple: (faces, offsets, meta) where `faces` is a structured array (a read-only memmap
+            if `mmap`), `offsets` the int64 part offsets and `meta` the table metadata.
+    """
+    with open(os.path.join(root, "meta.json"), 'r') as file:
+        meta = json.load(file)
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+    path = os.path.join(root, "faces.bin")
+    if meta["count"] == 0:
+        faces = np.zeros(0, dtype=dtype)
+    elif mmap:
+        faces = np.memmap(path, dtype=dtype, mode='r', shape=(meta["count"],))
+    else:
+        faces = np.fromfile(path, dtype=dtype, count=meta["count"])
+    offsets = np.load(os.path.join(root, "offsets.npy"), mmap_mode='r' if mmap else None)
+    return faces, offsets, meta
+
+
+# Function to get the faces of one part of a feature table
+def part_faces(faces, offsets, part):
+    """
+    Returns the records of one part as a view, without copying.
+
+    Args:
+        faces (ndarray): Records returned by `load_face_features`.
+        offsets (ndarray): Offsets returned by `load_face_features`.
+        part (int): Index of the part in `meta["parts"]`.
+
+    Returns:
+        ndarray: Face records of the part.
+    """
+    return faces[offsets[part]:offsets[part + 1]]
@@ -0,0 +1,288 @@
+"""
+Face Adjacency Graph
+
+This module builds the face adjacency graph of a shape: one node per face, one undirected edge
+between two faces that share at least one topological edge. Flat face and edge counts do not
+capture how faces connect; the graph does.
+
+- The graph is built from one `topexp.MapShapesAndAncestors` pass (see
+  `topology.edge_face_incidence`). The face pairs are formed per shared edge and deduplicated
+  with NumPy sorting, so no pairwise face checks are needed and the cost stays near linear in
+  the number of edges.
+- The graph is stored in CSR form (`indptr`, `indices`), with both directions of every pair, as
+  used by `scipy.sparse.csr_matrix`.
+- Every pair carries the number of shared edges, the mean dihedral angle across them and a
+  convexity label: convex, concave, smooth (tangent faces), mixed (the shared edges disagree)
+  or unknown (seam or non-manifold edges, undefined normals).
+- `FaceGraph.statistics` reports the degree distribution, the number of connected components,
+  the cycle rank (independent cycles, edges - faces + components) and the convexity counts.
+
+Convexity is measured at the midpoint of each shared edge from the outward face normals n1, n2
+and the edge tangent t, oriented as in the wire of the first face: the edge is convex when
+(n1 x n2) . t > 0.
+"""
+
+import math
+import numpy as np
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepAdaptor import BRepAdaptor_Surface, BRepAdaptor_Curve, BRepAdaptor_Curve2d
+from OCC.Core.BRepLProp import BRepLProp_SLProps
+from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_REVERSED
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopoDS import topods
+from OCC.Core.gp import gp_Pnt, gp_Vec
+from scripts.topology import edge_face_incidence, face_neighbour_pairs
+
+# Convexity labels of a face pair
+CONCAVE, CONVEX, SMOOTH, MIXED, UNKNOWN = range(5)
+CONVEXITY_NAMES = ("concave", "convex", "smooth", "mixed", "unknown")
+
+# Dihedral angles below this are treated as tangent (smooth) transitions, in radians
+SMOOTH_ANGLE = math.radians(1.0)
+
+
+class FaceGraph:
+    """
+    Face adjacency graph of a shape in CSR form.
+
+    Attributes:
+        face_count (int): Number of faces (nodes).
+        indptr (ndarray): CSR row pointers, int64 of length `face_count + 1`.
+        indices (ndarray): CSR column indices: the neighbours of face i are
+            `indices[indptr[i]:indptr[i + 1]]`, in increasing order.
+        convexity (ndarray): uint8 convexity label of each CSR entry (`CONVEXITY_NAMES`).
+        dihedral (ndarray): float64 mean dihedral angle of each CSR entry, in radians
+            (NaN when unknown).
+        shared_edges (ndarray): int32 number of edges shared by each CSR entry's faces.
+    """
+
+    def __init__(self, face_count, indptr, indices, convexity, dihedral, shared_edges):
+        self.face_count = face_count
+        self.indptr = indptr
+        self.indices = indices
+        self.convexity = convexity
+        self.dihedral = dihedral
+        self.shared_edges = shared_edges
+
+    @classmethod
+    def concatenate(cls, graphs):
+        """
+        Merges the graphs of disjoint shapes into one graph, renumbering the faces in order.
+        """
+        graphs = list(graphs)
+        if not graphs:
+            return cls(0, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8),
+                       np.zeros(0), np.zeros(0, dtype=np.int32))
+        offsets = np.cumsum([0] + [graph.face_count for graph in graphs])
+        entries = np.cumsum([0] + [len(graph.indices) for graph in graphs])
+        indptr = np.concatenate([graphs[0].indptr[:1]]
+                                + [graph.indptr[1:] + entries[i] for i, graph in enumerate(graphs)])
+        return cls(
+            int(offsets[-1]),
+            indptr.astype(np.int64),
+            np.concatenate([graph.indices + offsets[i] for i, graph in enumerate(graphs)]).astype(np.int64),
+            np.concatenate([graph.convexity for graph in graphs]),
+            np.concatenate([graph.dihedral for graph in graphs]),
+            np.concatenate([graph.shared_edges for graph in graphs]),
+        )
+
+    @property
+    def pair_count(self):
+        """Number of adjacent face pairs (undirected graph edges)."""
+        return len(self.indices) // 2
+
+    @property
+    def degree(self):
+        """Number of neighbours of each face."""
+        return np.diff(self.indptr)
+
+    def neighbours(self, face):
+        """Returns the neighbours of a face as a view into `indices`."""
+        return self.indices[self.indptr[face]:self.indptr[face + 1]]
+
+    def to_scipy(self, values="shared_edges"):
+        """
+        Returns the graph as a `scipy.sparse.csr_matrix` holding one of the pair attributes.
+        """
+        from scipy.sparse import csr_matrix  # Optional dependency
+        return csr_matrix((getattr(self, values), self.indices, self.indptr),
+                          shape=(self.face_count, self.face_count))
+
+    def save(self, path):
+        """
+        Saves the graph to a `.npz` file that `load_face_graph` can read.
+        """
+        np.savez_compressed(path, face_count=self.face_count, indptr=self.indptr, indices=self.indices,
+                            convexity=self.convexity, dihedral=self.dihedral, shared_edges=self.shared_edges)
+
+    def components(self):
+        """
+        Labels the connected components of the graph.
+
+        Returns:
+            ndarray: Component label of each face, numbered from 0.
+        """
+        parent = np.arange(self.face_count)
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        rows = np.repeat(np.arange(self.face_count), self.degree)
+        upper = rows < self.indices
+        for a, b in zip(rows[upper], self.indices[upper]):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        roots = np.array([find(node) for node in range(self.face_count)], dtype=np.int64)
+        return np.unique(roots, return_inverse=True)[1]
+
+    def statistics(self):
+        """
+        Computes summary statistics of the graph.
+
+        Returns:
+            dict: Face and pair counts, degree statistics and histogram, connected component
+                count, cycle rank, isolated faces and the number of pairs of each convexity.
+        """
+        degree = self.degree
+        components = len(np.unique(self.components())) if self.face_count else 0
+        upper = np.repeat(np.arange(self.face_count), degree) < self.indices
+        convexity_counts = np.bincount(self.convexity[upper], minlength=len(CONVEXITY_NAMES))
+        return {
+            "faces": self.face_count,
+            "pairs": self.pair_count,
+            "mean_degree": float(degree.mean()) if self.face_count else 0.0,
+            "max_degree": int(degree.max()) if self.face_count else 0,
+            "degree_histogram": np.bincount(degree).tolist(),
+            "components": components,
+            "cycle_rank": self.pair_count - self.face_count + components,
+            "isolated_faces": int(np.count_nonzero(degree == 0)),
+            **{name: int(count) for name, count in zip(CONVEXITY_NAMES, convexity_counts)},
+        }
+
+
+# Function to load a face graph saved with `FaceGraph.save`
+def load_face_graph(path):
+    """
+    Loads a face graph saved with `FaceGraph.save`.
+
+    Args:
+        path (str): Path to the `.npz` file.
+
+    Returns:
+        FaceGraph: The loaded graph.
+    """
+    with np.load(path) as data:
+        return FaceGraph(int(data["face_count"]), data["indptr"], data["indices"], data["convexity"],
+                         data["dihedral"], data["shared_edges"])
+
+
+def _outward_normal(face, surface, uv):
+    props = BRepLProp_SLProps(surface, uv.X(), uv.Y(), 1, 1e-6)
+    if not props.IsNormalDefined():
+        return None
+    normal = gp_Vec(props.Normal())
+    return normal.Reversed() if face.Orientation() == TopAbs_REVERSED else normal
+
+
+def _edge_convexity(edge, face_a, surface_a, face_b, surface_b):
+    # `edge` is oriented as in the wire of `face_a`; returns (label, dihedral angle)
+    if BRep_Tool.Degenerated(edge):
+        return UNKNOWN, math.nan
+    curve = BRepAdaptor_Curve(edge)
+    t = (curve.FirstParameter() + curve.LastParameter()) / 2
+    point, tangent = gp_Pnt(), gp_Vec()
+    curve.D1(t, point, tangent)
+    if tangent.Magnitude() < 1e-12:
+        return UNKNOWN, math.nan
+    if edge.Orientation() == TopAbs_REVERSED:
+        tangent.Reverse()
+
+    normal_a = _outward_normal(face_a, surface_a, BRepAdaptor_Curve2d(edge, face_a).Value(t))
+    normal_b = _outward_normal(face_b, surface_b, BRepAdaptor_Curve2d(edge, face_b).Value(t))
+    if normal_a is None or normal_b is None:
+        return UNKNOWN, math.nan
+
+    cross = normal_a.Crossed(normal_b)
+    angle = math.atan2(cross.Magnitude(), normal_a.Dot(normal_b))
+    if angle < SMOOTH_ANGLE:
+        return SMOOTH, angle
+    return (CONVEX if cross.Dot(tangent) > 0 else CONCAVE), angle
+
+
+# Function to build the face adjacency graph of a shape
+def build_face_graph(shape):
+    """
+    Builds the face adjacency graph of a shape.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+
+    Returns:
+        FaceGraph: Graph with one node per distinct face, in `edge_face_incidence` face order.
+    """
+    faces, edges, edge_index, face_index = edge_face_incidence(shape)
+    face_count = faces.Size()
+
+    # Oriented edges of each face, to read the edge direction in the wire of its first face
+    oriented = {}
+    surfaces = []
+    explorer = TopExp_Explorer()
+    for face_number in range(face_count):
+        face = topods.Face(faces.FindKey(face_number + 1))
+        surfaces.append((face, BRepAdaptor_Surface(face)))
+        explorer.Init(face, TopAbs_EDGE)
+        while explorer.More():
+            oriented.setdefault((edges.FindIndex(explorer.Current()) - 1, face_number), topods.Edge(explorer.Current()))
+            explorer.Next()
+
+    # Convexity of every manifold edge (an edge used by exactly two faces)
+    starts = np.flatnonzero(np.r_[True, edge_index[1:] != edge_index[:-1]]) if len(edge_index) else np.empty(0, int)
+    counts = np.diff(np.r_[starts, len(edge_index)])
+    manifold = starts[counts == 2]
+    first, second = face_index[manifold], face_index[manifold + 1]
+    labels = np.empty(len(manifold), dtype=np.uint8)
+    angles = np.empty(len(manifold))
+    for i, (edge_number, a, b) in enumerate(zip(edge_index[manifold], first, second)):
+        face_a, surface_a = surfaces[a]
+        face_b, surface_b = surfaces[b]
+        labels[i], angles[i] = _edge_convexity(oriented[(edge_number, a)], face_a, surface_a, face_b, surface_b)
+
+    # Aggregate the edges of every face pair: sort by pair key and reduce per group
+    pairs = face_neighbour_pairs(edge_index, face_index)
+    pair_keys = pairs[:, 0] * face_count + pairs[:, 1]
+    edge_keys = np.minimum(first, second) * face_count + np.maximum(first, second)
+    slot = np.searchsorted(pair_keys, edge_keys)
+
+    label_bits = np.zeros(len(pairs), dtype=np.uint8)
+    np.bitwise_or.at(label_bits, slot, (1 << labels).astype(np.uint8))
+    shared = np.bincount(slot, minlength=len(pairs)).astype(np.int32)
+    angle_sum = np.bincount(slot, weights=np.nan_to_num(angles), minlength=len(pairs))
+    known = np.bincount(slot, weights=~np.isnan(angles), minlength=len(pairs))
+
+    pair_convexity = np.full(len(pairs), MIXED, dtype=np.uint8)
+    for label in (CONCAVE, CONVEX, SMOOTH, UNKNOWN):
+        pair_convexity[label_bits == 1 << label] = label
+    pair_convexity[label_bits == 0] = UNKNOWN  # Only non-manifold edges
+    # Pairs whose only disagreement is an unknown edge keep the known label
+    for label in (CONCAVE, CONVEX, SMOOTH):
+        pair_convexity[label_bits == (1 << label) | (1 << UNKNOWN)] = label
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pair_dihedral = np.where(known > 0, angle_sum / known, np.nan)
+
+    # CSR with both directions of every pair
+    rows = np.r_[pairs[:, 0], pairs[:, 1]]
+    columns = np.r_[pairs[:, 1], pairs[:, 0]]
+    order = np.lexsort((columns, rows))
+    indptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=face_count))].astype(np.int64)
+    return FaceGraph(
+        face_count,
+        indptr,
+        columns[order].astype(np.int64),
+        np.r_[pair_convexity, pair_convexity][order],
+        np.r_[pair_dihedral, pair_dihedral][order],
+        np.r_[shared, shared][order],
+    )
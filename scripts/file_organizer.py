@@ -0,0 +1,386 @@
+"""
+File Organization Engine
+
+This module moves, renames and copies STEP files in two steps: a plan is built first, then
+executed by a pool of I/O threads. The split, rename and selection scripts all build plans
+with the `plan_*` functions and run them with `execute_plan`.
+
+- A plan is a list of `Operation`s ("move" or "copy", source, destination). `check_plan`
+  rejects plans in which two operations write the same destination or an operation
+  overwrites the source of another, so the operations can run in any order.
+- Copies are made as reflinks (copy-on-write clones, `FICLONE` on Linux) or hardlinks where
+  the filesystem allows, and as byte copies otherwise (`link_mode`). A copy is written under
+  a temporary name and renamed into place, so a destination never holds a partial file.
+- With a journal, the plan and the outcome of every operation are appended to a JSON lines
+  file as they complete. `resume_journal` finishes an interrupted run and `rollback_journal`
+  undoes the operations it recorded: moved files are moved back and created copies removed.
+- With `dry_run`, the plan is checked and printed but no file is touched.
+
+Hardlinked copies share their content with the source: editing one edits the other. Use
+`link_mode="copy"` or `"reflink"` for copies that will be modified.
+"""
+
+import os
+import sys
+import json
+import shutil
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of I/O threads
+DEFAULT_IO_WORKERS = 8
+
+# How copies are made: "auto" tries a reflink, then a hardlink, then a byte copy
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+
+# ioctl request cloning a file on Linux copy-on-write filesystems (btrfs, XFS)
+_FICLONE = 0x40049409
+
+
+class Operation:
+    """
+    One planned file operation.
+
+    Args:
+        action (str): "move" (also used for renames) or "copy".
+        source (str): Path of the existing file.
+        destination (str): Path the file is moved or copied to.
+    """
+
+    def __init__(self, action, source, destination):
+        if action not in ("move", "copy"):
+            raise ValueError(f"Unknown file operation: {action}")
+        self.action = action
+        self.source = source
+        self.destination = destination
+
+    def __repr__(self):
+        return f"Operation({self.action!r}, {self.source!r}, {self.destination!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Operation) and self.to_list() == other.to_list()
+
+    def to_list(self):
+        return [self.action, self.source, self.destination]
+
+
+# Function to plan the distribution of the files of a folder into numbered subfolders
+def plan_split(source_dir, files_per_folder=1000, prefix="step_", max_folders=None):
+    """
+    Plans moving the files of a folder into subfolders of at most `files_per_folder` files.
+
+    Files are taken in name order; subfolders are named `prefix` plus a two-digit (or longer)
+    index: step_00, step_01, ...
+
+    Args:
+        source_dir (str): Folder whose files are distributed. The subfolders are created in it.
+        files_per_folder (int): Maximum number of files per subfolder.
+        prefix (str): Name prefix of the subfolders.
+        max_folders (int, optional): Stop after filling this many subfolders. By default all
+            files are distributed.
+
+    Returns:
+        list of Operation: Planned moves.
+    """
+    file_names = sorted(entry.name for entry in os.scandir(source_dir) if entry.is_file())
+    if max_folders is not None:
+        file_names = file_names[:max_folders * files_per_folder]
+    width = max(2, len(str(max(len(file_names) - 1, 0) // files_per_folder)))
+    return [
+        Operation("move", os.path.join(source_dir, name),
+                  os.path.join(source_dir, f"{prefix}{index // files_per_folder:0{width}}", name))
+        for index, name in enumerate(file_names)
+    ]
+
+
+# Function to plan renaming the files of a folder
+def plan_rename(folder_path, rename, extensions=(".step",)):
+    """
+    Plans renaming the files of a folder.
+
+    Args:
+        folder_path (str): Folder containing the files.
+        rename (callable): Function taking a file name (and its position in name order) and
+            returning the new name, e.g. `lambda name, index: name.split('_')[0] + ".step"`.
+        extensions (tuple of str): Only files with these extensions are renamed.
+
+    Returns:
+        list of Operation: Planned moves. Files whose name does not change are left out.
+    """
+    file_names = sorted(name for name in os.listdir(folder_path) if name.endswith(extensions))
+    operations = []
+    for index, name in enumerate(file_names):
+        new_name = rename(name, index)
+        if new_name != name:
+            operations.append(Operation("move", os.path.join(folder_path, name), os.path.join(folder_path, new_name)))
+    return operations
+
+
+# Function to plan copying a list of files into a folder
+def plan_copy(file_names, source_dir, destination_dir):
+    """
+    Plans copying files from one folder to another under the same names.
+
+    Args:
+        file_names (iterable of str): Names of the files in `source_dir`.
+        source_dir (str): Folder containing the files.
+        destination_dir (str): Folder the files are copied to.
+
+    Returns:
+        list of Operation: Planned copies.
+    """
+    return [
+        Operation("copy", os.path.join(source_dir, name), os.path.join(destination_dir, name))
+        for name in file_names
+    ]
+
+
+# Function to check that the operations of a plan are independent
+def check_plan(operations):
+    """
+    Checks that the operations of a plan can run in any order.
+
+    Args:
+        operations (list of Operation): Plan to check.
+
+    Raises:
+        ValueError: If two operations write the same destination, or a move writes to the
+            source of another operation (rename chains and swaps need an intermediate name).
+    """
+    destinations = Counter(os.path.normcase(os.path.abspath(op.destination)) for op in operations)
+    conflicts = [path for path, count in destinations.items() if count > 1]
+    if conflicts:
+        raise ValueError(f"{len(conflicts)} destinations are written more than once, e.g. {conflicts[0]}")
+
+    sources = {os.path.normcase(os.path.abspath(op.source)) for op in operations}
+    overlaps = [path for path in destinations if path in sources]
+    if overlaps:
+        raise ValueError(f"{len(overlaps)} destinations are also sources of the plan, e.g. {overlaps[0]}")
+
+
+def _reflink(source, destination):
+    import fcntl  # Not available on Windows
+    with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+        fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+
+
+def _copy(source, destination, link_mode):
+    # Copies `source` to a temporary name next to `destination`, then renames it into place
+    methods = ("reflink", "hardlink", "copy") if link_mode == "auto" else (link_mode,)
+    if "hardlink" in methods and os.path.exists(destination) and os.path.samefile(source, destination):
+        return "hardlink"  # Linked by an earlier run; relinking would leave the temporary behind
+    temporary = f"{destination}.{os.getpid()}.{threading.get_ident()}.part"
+    for method in methods:
+        try:
+            if method == "reflink":
+                _reflink(source, temporary)
+            elif method == "hardlink":
+                os.link(source, temporary)
+            else:
+                shutil.copy2(source, temporary)
+            os.replace(temporary, destination)
+            if os.path.lexists(temporary):
+                # rename() does nothing when both names are links to the same file
+                os.remove(temporary)
+            return method
+        except (OSError, ImportError):
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            if method == methods[-1]:
+                raise
+
+
+class _Journal:
+    # Thread-safe JSON lines journal of a plan and the outcome of its operations
+
+    def __init__(self, path, mode):
+        self._file = open(path, mode) if path else None
+        self._lock = threading.Lock()
+
+    def write(self, entry):
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _run(index, operation, journal, link_mode, overwrite):
+    # Runs one operation and journals its outcome; returns the journal entry
+    entry = {"type": "op", "index": index}
+    try:
+        if os.path.exists(operation.destination):
+            if operation.action == "move" and not os.path.exists(operation.source):
+                entry["status"] = "done"  # Moved by an interrupted run before it was journaled
+                entry["method"] = "move"
+                journal.write(entry)
+                return entry
+            if not overwrite:
+                entry["status"] = "exists"
+                journal.write(entry)
+                return entry
+            entry["replaced"] = True
+
+        if operation.action == "move":
+            os.replace(operation.source, operation.destination)
+            entry["method"] = "move"
+        else:
+            entry["method"] = _copy(operation.source, operation.destination, link_mode)
+        entry["status"] = "done"
+    except OSError as e:
+        entry["status"] = "failed"
+        entry["error"] = str(e)
+    journal.write(entry)
+    return entry
+
+
+def _execute(operations, journal, workers, link_mode, overwrite, skip=()):
+    summary = Counter()
+    for directory in sorted({os.path.dirname(op.destination) for op in operations}):
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+            journal.write({"type": "mkdir", "path": directory})
+
+    pending = [(index, op) for index, op in enumerate(operations) if index not in skip]
+    summary["skipped"] = len(operations) - len(pending)
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_IO_WORKERS) as pool:
+        for entry in pool.map(lambda item: _run(*item, journal, link_mode, overwrite), pending):
+            summary[entry["status"]] += 1
+            if "method" in entry and entry["method"] != "move":
+                summary[entry["method"]] += 1
+            if entry["status"] == "failed":
+                print(f"Failed: {operations[entry['index']]}: {entry['error']}")
+    return dict(summary)
+
+
+# Function to run a plan of file operations
+def execute_plan(operations, journal_path=None, workers=None, link_mode="auto", overwrite=False, dry_run=False):
+    """
+    Checks and runs a plan of file operations in a pool of I/O threads.
+
+    Args:
+        operations (list of Operation): Plan to run.
+        journal_path (str, optional): JSON lines file receiving the plan and the outcome of
+            every operation, for `resume_journal` and `rollback_journal`. Overwritten if it exists.
+        workers (int, optional): Number of I/O threads. Defaults to `DEFAULT_IO_WORKERS`.
+        link_mode (str): How copies are made, one of `LINK_MODES`.
+        overwrite (bool): Replace existing destinations. Otherwise their operations are
+            skipped with the status "exists".
+        dry_run (bool): Only check and print the plan.
+
+    Returns:
+        dict: Number of operations per status ("done", "exists", "failed") and per copy
+            method ("reflink", "hardlink", "copy").
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {link_mode}")
+    check_plan(operations)
+    if dry_run:
+        for operation in operations:
+            print(f"{operation.action}: {operation.source} -> {operation.destination}")
+        return {"planned": len(operations)}
+
+    journal = _Journal(journal_path, 'w')
+    try:
+        journal.write({"type": "plan", "link_mode": link_mode, "overwrite": overwrite,
+                       "operations": [op.to_list() for op in operations]})
+        return _execute(operations, journal, workers, link_mode, overwrite)
+    finally:
+        journal.close()
+
+
+def _read_journal(journal_path):
+    # Returns (plan entry, operations, {index: last outcome entry}, created folders)
+    with open(journal_path, 'r') as file:
+        entries = [json.loads(line) for line in file if line.strip()]
+    if not entries or entries[0].get("type") != "plan":
+        raise ValueError(f"Not a file organizer journal: {journal_path}")
+    plan = entries[0]
+    outcomes, folders = {}, []
+    for entry in entries[1:]:
+        if entry["type"] == "mkdir":
+            folders.append(entry["path"])
+        elif entry["type"] == "op":
+            outcomes[entry["index"]] = entry
+        elif entry["type"] == "undo":
+            outcomes.pop(entry["index"], None)
+    return plan, [Operation(*op) for op in plan["operations"]], outcomes, folders
+
+
+# Function to finish an interrupted plan
+def resume_journal(journal_path, workers=None):
+    """
+    Runs the operations of a journaled plan that have not completed yet.
+
+    Operations that completed, or were skipped because their destination existed, are not run
+    again; failed ones are retried.
+
+    Args:
+        journal_path (str): Journal written by `execute_plan`.
+        workers (int, optional): Number of I/O threads.
+
+    Returns:
+        dict: Outcome counts as in `execute_plan`, with the already completed operations
+            counted as "skipped".
+    """
+    plan, operations, outcomes, _ = _read_journal(journal_path)
+    finished = {index for index, entry in outcomes.items() if entry["status"] in ("done", "exists")}
+    journal = _Journal(journal_path, 'a')
+    try:
+        return _execute(operations, journal, workers, plan["link_mode"], plan["overwrite"], skip=finished)
+    finally:
+        journal.close()
+
+
+# Function to undo a journaled plan
+def rollback_journal(journal_path):
+    """
+    Undoes the completed operations of a journaled plan, newest first.
+
+    Moved files are moved back and copies are removed, except copies that replaced an
+    existing file, which cannot be restored and are left in place. Folders created by the plan
+    are removed once empty. The rollback is journaled too, so an interrupted rollback can be run again.
+
+    Args:
+        journal_path (str): Journal written by `execute_plan`.
+
+    Returns:
+        dict: Number of operations undone, left in place and failed.
+    """
+    _, operations, outcomes, folders = _read_journal(journal_path)
+    summary = Counter()
+    journal = _Journal(journal_path, 'a')
+    try:
+        for index in sorted(outcomes, reverse=True):
+            entry, operation = outcomes[index], operations[index]
+            if entry["status"] != "done":
+                continue
+            try:
+                if operation.action == "move":
+                    os.makedirs(os.path.dirname(operation.source) or ".", exist_ok=True)
+                    os.replace(operation.destination, operation.source)
+                elif entry.get("replaced"):
+                    summary["kept"] += 1
+                    continue
+                else:
+                    os.remove(operation.destination)
+            except OSError as e:
+                print(f"Rollback failed: {operation}: {e}", file=sys.stderr)
+                summary["failed"] += 1
+                continue
+            journal.write({"type": "undo", "index": index})
+            summary["undone"] += 1
+    finally:
+        journal.close()
+
+    for directory in sorted(set(folders), key=len, reverse=True):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass  # Still holds files that were not part of the plan
+    return dict(summary)
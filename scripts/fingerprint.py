@@ -0,0 +1,326 @@
+"""
+Shape Fingerprints and Near-Duplicate Detection
+
+This module finds near-identical parts in a corpus from the columns of the results table, so
+no geometry is loaded again. Every analyzed file gets a fingerprint: a short vector of its
+counts, surface type histogram, volume, bounding box and curvature statistics.
+
+- Counts and sizes are log-scaled and the surface type counts turned into fractions, with a
+  fixed transform (no fitted normalization), so fingerprints of new files never change the
+  fingerprints already indexed.
+- `FingerprintIndex` is an approximate nearest neighbour index using p-stable locality
+  sensitive hashing: each of `tables` hash tables buckets the fingerprints by `hashes`
+  quantized random projections. Two fingerprints within `threshold` of each other share a
+  bucket in at least one table with high probability, while distant ones rarely do. Only
+  fingerprints sharing a bucket are compared, so finding the duplicates of N files takes
+  roughly O(N) work instead of the O(N^2) of comparing every pair.
+- `duplicate_clusters` links every pair closer than `threshold` (Euclidean distance between
+  fingerprints) and returns the connected groups.
+- The index is saved to a single `.npz` file. `update_index` adds the files of a results table
+  that are not yet indexed and saves the index again, so a growing corpus is indexed
+  incrementally. Files are keyed by path, so parts with the same file name in different
+  folders are indexed (and reported) separately.
+
+Distances add up over the dimensions: a 5% change moves one log-scaled count or size by about
+0.049, so a threshold of 0.05 accepts about 5% difference in a single count or size, or about 2%
+in all seven at once (5% in all of them is a distance of about 0.13).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Columns of the results table used as log-scaled count and size features
+COUNT_FEATURES = ("Total Faces", "Curved Faces", "Total Edges", "Vertices", "Hole Count")
+SIZE_FEATURES = ("Volume", "Bounding Box Volume")
+
+# Columns used as signed curvature features
+CURVATURE_FEATURES = ("Mean Curvature", "Curvature Std Dev")
+
+# Surface type count columns written by the "surface_types" analyzer (see `topology.SURFACE_TYPE_NAMES`)
+SURFACE_TYPE_FEATURES = (
+    "Plane Faces", "Cylinder Faces", "Cone Faces", "Sphere Faces", "Torus Faces", "Bezier Faces",
+    "BSpline Faces", "Revolution Faces", "Extrusion Faces", "Offset Faces", "Other Faces",
+)
+
+# Names of the fingerprint dimensions, in order
+FINGERPRINT_FEATURES = COUNT_FEATURES + SIZE_FEATURES + CURVATURE_FEATURES + SURFACE_TYPE_FEATURES
+
+# Default maximum fingerprint distance between duplicates
+DEFAULT_THRESHOLD = 0.05
+
+# Rows compared at once when verifying the candidates of a large bucket
+_BLOCK_SIZE = 1024
+
+
+def _column(data, name):
+    if name not in data:
+        return np.zeros(len(data))
+    return pd.to_numeric(data[name], errors='coerce').to_numpy(dtype=float)
+
+
+# Function to compute the fingerprints of the rows of a results table
+def fingerprints(data):
+    """
+    Computes the fingerprint of every row of a results table.
+
+    Missing columns contribute zeros, so tables with and without the "surface_types" columns
+    give comparable fingerprints, just without the histogram.
+
+    Args:
+        data (DataFrame): Results table.
+
+    Returns:
+        ndarray: float32 array of shape (rows, len(FINGERPRINT_FEATURES)). Rows with a missing
+            count or size hold NaN.
+    """
+    counts = [np.log1p(np.maximum(_column(data, name), 0)) for name in COUNT_FEATURES]
+    sizes = [np.log1p(np.abs(_column(data, name))) for name in SIZE_FEATURES]
+    curvatures = [np.arcsinh(_column(data, name)) for name in CURVATURE_FEATURES]
+
+    surface_types = np.column_stack([np.nan_to_num(_column(data, name)) for name in SURFACE_TYPE_FEATURES])
+    totals = surface_types.sum(axis=1, keepdims=True)
+    fractions = np.divide(surface_types, totals, out=np.zeros_like(surface_types), where=totals > 0)
+
+    return np.column_stack(counts + sizes + curvatures + [fractions]).astype(np.float32)
+
+
+class _UnionFind:
+    # Disjoint sets over 0..n-1 with path halving
+
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class FingerprintIndex:
+    """
+    Locality sensitive hash index over fingerprints, for near-duplicate search.
+
+    Args:
+        dimensions (int): Length of the fingerprints.
+        threshold (float): Maximum distance between duplicates.
+        tables (int): Number of hash tables. More tables find more duplicates and cost more.
+        hashes (int): Projections per table. More projections give smaller buckets.
+        seed (int): Seed of the random projections.
+    """
+
+    def __init__(self, dimensions=len(FINGERPRINT_FEATURES), threshold=DEFAULT_THRESHOLD, tables=8, hashes=4,
+                 seed=0):
+        self.threshold = threshold
+        self.seed = seed
+        random = np.random.default_rng(seed)
+        self.projections = random.standard_normal((tables, hashes, dimensions))
+        # Bucket width; pairs at `threshold` collide per projection ~80% of the time, so with the
+        # defaults ~41% per table and ~98% in at least one of the 8 tables
+        self.width = 4.0 * threshold
+        self.offsets = random.uniform(0, self.width, (tables, hashes))
+
+        self.names = []
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self._ids = {}
+        self._tables = [{} for _ in range(tables)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def _keys(self, vectors):
+        # Bucket key of every vector in every table, shape (tables, len(vectors), hashes)
+        projected = np.einsum('thd,nd->tnh', self.projections, vectors.astype(np.float64))
+        return np.floor((projected + self.offsets[:, None, :]) / self.width).astype(np.int64)
+
+    def add(self, names, vectors):
+        """
+        Adds fingerprints to the index. Names already indexed are skipped.
+
+        Args:
+            names (iterable of str): Unique names of the files, e.g. their paths.
+            vectors (ndarray): Fingerprints, one row per name. Rows containing NaN are skipped.
+
+        Returns:
+            int: Number of fingerprints added.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows, new_names = [], []
+        for row, name in enumerate(names):
+            if name in self._ids or np.isnan(vectors[row]).any():
+                continue
+            self._ids[name] = len(self.names) + len(new_names)
+            rows.append(row)
+            new_names.append(name)
+        if not rows:
+            return 0
+
+        first_id = len(self.names)
+        added = vectors[rows]
+        for table, keys in zip(self._tables, self._keys(added)):
+            for offset, key in enumerate(keys):
+                table.setdefault(key.tobytes(), []).append(first_id + offset)
+        self.names.extend(new_names)
+        self.vectors = np.concatenate((self.vectors, added))
+        return len(rows)
+
+    def candidates(self, vector):
+        """
+        Returns the ids of the indexed fingerprints sharing a bucket with `vector`.
+        """
+        keys = self._keys(np.asarray(vector, dtype=np.float32)[None, :])[:, 0]
+        found = set()
+        for table, key in zip(self._tables, keys):
+            found.update(table.get(key.tobytes(), ()))
+        return found
+
+    def query(self, vector, threshold=None):
+        """
+        Finds the indexed files within `threshold` of a fingerprint.
+
+        Args:
+            vector (ndarray): Fingerprint to look up.
+            threshold (float, optional): Maximum distance. Defaults to the index threshold.
+
+        Returns:
+            list: (name, distance) pairs, closest first.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        ids = np.fromiter(self.candidates(vector), dtype=np.int64)
+        if not len(ids):
+            return []
+        distances = np.linalg.norm(self.vectors[ids] - np.asarray(vector, dtype=np.float32), axis=1)
+        order = np.argsort(distances)
+        return [(self.names[ids[i]], float(distances[i])) for i in order if distances[i] <= threshold]
+
+    def duplicate_pairs(self, threshold=None):
+        """
+        Finds all pairs of indexed fingerprints within `threshold` of each other.
+
+        Only fingerprints sharing a bucket are compared. A pair found in several tables is
+        reported once.
+
+        Args:
+            threshold (float, optional): Maximum distance. Defaults to the index threshold.
+
+        Returns:
+            ndarray: int64 array of shape (pairs, 2) of id pairs (smaller id first), sorted.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        found = []
+        for table in self._tables:
+            for ids in table.values():
+                if len(ids) < 2:
+                    continue
+                ids = np.asarray(ids)
+                members = self.vectors[ids].astype(np.float64)
+                norms = np.einsum('ij,ij->i', members, members)
+                for start in range(0, len(ids), _BLOCK_SIZE):
+                    block = members[start:start + _BLOCK_SIZE]
+                    squared = norms[start:start + _BLOCK_SIZE, None] + norms[None, :] - 2 * block @ members.T
+                    rows, columns = np.nonzero(squared <= threshold * threshold)
+                    rows += start
+                    upper = rows < columns
+                    found.append(np.column_stack((ids[rows[upper]], ids[columns[upper]])))
+        if not found:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(found), axis=0)
+
+    def save(self, path):
+        """
+        Saves the index to an `.npz` file that `FingerprintIndex.load` can read.
+
+        The buckets are not stored; they are recomputed from the fingerprints on load.
+        """
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            np.savez(file, names=np.array(self.names, dtype=str), vectors=self.vectors,
+                     projections=self.projections, offsets=self.offsets,
+                     parameters=np.array([self.threshold, self.width, self.seed]))
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads an index saved with `save`.
+        """
+        with np.load(path) as data:
+            tables, hashes, dimensions = data["projections"].shape
+            threshold, width, seed = data["parameters"]
+            index = cls(dimensions, float(threshold), tables, hashes, int(seed))
+            index.projections, index.offsets, index.width = data["projections"], data["offsets"], float(width)
+            index.add(data["names"].tolist(), data["vectors"])
+        return index
+
+
+# Function to group the indexed files into near-duplicate clusters
+def duplicate_clusters(index, threshold=None):
+    """
+    Groups the indexed files whose fingerprints are linked by a chain of near-duplicate pairs.
+
+    Args:
+        index (FingerprintIndex): Index of the corpus.
+        threshold (float, optional): Maximum distance. Defaults to the index threshold.
+
+    Returns:
+        list of list of str: Clusters of two or more indexed names, largest first.
+    """
+    pairs = index.duplicate_pairs(threshold)
+    sets = _UnionFind(len(index))
+    for a, b in pairs:
+        sets.union(a, b)
+
+    clusters = {}
+    for node in np.unique(pairs):
+        clusters.setdefault(sets.find(node), []).append(index.names[node])
+    return sorted((sorted(names) for names in clusters.values()), key=lambda names: (-len(names), names[0]))
+
+
+# Function to add the files of a results table to a persistent index
+def update_index(index_path, results, threshold=DEFAULT_THRESHOLD, folder=None):
+    """
+    Adds the files of a results table that are not indexed yet to a saved index.
+
+    Rows with an "Error" are left out. The index is created if `index_path` does not exist;
+    otherwise its own threshold is kept. Results tables only hold file names, so files are
+    keyed by their path in `folder`. Without a folder, a results CSV stands in for it
+    ("results.csv::part.step"); the rows of a DataFrame are then keyed by file name alone.
+
+    Args:
+        index_path (str): Path to the `.npz` index file.
+        results (str or DataFrame): Path to a results CSV, or the results table itself.
+        threshold (float): Maximum duplicate distance of a new index.
+        folder (str, optional): Folder holding the STEP files of the results table.
+
+    Returns:
+        tuple: (index, number of files added).
+    """
+    source = None
+    if isinstance(results, str):
+        from scripts.results_store import read_results_csv
+        source = os.path.abspath(results)
+        results = read_results_csv(results)
+    if "Error" in results:
+        results = results[results["Error"].isna()]
+
+    index = FingerprintIndex.load(index_path) if os.path.exists(index_path) else FingerprintIndex(threshold=threshold)
+    names = results["File Name"].astype(str).tolist()
+    if folder is not None:
+        names = [os.path.join(os.path.abspath(folder), name) for name in names]
+    elif source is not None:
+        names = [f"{source}::{name}" for name in names]
+    new_rows = [row for row, name in enumerate(names) if name not in index]
+    added = index.add([names[row] for row in new_rows], fingerprints(results.iloc[new_rows]))
+    if added or not os.path.exists(index_path):
+        index.save(index_path)
+    return index, added
@@ -0,0 +1,308 @@
+"""
+Incremental Folder Watcher
+
+This module watches a staging folder and analyzes STEP files as they arrive, instead of
+re-running `file_selection` over the whole folder:
+- The folder is polled with `os.scandir`; each poll only compares the size and modification
+  time of the entries with the previous snapshot, so no file is opened until it changes.
+- File events are coalesced: a new or modified file is only queued once its size and
+  modification time have not changed for `settle_time` seconds, so a file that is still being
+  copied is analyzed once, after the copy finished.
+- Files are analyzed by a `batch_analysis.WorkerPool`. At most `max_in_flight` files are handed
+  to the pool at a time; the others wait in the watcher, so a burst of thousands of files does
+  not flood the pool or the worker pipes.
+- Every result is appended to the results CSV right away, optionally buffered into the results
+  store, and checked against the selection criteria. Selected files are copied to the
+  destination folder.
+
+A modified file is analyzed again and appended as a new row; the last row of a file is the
+current one. Each row records the size and modification time of the version it describes in a
+"File Signature" column, so after a restart only the files that changed in the meantime are
+analyzed again.
+"""
+
+import os
+import csv
+import time
+import pandas as pd
+from collections import deque
+from scripts.batch_analysis import DEFAULT_MAX_FILES_PER_WORKER, DEFAULT_TIMEOUT, WorkerPool
+from scripts.result_cache import ResultCache
+from scripts.result_writer import ResultWriter
+from scripts.results_store import append as append_to_store
+from scripts.selection_criteria import DEFAULT_MIN_CRITERIA_MET, copy_selected_files, criteria_met
+
+# File extensions picked up by the watcher (compared case-insensitively)
+STEP_EXTENSIONS = (".step", ".stp")
+
+# Results CSV column holding the "size:mtime_ns" signature of the analyzed version of a file
+SIGNATURE_COLUMN = "File Signature"
+
+
+# Function to take a snapshot of the STEP files of a folder
+def folder_snapshot(folder_path, extensions=STEP_EXTENSIONS):
+    """
+    Lists the STEP files of a folder with their size and modification time.
+
+    Args:
+        folder_path (str): Folder to scan.
+        extensions (tuple of str): File extensions to include.
+
+    Returns:
+        dict: {file name: (size, mtime_ns)}.
+    """
+    snapshot = {}
+    for entry in os.scandir(folder_path):
+        if entry.name.lower().endswith(extensions) and entry.is_file():
+            stat = entry.stat()
+            snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def _recorded_signatures(output_path):
+    # Signature of the last row of every file in a results CSV; rows without one are left out
+    signatures = {}
+    with open(output_path, 'r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            size, _, mtime = (row.get(SIGNATURE_COLUMN) or "").partition(":")
+            if size.isdigit() and mtime.isdigit():
+                signatures[row["File Name"]] = (int(size), int(mtime))
+    return signatures
+
+
+class FolderWatcher:
+    """
+    Watches a folder and analyzes new or modified STEP files incrementally.
+
+    Args:
+        folder_path (str): Staging folder to watch.
+        output_path (str): Results CSV the rows are appended to. An existing file is resumed:
+            the files it lists are not analyzed again unless their size or modification time
+            differs from the signature recorded with their row.
+        destination_folder (str, optional): Folder the selected files are copied to.
+        store_root (str, optional): Results store the rows are appended to (see `results_store`).
+        cache_path (str, optional): Path to a result cache database.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        timeout (float, optional): Wall-clock limit per file, in seconds.
+        max_files_per_worker (int, optional): Files analyzed before a worker is replaced.
+        max_in_flight (int, optional): Files handed to the pool at a time. Defaults to twice the
+            number of workers.
+        poll_interval (float): Time between two folder scans, in seconds.
+        settle_time (float): Time a file has to stay unchanged before it is analyzed, in seconds.
+        store_interval (float): Time between two appends to the results store, in seconds. Rows
+            are buffered in between so the store does not get one shard per file.
+        criteria (list of Criterion, optional): Selection criteria.
+        min_criteria_met (float): Minimum weighted number of criteria met for a file to be selected.
+        analyze (callable, optional): Function taking a file path and returning a result dict.
+            Defaults to `analysis_pipeline.analyze_file`.
+        columns (list of str, optional): Columns of the results CSV, before the signature column.
+            Defaults to `step_analysis.RESULT_COLUMNS`.
+    """
+
+    def __init__(self, folder_path, output_path, destination_folder=None, store_root=None, cache_path=None,
+                 workers=None, timeout=DEFAULT_TIMEOUT, max_files_per_worker=DEFAULT_MAX_FILES_PER_WORKER,
+                 max_in_flight=None, poll_interval=1.0, settle_time=2.0, store_interval=60.0,
+                 criteria=None, min_criteria_met=DEFAULT_MIN_CRITERIA_MET, analyze=None, columns=None):
+        self.folder_path = folder_path
+        self.destination_folder = destination_folder
+        self.store_root = store_root
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.store_interval = store_interval
+        self.criteria = criteria
+        self.min_criteria_met = min_criteria_met
+
+        # The analysis modules load OCC; they are only imported for the defaults
+        if analyze is None:
+            from scripts.analysis_pipeline import analyze_file as analyze
+        if columns is None:
+            from scripts.step_analysis import RESULT_COLUMNS as columns
+
+        self.pool = WorkerPool(analyze, workers, timeout, max_files_per_worker)
+        self.max_in_flight = max_in_flight or 2 * self.pool.workers
+        if cache_path:
+            from scripts.analysis_pipeline import analyzer_key
+            self.cache = ResultCache(cache_path, analyzer_key())
+        else:
+            self.cache = None
+        self.writer = ResultWriter(output_path, list(columns) + [SIGNATURE_COLUMN], flush_every=1)
+        if SIGNATURE_COLUMN not in self.writer.columns:
+            print(f"{output_path} has no {SIGNATURE_COLUMN} column: the files it lists are analyzed again "
+                  f"after every restart")
+
+        self._known = {}          # file name -> signature of the last analyzed version
+        self._changing = {}       # file name -> (signature, time of the last change)
+        self._ready = deque()     # settled file names waiting for a pool slot
+        self._submitted = {}      # file name -> signature handed to the pool
+        self._store_buffer = []
+        self._last_store_flush = time.monotonic()
+
+        # Files written by a previous run count as analyzed if they did not change since
+        snapshot = folder_snapshot(folder_path)
+        for name, signature in _recorded_signatures(output_path).items():
+            if name in self.writer.done and snapshot.get(name) == signature:
+                self._known[name] = signature
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def pending(self):
+        """Number of files seen but not analyzed yet."""
+        return len(self._changing) + len(self._ready) + len(self._submitted)
+
+    def scan(self):
+        """
+        Compares the folder with the previous snapshot and queues the files that settled.
+        """
+        now = time.monotonic()
+        snapshot = folder_snapshot(self.folder_path)
+
+        for name, signature in snapshot.items():
+            if self._known.get(name) == signature or self._submitted.get(name) == signature:
+                continue
+            if name in self._ready:
+                continue
+            previous = self._changing.get(name)
+            if previous is None or previous[0] != signature:
+                # New file, or still being written: restart its settle timer
+                self._changing[name] = (signature, now)
+            elif now - previous[1] >= self.settle_time:
+                del self._changing[name]
+                self._ready.append(name)
+
+        # Forget the files removed from the folder
+        for name in [name for name in self._changing if name not in snapshot]:
+            del self._changing[name]
+        for name in [name for name in self._known if name not in snapshot]:
+            del self._known[name]
+
+    def _dispatch(self):
+        # Hand settled files to the pool while it has room; the rest wait here
+        while self._ready and self.pool.queued + self.pool.in_flight < self.max_in_flight:
+            name = self._ready.popleft()
+            file_path = os.path.join(self.folder_path, name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+
+            cached_result = self.cache.get(file_path) if self.cache else None
+            if cached_result is not None:
+                self._known[name] = signature
+                self._handle(cached_result, file_path, signature)
+                continue
+
+            self._submitted[name] = signature
+            self.pool.submit(file_path)
+
+    def _handle(self, row, file_path, signature=None):
+        name = row["File Name"]
+        if signature is not None:
+            self.writer.write({**row, SIGNATURE_COLUMN: f"{signature[0]}:{signature[1]}"})
+        else:
+            self.writer.write(row)
+        if self.store_root:
+            self._store_buffer.append(row)
+
+        if "Error" in row:
+            print(f"Analysis failed for {name} file: {row['Error']}")
+            return
+        if self.cache:
+            self.cache.put(file_path, row)
+
+        # Weighted criteria can add up to fractions; compare the total as is
+        met = criteria_met(pd.DataFrame([row]), self.criteria).iloc[0]
+        if met >= self.min_criteria_met:
+            print(f"File meets {met:g} criteria: {name}")
+            if self.destination_folder:
+                copy_selected_files(pd.DataFrame([row]), self.folder_path, self.destination_folder)
+        else:
+            print(f"Analysis successful for {name} file ({met:g} criteria met)")
+
+    def flush_store(self):
+        """
+        Appends the buffered rows to the results store as one shard.
+        """
+        if self.store_root and self._store_buffer:
+            append_to_store(self.store_root, self._store_buffer)
+            self._store_buffer = []
+        self._last_store_flush = time.monotonic()
+
+    def step(self, timeout=None):
+        """
+        Runs one watch iteration: scans the folder, dispatches settled files and handles the
+        results that arrive within `timeout` seconds.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for results. Defaults to `poll_interval`.
+
+        Returns:
+            int: Number of results handled.
+        """
+        timeout = self.poll_interval if timeout is None else timeout
+        self.scan()
+        self._dispatch()
+
+        handled = 0
+        if self.pool.busy:
+            for row in self.pool.poll(timeout):
+                name = row["File Name"]
+                signature = self._submitted.pop(name, None)
+                if signature is not None:
+                    self._known[name] = signature
+                self._handle(row, os.path.join(self.folder_path, name), signature)
+                handled += 1
+            self._dispatch()
+        else:
+            time.sleep(timeout)
+
+        if time.monotonic() - self._last_store_flush >= self.store_interval:
+            self.flush_store()
+        return handled
+
+    def run(self, duration=None, until_idle=False):
+        """
+        Watches the folder until interrupted.
+
+        Args:
+            duration (float, optional): Stop after this many seconds.
+            until_idle (bool): Stop as soon as every file in the folder has been analyzed.
+        """
+        start = time.monotonic()
+        try:
+            while duration is None or time.monotonic() - start < duration:
+                self.step()
+                if until_idle and not self.pending:
+                    break
+        except KeyboardInterrupt:
+            print("Stopping folder watcher")
+
+    def close(self):
+        """
+        Stops the workers and flushes the results CSV and store. Files still being analyzed are
+        picked up again by the next run.
+        """
+        self.pool.close()
+        self.flush_store()
+        self.writer.close()
+
+
+# Function to watch a staging folder and select new STEP files as they arrive
+def watch_folder(folder_path, output_path, destination_folder=None, duration=None, **options):
+    """
+    Watches a folder and analyzes and selects new or modified STEP files as they arrive.
+
+    Args:
+        folder_path (str): Staging folder to watch.
+        output_path (str): Results CSV the rows are appended to.
+        destination_folder (str, optional): Folder the selected files are copied to.
+        duration (float, optional): Stop after this many seconds. Runs until interrupted if None.
+        **options: Further arguments of `FolderWatcher`.
+    """
+    with FolderWatcher(folder_path, output_path, destination_folder, **options) as watcher:
+        watcher.run(duration)
@@ -21,7 +21,6 @@ from OCC.Core.GeomAbs import GeomAbs_Cylinder
 from OCC.Core.TopExp import TopExp_Explorer
 from OCC.Core.TopAbs import TopAbs_FACE
 import os
-import pandas as pd
 
 def detect_holes(step_file_path):
     """
@@ -62,17 +61,20 @@ def detect_holes(step_file_path):
 
     return hole_count  # Return total number of detected holes
 
-# Example usage
-folder_path = "Selected"  # Folder containing STEP files
+if __name__ == "__main__":
+    import pandas as pd
 
-# Retrieve all STEP file paths from the given folder
-file_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".step")]
+    # Example usage
+    folder_path = "Selected"  # Folder containing STEP files
 
-# Process each file and count the number of detected holes
-count_hole = [detect_holes(fp) for fp in file_paths]
+    # Retrieve all STEP file paths from the given folder
+    file_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".step")]
 
-# Create a DataFrame to store results
-df = pd.DataFrame({"File": file_paths, "Holes": count_hole})
+    # Process each file and count the number of detected holes
+    count_hole = [detect_holes(fp) for fp in file_paths]
 
-# Print results
-print(df)
+    # Create a DataFrame to store results
+    df = pd.DataFrame({"File": file_paths, "Holes": count_hole})
+
+    # Print results
+    print(df)
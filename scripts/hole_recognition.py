@@ -0,0 +1,293 @@
+"""
+Hole Feature Recognition
+
+This module recognizes holes from the cylindrical faces of a shape instead of counting every
+cylindrical face as a hole:
+- Cylindrical faces lying on the same cylinder (same axis line and radius) are grouped, so a
+  hole split into two half-cylinder faces is one hole. Faces are grouped through a hash index
+  over the quantized axis direction, axis line and radius, which keeps the grouping linear in
+  the number of faces even for parts with hundreds of cylinders.
+- Coaxial faces whose axial ranges do not touch (e.g. the same bore in two ribs) stay separate.
+- A group is a hole only if it is concave, i.e. the outward face normal points towards the axis
+  (bosses and pins are convex), and if its faces sweep (almost) all the way around the axis
+  (concave fillets and slots only cover part of the circle).
+- Each hole reports its diameter, its depth (axial extent) and whether it goes through the part.
+  The axis is intersected with the faces of the part past both ends of the cylinder: an end is
+  closed if the first face met there borders the bore, like the cone of a drill point or a flat
+  or ball-shaped bottom. A hole is through if neither end is closed.
+"""
+
+import math
+from itertools import product
+from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
+from OCC.Core.BRepLProp import BRepLProp_SLProps
+from OCC.Core.GeomAbs import GeomAbs_Cylinder
+from OCC.Core.IntCurvesFace import IntCurvesFace_ShapeIntersector
+from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_REVERSED
+from OCC.Core.TopExp import TopExp_Explorer, topexp
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.gp import gp_Dir, gp_Lin, gp_Pnt
+from scripts.topology import walk_topology
+
+# Length tolerance for matching axis lines and radii, in model units
+LINEAR_TOLERANCE = 1e-4
+
+# Angular tolerance for matching axis directions, in radians
+ANGULAR_TOLERANCE = 1e-4
+
+# Fraction of the full circle a concave group has to cover to be a hole
+MIN_SWEEP_RATIO = 0.95
+
+# Distance past an end of the cylinder, in radii, within which a face bordering the bore closes
+# the hole: a 118 degree drill point ends 0.6 radii past the cylinder, a ball-shaped bottom 1
+CLOSURE_DEPTH_RATIO = 2.0
+
+
+class Hole:
+    """
+    A recognized hole.
+
+    Attributes:
+        diameter (float): Diameter of the cylinder.
+        depth (float): Axial extent of the cylinder faces.
+        through (bool): Whether the hole is open at both ends.
+        location (tuple): Point on the axis at the start of the hole.
+        direction (tuple): Unit axis direction, from the start to the end of the hole.
+        face_count (int): Number of cylindrical faces forming the hole.
+    """
+
+    def __init__(self, diameter, depth, through, location, direction, face_count):
+        self.diameter = diameter
+        self.depth = depth
+        self.through = through
+        self.location = location
+        self.direction = direction
+        self.face_count = face_count
+
+    def __repr__(self):
+        kind = "through" if self.through else "blind"
+        return f"Hole(diameter={self.diameter:.4g}, depth={self.depth:.4g}, {kind}, faces={self.face_count})"
+
+    def to_dict(self):
+        return {
+            "Diameter": self.diameter,
+            "Depth": self.depth,
+            "Through": self.through,
+            "Faces": self.face_count,
+        }
+
+
+class _CylinderFace:
+    # Axis, radius, axial range, sweep and concavity of one cylindrical face
+
+    def __init__(self, face, surface):
+        self.face = face
+        cylinder = surface.Cylinder()
+        axis = cylinder.Axis()
+        direction = axis.Direction()
+        location = axis.Location()
+        d = (direction.X(), direction.Y(), direction.Z())
+        p = (location.X(), location.Y(), location.Z())
+
+        # Canonical direction: the first non-negligible component is positive
+        sign = 1.0
+        for component in d:
+            if abs(component) > ANGULAR_TOLERANCE:
+                sign = 1.0 if component > 0 else -1.0
+                break
+        self.direction = tuple(sign * c for c in d)
+
+        # Point of the axis line closest to the origin, independent of the axis location
+        along = _dot(p, self.direction)
+        self.line_point = tuple(pc - along * dc for pc, dc in zip(p, self.direction))
+        self.radius = cylinder.Radius()
+
+        # V runs along the axis of the face's own cylinder, U around it
+        v_min, v_max = surface.FirstVParameter(), surface.LastVParameter()
+        self.start = along + min(sign * v_min, sign * v_max)
+        self.end = along + max(sign * v_min, sign * v_max)
+        self.sweep = surface.LastUParameter() - surface.FirstUParameter()
+        self.concave = _is_concave(face, surface, p, d)
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _is_concave(face, surface, axis_point, axis_direction):
+    # The outward normal of a hole wall points towards the axis
+    u = (surface.FirstUParameter() + surface.LastUParameter()) / 2
+    v = (surface.FirstVParameter() + surface.LastVParameter()) / 2
+    props = BRepLProp_SLProps(surface, u, v, 1, 1e-6)
+    if not props.IsNormalDefined():
+        return False
+    point, normal = props.Value(), props.Normal()
+    n = (normal.X(), normal.Y(), normal.Z())
+    if face.Orientation() == TopAbs_REVERSED:
+        n = tuple(-c for c in n)
+    offset = (point.X() - axis_point[0], point.Y() - axis_point[1], point.Z() - axis_point[2])
+    along = _dot(offset, axis_direction)
+    radial = tuple(o - along * d for o, d in zip(offset, axis_direction))
+    return _dot(n, radial) < 0
+
+
+def _cells(values, cell_size, tolerance):
+    # Index cells of `values`, including the neighbouring cell of every value that lies within
+    # `tolerance` of a cell boundary, so that matching values always share at least one cell
+    options = []
+    for value in values:
+        q = value / cell_size
+        base = round(q)
+        if abs(q - base) > 0.5 - tolerance / cell_size:
+            options.append((base, base + (1 if q > base else -1)))
+        else:
+            options.append((base,))
+    return product(*options)
+
+
+def _key_values(cylinder):
+    return cylinder.direction, cylinder.line_point + (cylinder.radius,)
+
+
+def _matches(a, b):
+    cross = (
+        a.direction[1] * b.direction[2] - a.direction[2] * b.direction[1],
+        a.direction[2] * b.direction[0] - a.direction[0] * b.direction[2],
+        a.direction[0] * b.direction[1] - a.direction[1] * b.direction[0],
+    )
+    return (
+        math.sqrt(_dot(cross, cross)) <= ANGULAR_TOLERANCE
+        and math.dist(a.line_point, b.line_point) <= LINEAR_TOLERANCE
+        and abs(a.radius - b.radius) <= LINEAR_TOLERANCE
+    )
+
+
+# Function to group cylindrical faces lying on the same cylinder
+def group_coaxial_faces(cylinders):
+    """
+    Groups cylinder faces that share the same axis line and radius.
+
+    Every group is stored once under each index cell of its first face; a face is compared only
+    with the groups found in its own cells, so the grouping runs in linear time.
+
+    Args:
+        cylinders (list of _CylinderFace): Cylindrical faces to group.
+
+    Returns:
+        list of list: Groups of faces, in order of first appearance.
+    """
+    direction_cell = 4 * ANGULAR_TOLERANCE
+    linear_cell = 4 * LINEAR_TOLERANCE
+    index = {}
+    groups = []
+
+    for cylinder in cylinders:
+        direction, linear = _key_values(cylinder)
+        keys = [
+            direction_key + linear_key
+            for direction_key in _cells(direction, direction_cell, ANGULAR_TOLERANCE)
+            for linear_key in _cells(linear, linear_cell, LINEAR_TOLERANCE)
+        ]
+        group = next(
+            (candidate for key in keys for candidate in index.get(key, ()) if _matches(candidate[0], cylinder)),
+            None,
+        )
+        if group is None:
+            group = [cylinder]
+            groups.append(group)
+            for key in keys:
+                index.setdefault(key, []).append(group)
+        else:
+            group.append(cylinder)
+
+    return groups
+
+
+def _split_axial_runs(group):
+    # Splits a coaxial group into runs of faces whose axial ranges touch or overlap
+    runs = []
+    for cylinder in sorted(group, key=lambda c: c.start):
+        if runs and cylinder.start <= runs[-1][-1].end + LINEAR_TOLERANCE:
+            runs[-1].append(cylinder)
+        else:
+            runs.append([cylinder])
+    return runs
+
+
+def _borders(face, edges):
+    # True if the face shares an edge with the map of bore edges
+    explorer = TopExp_Explorer(face, TopAbs_EDGE)
+    while explorer.More():
+        if edges.Contains(explorer.Current()):
+            return True
+        explorer.Next()
+    return False
+
+
+def _is_through(intersector, run, start, end):
+    # A hole is open at an end unless the first face its axis meets past that end borders the
+    # bore; faces further along the axis (e.g. the far wall of a cavity) do not close it
+    reference = run[0]
+    line = gp_Lin(gp_Pnt(*reference.line_point), gp_Dir(*reference.direction))
+    reach = CLOSURE_DEPTH_RATIO * reference.radius
+    bore_edges = TopTools_IndexedMapOfShape()
+    for cylinder in run:
+        topexp.MapShapes(cylinder.face, TopAbs_EDGE, bore_edges)
+
+    for near, far in ((start + LINEAR_TOLERANCE, start - reach), (end - LINEAR_TOLERANCE, end + reach)):
+        intersector.Perform(line, min(near, far), max(near, far))
+        if not intersector.IsDone() or intersector.NbPnt() == 0:
+            continue
+        first = min(range(1, intersector.NbPnt() + 1), key=lambda i: abs(intersector.WParameter(i) - near))
+        if _borders(intersector.Face(first), bore_edges):
+            return False
+    return True
+
+
+# Function to recognize the holes of a shape
+def recognize_holes(shape, cylinder_faces=None, min_sweep_ratio=MIN_SWEEP_RATIO):
+    """
+    Recognizes the holes of a shape from its cylindrical faces.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        cylinder_faces (list, optional): `(face, adaptor)` pairs of the cylindrical faces, as
+            collected by `walk_topology(shape, keep_cylinders=True)`. Found by walking the shape
+            if not given.
+        min_sweep_ratio (float): Fraction of the full circle the faces of a hole have to cover.
+
+    Returns:
+        list of Hole: Recognized holes.
+    """
+    if cylinder_faces is None:
+        cylinder_faces = walk_topology(shape, sample_curvature=False, keep_cylinders=True).cylinder_faces
+
+    cylinders = []
+    for face, surface in cylinder_faces:
+        surface = surface or BRepAdaptor_Surface(face)
+        if surface.GetType() == GeomAbs_Cylinder:
+            cylinders.append(_CylinderFace(face, surface))
+
+    holes = []
+    intersector = IntCurvesFace_ShapeIntersector()
+    intersector.Load(shape, LINEAR_TOLERANCE)
+    for group in group_coaxial_faces(cylinders):
+        for run in _split_axial_runs(group):
+            # Majority vote, in case a face has a degenerate normal at its UV midpoint
+            if 2 * sum(c.concave for c in run) <= len(run):
+                continue
+            if sum(c.sweep for c in run) < min_sweep_ratio * 2 * math.pi:
+                continue
+            reference = run[0]
+            start = min(c.start for c in run)
+            end = max(c.end for c in run)
+            holes.append(Hole(
+                diameter=2 * reference.radius,
+                depth=end - start,
+                through=_is_through(intersector, run, start, end),
+                location=tuple(p + start * d for p, d in zip(reference.line_point, reference.direction)),
+                direction=reference.direction,
+                face_count=len(run),
+            ))
+
+    return holes
@@ -0,0 +1,313 @@
+"""
+Large STEP File Analysis
+
+This module analyzes STEP files too large for the regular batch run. Most of the memory of a
+large file goes into the transferred shape, and an assembly transferred with `TransferRoots`
+is materialized as one compound holding every part at once. A typical assembly has a single
+root, so transferring the roots one at a time does not help either.
+
+- `iter_component_shapes` reads the product structure from the STEP text
+  (`step_scanner.scan_product_structure`) and transfers each distinct leaf product on its own
+  (`TransferOne` of its PRODUCT_DEFINITION), once however many instances it has. The reader
+  and its transfer process are cleared after each component, so only one component shape is
+  alive at a time. Files without an assembly structure are transferred root by root
+  (`iter_root_shapes`).
+- `analyze_large_file` runs the analyzers over each component separately and rolls the values
+  they share up into one record for the file, weighted by the number of instances: counts,
+  volumes and areas are summed, bounding boxes of the placed instances united, curvature
+  moments merged exactly, and holes, meshes and face graphs concatenated. The analyzers then
+  run once more over the rolled-up values, so the record has the same columns as
+  `analysis_pipeline.analyze_file`, plus the number of components and instances and the peak
+  resident memory of the process ("Peak RSS MB").
+- `step_analysis.iter_analysis_for_folder` sends files larger than `LARGE_FILE_MB` to a
+  separate lane of worker processes with a lower concurrency. Each large file gets a fresh
+  worker, so the peak RSS in its record is the file's own. An address space limit can be set
+  on these workers (see `batch_analysis.WorkerPool`); it is off by default, because it caps
+  virtual memory rather than resident memory and can fail files that would fit.
+
+Analyzers reading values of the shape that cannot be rolled up raise a ValueError here.
+"""
+
+import os
+from contextlib import nullcontext
+from OCC.Core.STEPControl import STEPControl_Reader
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.gp import gp_Trsf
+from scripts.analysis_pipeline import (
+    ANALYZERS,
+    DEFAULT_ANALYZERS,
+    ShapeContext,
+    analyze_shape,
+    box_extents,
+    build_bounding_box,
+    file_scan,
+)
+from scripts.curvature_field import merge_curvature_fields
+from scripts.face_graph import FaceGraph
+from scripts.profiling import peak_rss_mb
+from scripts.step_scanner import IDENTITY_PLACEMENT, scan_product_structure
+from scripts.tessellation import DEFAULT_ANGULAR_DEFLECTION, DEFAULT_DEFLECTION, MeshCache, TriangleMesh
+from scripts.topology import TopologySummary
+
+# Files larger than this, in MB, are analyzed in the large-file lane
+LARGE_FILE_MB = 5
+
+# Default number of large files analyzed at the same time
+DEFAULT_LARGE_WORKERS = 1
+
+# Large files get this many times the regular per-file timeout
+LARGE_TIMEOUT_FACTOR = 4
+
+
+def _stage(timer, name):
+    # Times a stage when profiling, like `analysis_pipeline.analyze_file`
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def _read_step(file_path, timer):
+    step_reader = STEPControl_Reader()
+    with _stage(timer, "read"):
+        status = step_reader.ReadFile(file_path)
+    if status != 1:
+        raise ValueError("Error reading STEP file")
+    return step_reader
+
+
+def _transfer(step_reader, transfer, timer):
+    # Runs one transfer and returns its shape, or None; the previous shapes are released first.
+    # The transfer process keeps the result of every transferred entity, so it is cleared too.
+    step_reader.ClearShapes()
+    transfer_reader = step_reader.WS().TransferReader()
+    if transfer_reader.TransientProcess() is not None:
+        transfer_reader.TransientProcess().Clear()
+    with _stage(timer, "transfer"):
+        if not transfer():
+            return None
+        shape = step_reader.OneShape()
+    return None if shape.IsNull() else shape
+
+
+# Function to transfer the roots of a STEP file one at a time
+def iter_root_shapes(file_path, timer=None):
+    """
+    Reads a STEP file and yields the shape of each root separately.
+
+    The reader keeps only the current root: the previous shape is cleared before the next root
+    is transferred, so callers should drop their references to it as well.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        timer (StageTimer, optional): Records the "read" and "transfer" stages.
+
+    Yields:
+        TopoDS_Shape: Shape of each root that transferred.
+    """
+    step_reader = _read_step(file_path, timer)
+    for index in range(1, step_reader.NbRootsForTransfer() + 1):
+        shape = _transfer(step_reader, lambda: step_reader.TransferRoot(index), timer)
+        if shape is not None:
+            yield shape
+    step_reader.ClearShapes()
+
+
+def _entity_numbers(model, components):
+    # Entity numbers of the product definitions in the reader's model. They follow the order
+    # of the DATA section, which the scanner counted; a full lookup covers any mismatch.
+    count = model.NbEntities()
+    numbers = {component.ident: component.rank for component in components
+               if component.rank <= count and model.IdentLabel(model.Value(component.rank)) == component.ident}
+    if len(numbers) < len(components):
+        idents = {component.ident for component in components}
+        for number in range(1, count + 1):
+            ident = model.IdentLabel(model.Value(number))
+            if ident in idents:
+                numbers[ident] = number
+    return numbers
+
+
+# Function to transfer the components of a STEP file one at a time
+def iter_component_shapes(file_path, timer=None):
+    """
+    Reads a STEP file and yields each distinct component with the placements of its instances.
+
+    Assemblies are split into their leaf products (see `step_scanner.scan_product_structure`),
+    each transferred once in its own coordinates. Files without an assembly structure, or whose
+    placements cannot be resolved, yield one component per root instead, already placed. As in
+    `iter_root_shapes`, only the current component is kept by the reader.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        timer (StageTimer, optional): Records the "structure", "read" and "transfer" stages.
+
+    Yields:
+        tuple: (name, shape, placements) of each component that transferred, where placements
+            are the 3x4 rigid transformations of its instances (see `placed_shape`).
+    """
+    with _stage(timer, "structure"):
+        components = scan_product_structure(file_path)
+    if not components:
+        for index, shape in enumerate(iter_root_shapes(file_path, timer), start=1):
+            yield f"Root {index}", shape, [IDENTITY_PLACEMENT]
+        return
+
+    step_reader = _read_step(file_path, timer)
+    numbers = _entity_numbers(step_reader.StepModel(), components)
+    for component in components:
+        if component.ident not in numbers:
+            continue
+        number = numbers[component.ident]
+        shape = _transfer(step_reader, lambda: step_reader.TransferOne(number), timer)
+        if shape is not None:
+            yield component.name, shape, component.placements
+    step_reader.ClearShapes()
+
+
+# Function to place an instance of a component
+def placed_shape(shape, placement):
+    """
+    Moves a component shape to one of its instances.
+
+    Args:
+        shape (TopoDS_Shape): Shape of the component, in its own coordinates.
+        placement (tuple): Rows of the 3x4 rigid transformation of the instance.
+
+    Returns:
+        TopoDS_Shape: The instance, sharing the geometry of the component.
+    """
+    if placement == IDENTITY_PLACEMENT:
+        return shape
+    trsf = gp_Trsf()
+    trsf.SetValues(*placement[0], *placement[1], *placement[2])
+    return shape.Moved(TopLoc_Location(trsf))
+
+
+class _ComponentRollup:
+    """
+    Accumulates the values computed by the analyzers over the components of one file.
+    """
+
+    def __init__(self):
+        self.components = 0
+        self.instances = 0
+        self.topology = None
+        self.boxes = {}
+        self.sums = {}
+        self.holes = None
+        self.meshes = []
+        self.face_graphs = []
+        self.curvature_fields = []
+
+    def add(self, context, placements):
+        """
+        Adds the values stored in the context of one component, once per instance.
+        """
+        count = len(placements)
+        self.components += 1
+        self.instances += count
+        for key, value in context.stored().items():
+            if key == "scan":
+                continue  # File-level value, shared by all components
+            if key == "topology":
+                self.topology = self.topology or TopologySummary()
+                for _ in placements:
+                    self.topology.merge(value)
+                self.topology.cylinder_faces.clear()  # The faces die with their component
+            elif key.startswith("bounding_box:"):
+                mode = key.split(":", 1)[1]
+                for placement in placements:
+                    box = build_bounding_box(placed_shape(context.shape, placement), mode)
+                    if mode in self.boxes:
+                        self.boxes[mode].Add(box)
+                    else:
+                        self.boxes[mode] = box
+            elif key in ("volume", "surface_area"):
+                self.sums[key] = self.sums.get(key, 0.0) + value * count
+            elif key == "holes":
+                self.holes = (self.holes or []) + list(value) * count
+            elif key == "mesh":
+                self.meshes.extend(value if placement == IDENTITY_PLACEMENT else value.transformed(placement)
+                                   for placement in placements)
+            elif key == "face_graph":
+                self.face_graphs.extend([value] * count)
+            elif key == "curvature_field":
+                self.curvature_fields.extend([value] * count)
+            else:
+                raise ValueError(f"Cannot roll up '{key}' over the components of a file")
+
+    def context(self, file_path, options):
+        """
+        Returns a shape-less context holding the rolled-up values, for the analyzers to read.
+        """
+        context = ShapeContext(file_path, None, options)
+        values = dict(self.sums)
+        values.update({f"bounding_box:{mode}": box_extents(box) for mode, box in self.boxes.items()})
+        if self.topology is not None:
+            values["topology"] = self.topology
+        if self.holes is not None:
+            values["holes"] = self.holes
+        if self.meshes:
+            values["mesh"] = TriangleMesh.concatenate(self.meshes)
+        if self.face_graphs:
+            values["face_graph"] = FaceGraph.concatenate(self.face_graphs)
+        if self.curvature_fields:
+            values["curvature_field"] = merge_curvature_fields(self.curvature_fields)
+        for key, value in values.items():
+            context.memo(key, lambda value=value: value)
+        return context
+
+
+# Function to analyze a large STEP file one component at a time
+def analyze_large_file(file_path, analyzers=None, options=None, timer=None):
+    """
+    Analyzes a STEP file component by component and rolls the results up into one record.
+
+    Takes the same arguments and returns the same columns as `analysis_pipeline.analyze_file`,
+    without ever holding more than one component shape in memory.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        analyzers (iterable of str, optional): Analyzer names, in column order.
+            Defaults to `DEFAULT_ANALYZERS`.
+        options (dict, optional): Settings read by the analyzers (see `ShapeContext`).
+        timer (StageTimer, optional): Records the time spent in each stage (see `profiling`).
+
+    Returns:
+        dict: Combined analysis record, starting with the file name and ending with
+            "Components", "Instances" and "Peak RSS MB".
+    """
+    analyzers = analyzers or DEFAULT_ANALYZERS
+    options = options or {}
+    for name in analyzers:
+        if name not in ANALYZERS:
+            raise KeyError(f"Unknown analyzer: {name}")
+
+    # A component's mesh is not the file's mesh; only the rolled-up mesh may go to the cache
+    component_options = {key: value for key, value in options.items() if key != "mesh_cache"}
+    rollup = _ComponentRollup()
+    file_context = ShapeContext(file_path, None, options)
+    for _, shape, placements in iter_component_shapes(file_path, timer):
+        context = ShapeContext(file_path, shape, component_options)
+        context.memo("scan", lambda: file_scan(file_context))
+        analyze_shape(context, analyzers, timer)
+        with _stage(timer, "rollup"):
+            rollup.add(context, placements)
+        del context, shape
+    if not rollup.components:
+        raise ValueError("No component of the STEP file could be transferred")
+
+    context = rollup.context(file_path, options)
+    context.memo("scan", lambda: file_scan(file_context))
+    record = {"File Name": os.path.basename(file_path), **analyze_shape(context, analyzers)}
+
+    if options.get("mesh_cache") and rollup.meshes:
+        cache = MeshCache(options["mesh_cache"])
+        context.stored()["mesh"].save(cache.path(
+            file_path,
+            options.get("mesh_deflection", DEFAULT_DEFLECTION),
+            options.get("mesh_angular_deflection", DEFAULT_ANGULAR_DEFLECTION),
+        ))
+
+    record["Components"] = rollup.components
+    record["Instances"] = rollup.instances
+    record["Peak RSS MB"] = peak_rss_mb()
+    return record
@@ -1,29 +1,45 @@
 import pandas as pd
 import os
-# This scipt is used to merge two csv files and organize the data
-# replace with your folder's path
-folder_path = r'S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00\results'
-all_files = os.listdir(folder_path)
-# Filter out non-CSV files
-csv_files = [f for f in all_files if f.endswith('.csv')]
-# Create a list to hold the dataframes
-df_list = []
-for csv in csv_files:
-    file_path = os.path.join(folder_path, csv)
-    try:
-        # Try reading the file using default UTF-8 encoding
-        df = pd.read_csv(file_path)
-        df_list.append(df)
-    except UnicodeDecodeError:
+from scripts.results_store import import_csv_folder, read_results_csv
+# This scipt is used to merge csv files and organize the data.
+# The encoding of each file is detected from its byte order mark (see `read_results_csv`).
+# `merge_into_store` imports the files into the columnar results store instead, where later
+# merges only link shard files and never reload the data.
+
+def merge_csv_folder(folder_path, output_name='combined_file.csv'):
+    """
+    Concatenates all CSV files of a folder into a single CSV file in the same folder.
+
+    :param folder_path: Folder containing the CSV files.
+    :param output_name: Name of the combined CSV file.
+    :return: The combined DataFrame.
+    """
+    # Filter out non-CSV files and the output of a previous merge
+    csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv') and f != output_name]
+    # Create a list to hold the dataframes
+    df_list = []
+    for csv in csv_files:
         try:
-            # If UTF-8 fails, try reading the file using UTF-16 encoding with tab separator
-            df = pd.read_csv(file_path, sep='\t', encoding='utf-16')
-            df_list.append(df)
+            df_list.append(read_results_csv(os.path.join(folder_path, csv)))
         except Exception as e:
             print(f"Could not read file {csv} because of error: {e}")
-    except Exception as e:
-        print(f"Could not read file {csv} because of error: {e}")
-# Concatenate all data into one DataFrame
-big_df = pd.concat(df_list, ignore_index=True)
-# Save the final result to a new CSV file
-big_df.to_csv(os.path.join(folder_path, 'combined_file.csv'), index=False)
\ No newline at end of file
+    # Concatenate all data into one DataFrame
+    big_df = pd.concat(df_list, ignore_index=True)
+    # Save the final result to a new CSV file
+    big_df.to_csv(os.path.join(folder_path, output_name), index=False)
+    return big_df
+
+def merge_into_store(folder_path, store_root):
+    """
+    Imports all CSV files of a folder into the columnar results store, one shard per file.
+
+    :param folder_path: Folder containing the CSV files.
+    :param store_root: Root folder of the results store.
+    :return: Paths of the written shards.
+    """
+    return import_csv_folder(store_root, folder_path)
+
+if __name__ == "__main__":
+    # replace with your folder's path
+    folder_path = r'S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00\results'
+    merge_csv_folder(folder_path)
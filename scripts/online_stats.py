@@ -0,0 +1,280 @@
+"""
+Online Statistics
+
+This module aggregates samples in constant memory, so curvature statistics can be collected
+per part and across a whole corpus without keeping the samples themselves.
+
+- `RunningMoments` keeps the count, weight, mean, sum of squared deviations, minimum and
+  maximum of a stream (weighted Welford updates). Two instances are merged exactly with Chan's
+  parallel formula, so partial results from worker processes combine into the same mean and
+  variance as a single pass over all samples.
+- `QuantileSketch` is a DDSketch: values are counted in logarithmic buckets whose width
+  guarantees a relative error of at most `relative_accuracy` on every quantile. The number of
+  buckets grows with the logarithm of the value range, not with the number of samples, and
+  two sketches merge exactly by adding their bucket counts.
+- Both count undefined samples (NaN) separately instead of letting them poison the results,
+  and report NaN explicitly when no defined sample was seen.
+- `to_dict` and `from_dict` turn both into plain dictionaries, to return them from worker
+  processes or store them as JSON.
+"""
+
+import math
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Weighted count, mean, variance, minimum and maximum of a stream of samples.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.weight = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.undefined = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value, weight=1.0):
+        """
+        Adds one sample. NaN samples are only counted in `undefined`.
+        """
+        if math.isnan(value):
+            self.undefined += 1
+            return
+        if weight <= 0:
+            return
+        self.count += 1
+        self.weight += weight
+        delta = value - self.mean
+        self.mean += delta * weight / self.weight
+        self.m2 += weight * delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def add_array(self, values, weights=None):
+        """
+        Adds an array of samples at once (moments of the batch, then an exact merge).
+
+        Args:
+            values (array-like): Samples. NaN samples are only counted in `undefined`.
+            weights (array-like, optional): Weight of each sample. Samples with a weight of
+                zero or less are ignored.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float).ravel()
+        defined = ~np.isnan(values)
+        self.undefined += int(np.count_nonzero(~defined))
+        keep = defined & (weights > 0)
+        values, weights = values[keep], weights[keep]
+        if not len(values):
+            return
+
+        batch = RunningMoments()
+        batch.count = len(values)
+        batch.weight = float(weights.sum())
+        batch.mean = float(np.dot(weights, values) / batch.weight)
+        batch.m2 = float(np.dot(weights, (values - batch.mean) ** 2))
+        batch.minimum, batch.maximum = float(values.min()), float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """
+        Merges the moments of another stream into this one (Chan et al.).
+
+        Returns:
+            RunningMoments: self.
+        """
+        self.undefined += other.undefined
+        if other.weight <= 0:
+            return self
+        if self.weight <= 0:
+            self.count, self.weight, self.mean, self.m2 = other.count, other.weight, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+
+        weight = self.weight + other.weight
+        delta = other.mean - self.mean
+        self.mean += delta * other.weight / weight
+        self.m2 += other.m2 + delta * delta * self.weight * other.weight / weight
+        self.weight = weight
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self):
+        """Population variance, or NaN without defined samples."""
+        return self.m2 / self.weight if self.weight > 0 else float("nan")
+
+    @property
+    def std(self):
+        """Population standard deviation, or NaN without defined samples."""
+        return math.sqrt(max(self.variance, 0.0)) if self.weight > 0 else float("nan")
+
+    def statistics(self):
+        """
+        Returns the statistics as a dictionary.
+
+        Returns:
+            dict: count, undefined, mean, std, min and max. The last four are NaN when no
+                defined sample was added.
+        """
+        defined = self.weight > 0
+        nan = float("nan")
+        return {
+            "count": self.count,
+            "undefined": self.undefined,
+            "mean": self.mean if defined else nan,
+            "std": self.std,
+            "min": self.minimum if defined else nan,
+            "max": self.maximum if defined else nan,
+        }
+
+    def to_dict(self):
+        return {"count": self.count, "weight": self.weight, "mean": self.mean, "m2": self.m2,
+                "min": self.minimum, "max": self.maximum, "undefined": self.undefined}
+
+    @classmethod
+    def from_dict(cls, state):
+        moments = cls()
+        moments.count, moments.weight, moments.mean, moments.m2 = (
+            state["count"], state["weight"], state["mean"], state["m2"]
+        )
+        moments.minimum, moments.maximum, moments.undefined = state["min"], state["max"], state["undefined"]
+        return moments
+
+
+class QuantileSketch:
+    """
+    DDSketch quantile sketch with a bounded relative error.
+
+    Args:
+        relative_accuracy (float): Maximum relative error of the returned quantiles.
+        min_value (float): Magnitudes below this are counted as zero.
+        max_buckets (int): Bucket limit per sign. Beyond it the buckets of the smallest
+            magnitudes are collapsed, which only affects the accuracy of values close to zero.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.undefined = 0
+
+    @property
+    def count(self):
+        """Number of defined samples."""
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add_buckets(self, buckets, magnitudes):
+        indices, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                    return_counts=True)
+        for index, count in zip(indices.tolist(), counts.tolist()):
+            buckets[index] = buckets.get(index, 0) + count
+        self._collapse(buckets)
+
+    def _collapse(self, buckets):
+        # Folds the lowest buckets into one until the limit is respected
+        if len(buckets) <= self.max_buckets:
+            return
+        indices = sorted(buckets)
+        excess = indices[:len(indices) - self.max_buckets + 1]
+        buckets[excess[-1]] = sum(buckets.pop(index) for index in excess[:-1]) + buckets[excess[-1]]
+
+    def add(self, value):
+        """Adds one sample. NaN samples are only counted in `undefined`."""
+        self.add_array([value])
+
+    def add_array(self, values):
+        """
+        Adds an array of samples at once.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        defined = ~np.isnan(values)
+        self.undefined += int(np.count_nonzero(~defined))
+        values = values[defined]
+        small = np.abs(values) < self.min_value
+        self.zero_count += int(np.count_nonzero(small))
+        values = values[~small]
+        if np.any(values > 0):
+            self._add_buckets(self.positive, values[values > 0])
+        if np.any(values < 0):
+            self._add_buckets(self.negative, -values[values < 0])
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch with the same accuracy.
+
+        Returns:
+            QuantileSketch: self.
+        """
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError("Sketches with different relative accuracies cannot be merged")
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in other_buckets.items():
+                buckets[index] = buckets.get(index, 0) + count
+            self._collapse(buckets)
+        self.zero_count += other.zero_count
+        self.undefined += other.undefined
+        return self
+
+    def _value(self, index):
+        # Representative value of a bucket: within `relative_accuracy` of every value in it
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        Returns the q-quantile of the samples, or NaN without defined samples.
+
+        Args:
+            q (float): Quantile in [0, 1].
+        """
+        total = self.count
+        if total == 0:
+            return float("nan")
+        rank = q * (total - 1)
+
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def quantiles(self, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Returns {q: quantile} for several quantiles."""
+        return {q: self.quantile(q) for q in qs}
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy, "min_value": self.min_value, "max_buckets": self.max_buckets,
+            "positive": {str(index): count for index, count in self.positive.items()},
+            "negative": {str(index): count for index, count in self.negative.items()},
+            "zero_count": self.zero_count, "undefined": self.undefined,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state["relative_accuracy"], state["min_value"], state["max_buckets"])
+        sketch.positive = {int(index): count for index, count in state["positive"].items()}
+        sketch.negative = {int(index): count for index, count in state["negative"].items()}
+        sketch.zero_count, sketch.undefined = state["zero_count"], state["undefined"]
+        return sketch
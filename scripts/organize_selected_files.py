@@ -1,45 +1,82 @@
-import shutil
 import os
+from scripts.file_organizer import Operation, execute_plan
 # Manuallly selected (text file), It reads the file names and their classifications from the text file, 
-# constructs the full source and destination paths, and moves the files to the appropriate folders.
-
-# Define paths
-source_dir = r"S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00\automated_filter_no"
-simple_dest = r"S:\03_HiWiS\Harshith\ILSC-APP\3D_STEP_file_analysis\Selected_Manually\new_partitions\Simple"
-complex_dest = r"S:\03_HiWiS\Harshith\ILSC-APP\3D_STEP_file_analysis\Selected_Manually\new_partitions\Complex"
-
-# Path to the text file containing file names and classification
-text_file = r"S:\03_HiWiS\Harshith\ILSC-APP\3D_STEP_file_analysis\selected.txt"
-
-# Read file and process each line
-with open(text_file, "r") as file:
-    for line in file:
-        line = line.strip()
-        if not line:
-            continue  # Skip empty lines
-        
-        parts = line.split("-")
-        if len(parts) != 2:
-            print(f"Skipping invalid line: {line}")
-            continue
-        
-        file_name, category = parts
-        full_file_name = f"0000{file_name}.step"  # Append leading zeros
-        
-        source_path = os.path.join(source_dir, full_file_name)
-        
-        # Determine destination
-        if category.lower() == "sim":
-            destination_path = os.path.join(simple_dest, full_file_name)
-        elif category.lower() == "co":
-            destination_path = os.path.join(complex_dest, full_file_name)
-        else:
-            print(f"Skipping unknown category in line: {line}")
-            continue
-        
-        # Copy file if it exists
-        if os.path.exists(source_path):
-            shutil.copy(source_path, destination_path)
-            print(f"Copied {source_path} to {destination_path}")
-        else:
-            print(f"File not found: {source_path}")
+# constructs the full source and destination paths, and copies the files to the appropriate folders.
+# The copies are planned first, then run in parallel by `file_organizer` (as hardlinks or reflinks where possible).
+
+# Function to plan copying the manually classified files to their category folders
+def plan_selected_files(text_file, source_dir, simple_dest, complex_dest):
+    """
+    Reads "<number>-<category>" lines (category "sim" or "co") and plans the copies.
+
+    Args:
+        text_file (str): Path to the text file containing file names and classification.
+        source_dir (str): Folder containing the STEP files ("0000<number>.step").
+        simple_dest (str): Folder receiving the "sim" files.
+        complex_dest (str): Folder receiving the "co" files.
+
+    Returns:
+        list of Operation: Planned copies of the files that exist.
+    """
+    destinations = {"sim": simple_dest, "co": complex_dest}
+    operations = []
+    with open(text_file, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue  # Skip empty lines
+
+            parts = line.split("-")
+            if len(parts) != 2:
+                print(f"Skipping invalid line: {line}")
+                continue
+
+            file_name, category = parts
+            full_file_name = f"0000{file_name}.step"  # Append leading zeros
+            source_path = os.path.join(source_dir, full_file_name)
+
+            # Determine destination
+            destination_dir = destinations.get(category.lower())
+            if destination_dir is None:
+                print(f"Skipping unknown category in line: {line}")
+                continue
+
+            if os.path.exists(source_path):
+                operations.append(Operation("copy", source_path, os.path.join(destination_dir, full_file_name)))
+            else:
+                print(f"File not found: {source_path}")
+    return operations
+
+# Function to copy the manually classified files to their category folders
+def organize_selected_files(text_file, source_dir, simple_dest, complex_dest, journal_path=None, workers=None,
+                            link_mode="auto", dry_run=False):
+    """
+    Copies the files listed in a classification text file to the Simple and Complex folders.
+
+    Args:
+        text_file (str): Path to the text file containing file names and classification.
+        source_dir (str): Folder containing the STEP files.
+        simple_dest (str): Folder receiving the "sim" files.
+        complex_dest (str): Folder receiving the "co" files.
+        journal_path (str, optional): Journal for `file_organizer.resume_journal` and
+            `file_organizer.rollback_journal`.
+        workers (int, optional): Number of I/O threads.
+        link_mode (str): How copies are made (see `file_organizer.LINK_MODES`).
+        dry_run (bool): Only print the planned copies.
+
+    Returns:
+        dict: Outcome counts (see `file_organizer.execute_plan`).
+    """
+    operations = plan_selected_files(text_file, source_dir, simple_dest, complex_dest)
+    return execute_plan(operations, journal_path, workers, link_mode, overwrite=True, dry_run=dry_run)
+
+if __name__ == "__main__":
+    # Define paths
+    source_dir = r"S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00\automated_filter_no"
+    simple_dest = r"S:\03_HiWiS\Harshith\ILSC-APP\3D_STEP_file_analysis\Selected_Manually\new_partitions\Simple"
+    complex_dest = r"S:\03_HiWiS\Harshith\ILSC-APP\3D_STEP_file_analysis\Selected_Manually\new_partitions\Complex"
+
+    # Path to the text file containing file names and classification
+    text_file = r"S:\03_HiWiS\Harshith\ILSC-APP\3D_STEP_file_analysis\selected.txt"
+
+    print(organize_selected_files(text_file, source_dir, simple_dest, complex_dest))
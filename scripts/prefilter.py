@@ -0,0 +1,121 @@
+"""
+Cheap Pre-Filter Stage for File Selection
+
+This module rejects STEP files before the expensive OCC analysis, using only the file metadata
+and the raw entity scan of `step_scanner`:
+- Stage 1 estimates each selection metric from the file size and the entity counts, and
+  rejects the files that cannot meet enough criteria.
+- Stage 2 (the full BRep analysis in `step_analysis`) only runs on the survivors.
+
+Each metric estimate comes with the range the OCC value can take relative to it. The ranges were
+measured on the manually selected sets in `data/Selected_Manually` and are deliberately wide:
+a file is only rejected on a criterion when the whole range lies outside the criterion bounds,
+so the pre-filter does not drop files the full analysis would have selected.
+"""
+
+import os
+import time
+from scripts.selection_criteria import DEFAULT_CRITERIA, DEFAULT_MIN_CRITERIA_MET, criteria_bounds
+from scripts.step_scanner import scan_step_file
+
+
+def _face_count(scan):
+    return scan.entity_counts["ADVANCED_FACE"] + scan.entity_counts["FACE_SURFACE"]
+
+
+# Metric estimates from a `StepScan`, as {column: (estimator, low ratio, high ratio)}.
+# The OCC value of the metric lies between low ratio and high ratio times the estimate.
+SCAN_ESTIMATES = {
+    "size": (lambda scan: scan.file_size / 1024, 1.0, 1.0),
+    "ispart": (lambda scan: 0 if scan.is_assembly else 1, 1.0, 1.0),
+    # Faces shared between several product instances can make the OCC count lower
+    "Total Faces": (_face_count, 0.0, 1.25),
+    "Curved Faces": (lambda scan: _face_count(scan) - scan.entity_counts["PLANE"], 0.0, 1.5),
+    # TopExp_Explorer visits an edge once per wire using it, and two vertices per edge visit
+    "Total Edges": (lambda scan: scan.entity_counts["ORIENTED_EDGE"], 0.0, 2.5),
+    "Vertices": (lambda scan: scan.entity_counts["ORIENTED_EDGE"], 0.0, 5.0),
+    "Hole Count": (lambda scan: scan.entity_counts["CYLINDRICAL_SURFACE"], 0.0, 1.5),
+}
+
+
+# Function to find the criteria a file certainly fails, from its raw scan
+def failed_criteria(scan, criteria=None):
+    """
+    Lists the criteria that a file cannot meet, judging only from its raw entity scan.
+
+    Criteria without a scan estimate (such as the volume) are never reported as failed.
+
+    Args:
+        scan (StepScan): Raw scan of the STEP file.
+        criteria (list of Criterion, optional): Selection criteria. Defaults to `DEFAULT_CRITERIA`.
+
+    Returns:
+        list of str: Columns whose criterion certainly fails.
+    """
+    failed = []
+    for column, (minimum, maximum) in criteria_bounds(criteria).items():
+        if column not in SCAN_ESTIMATES:
+            continue
+        estimator, low_ratio, high_ratio = SCAN_ESTIMATES[column]
+        estimate = estimator(scan)
+        if estimate * high_ratio < minimum or estimate * low_ratio > maximum:
+            failed.append(column)
+    return failed
+
+
+# Function to split the STEP files of a folder into pre-filter survivors and rejects
+def prefilter_folder(folder_path, criteria=None, min_criteria_met=DEFAULT_MIN_CRITERIA_MET):
+    """
+    Runs the cheap stage of the selection over all STEP files in a folder.
+
+    Args:
+        folder_path (str): Path to the folder containing STEP files.
+        criteria (list of Criterion, optional): Selection criteria. Defaults to `DEFAULT_CRITERIA`.
+        min_criteria_met (float): Minimum weighted number of criteria a file has to meet to be
+            selected.
+
+    Returns:
+        tuple: (survivors, rejected, elapsed) where `survivors` lists the file names to analyze,
+            `rejected` maps each rejected file name to the criteria it fails and `elapsed` is the
+            time spent in this stage, in seconds.
+    """
+    criteria = criteria or DEFAULT_CRITERIA
+    weights = {criterion.column: criterion.weight for criterion in criteria}
+    best_score = sum(weights.values())
+    survivors = []
+    rejected = {}
+    start = time.perf_counter()
+
+    for entry in os.scandir(folder_path):
+        if not entry.name.endswith(".step"):
+            continue
+        failed = failed_criteria(scan_step_file(entry.path), criteria)
+        # Reject the file if even meeting every other criterion would not be enough
+        if best_score - sum(weights[column] for column in failed) < min_criteria_met:
+            rejected[entry.name] = failed
+        else:
+            survivors.append(entry.name)
+
+    return survivors, rejected, time.perf_counter() - start
+
+
+# Function to print how many files each selection stage rejected and how much time it saved
+def format_stage_report(report):
+    """
+    Formats the stage report of a staged file selection.
+
+    Args:
+        report (dict): Report built by `step_analysis.file_selection`.
+
+    Returns:
+        str: Human readable summary.
+    """
+    lines = [
+        f"Stage 1 (raw scan): {report['scanned']} files scanned in {report['prefilter_time']:.2f}s, "
+        f"{report['prefilter_rejected']} rejected",
+        f"Stage 2 (BRep analysis): {report['analyzed']} files analyzed in {report['analysis_time']:.2f}s, "
+        f"{report['analysis_rejected']} rejected",
+        f"Selected: {report['selected']} files",
+        f"Estimated time saved by stage 1: {report['time_saved']:.2f}s",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,244 @@
+"""
+Pipeline Profiling
+
+This module measures where the analysis time goes, per file and per pipeline stage:
+- `StageTimer` records the wall-clock time (`time.perf_counter`) and the CPU time
+  (`time.process_time`) of named stages. `analysis_pipeline.analyze_file` reports the stages
+  "read" (`ReadFile`), "transfer" (`TransferRoots`), "topology" (the shared face walk) and one
+  stage per analyzer ("curvature" covers the bounding box and curvature statistics, "volume"
+  the `VolumeProperties` call).
+- `profile_file` analyzes one file with a timer and attaches the timings, the peak resident
+  memory of the process and the face/edge counts to the record under the "Profile" key.
+  It can also dump a cProfile of each file for `snakeviz` or `pstats`.
+- `ProfileLog` moves the "Profile" entry of each row to a JSON lines sidecar log, so the
+  results CSV and the result cache are unchanged.
+- `summarize_profile` aggregates a sidecar log into per-stage percentiles and the slowest files.
+
+The stages are plain function calls in the worker processes, so sampling profilers such as
+`py-spy record --subprocesses` attribute their time to the same names.
+
+Peak memory is the high-water mark of the process analyzing the file. Workers analyze several
+files, so it is an upper bound for the file itself. It is not available on Windows.
+"""
+
+import os
+import sys
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+import pandas as pd
+from scripts.analysis_pipeline import analyze_file
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Percentiles reported by `summarize_profile`
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+class StageTimer:
+    """
+    Accumulates the wall-clock and CPU time of named stages.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the enclosed block as stage `name`. Repeated stages are added up.
+        """
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = self.stages.get(name, (0.0, 0.0))
+            self.stages[name] = (
+                wall + time.perf_counter() - wall_start,
+                cpu + time.process_time() - cpu_start,
+            )
+
+    def as_dict(self):
+        """
+        Returns the stage timings as {stage: {"wall": seconds, "cpu": seconds}}.
+        """
+        return {name: {"wall": wall, "cpu": cpu} for name, (wall, cpu) in self.stages.items()}
+
+
+# Function to read the peak resident memory of the current process
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process.
+
+    Returns:
+        float: Peak RSS in MB, or None where `resource` is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Function to analyze a STEP file and record the time spent in each stage
+def profile_file(file_path, analyzers=None, options=None, cprofile_dir=None, analyze=None):
+    """
+    Analyzes a STEP file like `analysis_pipeline.analyze_file` and attaches a profile.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        analyzers (iterable of str, optional): Analyzer names.
+        options (dict, optional): Analyzer options.
+        cprofile_dir (str, optional): If given, a cProfile of the analysis is written there as
+            "<file name>.prof".
+        analyze (callable, optional): Analysis function with the signature of `analyze_file`,
+            e.g. `large_files.analyze_large_file`. Defaults to `analyze_file`.
+
+    Returns:
+        dict: Analysis record with an extra "Profile" entry holding the full file path, the
+            total and per-stage wall/CPU times, the peak RSS and the face and edge counts.
+    """
+    timer = StageTimer()
+    profiler = cProfile.Profile() if cprofile_dir else None
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+    if profiler is not None:
+        profiler.enable()
+    try:
+        record = (analyze or analyze_file)(file_path, analyzers, options, timer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(cprofile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(cprofile_dir, os.path.basename(file_path) + ".prof"))
+
+    record["Profile"] = {
+        "path": file_path,
+        "wall": time.perf_counter() - wall_start,
+        "cpu": time.process_time() - cpu_start,
+        "peak_rss_mb": peak_rss_mb(),
+        "faces": record.get("Total Faces"),
+        "edges": record.get("Total Edges"),
+        "stages": timer.as_dict(),
+    }
+    return record
+
+
+class ProfileLog:
+    """
+    Appends the profiles of analyzed files to a JSON lines sidecar log.
+
+    Args:
+        path (str): Path to the log file. New entries are appended to an existing log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, row):
+        """
+        Removes the "Profile" entry from a result row and writes it to the log. Failed rows
+        are logged with their error and no timings.
+
+        Args:
+            row (dict): Result row, modified in place.
+
+        Returns:
+            dict: The row without its profile.
+        """
+        profile = row.pop("Profile", None)
+        entry = {"file": row.get("File Name"), "logged": time.time()}
+        if profile is not None:
+            entry.update(profile)
+        if "Error" in row:
+            entry["error"] = row["Error"]
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        return row
+
+    def close(self):
+        self._file.close()
+
+
+# Function to aggregate a profile log into percentiles and the slowest files
+def summarize_profile(path, slowest=10, since=None):
+    """
+    Aggregates a sidecar profile log.
+
+    Args:
+        path (str): Path to the JSON lines log written by `ProfileLog`.
+        slowest (int): Number of slowest files to list.
+        since (float, optional): Only aggregate the entries logged after this `time.time()`
+            value, e.g. the start of the current run.
+
+    Returns:
+        dict: "files" and "failed" counts, "stages" as a DataFrame of wall-time percentiles,
+            totals and shares per stage, and "slowest" as a DataFrame of the slowest files.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        entries = [json.loads(line) for line in file if line.strip()]
+    if since is not None:
+        entries = [entry for entry in entries if entry["logged"] >= since]
+
+    timed = [entry for entry in entries if "wall" in entry]
+    rows = []
+    for entry in timed:
+        row = {"file": entry["file"], "total": entry["wall"], "cpu": entry["cpu"],
+               "peak_rss_mb": entry.get("peak_rss_mb"), "faces": entry.get("faces"), "edges": entry.get("edges")}
+        row.update({name: times["wall"] for name, times in entry["stages"].items()})
+        rows.append(row)
+    table = pd.DataFrame(rows)
+
+    stage_columns = [column for column in table.columns
+                     if column not in ("file", "cpu", "peak_rss_mb", "faces", "edges")]
+    stages = pd.DataFrame({
+        column: {
+            **{f"p{int(q * 100)}": table[column].quantile(q) for q in PERCENTILES},
+            "max": table[column].max(),
+            "total": table[column].sum(),
+        }
+        for column in stage_columns
+    }).T if not table.empty else pd.DataFrame()
+    if not stages.empty:
+        stages["share"] = stages["total"] / stages.loc["total", "total"]
+
+    return {
+        "files": len(timed),
+        "failed": sum(1 for entry in entries if "error" in entry),
+        "stages": stages,
+        "slowest": table.nlargest(slowest, "total") if not table.empty else table,
+    }
+
+
+# Function to print a profile summary
+def format_profile_summary(summary):
+    """
+    Formats the summary built by `summarize_profile`.
+
+    Args:
+        summary (dict): Profile summary.
+
+    Returns:
+        str: Human readable summary.
+    """
+    lines = [f"Profiled {summary['files']} files ({summary['failed']} failed)"]
+    if not summary["stages"].empty:
+        lines += ["Wall time per stage (s):", summary["stages"].to_string(float_format="{:.3f}".format)]
+        columns = [column for column in ("file", "total", "read", "transfer", "peak_rss_mb", "faces")
+                   if column in summary["slowest"]]
+        lines += ["Slowest files:", summary["slowest"][columns].to_string(index=False, float_format="{:.3f}".format)]
+    return "\n".join(lines)
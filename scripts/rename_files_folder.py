@@ -4,50 +4,55 @@ STEP File Renaming Script
 This script renames STEP files in a specified folder by:
 1. Removing unnecessary parts of filenames, keeping only the base name.
 2. Ensuring all files have a standardized `.step` extension.
-3. Optionally, it includes a commented-out section to rename files with sequential numbering.
+3. Optionally, renaming files with sequential numbering (e.g., abc_00000001.step).
+
+The renames are planned and checked for name collisions before any file is touched, then run
+in parallel by `file_organizer`; with a journal they can be resumed or rolled back.
 
 Usage:
-- Modify the `folder_path` variable to point to the target directory.
+- Call `rename_files` with the target directory, or modify the `folder_path` variable below.
 - Ensure the folder contains `.step` files before running.
 
 """
 
-import os
-
-# Specify the folder containing STEP files
-folder_path = r"S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00\step_00"
-
-# Iterate through all files in the directory
-for filename in os.listdir(folder_path):
-    # Check if the file has a .step extension
-    if filename.endswith(".step"):
-        # Extract the base name (before the first underscore) to rename the file
-        base_name = filename.split('_')[0]
-        
-        # Construct full old and new file paths
-        old_path = os.path.join(folder_path, filename)
-        new_path = os.path.join(folder_path, f"{base_name}.step")
-        
-        # Rename the file
-        os.rename(old_path, new_path)
-
-print("Files have been renamed.")
-
-# ---- Alternative Sequential Renaming (Commented Out) ----
-# Uncomment this section if you want to rename files sequentially (e.g., abc_00000001.step)
-"""
-start_number = 1  # Define the starting number for renaming
+from scripts.file_organizer import execute_plan, plan_rename
 
-# Get all files in the directory and sort them
-files = sorted(os.listdir(folder_path))
+# Function to keep only the base name (before the first underscore) of a file
+def base_name(filename, index):
+    return f"{filename.split('_')[0]}.step"
 
-# Rename each file with sequential numbering
-for index, filename in enumerate(files, start=start_number):
-    new_name = f"abc_{index:08}.step"  # Generate new name with 8-digit numbering
-    old_path = os.path.join(folder_path, filename)
-    new_path = os.path.join(folder_path, new_name)
-    
-    os.rename(old_path, new_path)  # Rename the file
+# Function to number files sequentially, starting at `start_number`
+def sequential_name(start_number=1):
+    return lambda filename, index: f"abc_{index + start_number:08}.step"  # 8-digit numbering
 
-print("Files have been renamed with sequential numbering.")
-"""
+# Function to rename the STEP files of a folder
+def rename_files(folder_path, rename=base_name, journal_path=None, workers=None, dry_run=False):
+    """
+    Renames the STEP files of a folder.
+
+    Args:
+        folder_path (str): Folder containing the STEP files.
+        rename (callable): New name of a file from its name and position in name order.
+            `base_name` (default) or `sequential_name()`.
+        journal_path (str, optional): Journal for `file_organizer.resume_journal` and
+            `file_organizer.rollback_journal`.
+        workers (int, optional): Number of I/O threads.
+        dry_run (bool): Only print the planned renames.
+
+    Returns:
+        dict: Outcome counts (see `file_organizer.execute_plan`).
+
+    Raises:
+        ValueError: If two files would get the same name.
+    """
+    return execute_plan(plan_rename(folder_path, rename), journal_path, workers, dry_run=dry_run)
+
+if __name__ == "__main__":
+    # Specify the folder containing STEP files
+    folder_path = r"S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00\step_00"
+
+    rename_files(folder_path)
+    print("Files have been renamed.")
+
+    # Use this instead to rename files sequentially (e.g., abc_00000001.step)
+    # rename_files(folder_path, sequential_name(start_number=1))
@@ -0,0 +1,213 @@
+"""
+Content-Hash Result Cache
+
+This module keeps analysis records in a persistent SQLite database so that re-runs over the
+same folders only analyze new or changed files.
+
+- Records are keyed by the SHA-256 of the file content plus an analyzer key (analyzer version
+  and analyzer names, see `analysis_pipeline.analyzer_key`). Renaming or copying a file keeps
+  its record valid; changing its content or the analyzers invalidates it.
+- Hashes are remembered per path together with the file size and modification time, so
+  unchanged files are not re-read on every run.
+- The least recently used records are evicted when the cache exceeds `max_entries` records or
+  `max_bytes` bytes of stored records.
+
+The database runs in WAL mode with a busy timeout, and every process opens its own connection,
+so several worker processes or concurrent runs can read and write the same cache.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# Size of the blocks read when hashing a file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# How many writes happen between two eviction checks
+EVICTION_INTERVAL = 100
+
+
+# Function to compute the content hash of a file
+def file_content_hash(file_path):
+    """
+    Computes the SHA-256 hash of a file's content.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: Hexadecimal digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _json_default(value):
+    # NumPy scalars (np.int64, np.bool_, ...) are not JSON serializable as such
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ResultCache:
+    """
+    Persistent cache of analysis records keyed by file content hash and analyzer key.
+
+    Args:
+        path (str): Path to the SQLite database file. Created if missing.
+        analyzer_key (str): Identifies the analyzer version and set that produced the records.
+        max_entries (int, optional): Maximum number of records kept.
+        max_bytes (int, optional): Maximum total size of the stored records, in bytes.
+    """
+
+    def __init__(self, path, analyzer_key, max_entries=None, max_bytes=None):
+        self.path = path
+        self.analyzer_key = analyzer_key
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def __getstate__(self):
+        # Connections cannot cross process boundaries; each process reconnects on first use
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_pid"] = None
+        return state
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, record TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL, content_hash TEXT NOT NULL)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self):
+        """
+        Closes this process's connection to the database.
+        """
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._pid = None
+
+    def file_hash(self, file_path):
+        """
+        Returns the content hash of a file, reusing the stored hash if the file is unchanged.
+
+        Args:
+            file_path (str): Path to the file.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest of the file content.
+        """
+        conn = self._connection()
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        row = conn.execute(
+            "SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        content_hash = file_content_hash(path)
+        conn.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, content_hash),
+        )
+        return content_hash
+
+    def _key(self, file_path):
+        return f"{self.file_hash(file_path)}:{self.analyzer_key}"
+
+    def get(self, file_path):
+        """
+        Returns the cached record of a file, or None if it has no valid record.
+
+        Args:
+            file_path (str): Path to the STEP file.
+
+        Returns:
+            dict or None: Cached record, with "File Name" set to the file's current name.
+        """
+        conn = self._connection()
+        key = self._key(file_path)
+        row = conn.execute("SELECT record FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        record = json.loads(row[0])
+        if "File Name" in record:
+            record["File Name"] = os.path.basename(file_path)
+        return record
+
+    def put(self, file_path, record):
+        """
+        Stores the record of a file, replacing any previous record with the same key.
+
+        Args:
+            file_path (str): Path to the STEP file.
+            record (dict): Analysis record of the file.
+        """
+        conn = self._connection()
+        data = json.dumps(record, default=_json_default)
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, record, size, last_access) VALUES (?, ?, ?, ?)",
+            (self._key(file_path), data, len(data), time.time()),
+        )
+        self._writes += 1
+        if self._writes % EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used records until the size limits are met.
+
+        Returns:
+            int: Number of records removed.
+        """
+        if self.max_entries is None and self.max_bytes is None:
+            return 0
+
+        conn = self._connection()
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        excess_entries = count - self.max_entries if self.max_entries is not None else 0
+        excess_bytes = total_bytes - self.max_bytes if self.max_bytes is not None else 0
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return 0
+
+        # Walk the records from the least recently used one until both limits are met
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access"):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            stale.append((key,))
+            excess_entries -= 1
+            excess_bytes -= size
+
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+        conn.execute("COMMIT")
+        return len(stale)
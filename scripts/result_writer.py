@@ -0,0 +1,175 @@
+"""
+Streaming, Checkpointed Result Writer
+
+This module appends analysis rows to a CSV file as soon as they are produced instead of keeping
+them in memory until the end of a run.
+
+- Rows are flushed to disk every `flush_every` rows and at the end of the run.
+- At every flush a small JSON manifest next to the CSV records how many bytes of the CSV are
+  complete. The manifest is replaced atomically, so it always describes a consistent file.
+- When a run restarts with the same output path, the CSV is truncated back to the last
+  checkpoint, which drops any partially written row, and the names of the rows already written
+  are returned by `done` so that those files can be skipped.
+- Rows with an "Error" are not taken as done: on restart they are removed from the CSV and their
+  names returned by `failed`, so the files are analyzed again and their new rows replace the old
+  ones. Pass `retry_errors=False` to keep failed rows and skip those files like the others.
+"""
+
+import os
+import csv
+import json
+import time
+
+
+# Function to derive the manifest path of an output CSV
+def manifest_path_for(output_path):
+    """
+    Returns the default checkpoint manifest path of an output CSV.
+
+    Args:
+        output_path (str): Path to the output CSV.
+
+    Returns:
+        str: Path of the manifest, next to the CSV.
+    """
+    return output_path + ".manifest.json"
+
+
+class ResultWriter:
+    """
+    Appends result rows to a CSV file and checkpoints progress for resumable runs.
+
+    Args:
+        output_path (str): Path to the output CSV.
+        columns (list of str): Columns written, in order. Keys of a row that are not listed are
+            ignored, missing ones are left empty.
+        manifest_path (str, optional): Path to the checkpoint manifest.
+            Defaults to `manifest_path_for(output_path)`.
+        flush_every (int): Number of rows written between two checkpoints.
+        resume (bool): Continue from the last checkpoint if a manifest exists. Otherwise the
+            output file is overwritten.
+        retry_errors (bool): On resume, drop the rows with an "Error" so that those files are
+            analyzed again. If False, they count as done.
+    """
+
+    def __init__(self, output_path, columns, manifest_path=None, flush_every=50, resume=True, retry_errors=True):
+        self.output_path = output_path
+        self.manifest_path = manifest_path or manifest_path_for(output_path)
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self.rows_written = 0
+        self._since_flush = 0
+        self._done = set()
+        self._failed = set()
+
+        manifest = self._read_manifest() if resume else None
+        if manifest is not None and os.path.exists(output_path):
+            self.columns = manifest["columns"]
+            # Drop whatever was appended after the last checkpoint. A CSV shorter than the
+            # checkpoint was already compacted by a restart that stopped before its checkpoint.
+            with open(output_path, 'r+', newline='', encoding='utf-8') as file:
+                file.truncate(min(manifest["offset"], os.path.getsize(output_path)))
+            names, errors = self._read_names()
+            self._done = set(names)
+            if retry_errors and errors:
+                self._failed = set(errors) - set(names)
+                self._drop_failed_rows()
+            else:
+                self._done.update(errors)
+            self.rows_written = len(names) + (0 if retry_errors else len(errors))
+            self._file = open(output_path, 'r+', newline='', encoding='utf-8')
+            self._file.seek(0, os.SEEK_END)
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+            if self._failed:
+                self.checkpoint()
+        else:
+            directory = os.path.dirname(output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(output_path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+            self._writer.writeheader()
+            self.checkpoint()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def done(self):
+        """Names of the files whose rows were written by a previous, interrupted run."""
+        return self._done
+
+    @property
+    def failed(self):
+        """Names of the files whose failed rows were dropped on resume to analyze them again."""
+        return self._failed
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _read_names(self):
+        # File names of the complete rows, split into successful and failed ones
+        names, errors = [], []
+        with open(self.output_path, 'r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                (errors if row.get("Error") else names).append(row["File Name"])
+        return names, errors
+
+    def _drop_failed_rows(self):
+        # Rewrites the CSV without the rows that have an "Error", replacing it atomically
+        temp_path = self.output_path + ".tmp"
+        with open(self.output_path, 'r', newline='', encoding='utf-8') as source, \
+                open(temp_path, 'w', newline='', encoding='utf-8') as target:
+            writer = csv.DictWriter(target, fieldnames=self.columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(row for row in csv.DictReader(source) if not row.get("Error"))
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_path, self.output_path)
+
+    def write(self, row):
+        """
+        Appends one row and checkpoints every `flush_every` rows.
+
+        Args:
+            row (dict): Result row, keyed by column name.
+        """
+        self._writer.writerow(row)
+        self.rows_written += 1
+        self._since_flush += 1
+        if self._since_flush >= self.flush_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Flushes the CSV to disk and records its complete length in the manifest.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        manifest = {
+            "output": os.path.basename(self.output_path),
+            "columns": self.columns,
+            "offset": self._file.tell(),
+            "rows": self.rows_written,
+            "updated": time.time(),
+        }
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(manifest, file)
+        os.replace(temp_path, self.manifest_path)
+        self._since_flush = 0
+
+    def close(self):
+        """
+        Writes a final checkpoint and closes the CSV.
+        """
+        if not self._file.closed:
+            self.checkpoint()
+            self._file.close()
@@ -0,0 +1,246 @@
+"""
+Columnar Results Store
+
+This module keeps analysis results in a partitioned Parquet store instead of loose CSV files:
+
+    results_store/
+        analyzer_version=1/
+            part-20250101T120000-3f2a9c1e.parquet
+            part-20250102T080000-77b0d4aa.parquet
+        analyzer_version=2/
+            ...
+
+- Every analyzer version has a fixed, typed schema (`RESULT_SCHEMAS`), so shards written by
+  different runs can always be read together.
+- `append` writes a new shard file and never rewrites existing ones.
+- `open_results` returns a lazy `pyarrow.dataset.Dataset`, and `read_results` only loads the
+  requested columns and rows.
+- `merge_stores` adds the shards of other stores by hard-linking their files, so merging ten
+  ABC shards is a metadata operation rather than a reload into pandas.
+- `read_results_csv` imports the legacy CSV files, detecting UTF-16 exports from their byte
+  order mark instead of retrying decodings.
+
+Parquet support requires `pyarrow` (`conda install -c conda-forge pyarrow`).
+"""
+
+import os
+import uuid
+import shutil
+import time
+import warnings
+import pandas as pd
+
+# Typed schema of the results table for each analyzer version, as [(column, arrow type)].
+# Add a new entry whenever `analysis_pipeline.ANALYZER_VERSION` is bumped.
+RESULT_SCHEMAS = {
+    1: [
+        ("File Name", "string"),
+        ("Total Faces", "int64"),
+        ("Curved Faces", "int64"),
+        ("Total Edges", "int64"),
+        ("Vertices", "int64"),
+        ("Bounding Box Volume", "float64"),
+        ("Mean Curvature", "float64"),
+        ("Curvature Std Dev", "float64"),
+        ("Volume", "float64"),
+        ("Hole Count", "int64"),
+        ("size", "float64"),
+        ("ispart", "int8"),
+        ("Error", "string"),
+    ],
+}
+
+# Analyzer version used when none is given
+LATEST_VERSION = max(RESULT_SCHEMAS)
+
+# Columns derived from the others or from the file itself, left out of the store without a warning
+DERIVED_COLUMNS = ("Criteria Met", "File Signature")
+
+# Byte order marks of UTF-16 encoded CSV exports
+_UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "The results store requires pyarrow: conda install -c conda-forge pyarrow"
+        ) from e
+    return pyarrow
+
+
+# Function to build the arrow schema of an analyzer version
+def result_schema(analyzer_version=LATEST_VERSION):
+    """
+    Returns the arrow schema of the results table of an analyzer version.
+
+    Args:
+        analyzer_version (int): Analyzer version.
+
+    Returns:
+        pyarrow.Schema: Typed schema of the results table.
+    """
+    pa = _require_pyarrow()
+    return pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in RESULT_SCHEMAS[analyzer_version]])
+
+
+def _partition_path(root, analyzer_version):
+    return os.path.join(root, f"analyzer_version={analyzer_version}")
+
+
+# Function to append results to the store as a new shard
+def append(root, data, analyzer_version=LATEST_VERSION):
+    """
+    Writes results to the store as a new shard. Existing shards are never rewritten.
+
+    Columns missing from `data` are stored as nulls; columns that are not part of the schema
+    are not stored. Dropping the derived ones (`DERIVED_COLUMNS`) is expected; any other column,
+    such as those of the optional analyzers, raises a warning so a missing schema entry is
+    noticed.
+
+    Args:
+        root (str): Root folder of the store.
+        data (DataFrame or list of dict): Results to store.
+        analyzer_version (int): Analyzer version that produced the results.
+
+    Returns:
+        str: Path of the written shard, or None if `data` is empty.
+    """
+    pa = _require_pyarrow()
+    schema = result_schema(analyzer_version)
+    frame = pd.DataFrame(data)
+    dropped = [name for name in frame.columns if name not in schema.names and name not in DERIVED_COLUMNS]
+    if dropped:
+        warnings.warn(f"Columns not in the analyzer version {analyzer_version} schema are not stored: "
+                      f"{', '.join(map(str, dropped))}", stacklevel=2)
+    frame = frame.reindex(columns=schema.names)
+    if frame.empty:
+        return None
+
+    table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+    partition = _partition_path(root, analyzer_version)
+    os.makedirs(partition, exist_ok=True)
+    name = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+
+    # Write under a temporary name so readers never see a half-written shard
+    shard_path = os.path.join(partition, name)
+    pa.parquet.write_table(table, shard_path + ".tmp")
+    os.replace(shard_path + ".tmp", shard_path)
+    return shard_path
+
+
+# Function to open the store as a lazy dataset
+def open_results(root, analyzer_version=LATEST_VERSION):
+    """
+    Opens the shards of one analyzer version as a lazy dataset. No data is read until the
+    dataset is scanned.
+
+    Args:
+        root (str): Root folder of the store.
+        analyzer_version (int): Analyzer version to open.
+
+    Returns:
+        pyarrow.dataset.Dataset: Dataset over all shards of the version.
+    """
+    pa = _require_pyarrow()
+    partition = _partition_path(root, analyzer_version)
+    shards = sorted(
+        os.path.join(partition, name) for name in os.listdir(partition) if name.endswith(".parquet")
+    ) if os.path.isdir(partition) else []
+    return pa.dataset.dataset(shards, schema=result_schema(analyzer_version), format="parquet")
+
+
+# Function to read selected columns of the store into a DataFrame
+def read_results(root, columns=None, row_filter=None, analyzer_version=LATEST_VERSION):
+    """
+    Reads the requested columns and rows of the store into a DataFrame.
+
+    Args:
+        root (str): Root folder of the store.
+        columns (list of str, optional): Columns to read. Defaults to all columns.
+        row_filter (pyarrow.dataset.Expression, optional): Row filter pushed down to the shards,
+            e.g. `pyarrow.dataset.field("ispart") == 1`.
+        analyzer_version (int): Analyzer version to read.
+
+    Returns:
+        DataFrame: The requested part of the results table.
+    """
+    dataset = open_results(root, analyzer_version)
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+# Function to merge other stores into a store without rewriting any data
+def merge_stores(root, source_roots):
+    """
+    Adds the shards of other stores to a store. Shard files are hard-linked when the file
+    system allows it and copied otherwise; their content is never decoded.
+
+    Args:
+        root (str): Root folder of the target store.
+        source_roots (list of str): Root folders of the stores to merge in.
+
+    Returns:
+        int: Number of shards added.
+    """
+    added = 0
+    for source_root in source_roots:
+        for partition in sorted(os.listdir(source_root)):
+            source_partition = os.path.join(source_root, partition)
+            if not partition.startswith("analyzer_version=") or not os.path.isdir(source_partition):
+                continue
+            target_partition = os.path.join(root, partition)
+            os.makedirs(target_partition, exist_ok=True)
+            for name in sorted(os.listdir(source_partition)):
+                target = os.path.join(target_partition, name)
+                if not name.endswith(".parquet") or os.path.exists(target):
+                    continue
+                try:
+                    os.link(os.path.join(source_partition, name), target)
+                except OSError:
+                    shutil.copy2(os.path.join(source_partition, name), target)
+                added += 1
+    return added
+
+
+# Function to read a legacy results CSV, whatever program exported it
+def read_results_csv(path):
+    """
+    Reads a results CSV. UTF-16 files (tab-separated Excel "Unicode text" exports) are detected
+    from their byte order mark; all other files are read as UTF-8, with or without BOM.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        DataFrame: Contents of the file.
+    """
+    with open(path, 'rb') as file:
+        start = file.read(4)
+    if start.startswith(_UTF16_BOMS):
+        return pd.read_csv(path, sep='\t', encoding='utf-16')
+    return pd.read_csv(path, encoding='utf-8-sig')
+
+
+# Function to import every results CSV of a folder into the store
+def import_csv_folder(root, folder_path, analyzer_version=LATEST_VERSION):
+    """
+    Imports every CSV file of a folder into the store, one shard per file.
+
+    Args:
+        root (str): Root folder of the store.
+        folder_path (str): Folder containing the CSV files.
+        analyzer_version (int): Analyzer version that produced the CSV files.
+
+    Returns:
+        list of str: Paths of the written shards.
+    """
+    shards = []
+    for name in sorted(os.listdir(folder_path)):
+        if name.endswith('.csv'):
+            shard = append(root, read_results_csv(os.path.join(folder_path, name)), analyzer_version)
+            if shard is not None:
+                shards.append(shard)
+    return shards
@@ -0,0 +1,304 @@
+"""
+Declarative Selection Criteria
+
+This module defines the file selection criteria as data instead of code. A criterion is a
+column of the results table, an allowed range and a weight. The criteria are evaluated as
+vectorized column operations over the whole table, so re-running a selection over thousands of
+rows takes milliseconds and needs no geometry analysis.
+
+Criteria can be loaded from a JSON file of the form:
+
+    {
+        "min_criteria_met": 8,
+        "criteria": [
+            {"column": "Total Faces", "min": 20, "max": 120},
+            {"column": "size", "min": 25, "max": 500, "weight": 1},
+            {"column": "ispart", "min": 1, "max": 1}
+        ]
+    }
+
+"min" or "max" may be omitted for an open range; "weight" defaults to 1. Criteria may use any
+column of the results table, e.g. "Recognized Holes" when the "hole_features" analyzer ran
+instead of the legacy "Hole Count" cylinder count, or "Fill Ratio" and
+"Aspect Ratio (Long/Short)" when the "shape_descriptors" analyzer ran.
+
+Columns holding approximate values, such as a "Volume" computed from a mesh by the
+"mesh_volume" analyzer, can be checked again exactly with `refine_near_boundaries`, only for
+the rows close enough to a bound for the approximation to change the result.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from scripts.file_organizer import execute_plan, plan_copy
+
+
+class Criterion:
+    """
+    A selection criterion: the value of `column` has to lie in [minimum, maximum].
+
+    Args:
+        column (str): Column of the results table.
+        minimum (float, optional): Lower bound, inclusive. None leaves the range open.
+        maximum (float, optional): Upper bound, inclusive. None leaves the range open.
+        weight (float): Contribution of the criterion to "Criteria Met" when it is met.
+    """
+
+    def __init__(self, column, minimum=None, maximum=None, weight=1):
+        self.column = column
+        self.minimum = minimum
+        self.maximum = maximum
+        self.weight = weight
+
+    def __repr__(self):
+        return f"Criterion({self.column!r}, {self.minimum!r}, {self.maximum!r}, weight={self.weight!r})"
+
+    def evaluate(self, data):
+        """
+        Checks the criterion for every row of a results table.
+
+        Args:
+            data (DataFrame): Results table.
+
+        Returns:
+            ndarray of bool: True where the criterion is met. Missing values and missing
+                columns never meet a criterion.
+        """
+        if self.column not in data:
+            return np.zeros(len(data), dtype=bool)
+        values = pd.to_numeric(data[self.column], errors='coerce').to_numpy(dtype=float)
+        met = ~np.isnan(values)
+        if self.minimum is not None:
+            met &= values >= self.minimum
+        if self.maximum is not None:
+            met &= values <= self.maximum
+        return met
+
+    def near_boundary(self, data, margin=None):
+        """
+        Finds the rows whose value lies close to one of the bounds.
+
+        Args:
+            data (DataFrame): Results table.
+            margin (float, optional): Relative distance to a bound, as a fraction of the bound.
+                Defaults to `DEFAULT_BOUNDARY_MARGIN`.
+
+        Returns:
+            ndarray of bool: True where the value is within the margin of a bound.
+        """
+        if self.column not in data:
+            return np.zeros(len(data), dtype=bool)
+        margin = DEFAULT_BOUNDARY_MARGIN if margin is None else margin
+        values = pd.to_numeric(data[self.column], errors='coerce').to_numpy(dtype=float)
+        near = np.zeros(len(data), dtype=bool)
+        for bound in (self.minimum, self.maximum):
+            if bound is not None:
+                near |= np.abs(values - bound) <= margin * abs(bound)
+        return near
+
+    def to_dict(self):
+        spec = {"column": self.column, "min": self.minimum, "max": self.maximum, "weight": self.weight}
+        return {key: value for key, value in spec.items() if value is not None}
+
+
+# Criteria used by `step_analysis.file_selection`
+DEFAULT_CRITERIA = [
+    Criterion("Total Faces", 20, 120),
+    Criterion("Curved Faces", 5, 50),
+    Criterion("Total Edges", 100, 700),
+    Criterion("Vertices", 200, 1500),
+    Criterion("Volume", 1e3, 1.5e5),
+    Criterion("Hole Count", 5, 50),
+    Criterion("size", 25, 500),  # file size filter
+    Criterion("ispart", 1, 1),
+]
+
+# Minimum value of "Criteria Met" for a file to be selected
+DEFAULT_MIN_CRITERIA_MET = 8
+
+# Relative distance to a bound within which approximate values are checked exactly
+DEFAULT_BOUNDARY_MARGIN = 0.05
+
+
+# Function to load selection criteria from a JSON file
+def load_criteria(path):
+    """
+    Loads selection criteria from a JSON file.
+
+    Args:
+        path (str): Path to the JSON file (see the module docstring for the format).
+
+    Returns:
+        tuple: (criteria, min_criteria_met).
+    """
+    with open(path, 'r') as file:
+        spec = json.load(file)
+    criteria = [
+        Criterion(item["column"], item.get("min"), item.get("max"), item.get("weight", 1))
+        for item in spec["criteria"]
+    ]
+    return criteria, spec.get("min_criteria_met", sum(criterion.weight for criterion in criteria))
+
+
+# Function to save selection criteria to a JSON file
+def save_criteria(path, criteria=None, min_criteria_met=DEFAULT_MIN_CRITERIA_MET):
+    """
+    Saves selection criteria to a JSON file that `load_criteria` can read.
+
+    Args:
+        path (str): Path to the JSON file.
+        criteria (list of Criterion, optional): Defaults to `DEFAULT_CRITERIA`.
+        min_criteria_met (float): Minimum value of "Criteria Met" for a file to be selected.
+    """
+    spec = {
+        "min_criteria_met": min_criteria_met,
+        "criteria": [criterion.to_dict() for criterion in criteria or DEFAULT_CRITERIA],
+    }
+    with open(path, 'w') as file:
+        json.dump(spec, file, indent=4)
+
+
+# Function to turn criteria into {column: (min, max)} bounds
+def criteria_bounds(criteria=None):
+    """
+    Returns the bounds of each criterion, with open ends as infinities.
+
+    Args:
+        criteria (list of Criterion, optional): Defaults to `DEFAULT_CRITERIA`.
+
+    Returns:
+        dict: {column: (min, max)}.
+    """
+    return {
+        criterion.column: (
+            -np.inf if criterion.minimum is None else criterion.minimum,
+            np.inf if criterion.maximum is None else criterion.maximum,
+        )
+        for criterion in criteria or DEFAULT_CRITERIA
+    }
+
+
+# Function to count the criteria met by every row of a results table
+def criteria_met(data, criteria=None):
+    """
+    Computes the weighted number of criteria met by every row of a results table.
+
+    Args:
+        data (DataFrame): Results table.
+        criteria (list of Criterion, optional): Defaults to `DEFAULT_CRITERIA`.
+
+    Returns:
+        Series: Weighted number of criteria met, aligned with `data`.
+    """
+    total = np.zeros(len(data))
+    for criterion in criteria or DEFAULT_CRITERIA:
+        total += criterion.weight * criterion.evaluate(data)
+    if all(float(criterion.weight).is_integer() for criterion in criteria or DEFAULT_CRITERIA):
+        total = total.astype(int)
+    return pd.Series(total, index=data.index, name="Criteria Met")
+
+
+# Function to select the rows of a results table that meet enough criteria
+def apply_criteria(data, criteria=None, min_criteria_met=None):
+    """
+    Adds the "Criteria Met" column to a results table and returns the selected rows.
+
+    Args:
+        data (DataFrame): Results table. The "Criteria Met" column is added in place.
+        criteria (list of Criterion, optional): Defaults to `DEFAULT_CRITERIA`.
+        min_criteria_met (float, optional): Minimum value of "Criteria Met" for a row to be
+            selected. Defaults to `DEFAULT_MIN_CRITERIA_MET`.
+
+    Returns:
+        DataFrame: Rows of `data` that meet enough criteria.
+    """
+    if min_criteria_met is None:
+        min_criteria_met = DEFAULT_MIN_CRITERIA_MET
+    data["Criteria Met"] = criteria_met(data, criteria)
+    return data[data["Criteria Met"] >= min_criteria_met]
+
+
+# Function to replace approximate values close to a criterion bound by exact ones
+def refine_near_boundaries(data, exact, criteria=None, margin=None):
+    """
+    Recomputes approximate columns exactly for the rows close to a criterion bound.
+
+    Rows far from every bound are met or missed whatever the approximation error, so only the
+    rows within `margin` of a bound pay for the exact computation.
+
+    Args:
+        data (DataFrame): Results table. The refined values are written in place.
+        exact (dict): {column: function(row) returning the exact value of that row}.
+        criteria (list of Criterion, optional): Defaults to `DEFAULT_CRITERIA`.
+        margin (float, optional): Relative distance to a bound. Defaults to
+            `DEFAULT_BOUNDARY_MARGIN`.
+
+    Returns:
+        int: Number of values recomputed.
+    """
+    near = {}
+    for criterion in criteria or DEFAULT_CRITERIA:
+        if criterion.column in exact:
+            near[criterion.column] = near.get(criterion.column, False) | criterion.near_boundary(data, margin)
+
+    refined = 0
+    for column, rows in near.items():
+        for index in data.index[rows]:
+            data.at[index, column] = exact[column](data.loc[index])
+            refined += 1
+    return refined
+
+
+# Function to copy the selected files to a destination folder
+def copy_selected_files(selected, folder_path, destination_folder, link_mode="copy", journal_path=None):
+    """
+    Copies the files of the selected rows to a destination folder, in parallel.
+
+    Args:
+        selected (DataFrame): Selected rows, with a "File Name" column.
+        folder_path (str): Folder containing the STEP files.
+        destination_folder (str): Folder the selected files are copied to. Existing files are
+            replaced.
+        link_mode (str): How copies are made (see `file_organizer.LINK_MODES`). Independent
+            byte copies by default; "auto" links the files instead where the filesystem allows,
+            so editing a hardlinked copy edits the source.
+        journal_path (str, optional): Journal to roll the copies back with
+            `file_organizer.rollback_journal`.
+
+    Returns:
+        dict: Outcome counts (see `file_organizer.execute_plan`).
+    """
+    os.makedirs(destination_folder, exist_ok=True)
+    operations = plan_copy(selected["File Name"], folder_path, destination_folder)
+    return execute_plan(operations, journal_path, link_mode=link_mode, overwrite=True)
+
+
+# Function to re-run a selection against a saved results table
+def select_from_results(results, criteria=None, min_criteria_met=None, folder_path=None, destination_folder=None):
+    """
+    Re-runs the selection against an existing results table, without analyzing any geometry.
+
+    Args:
+        results (str or DataFrame): Path to a results CSV, or the results table itself.
+        criteria (list of Criterion or str, optional): Criteria, or the path to a criteria JSON
+            file. Defaults to `DEFAULT_CRITERIA`.
+        min_criteria_met (float, optional): Minimum value of "Criteria Met" for a row to be
+            selected. Defaults to the value of the JSON file or `DEFAULT_MIN_CRITERIA_MET`.
+        folder_path (str, optional): Folder containing the STEP files of the table.
+        destination_folder (str, optional): If given with `folder_path`, the selected files are
+            copied there.
+
+    Returns:
+        DataFrame: Selected rows, with an up-to-date "Criteria Met" column.
+    """
+    data = pd.read_csv(results) if isinstance(results, str) else results.copy()
+    if isinstance(criteria, str):
+        criteria, file_min_criteria_met = load_criteria(criteria)
+        if min_criteria_met is None:
+            min_criteria_met = file_min_criteria_met
+
+    selected = apply_criteria(data, criteria, min_criteria_met)
+    if folder_path is not None and destination_folder is not None:
+        copy_selected_files(selected, folder_path, destination_folder)
+    return selected
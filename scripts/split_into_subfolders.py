@@ -1,49 +1,35 @@
 #This script organizes files in a specified directory by distributing them into subfolders, each containing up to 1,000 files. 
-# It sequentially creates folders (e.g., "step_00", "step_01") and moves files into them, stopping after creating 10 folders.
-
-import os
-import shutil
-
-# Define the source directory (files will remain in this directory, but be organized into subfolders)
-source_dir = r"S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00"
-
-# Number of files per folder
-files_per_folder = 1000
-
-# Get a sorted list of all files in the source directory
-all_files = sorted(os.listdir(source_dir))
-
-# Initialize folder index and file counter
-folder_index = 0
-file_count = 0
-
-# Loop through the files and distribute them into folders
-for filename in all_files:
-    # Ignore non-files or directories (if any exist)
-    if not os.path.isfile(os.path.join(source_dir, filename)):
-        continue
-
-    # Create a new folder if necessary
-    if file_count == 0:
-        folder_name = f"step_{folder_index:02}"  # Example: step_00, step_01, etc.
-        new_folder_path = os.path.join(source_dir, folder_name)
-        os.makedirs(new_folder_path, exist_ok=True)
-
-    # Move the file into the current folder
-    src_path = os.path.join(source_dir, filename)
-    dest_path = os.path.join(new_folder_path, filename)
-    shutil.move(src_path, dest_path)
-
-    # Update the file count
-    file_count += 1
-
-    # If the current folder reaches its limit, move to the next folder
-    if file_count == files_per_folder:
-        folder_index += 1
-        file_count = 0
-
-    # Stop if all 10 folders are filled
-    if folder_index >= 10:
-        break
-
-print("Files have been successfully organized into folders!")
+# It sequentially creates folders (e.g., "step_00", "step_01") and moves files into them. The moves are planned first and run
+# in parallel by `file_organizer`; with a journal, an interrupted run can be resumed or rolled back.
+
+from scripts.file_organizer import execute_plan, plan_split
+
+# Function to distribute the files of a folder into numbered subfolders
+def split_into_subfolders(source_dir, files_per_folder=1000, max_folders=None, journal_path=None, workers=None,
+                          dry_run=False):
+    """
+    Moves the files of a folder into subfolders ("step_00", "step_01", ...) of up to
+    `files_per_folder` files each.
+
+    Args:
+        source_dir (str): Folder whose files are distributed; the subfolders are created in it.
+        files_per_folder (int): Number of files per folder.
+        max_folders (int, optional): Stop after filling this many folders. By default all files
+            are distributed.
+        journal_path (str, optional): Journal for `file_organizer.resume_journal` and
+            `file_organizer.rollback_journal`.
+        workers (int, optional): Number of I/O threads.
+        dry_run (bool): Only print the planned moves.
+
+    Returns:
+        dict: Outcome counts (see `file_organizer.execute_plan`).
+    """
+    operations = plan_split(source_dir, files_per_folder, max_folders=max_folders)
+    return execute_plan(operations, journal_path, workers, dry_run=dry_run)
+
+if __name__ == "__main__":
+    # Define the source directory (files will remain in this directory, but be organized into subfolders)
+    source_dir = r"S:\03_HiWiS\Harshith\ILSC-APP\abc_0000_step_v00"
+
+    summary = split_into_subfolders(source_dir, files_per_folder=1000, journal_path="split_journal.jsonl")
+    print(f"Files have been successfully organized into folders! {summary}")
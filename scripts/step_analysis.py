@@ -9,26 +9,54 @@ This script has required functions to analyzes a collection of STEP files in a g
 - The complexity of the shape based on curvature
 - File size and whether the file represents an assembly or part
 
+Files larger than `large_files.LARGE_FILE_MB` are analyzed component by component in a separate
+lane of workers (see `large_files`).
+
 The script then filters the files based on certain criteria and copies the selected files to a destination folder.
 
 """
 
 import os
-import re
-import shutil
+import time
+from functools import partial
 import pandas as pd
-import numpy as np
-from OCC.Core.STEPControl import STEPControl_Reader
-from OCC.Core.TopExp import TopExp_Explorer
-from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX
-from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
-from OCC.Core.GeomAbs import GeomAbs_Plane, GeomAbs_Cylinder
-from OCC.Core.BRep import BRep_Tool
-from OCC.Core.Bnd import Bnd_Box
-from OCC.Core.BRepBndLib import brepbndlib
-from OCC.Core.GeomLProp import GeomLProp_SLProps
-from OCC.Core.GProp import GProp_GProps
-from OCC.Core.BRepGProp import brepgprop
+from scripts.analysis_pipeline import (
+    DEFAULT_ANALYZERS,
+    analyze_file,
+    analyzer_key,
+    count_cylindrical_faces,
+    count_topology,
+    curvature_summary,
+    is_assembly_by_entity_count,
+    load_step_shape,
+    shape_volume,
+)
+from scripts.assembly_analysis import analyze_assemblies
+from scripts.batch_analysis import DEFAULT_MAX_FILES_PER_WORKER, DEFAULT_TIMEOUT, WorkerPool, run_lanes
+from scripts.large_files import (
+    DEFAULT_LARGE_WORKERS,
+    LARGE_FILE_MB,
+    LARGE_TIMEOUT_FACTOR,
+    analyze_large_file,
+)
+from scripts.result_cache import ResultCache
+from scripts.result_writer import ResultWriter
+from scripts.prefilter import format_stage_report, prefilter_folder
+from scripts.profiling import ProfileLog, format_profile_summary, profile_file, summarize_profile
+from scripts.selection_criteria import (
+    DEFAULT_MIN_CRITERIA_MET,
+    apply_criteria,
+    copy_selected_files,
+    criteria_met,
+    refine_near_boundaries,
+)
+
+# Columns of the analysis results, in the order they are written
+RESULT_COLUMNS = [
+    "File Name", "Total Faces", "Curved Faces", "Total Edges", "Vertices",
+    "Bounding Box Volume", "Mean Curvature", "Curvature Std Dev",
+    "Volume", "Hole Count", "size", "ispart", "Error",
+]
 
 # Function to analyze the faces, edges, and vertices of a STEP file
 def analyze_step_file(file_path):
@@ -41,49 +69,7 @@ def analyze_step_file(file_path):
     Returns:
         dict: Contains the total number of faces, curved faces, edges, and vertices.
     """
-    step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(file_path)
-    if status != 1:
-        raise ValueError("Error reading STEP file")
-
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-
-    # Initialize counts
-    face_count = 0
-    curved_face_count = 0
-    edge_count = 0
-    vert_count = 0
-
-    # Count vertices in the shape
-    vertices_explorer = TopExp_Explorer(shape, TopAbs_VERTEX)
-    while vertices_explorer.More():
-        vertices_explorer.Next()
-        vert_count += 1
-
-    # Count faces in the shape and check for curved faces
-    face_explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    while face_explorer.More():
-        face = face_explorer.Current()
-        face_count += 1
-        surface = BRepAdaptor_Surface(face)
-        if surface.GetType() != GeomAbs_Plane:
-            curved_face_count += 1
-        face_explorer.Next()
-
-    # Count edges in the shape
-    edge_explorer = TopExp_Explorer(shape, TopAbs_EDGE)
-    while edge_explorer.More():
-        edge_explorer.Next()
-        edge_count += 1
-
-    # Return the results as a dictionary
-    return {
-        "Total Faces": face_count,
-        "Curved Faces": curved_face_count,
-        "Total Edges": edge_count,
-        "Vertices": vert_count,
-    }
+    return count_topology(load_step_shape(file_path))
 
 # Function to detect the number of holes (cylindrical faces) in a STEP file
 def detect_holes(step_file_path):
@@ -96,27 +82,13 @@ def detect_holes(step_file_path):
     Returns:
         int: Number of cylindrical faces representing holes.
     """
-    step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(step_file_path)
-    if status != 1:
+    try:
+        shape = load_step_shape(step_file_path)
+    except ValueError:
         print(f"Error reading file: {step_file_path}")
         return None
 
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-
-    explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    hole_count = 0
-
-    # Iterate through each face and check if it's cylindrical (indicating a hole)
-    while explorer.More():
-        face = explorer.Current()
-        surface = BRepAdaptor_Surface(face)
-        if surface.GetType() == GeomAbs_Cylinder:
-            hole_count += 1
-        explorer.Next()
-
-    return hole_count
+    return count_cylindrical_faces(shape)
 
 # Function to get the volume of a STEP file
 def get_volume(file_path):
@@ -129,15 +101,7 @@ def get_volume(file_path):
     Returns:
         float: Volume of the STEP file.
     """
-    step_reader = STEPControl_Reader()
-    step_reader.ReadFile(file_path)
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-
-    # Use OpenCascade to calculate the volume of the shape
-    props = GProp_GProps()
-    brepgprop.VolumeProperties(shape, props)
-    return props.Mass()
+    return shape_volume(load_step_shape(file_path))
 
 # Function to analyze the complexity of the shape based on curvature
 def analyze_complexity_by_curvature(file_path):
@@ -150,116 +114,215 @@ def analyze_complexity_by_curvature(file_path):
     Returns:
         dict: Contains bounding box volume, mean curvature, and curvature standard deviation.
     """
-    step_reader = STEPControl_Reader()
-    status = step_reader.ReadFile(file_path)
-    if status != 1:
-        raise ValueError("Error reading STEP file")
-
-    step_reader.TransferRoots()
-    shape = step_reader.Shape()
-
-    # Calculate the bounding box of the shape
-    bbox = Bnd_Box()
-    brepbndlib.Add(shape, bbox)
-    xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
-    bbox_volume = (xmax - xmin) * (ymax - ymin) * (zmax - zmin)
-
-    # Analyze the curvature of the faces
-    curvatures = []
-    face_explorer = TopExp_Explorer(shape, TopAbs_FACE)
-    while face_explorer.More():
-        face = face_explorer.Current()
-        geom_surface = BRep_Tool.Surface(face)
-        surface = BRepAdaptor_Surface(face)
-        u_min, u_max = surface.FirstUParameter(), surface.LastUParameter()
-        v_min, v_max = surface.FirstVParameter(), surface.LastVParameter()
-        u_sample, v_sample = (u_min + u_max) / 2, (v_min + v_max) / 2
-        props = GeomLProp_SLProps(geom_surface, u_sample, v_sample, 2, 0.01)
-        if props.IsCurvatureDefined():
-            curvatures.append(props.MeanCurvature())
-        face_explorer.Next()
-
-    # Calculate the mean and standard deviation of curvatures
-    curvature_std_dev = np.std(curvatures)
-    curvature_mean = np.mean(curvatures)
-
-    return {
-        "Bounding Box Volume": bbox_volume,
-        "Mean Curvature": curvature_mean,
-        "Curvature Std Dev": curvature_std_dev,
-    }
-
-# Function to check if the STEP file represents an assembly based on the presence of PRODUCT entities
-def is_assembly_by_entity_count(file_path):
+    return curvature_summary(load_step_shape(file_path))
+
+# Function to yield the analysis results of all STEP files in a folder one at a time
+def iter_analysis_for_folder(folder_path, workers=None, timeout=DEFAULT_TIMEOUT,
+                             max_files_per_worker=DEFAULT_MAX_FILES_PER_WORKER, cache_path=None, skip=(),
+                             profile_path=None, cprofile_dir=None, analyzers=None, options=None,
+                             large_file_mb=LARGE_FILE_MB, large_workers=DEFAULT_LARGE_WORKERS,
+                             memory_limit_mb=None):
     """
-    Determines if a STEP file is an assembly by counting the PRODUCT entities.
+    Analyzes all STEP files in a given folder and yields their results as they are produced.
 
     Args:
-        file_path (str): Path to the STEP file.
-
-    Returns:
-        bool: True if the file represents an assembly, False if it's a part.
+        folder_path (str): Path to the folder containing STEP files.
+        workers (int, optional): Number of worker processes. If None, files are analyzed
+            serially in this process. Otherwise each file runs in a worker with a timeout, and
+            files that fail, hang or crash are kept as rows with an "Error" column.
+        timeout (float, optional): Wall-clock limit per file in parallel mode, in seconds.
+        max_files_per_worker (int, optional): Files a worker analyzes before it is replaced.
+        cache_path (str, optional): Path to a result cache database. Files whose content and
+            analyzers are unchanged since they were cached are not analyzed again.
+        skip (collection of str, optional): File names that are not analyzed at all.
+        profile_path (str, optional): Path to a JSON lines log receiving the per-stage timings,
+            peak memory and face/edge counts of every analyzed file (see `profiling`). A summary
+            with percentiles and the slowest files is printed at the end of the run.
+        cprofile_dir (str, optional): With `profile_path`, also dump a cProfile of each file there.
+        analyzers (iterable of str, optional): Pipeline analyzers to run. Defaults to
+            `analysis_pipeline.DEFAULT_ANALYZERS`.
+        options (dict, optional): Analyzer options (see `analysis_pipeline.ShapeContext`).
+        large_file_mb (float, optional): Files larger than this, in MB, are analyzed component by
+            component (see `large_files.analyze_large_file`) in a separate lane of worker processes, also
+            in serial mode. Large files get a fresh worker each and `LARGE_TIMEOUT_FACTOR` times
+            the timeout. None analyzes every file the regular way.
+        large_workers (int): Number of large files analyzed at the same time, next to the
+            regular files.
+        memory_limit_mb (float, optional): Address space limit of a large-file worker, in MB, off
+            by default. It caps virtual memory, which runs well above the resident memory
+            ("Peak RSS MB"), so set it from measured peaks. A file exceeding it is kept as a row
+            with an "Error" column.
+
+    Yields:
+        dict: Analysis result of each STEP file.
     """
+    file_paths = {}
+    cache = ResultCache(cache_path, analyzer_key(analyzers, options)) if cache_path else None
+    profile_log = ProfileLog(profile_path) if profile_path else None
+    run_start = time.time()
+    if profile_log:
+        analyze = partial(profile_file, analyzers=analyzers, options=options, cprofile_dir=cprofile_dir)
+        large_analyze = partial(profile_file, analyzers=analyzers, options=options, cprofile_dir=cprofile_dir,
+                                analyze=analyze_large_file)
+    else:
+        analyze = partial(analyze_file, analyzers=analyzers, options=options)
+        large_analyze = partial(analyze_large_file, analyzers=analyzers, options=options)
+    large_pool = WorkerPool(large_analyze, large_workers, None if timeout is None else timeout * LARGE_TIMEOUT_FACTOR,
+                            max_files_per_worker=1, memory_limit_mb=memory_limit_mb)
     try:
-        with open(file_path, 'r') as file:
-            content = file.read()
-        product_count = len(re.findall(r'PRODUCT\(', content))
-        return product_count > 1  # More than one product indicates an assembly
-    except Exception as e:
-        print(f"Error reading file for entity count: {e}")
-        return None
+        yield from _iter_analysis(folder_path, workers, timeout, max_files_per_worker, cache, skip,
+                                  analyze, profile_log, file_paths, large_file_mb, large_pool)
+    finally:
+        if profile_log:
+            profile_log.close()
+    if profile_log:
+        print(format_profile_summary(summarize_profile(profile_path, since=run_start)))
+
+# Generator doing the work of `iter_analysis_for_folder`
+def _iter_analysis(folder_path, workers, timeout, max_files_per_worker, cache, skip, analyze, profile_log,
+                   file_paths, large_file_mb, large_pool):
+    large_file_paths = {}
+    # Iterate through all STEP files in the folder
+    for entry in os.scandir(folder_path):
+        filename = entry.name
+        if filename.endswith(".step") and filename not in skip:
+            file_path = entry.path
+            file_size_mb = entry.stat().st_size / (1024 * 1024)  # Get file size in MB
+
+            # Reuse the cached record if the file has not changed
+            cached_result = cache.get(file_path) if cache else None
+            if cached_result is not None:
+                print(f"Using cached analysis for {filename} file")
+                yield cached_result
+                continue
+
+            # Large files go to their own lane of workers
+            if large_file_mb is not None and file_size_mb > large_file_mb:
+                print(f"Queueing large file ({file_size_mb:.1f} MB) for root-by-root analysis: {filename}")
+                large_file_paths[filename] = file_path
+                continue
+
+            if workers is not None:
+                file_paths[filename] = file_path
+                continue
+
+            # Load the file once and run every analyzer over the shared shape
+            combined_result = analyze(file_path)
+            if profile_log:
+                profile_log.record(combined_result)
+            if cache:
+                cache.put(file_path, combined_result)
+            print(f"Analysis successful for {filename} file")
+            yield combined_result
+
+    # Analyze the collected files in worker processes, large files in their own lane
+    lanes = [(large_pool, list(large_file_paths.values()))]
+    if file_paths:
+        lanes.append((WorkerPool(analyze, workers, timeout, max_files_per_worker), list(file_paths.values())))
+    file_paths.update(large_file_paths)
+    for combined_result in run_lanes(lanes):
+        if profile_log:
+            profile_log.record(combined_result)
+        if "Error" in combined_result:
+            print(f"Analysis failed for {combined_result['File Name']} file: {combined_result['Error']}")
+        else:
+            if cache:
+                cache.put(file_paths[combined_result["File Name"]], combined_result)
+            print(f"Analysis successful for {combined_result['File Name']} file")
+        yield combined_result
 
 # Function to run the analysis for all STEP files in a folder
-def run_analysis_for_folder(folder_path):
+def run_analysis_for_folder(folder_path, workers=None, timeout=DEFAULT_TIMEOUT,
+                            max_files_per_worker=DEFAULT_MAX_FILES_PER_WORKER, cache_path=None, skip=(),
+                            profile_path=None, analyzers=None, options=None, large_file_mb=LARGE_FILE_MB,
+                            large_workers=DEFAULT_LARGE_WORKERS, memory_limit_mb=None):
     """
     Runs the analysis for all STEP files in a given folder and stores the results in a DataFrame.
 
     Args:
         folder_path (str): Path to the folder containing STEP files.
+        workers (int, optional): Number of worker processes. If None, files are analyzed
+            serially in this process. Otherwise each file runs in a worker with a timeout, and
+            files that fail, hang or crash are kept as rows with an "Error" column.
+        timeout (float, optional): Wall-clock limit per file in parallel mode, in seconds.
+        max_files_per_worker (int, optional): Files a worker analyzes before it is replaced.
+        cache_path (str, optional): Path to a result cache database. Files whose content and
+            analyzers are unchanged since they were cached are not analyzed again.
+        skip (collection of str, optional): File names that are not analyzed at all.
+        profile_path (str, optional): Path to a sidecar log receiving per-stage timings.
+        analyzers (iterable of str, optional): Pipeline analyzers to run.
+        options (dict, optional): Analyzer options.
+        large_file_mb (float, optional): Files larger than this, in MB, are analyzed component by
+            component in a separate lane of workers. None analyzes every file the regular way.
+        large_workers (int): Number of large files analyzed at the same time.
+        memory_limit_mb (float, optional): Address space limit of a large-file worker, in MB.
+            None, the default, leaves the workers unlimited.
 
     Returns:
         DataFrame: Contains the analysis results for each STEP file.
     """
-    all_results = []
-
-    # Iterate through all STEP files in the folder
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".step"):
-            file_path = os.path.join(folder_path, filename)
-            file_size_kb = os.path.getsize(file_path) / 1024  # Get file size in KB
-            
-            # Skip files larger than 5MB
-            if file_size_kb > 5 * 1024:  # 20MB = 20 * 1024 KB
-                print(f"Skipping file (size > 5MB): {filename}")
-                continue
-
-            # Check if the file is an assembly or part
-            is_assembly = is_assembly_by_entity_count(file_path)
-            ispart = 0 if is_assembly else 1
-
-            # Run the analysis if the file meets the size requirements
-            face_edge_result = analyze_step_file(file_path)
-            curvature_result = analyze_complexity_by_curvature(file_path)
-            volume = get_volume(file_path)
-            holes = detect_holes(file_path)
-
-            # Combine results into a dictionary
-            combined_result = {
-                "File Name": filename,
-                **face_edge_result,
-                **curvature_result,
-                "Volume": volume,
-                "Hole Count": holes,
-                "size": file_size_kb,
-                "ispart": ispart
-            } 
-            all_results.append(combined_result)
-            print(f"Analysis successful for {filename} file")
+    all_results = list(iter_analysis_for_folder(folder_path, workers, timeout, max_files_per_worker,
+                                                cache_path, skip, profile_path,
+                                                analyzers=analyzers, options=options,
+                                                large_file_mb=large_file_mb, large_workers=large_workers,
+                                                memory_limit_mb=memory_limit_mb))
 
     # Store the results in a DataFrame
     df = pd.DataFrame(all_results)
     return df
 
+# Function to run the analysis for a folder while streaming the results to a CSV file
+def stream_analysis_for_folder(folder_path, output_path, workers=None, timeout=DEFAULT_TIMEOUT,
+                               max_files_per_worker=DEFAULT_MAX_FILES_PER_WORKER, cache_path=None,
+                               flush_every=50, resume=True, profile_path=None, analyzers=None, options=None,
+                               large_file_mb=LARGE_FILE_MB, large_workers=DEFAULT_LARGE_WORKERS,
+                               memory_limit_mb=None, retry_errors=True):
+    """
+    Runs the analysis for all STEP files in a folder and appends each result to a CSV file.
+
+    Rows are written as soon as they are produced and checkpointed every `flush_every` rows,
+    so memory use does not grow with the folder size. If the run is interrupted, calling the
+    function again with the same output path skips the files that were already written and
+    analyzes the files that failed again.
+
+    Args:
+        folder_path (str): Path to the folder containing STEP files.
+        output_path (str): Path to the output CSV file.
+        workers (int, optional): Number of worker processes. If None, files are analyzed serially.
+        timeout (float, optional): Wall-clock limit per file in parallel mode, in seconds.
+        max_files_per_worker (int, optional): Files a worker analyzes before it is replaced.
+        cache_path (str, optional): Path to a result cache database.
+        flush_every (int): Number of rows written between two checkpoints.
+        resume (bool): Continue an interrupted run instead of overwriting the output file.
+        profile_path (str, optional): Path to a sidecar log receiving per-stage timings.
+        analyzers (iterable of str, optional): Pipeline analyzers to run. Columns outside
+            `RESULT_COLUMNS` are not written.
+        options (dict, optional): Analyzer options.
+        large_file_mb (float, optional): Files larger than this, in MB, are analyzed component by
+            component in a separate lane of workers. None analyzes every file the regular way.
+        large_workers (int): Number of large files analyzed at the same time.
+        memory_limit_mb (float, optional): Address space limit of a large-file worker, in MB.
+            None, the default, leaves the workers unlimited.
+        retry_errors (bool): On resume, analyze the files whose rows have an "Error" again. If
+            False, they are skipped like the successful ones.
+
+    Returns:
+        int: Total number of rows in the output file.
+    """
+    with ResultWriter(output_path, RESULT_COLUMNS, flush_every=flush_every, resume=resume,
+                      retry_errors=retry_errors) as writer:
+        if writer.done:
+            print(f"Resuming: {len(writer.done)} files already analyzed, {len(writer.failed)} failed ones retried")
+        for combined_result in iter_analysis_for_folder(folder_path, workers, timeout, max_files_per_worker,
+                                                        cache_path, skip=writer.done,
+                                                        profile_path=profile_path,
+                                                        analyzers=analyzers, options=options,
+                                                        large_file_mb=large_file_mb,
+                                                        large_workers=large_workers,
+                                                        memory_limit_mb=memory_limit_mb):
+            writer.write(combined_result)
+        return writer.rows_written
+
 # Function to apply selection criteria based on analysis results
 def criteria_count(row):
     """
@@ -269,49 +332,102 @@ def criteria_count(row):
         row (pandas.Series): A row from the DataFrame containing analysis results.
 
     Returns:
-        int: Number of criteria met by the file.
+        float: Weighted number of criteria met by the file.
     """
-    criteria = [
-        20 <= row["Total Faces"] <= 120, 
-        5 <= row["Curved Faces"] <= 50, 
-        100 <= row["Total Edges"] <= 700, 
-        200 <= row["Vertices"] <= 1500,  
-        1e3 <= row["Volume"] <= 1.5e5, 
-        5 <= row["Hole Count"] <= 50,
-        25 <= row["size"] <= 500,  # file size filter  
-        row["ispart"] == 1 
-    ]
-
-    return sum(criteria)
+    # The criteria themselves are defined in `selection_criteria.DEFAULT_CRITERIA`. The row is
+    # evaluated as a one-row table; its label, not 0, indexes the result.
+    return criteria_met(row.to_frame().T).iloc[0]
 
 # Function to filter STEP files based on selection criteria and move them to a new folder
-def file_selection(folder_path, destination_folder):
+def file_selection(folder_path, destination_folder, workers=None, cache_path=None, prefilter=False,
+                   criteria=None, min_criteria_met=DEFAULT_MIN_CRITERIA_MET, mesh_volume=False, mesh_cache=None,
+                   analyzers=None, options=None, assembly_breakdown=None):
     """
     Filters STEP files based on analysis criteria and copies the selected files to a destination folder.
 
     Args:
         folder_path (str): Path to the folder containing STEP files.
         destination_folder (str): Path to the folder where selected files will be copied.
+        workers (int, optional): Number of worker processes used for the analysis.
+            If None, files are analyzed serially.
+        cache_path (str, optional): Path to a result cache database; unchanged files are
+            not analyzed again.
+        prefilter (bool): Reject files from their size and raw entity counts before the full
+            analysis (see `prefilter.prefilter_folder`). Only the survivors are analyzed, and a
+            per-stage report is printed and stored in `data.attrs["stage_report"]`.
+        criteria (list of Criterion, optional): Selection criteria.
+            Defaults to `selection_criteria.DEFAULT_CRITERIA`.
+        min_criteria_met (float): Minimum weighted number of criteria met for a file to be selected.
+        mesh_volume (bool): Compute the volume from a triangle mesh instead of exact BRep
+            integration (see `tessellation`). Files whose mesh volume lies close to a volume
+            bound are checked again with the exact volume before the selection.
+        mesh_cache (str, optional): With `mesh_volume`, folder the meshes are cached in.
+        analyzers (iterable of str, optional): Pipeline analyzers to run, e.g. the defaults plus
+            "shape_descriptors" so that criteria can use the fill and aspect ratios.
+            Defaults to `analysis_pipeline.DEFAULT_ANALYZERS`.
+        options (dict, optional): Analyzer options, e.g. {"bbox_mode": "obb"}.
+        assembly_breakdown (str, optional): Path to a CSV file. The whole-shape metrics of an
+            assembly mix its bodies, so the files flagged as assemblies ("ispart" of 0) are also
+            analyzed component by component (see `assembly_analysis`). The hierarchical table is
+            written there and stored in `data.attrs["assembly_breakdown"]`.
 
     Returns:
-        DataFrame: Contains the analysis results for all files.
+        DataFrame: Contains the analysis results for all analyzed files.
     """
     if not os.path.exists(destination_folder):
         os.makedirs(destination_folder)
 
-    # Run the analysis for all files in the folder
-    data = run_analysis_for_folder(folder_path)
+    # Stage 1: reject files from their metadata and raw entity counts
+    rejected = {}
+    if prefilter:
+        survivors, rejected, prefilter_time = prefilter_folder(folder_path, criteria, min_criteria_met)
+
+    # Run the analysis for all remaining files in the folder
+    analysis_start = time.perf_counter()
+    if mesh_volume:
+        analyzers = tuple("mesh_volume" if name == "volume" else name for name in analyzers or DEFAULT_ANALYZERS)
+        options = {**(options or {}), **({"mesh_cache": mesh_cache} if mesh_cache else {})}
+    data = run_analysis_for_folder(folder_path, workers=workers, cache_path=cache_path, skip=rejected,
+                                   analyzers=analyzers, options=options)
+    if mesh_volume and not data.empty:
+        # Only files close to a volume bound need the exact integration
+        refined = refine_near_boundaries(
+            data, {"Volume": lambda row: get_volume(os.path.join(folder_path, row["File Name"]))}, criteria
+        )
+        print(f"Exact volume computed for {refined} of {len(data)} files")
+    analysis_time = time.perf_counter() - analysis_start
+
+    if assembly_breakdown and "ispart" in data:
+        assemblies = data.loc[data["ispart"] == 0, "File Name"]
+        data.attrs["assembly_breakdown"] = analyze_assemblies(
+            [os.path.join(folder_path, file_name) for file_name in assemblies], analyzers, options, workers,
+            output_path=assembly_breakdown,
+        )
+        print(f"{len(assemblies)} assemblies broken down into components in {assembly_breakdown}")
     
-    # Apply the selection criteria
-    data['Criteria Met'] = data.apply(criteria_count, axis=1)
-    filtered_data = data[data['Criteria Met'] >= 8]  # Files that meet at least 8 criteria
+    # Apply the selection criteria to the whole table at once
+    filtered_data = apply_criteria(data, criteria, min_criteria_met)  # Files that meet at least 8 criteria
+
+    if prefilter:
+        # Stage 1 saves the full analysis time of every file it rejected
+        time_per_file = analysis_time / len(data) if len(data) else 0.0
+        data.attrs["stage_report"] = report = {
+            "scanned": len(survivors) + len(rejected),
+            "prefilter_rejected": len(rejected),
+            "prefilter_time": prefilter_time,
+            "analyzed": len(data),
+            "analysis_rejected": len(data) - len(filtered_data),
+            "analysis_time": analysis_time,
+            "selected": len(filtered_data),
+            "time_saved": len(rejected) * time_per_file - prefilter_time,
+        }
+        print(format_stage_report(report))
     
     # If any files meet the criteria, copy them to the destination folder
     if not filtered_data.empty:
-        for _, row in filtered_data.iterrows():
-            file_path = os.path.join(folder_path, row['File Name'])
-            print(f"File meets {row['Criteria Met']} criteria: {row['File Name']}")
-            shutil.copy(file_path, os.path.join(destination_folder, row['File Name']))
+        for file_name, met in zip(filtered_data['File Name'], filtered_data['Criteria Met']):
+            print(f"File meets {met} criteria: {file_name}")
+        copy_selected_files(filtered_data, folder_path, destination_folder)
     else:
         print(f"No files meet at least 7 criteria.")
     
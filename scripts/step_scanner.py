@@ -0,0 +1,420 @@
+"""
+Fast STEP Header and Entity Scanner
+
+This module reads the raw text of a STEP file (ISO 10303-21) without starting an OCC reader.
+In a single pass over a memory-mapped file it extracts:
+- The HEADER section entries (FILE_DESCRIPTION, FILE_NAME, FILE_SCHEMA)
+- A histogram of the entity types instantiated in the DATA section
+  (PRODUCT, MANIFOLD_SOLID_BREP, ADVANCED_FACE, CYLINDRICAL_SURFACE, ...)
+
+The file is never loaded into a Python string, so memory use stays constant whatever the file
+size, and the scan runs at disk speed. Complex instances such as
+`#6 = ( GEOMETRIC_REPRESENTATION_CONTEXT( 3 ) ... )` are counted under their first entity type.
+
+`scan_product_structure` reads the product structure of an assembly the same way: which leaf
+product definitions hold the geometry, and where each of their instances is placed. Large
+assemblies can then be transferred one component at a time (see `large_files`).
+
+Only the Python standard library is used, so part/assembly classification and pre-filtering can
+run without importing OCC.
+"""
+
+import os
+import re
+import mmap
+from collections import Counter
+
+# Entity instance: "#12 = NAME(" or, for complex instances, "#12 = ( NAME("
+_ENTITY_PATTERN = re.compile(rb'#\d+\s*=\s*\(?\s*([A-Z][A-Z0-9_]*)\s*\(')
+
+# Header entry: "NAME( parameters );"
+_HEADER_ENTRY_PATTERN = re.compile(rb'([A-Z][A-Z0-9_]*)\s*\((.*?)\)\s*;', re.S)
+
+# Maximum number of bytes searched for the end of the HEADER section
+HEADER_SEARCH_BYTES = 64 * 1024
+
+# Complete instance "#12 = ...;", where quoted strings may contain semicolons
+_RECORD_PATTERN = re.compile(rb"#(\d+)\s*=\s*((?:'(?:[^']|'')*'|[^';])*);")
+
+# Parameter token: string, reference, keyword, enumeration, number or punctuation
+_TOKEN_PATTERN = re.compile(r"\s*('(?:[^']|'')*'|#\d+|[A-Z][A-Z0-9_]*|\.[A-Z0-9_]*\.|[-+0-9.Ee]+|[$*(),])")
+
+# Entities describing the product structure and the placement of its instances
+_STRUCTURE_ENTITIES = frozenset({
+    "PRODUCT", "PRODUCT_DEFINITION_FORMATION", "PRODUCT_DEFINITION_FORMATION_WITH_SPECIFIED_SOURCE",
+    "PRODUCT_DEFINITION", "PRODUCT_DEFINITION_SHAPE", "SHAPE_DEFINITION_REPRESENTATION",
+    "SHAPE_REPRESENTATION_RELATIONSHIP", "NEXT_ASSEMBLY_USAGE_OCCURRENCE",
+    "CONTEXT_DEPENDENT_SHAPE_REPRESENTATION", "ITEM_DEFINED_TRANSFORMATION",
+})
+
+# Length of one file unit in millimetres, the unit OCC transfers shapes to
+_SI_PREFIX_MM = {None: 1000.0, ".KILO.": 1e6, ".DECI.": 100.0, ".CENTI.": 10.0, ".MILLI.": 1.0, ".MICRO.": 1e-3}
+_CONVERSION_UNIT_MM = {"INCH": 25.4, "FOOT": 304.8, "YARD": 914.4, "MILE": 1609344.0}
+
+# Placement of an instance that is not moved: rows of a 3x4 rigid transformation
+IDENTITY_PLACEMENT = ((1.0, 0.0, 0.0, 0.0), (0.0, 1.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0))
+
+
+class StepScan:
+    """
+    Header entries and entity type histogram of a STEP file.
+
+    Attributes:
+        file_path (str): Path to the scanned file.
+        file_size (int): Size of the file, in bytes.
+        header (dict): Raw parameter text of each HEADER entry, keyed by entry name.
+        entity_counts (Counter): Number of instances of each entity type in the DATA section.
+    """
+
+    def __init__(self, file_path, file_size, header, entity_counts):
+        self.file_path = file_path
+        self.file_size = file_size
+        self.header = header
+        self.entity_counts = entity_counts
+
+    @property
+    def schema(self):
+        """Schema names listed in FILE_SCHEMA, e.g. ['AUTOMOTIVE_DESIGN { 1 0 10303 214 1 1 1 1 }']."""
+        return _strings(self.header.get("FILE_SCHEMA", ""))
+
+    @property
+    def product_count(self):
+        """Number of PRODUCT entities."""
+        return self.entity_counts["PRODUCT"]
+
+    @property
+    def is_assembly(self):
+        """True if the file holds more than one PRODUCT, which indicates an assembly."""
+        return self.product_count > 1
+
+
+class StepComponent:
+    """
+    A leaf product of an assembly and the placements of all its instances.
+
+    Attributes:
+        ident (int): Instance number of the PRODUCT_DEFINITION, e.g. 12 for "#12".
+        rank (int): Position of the PRODUCT_DEFINITION among the instances of the DATA section,
+            starting at 1, which is its entity number in an OCC reader's model.
+        name (str): Name of the product.
+        placements (list of tuple): Placement of each instance in the coordinates of its root,
+            as the rows of a 3x4 rigid transformation with translations in millimetres.
+    """
+
+    def __init__(self, ident, rank, name, placements):
+        self.ident = ident
+        self.rank = rank
+        self.name = name
+        self.placements = placements
+
+    def __repr__(self):
+        return f"StepComponent(#{self.ident}, {self.name!r}, instances={len(self.placements)})"
+
+
+def _strings(text):
+    # Quoted STEP strings, with '' as an escaped quote
+    return [match.replace("''", "'") for match in re.findall(r"'((?:[^']|'')*)'", text)]
+
+
+def _parse_header(data, end):
+    header = {}
+    start = data.find(b'HEADER;', 0, end)
+    if start < 0:
+        return header
+    for match in _HEADER_ENTRY_PATTERN.finditer(data, start + len(b'HEADER;'), end):
+        header[match.group(1).decode('ascii')] = match.group(2).decode('latin-1').strip()
+    return header
+
+
+# Function to scan a STEP file for its header and entity type histogram
+def scan_step_file(file_path):
+    """
+    Scans a STEP file once and returns its header entries and entity type histogram.
+
+    Args:
+        file_path (str): Path to the STEP file.
+
+    Returns:
+        StepScan: Header entries and entity counts of the file.
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size == 0:
+        return StepScan(file_path, 0, {}, Counter())
+
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # The HEADER section ends at the first ENDSEC; the DATA section follows it
+        header_end = data.find(b'ENDSEC;', 0, HEADER_SEARCH_BYTES)
+        header = _parse_header(data, header_end) if header_end >= 0 else {}
+        data_start = data.find(b'DATA;', max(header_end, 0))
+        if data_start < 0:
+            data_start = 0
+
+        entity_counts = Counter(match.group(1).decode('ascii')
+                                for match in _ENTITY_PATTERN.finditer(data, data_start))
+
+    return StepScan(file_path, file_size, header, entity_counts)
+
+
+def _parse_parameters(tokens, position):
+    # Parses the list opened before `position`; returns the values and the position after ")"
+    values = []
+    while position < len(tokens):
+        token = tokens[position]
+        position += 1
+        if token == ")":
+            return values, position
+        if token == ",":
+            continue
+        if token == "(":
+            value, position = _parse_parameters(tokens, position)
+        elif token.startswith("'"):
+            value = token[1:-1].replace("''", "'")
+        elif token.startswith("#"):
+            value = int(token[1:])
+        elif token in ("$", "*"):
+            value = None
+        elif token.startswith(".") and token.endswith(".") and len(token) > 1 and not token[1].isdigit():
+            value = token
+        elif token[0].isalpha():
+            # Typed parameter such as LENGTH_MEASURE(1.0)
+            value, position = _parse_parameters(tokens, position + 1)
+            value = (token, value)
+        else:
+            value = float(token)
+        values.append(value)
+    return values, position
+
+
+def _parse_record(body):
+    # Parses the body of an instance into {entity type: parameters}: one entry for a simple
+    # instance, one per part for a complex instance "( A(...) B(...) )"
+    tokens = _TOKEN_PATTERN.findall(body)
+    if tokens and tokens[0] == "(":
+        tokens = tokens[1:]
+    record = {}
+    position = 0
+    while position + 1 < len(tokens) and tokens[position + 1] == "(":
+        name = tokens[position]
+        record[name], position = _parse_parameters(tokens, position + 2)
+    return record
+
+def _data_start(data):
+    # Offset of the DATA section, after the HEADER section
+    header_end = data.find(b'ENDSEC;', 0, HEADER_SEARCH_BYTES)
+    return max(data.find(b'DATA;', max(header_end, 0)), 0)
+
+
+def _select_records(data, idents):
+    # Parses the instances whose numbers are in `idents`, in one pass over the DATA section
+    wanted = {str(ident).encode('ascii') for ident in idents}
+    records = {}
+    if wanted:
+        for match in _RECORD_PATTERN.finditer(data, _data_start(data)):
+            if match.group(1) in wanted:
+                records[int(match.group(1))] = _parse_record(match.group(2).decode('latin-1'))
+    return records
+
+
+def _length_unit_mm(record):
+    # Millimetres per file unit of a complex LENGTH_UNIT instance, or None if unknown
+    if "SI_UNIT" in record:
+        return _SI_PREFIX_MM.get(record["SI_UNIT"][0])
+    if "CONVERSION_BASED_UNIT" in record:
+        return _CONVERSION_UNIT_MM.get(str(record["CONVERSION_BASED_UNIT"][0]).upper())
+    return None
+
+
+def _norm(vector):
+    return sum(c * c for c in vector) ** 0.5
+
+
+def _normalized(vector):
+    length = _norm(vector)
+    return tuple(c / length for c in vector)
+
+
+def _frame(axis, records, length_mm):
+    # Rigid transformation from the coordinates of an AXIS2_PLACEMENT_3D to those of its context
+    _, location, z_ref, x_ref = records[axis]["AXIS2_PLACEMENT_3D"]
+    origin = [c * length_mm for c in records[location]["CARTESIAN_POINT"][1]]
+    z = _normalized(records[z_ref]["DIRECTION"][1]) if z_ref is not None else (0.0, 0.0, 1.0)
+    x = records[x_ref]["DIRECTION"][1] if x_ref is not None else (1.0, 0.0, 0.0)
+    along = sum(a * b for a, b in zip(x, z))
+    if abs(abs(along) - _norm(x)) < 1e-9 * max(_norm(x), 1.0):
+        # Reference direction parallel to the axis: any perpendicular one will do
+        x = (0.0, 0.0, 1.0) if abs(z[2]) < 0.9 else (1.0, 0.0, 0.0)
+        along = sum(a * b for a, b in zip(x, z))
+    x = _normalized([a - along * b for a, b in zip(x, z)])
+    y = (z[1] * x[2] - z[2] * x[1], z[2] * x[0] - z[0] * x[2], z[0] * x[1] - z[1] * x[0])
+    return tuple((x[i], y[i], z[i], origin[i]) for i in range(3))
+
+
+def _compose(a, b):
+    # Rows of the 3x4 transformation applying b, then a
+    return tuple(
+        tuple(sum(a[i][k] * b[k][j] for k in range(3)) + (a[i][3] if j == 3 else 0.0) for j in range(4))
+        for i in range(3)
+    )
+
+
+def _invert(a):
+    # Inverse of a rigid 3x4 transformation: transposed rotation, translation rotated back
+    return tuple(
+        (a[0][i], a[1][i], a[2][i], -sum(a[k][i] * a[k][3] for k in range(3)))
+        for i in range(3)
+    )
+
+
+# Function to read the product structure of a STEP assembly
+def scan_product_structure(file_path):
+    """
+    Reads the product structure of a STEP file and places every instance of its leaf products.
+
+    The assembly tree is given by the NEXT_ASSEMBLY_USAGE_OCCURRENCE instances, and each
+    occurrence is placed by the ITEM_DEFINED_TRANSFORMATION of its
+    CONTEXT_DEPENDENT_SHAPE_REPRESENTATION. Leaf products are the product definitions that have
+    a shape representation and no sub-assembly; geometry attached directly to an assembly
+    product is not covered. The file is read in three passes (structure, axes, then points and
+    directions) that keep only the instances involved, so memory use does not grow with the
+    amount of geometry.
+
+    Args:
+        file_path (str): Path to the STEP file.
+
+    Returns:
+        list of StepComponent: Leaf products, in the order of the assembly tree. Empty when the
+            file has no assembly structure, or when an occurrence is placed in a way this
+            reader does not resolve (e.g. through mapped items).
+    """
+    if os.path.getsize(file_path) == 0:
+        return []
+
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        records = {}
+        ranks = {}
+        length_mm = None
+        for rank, match in enumerate(_RECORD_PATTERN.finditer(data, _data_start(data)), start=1):
+            body = match.group(2)
+            if body.lstrip().startswith(b'('):
+                wanted = b'REPRESENTATION_RELATIONSHIP' in body or (length_mm is None and b'LENGTH_UNIT' in body)
+                if not wanted:
+                    continue
+            else:
+                name = _ENTITY_PATTERN.match(b'#0=' + body[:80])
+                if name is None or name.group(1).decode('ascii') not in _STRUCTURE_ENTITIES:
+                    continue
+            record = _parse_record(body.decode('latin-1'))
+            if "LENGTH_UNIT" in record:
+                length_mm = _length_unit_mm(record)
+                continue
+            ident = int(match.group(1))
+            records[ident] = record
+            if "PRODUCT_DEFINITION" in record:
+                ranks[ident] = rank
+
+        try:
+            return _place_components(data, records, ranks, length_mm or 1.0)
+        except (KeyError, IndexError, TypeError, ValueError, ZeroDivisionError):
+            # Dangling references, or placements this reader does not resolve
+            return []
+
+
+def _place_components(data, records, ranks, length_mm):
+    # Builds the assembly tree from the structure instances and places every leaf instance
+    def entities(name):
+        return ((ident, record[name]) for ident, record in records.items() if name in record)
+
+    definition_shapes = {ident: params[2] for ident, params in entities("PRODUCT_DEFINITION_SHAPE")}
+    children = {}
+    child_definitions = set()
+    for ident, params in entities("NEXT_ASSEMBLY_USAGE_OCCURRENCE"):
+        children.setdefault(params[3], []).append((ident, params[4]))
+        child_definitions.add(params[4])
+    if not children:
+        return []
+
+    # Representations of each product definition, closed over shape representation relationships
+    links = {}
+    transformed = {}
+    for ident, record in records.items():
+        if "REPRESENTATION_RELATIONSHIP_WITH_TRANSFORMATION" in record:
+            transformed[ident] = record
+            continue
+        params = record.get("REPRESENTATION_RELATIONSHIP") or record.get("SHAPE_REPRESENTATION_RELATIONSHIP")
+        if params:
+            links.setdefault(params[2], set()).add(params[3])
+            links.setdefault(params[3], set()).add(params[2])
+    representations = {}
+    for _, params in entities("SHAPE_DEFINITION_REPRESENTATION"):
+        definition = definition_shapes.get(params[0])
+        if definition in ranks:
+            representations.setdefault(definition, set()).add(params[1])
+    for reps in representations.values():
+        pending = list(reps)
+        while pending:
+            for linked in links.get(pending.pop(), ()):
+                if linked not in reps:
+                    reps.add(linked)
+                    pending.append(linked)
+
+    # Axes placing each occurrence: (axis in the child, axis in the parent)
+    occurrence_relations = {definition_shapes.get(params[1]): params[0]
+                            for _, params in entities("CONTEXT_DEPENDENT_SHAPE_REPRESENTATION")}
+    placing_axes = {}
+    for occurrences in children.values():
+        for occurrence, child in occurrences:
+            relation = transformed[occurrence_relations[occurrence]]
+            _, _, rep_1, rep_2 = relation["REPRESENTATION_RELATIONSHIP"]
+            operator = relation["REPRESENTATION_RELATIONSHIP_WITH_TRANSFORMATION"][0]
+            _, _, item_1, item_2 = records[operator]["ITEM_DEFINED_TRANSFORMATION"]
+            child_reps = representations.get(child, set())
+            if rep_1 not in child_reps and rep_2 in child_reps:
+                # Relationship written from the parent to the child
+                item_1, item_2 = item_2, item_1
+            placing_axes[occurrence] = (item_1, item_2)
+
+    axes = _select_records(data, {axis for pair in placing_axes.values() for axis in pair})
+    records.update(axes)
+    records.update(_select_records(data, {ref for record in axes.values()
+                                          for ref in record["AXIS2_PLACEMENT_3D"][1:] if ref is not None}))
+    transforms = {
+        occurrence: _compose(_frame(parent_axis, records, length_mm), _invert(_frame(child_axis, records, length_mm)))
+        for occurrence, (child_axis, parent_axis) in placing_axes.items()
+    }
+
+    placements = {}
+    pending = [(definition, IDENTITY_PLACEMENT, frozenset())
+               for definition in ranks if definition not in child_definitions]
+    while pending:
+        definition, placement, path = pending.pop(0)
+        if definition in path:
+            raise ValueError("Cyclic assembly structure")
+        if definition not in children:
+            if representations.get(definition):
+                placements.setdefault(definition, []).append(placement)
+            continue
+        pending[:0] = [(child, _compose(placement, transforms[occurrence]), path | {definition})
+                       for occurrence, child in children[definition]]
+
+    components = []
+    for definition, instances in placements.items():
+        formation = records[records[definition]["PRODUCT_DEFINITION"][2]]
+        product = records[next(iter(formation.values()))[2]]["PRODUCT"]
+        components.append(StepComponent(definition, ranks[definition], product[1] or product[0], instances))
+    return components
+
+
+# Function to scan every STEP file in a folder
+def scan_folder(folder_path):
+    """
+    Scans all STEP files in a folder, one at a time.
+
+    Args:
+        folder_path (str): Path to the folder containing STEP files.
+
+    Yields:
+        StepScan: Header entries and entity counts of each file.
+    """
+    for entry in os.scandir(folder_path):
+        if entry.is_file() and entry.name.lower().endswith(('.step', '.stp')):
+            yield scan_step_file(entry.path)
@@ -0,0 +1,294 @@
+"""
+Tessellation Cache and Mesh-Based Metrics
+
+This module gives an approximate alternative to the exact BRep integration of
+`analysis_pipeline.shape_volume` and `bounding_box_volume`. Each shape is tessellated once with
+`BRepMesh_IncrementalMesh`, and the triangle mesh is kept as two compact arrays:
+
+    vertices     float32 array of shape (n, 3)
+    triangles    int32 array of shape (m, 3), outward-facing (counter-clockwise) vertex indices
+
+Meshes are stored in a cache folder as `.npz` files keyed by the SHA-256 of the STEP file and
+the deflections, so later runs read the arrays instead of tessellating again. Renaming or
+copying a file keeps its mesh valid; changing its content invalidates it.
+
+The volume, surface area, axis-aligned bounding box and oriented bounding box are computed
+from the arrays with vectorized NumPy. The volume is the sum of the signed volumes of the
+tetrahedra spanned by the origin and each triangle, so it is exact for the mesh; the mesh
+itself sits inside curved surfaces by up to the linear deflection, which makes mesh volumes of
+convex curved parts slightly low. Use `selection_criteria.refine_near_boundaries` to fall back
+to the exact value where the difference could change a selection.
+
+Vertices are not shared between faces; the metrics do not need a watertight index.
+"""
+
+import os
+import numpy as np
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import topods
+from scripts.result_cache import file_content_hash
+
+# Maximum distance between the mesh and the surface, in model units
+DEFAULT_DEFLECTION = 0.1
+
+# Maximum angle between the normals of neighbouring triangles, in radians
+DEFAULT_ANGULAR_DEFLECTION = 0.5
+
+
+class TriangleMesh:
+    """
+    A triangle mesh held as vertex and triangle arrays.
+
+    Args:
+        vertices (ndarray): Vertex coordinates, shape (n, 3).
+        triangles (ndarray): Vertex indices of each triangle, shape (m, 3), counter-clockwise
+            when seen from outside the shape.
+    """
+
+    def __init__(self, vertices, triangles):
+        self.vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.triangles = np.asarray(triangles, dtype=np.int32).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.triangles)
+
+    @classmethod
+    def concatenate(cls, meshes):
+        """Merges several meshes into one, renumbering the vertices of each."""
+        meshes = list(meshes)
+        if not meshes:
+            return cls(np.zeros((0, 3)), np.zeros((0, 3)))
+        offsets = np.cumsum([0] + [len(mesh.vertices) for mesh in meshes])
+        return cls(np.concatenate([mesh.vertices for mesh in meshes]),
+                   np.concatenate([mesh.triangles.astype(np.int64) + offsets[i] for i, mesh in enumerate(meshes)]))
+
+    def transformed(self, placement):
+        """Returns a copy of the mesh moved by a rigid transformation given as its 3x4 rows."""
+        matrix = np.asarray(placement, dtype=np.float64)
+        vertices = self.vertices.astype(np.float64) @ matrix[:, :3].T + matrix[:, 3]
+        return TriangleMesh(vertices, self.triangles)
+
+    def _corners(self):
+        # Corners of every triangle in float64, relative to the first vertex for precision
+        points = self.vertices.astype(np.float64)
+        if len(points):
+            points -= points[0]
+        return points[self.triangles[:, 0]], points[self.triangles[:, 1]], points[self.triangles[:, 2]]
+
+    def triangle_areas(self):
+        """Returns the area of every triangle."""
+        a, b, c = self._corners()
+        return 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+
+    def surface_area(self):
+        """Returns the total area of the mesh."""
+        return float(self.triangle_areas().sum())
+
+    def volume(self):
+        """
+        Returns the enclosed volume, as the sum of the signed tetrahedron volumes.
+
+        The result is only meaningful for closed meshes (solids); open shells give a value
+        that depends on the origin.
+        """
+        a, b, c = self._corners()
+        return float(np.einsum('ij,ij->i', a, np.cross(b, c)).sum() / 6.0)
+
+    def bounding_box(self):
+        """
+        Returns the axis-aligned bounding box.
+
+        Returns:
+            tuple: (xmin, ymin, zmin, xmax, ymax, zmax), like `Bnd_Box.Get`.
+        """
+        if not len(self.vertices):
+            return (0.0,) * 6
+        return tuple(float(value) for value in np.r_[self.vertices.min(axis=0), self.vertices.max(axis=0)])
+
+    def oriented_bounding_box(self):
+        """
+        Returns an oriented bounding box aligned with the principal axes of the surface.
+
+        The axes are the eigenvectors of the covariance of the surface, integrated exactly over
+        every triangle, so the result does not depend on how densely each face is tessellated.
+
+        Returns:
+            tuple: (center, axes, extents) where `axes` holds one unit axis per row and
+                `extents` the full box size along each axis, largest first.
+        """
+        if not len(self.triangles):
+            return np.zeros(3), np.eye(3), np.zeros(3)
+        a, b, c = self._corners()
+        areas = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+        total_area = areas.sum()
+        if total_area > 0:
+            # Integral of x x^T over a triangle: area / 12 * (a a^T + b b^T + c c^T + s s^T), s = a + b + c
+            corner_sum = a + b + c
+            mean = (areas[:, None] * corner_sum).sum(axis=0) / (3.0 * total_area)
+            weights = np.tile(areas / 12.0, 4)
+            stacked = np.concatenate((a, b, c, corner_sum))
+            second_moment = np.einsum('i,ij,ik->jk', weights, stacked, stacked)
+            covariance = second_moment / total_area - np.outer(mean, mean)
+        else:
+            covariance = np.eye(3)
+        _, vectors = np.linalg.eigh(covariance)
+        axes = vectors[:, ::-1].T
+
+        points = self.vertices.astype(np.float64)
+        projected = points @ axes.T
+        low, high = projected.min(axis=0), projected.max(axis=0)
+        center = ((low + high) / 2.0) @ axes
+        return center, axes, high - low
+
+    def metrics(self):
+        """
+        Computes the mesh-based metrics of the shape.
+
+        Returns:
+            dict: Mesh volume, surface area, bounding box volume and oriented bounding box
+                volume, plus the triangle count.
+        """
+        xmin, ymin, zmin, xmax, ymax, zmax = self.bounding_box()
+        _, _, extents = self.oriented_bounding_box()
+        return {
+            "Mesh Volume": self.volume(),
+            "Mesh Surface Area": self.surface_area(),
+            "Mesh Bounding Box Volume": (xmax - xmin) * (ymax - ymin) * (zmax - zmin),
+            "Mesh OBB Volume": float(np.prod(extents)),
+            "Mesh Triangles": len(self),
+        }
+
+    def save(self, path):
+        """
+        Saves the mesh to an `.npz` file, replacing it atomically.
+        """
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            np.savez(file, vertices=self.vertices, triangles=self.triangles)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a mesh saved with `save`.
+        """
+        with np.load(path) as data:
+            return cls(data["vertices"], data["triangles"])
+
+
+# Function to tessellate a shape into a triangle mesh
+def tessellate_shape(shape, deflection=DEFAULT_DEFLECTION, angular_deflection=DEFAULT_ANGULAR_DEFLECTION):
+    """
+    Tessellates a shape and collects the triangles of all its faces.
+
+    Args:
+        shape (TopoDS_Shape): Shape to tessellate. The triangulation is stored on its faces.
+        deflection (float): Maximum distance between the mesh and the surface.
+        angular_deflection (float): Maximum angle between neighbouring triangles, in radians.
+
+    Returns:
+        TriangleMesh: Triangles of all faces, oriented outwards.
+    """
+    BRepMesh_IncrementalMesh(shape, deflection, False, angular_deflection, True)
+
+    vertices, triangles = [], []
+    vertex_count = 0
+    explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    while explorer.More():
+        face = topods.Face(explorer.Current())
+        explorer.Next()
+        location = TopLoc_Location()
+        triangulation = BRep_Tool.Triangulation(face, location)
+        if triangulation is None or triangulation.NbTriangles() == 0:
+            continue
+
+        transform = location.Transformation()
+        nodes = [triangulation.Node(i).Transformed(transform).Coord() for i in range(1, triangulation.NbNodes() + 1)]
+        face_triangles = np.array(
+            [triangulation.Triangle(i).Get() for i in range(1, triangulation.NbTriangles() + 1)], dtype=np.int64
+        ) - 1 + vertex_count
+        if face.Orientation() == TopAbs_REVERSED:
+            face_triangles = face_triangles[:, ::-1]
+
+        vertices.append(np.array(nodes, dtype=np.float32))
+        triangles.append(face_triangles)
+        vertex_count += len(nodes)
+
+    if not triangles:
+        return TriangleMesh(np.zeros((0, 3)), np.zeros((0, 3)))
+    return TriangleMesh(np.concatenate(vertices), np.concatenate(triangles))
+
+
+class MeshCache:
+    """
+    Folder of cached meshes keyed by file content hash and deflections.
+
+    Args:
+        root (str): Cache folder, created if needed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, file_path, deflection=DEFAULT_DEFLECTION, angular_deflection=DEFAULT_ANGULAR_DEFLECTION):
+        """Returns the cache path of a file's mesh at the given deflections."""
+        return os.path.join(self.root, f"{file_content_hash(file_path)}-{deflection:g}-{angular_deflection:g}.npz")
+
+    def get(self, file_path, deflection=DEFAULT_DEFLECTION, angular_deflection=DEFAULT_ANGULAR_DEFLECTION,
+            shape=None):
+        """
+        Returns the cached mesh of a file, tessellating and storing it on a miss.
+
+        Args:
+            file_path (str): Path to the STEP file.
+            deflection (float): Linear deflection of the mesh.
+            angular_deflection (float): Angular deflection of the mesh, in radians.
+            shape (TopoDS_Shape, optional): Already loaded shape of the file. If omitted, the
+                file is only loaded on a miss.
+
+        Returns:
+            TriangleMesh: Mesh of the file.
+        """
+        path = self.path(file_path, deflection, angular_deflection)
+        if os.path.exists(path):
+            try:
+                return TriangleMesh.load(path)
+            except (OSError, ValueError, KeyError):
+                pass  # Unreadable entry; tessellate again and overwrite it
+
+        if shape is None:
+            from scripts.analysis_pipeline import load_step_shape
+            shape = load_step_shape(file_path)
+        mesh = tessellate_shape(shape, deflection, angular_deflection)
+        mesh.save(path)
+        return mesh
+
+
+# Function to compute the mesh-based metrics of a STEP file
+def file_mesh_metrics(file_path, cache_root=None, deflection=DEFAULT_DEFLECTION,
+                      angular_deflection=DEFAULT_ANGULAR_DEFLECTION):
+    """
+    Computes the approximate volume, area and bounding boxes of a STEP file from its mesh.
+
+    With a cache folder, a file whose mesh is cached is not loaded at all.
+
+    Args:
+        file_path (str): Path to the STEP file.
+        cache_root (str, optional): Mesh cache folder. Without it the file is always tessellated.
+        deflection (float): Linear deflection of the mesh.
+        angular_deflection (float): Angular deflection of the mesh, in radians.
+
+    Returns:
+        dict: "File Name" and the columns of `TriangleMesh.metrics`.
+    """
+    if cache_root:
+        mesh = MeshCache(cache_root).get(file_path, deflection, angular_deflection)
+    else:
+        from scripts.analysis_pipeline import load_step_shape
+        mesh = tessellate_shape(load_step_shape(file_path), deflection, angular_deflection)
+    return {"File Name": os.path.basename(file_path), **mesh.metrics()}
@@ -0,0 +1,232 @@
+"""
+Single-Pass Topology Walker
+
+This module visits every face of a shape once, builds its `BRepAdaptor_Surface` once and fills,
+in the same traversal:
+- The face, curved face, edge and vertex counts
+- A histogram of surface types (plane, cylinder, cone, sphere, torus, B-spline, ...)
+- The cylindrical face count used as the hole count
+- The mean curvature sampled at the UV midpoint of each face
+
+Edge and vertex counts match separate `TopExp_Explorer` passes over the whole shape: the
+sub-shapes of every face are counted while the face is visited, and the edges and vertices
+that do not belong to any face are added afterwards.
+
+`edge_face_incidence` indexes the distinct faces and edges of a shape and returns which faces
+use which edge, as integer arrays for NumPy-based adjacency computations.
+"""
+
+from collections import Counter
+import numpy as np
+from OCC.Core.TopExp import TopExp_Explorer, topexp
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX
+from OCC.Core.TopTools import (
+    TopTools_IndexedMapOfShape,
+    TopTools_IndexedDataMapOfShapeListOfShape,
+    TopTools_ListIteratorOfListOfShape,
+)
+from OCC.Core.BRepAdaptor import BRepAdaptor_Surface
+from OCC.Core.BRepLProp import BRepLProp_SLProps
+from OCC.Core.GeomAbs import (
+    GeomAbs_Plane,
+    GeomAbs_Cylinder,
+    GeomAbs_Cone,
+    GeomAbs_Sphere,
+    GeomAbs_Torus,
+    GeomAbs_BezierSurface,
+    GeomAbs_BSplineSurface,
+    GeomAbs_SurfaceOfRevolution,
+    GeomAbs_SurfaceOfExtrusion,
+    GeomAbs_OffsetSurface,
+    GeomAbs_OtherSurface,
+)
+from scripts.online_stats import RunningMoments
+
+# Display names of the OCC surface types, in histogram order
+SURFACE_TYPE_NAMES = {
+    GeomAbs_Plane: "Plane",
+    GeomAbs_Cylinder: "Cylinder",
+    GeomAbs_Cone: "Cone",
+    GeomAbs_Sphere: "Sphere",
+    GeomAbs_Torus: "Torus",
+    GeomAbs_BezierSurface: "Bezier",
+    GeomAbs_BSplineSurface: "BSpline",
+    GeomAbs_SurfaceOfRevolution: "Revolution",
+    GeomAbs_SurfaceOfExtrusion: "Extrusion",
+    GeomAbs_OffsetSurface: "Offset",
+    GeomAbs_OtherSurface: "Other",
+}
+
+
+class TopologySummary:
+    """
+    Counts, surface type histogram and curvature statistics collected by `walk_topology`.
+
+    The midpoint mean curvatures are aggregated into `curvature_moments` as they are sampled;
+    faces whose curvature is undefined are counted in `curvature_moments.undefined`.
+    """
+
+    def __init__(self):
+        self.face_count = 0
+        self.curved_face_count = 0
+        self.edge_count = 0
+        self.vertex_count = 0
+        self.surface_types = Counter()
+        self.curvature_moments = RunningMoments()
+        self.cylinder_faces = []
+
+    @property
+    def cylinder_count(self):
+        return self.surface_types["Cylinder"]
+
+    def merge(self, other):
+        """
+        Adds the counts, surface types, curvature moments and cylinder faces of the summary of
+        another, disjoint shape.
+
+        Returns:
+            TopologySummary: self.
+        """
+        self.face_count += other.face_count
+        self.curved_face_count += other.curved_face_count
+        self.edge_count += other.edge_count
+        self.vertex_count += other.vertex_count
+        self.surface_types.update(other.surface_types)
+        self.curvature_moments.merge(other.curvature_moments)
+        self.cylinder_faces.extend(other.cylinder_faces)
+        return self
+
+
+# Function to walk the faces of a shape once and collect all face-level metrics
+def walk_topology(shape, sample_curvature=True, keep_cylinders=False):
+    """
+    Traverses the faces of a shape once and collects counts, surface types and curvature.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+        sample_curvature (bool): Sample the mean curvature at each face's UV midpoint.
+        keep_cylinders (bool): Keep the `(face, adaptor)` pairs of cylindrical faces.
+
+    Returns:
+        TopologySummary: Collected counts, histogram and curvature samples.
+    """
+    summary = TopologySummary()
+    sub_explorer = TopExp_Explorer()
+
+    face_explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    while face_explorer.More():
+        face = face_explorer.Current()
+        summary.face_count += 1
+
+        # Build the adaptor once and reuse it for the type, hole and curvature checks
+        surface = BRepAdaptor_Surface(face)
+        surface_type = surface.GetType()
+        summary.surface_types[SURFACE_TYPE_NAMES.get(surface_type, "Other")] += 1
+        if surface_type != GeomAbs_Plane:
+            summary.curved_face_count += 1
+        if keep_cylinders and surface_type == GeomAbs_Cylinder:
+            summary.cylinder_faces.append((face, surface))
+
+        if sample_curvature:
+            if surface_type == GeomAbs_Plane:
+                # Planes have zero curvature everywhere, no need to evaluate them
+                summary.curvature_moments.add(0.0)
+            else:
+                u_sample = (surface.FirstUParameter() + surface.LastUParameter()) / 2
+                v_sample = (surface.FirstVParameter() + surface.LastVParameter()) / 2
+                props = BRepLProp_SLProps(surface, u_sample, v_sample, 2, 0.01)
+                summary.curvature_moments.add(props.MeanCurvature() if props.IsCurvatureDefined() else float("nan"))
+
+        sub_explorer.Init(face, TopAbs_EDGE)
+        while sub_explorer.More():
+            summary.edge_count += 1
+            sub_explorer.Next()
+
+        sub_explorer.Init(face, TopAbs_VERTEX)
+        while sub_explorer.More():
+            summary.vertex_count += 1
+            sub_explorer.Next()
+
+        face_explorer.Next()
+
+    # Edges and vertices outside of any face (wireframe geometry) are counted separately
+    sub_explorer.Init(shape, TopAbs_EDGE, TopAbs_FACE)
+    while sub_explorer.More():
+        summary.edge_count += 1
+        sub_explorer.Next()
+
+    sub_explorer.Init(shape, TopAbs_VERTEX, TopAbs_FACE)
+    while sub_explorer.More():
+        summary.vertex_count += 1
+        sub_explorer.Next()
+
+    return summary
+
+
+# Function to list which faces use which edge
+def edge_face_incidence(shape):
+    """
+    Indexes the distinct faces of a shape and lists the faces incident to each edge.
+
+    Faces are numbered from 0 in the order of `TopTools_IndexedMapOfShape`, which is the
+    `TopExp_Explorer` order without repeated faces. Edges are numbered the same way.
+
+    Args:
+        shape (TopoDS_Shape): Shape to analyze.
+
+    Returns:
+        tuple: (faces, edges, edge_index, face_index) where `faces` is the
+            `TopTools_IndexedMapOfShape` of the faces, `edges` the
+            `TopTools_IndexedDataMapOfShapeListOfShape` from each edge to its faces, and
+            `edge_index[i]` is used by face `face_index[i]`. Both arrays are int64 and sorted
+            by edge.
+    """
+    faces = TopTools_IndexedMapOfShape()
+    topexp.MapShapes(shape, TopAbs_FACE, faces)
+    edge_faces = TopTools_IndexedDataMapOfShapeListOfShape()
+    topexp.MapShapesAndAncestors(shape, TopAbs_EDGE, TopAbs_FACE, edge_faces)
+
+    edge_index = []
+    face_index = []
+    for edge in range(1, edge_faces.Size() + 1):
+        iterator = TopTools_ListIteratorOfListOfShape(edge_faces.FindFromIndex(edge))
+        seen = set()
+        while iterator.More():
+            face = faces.FindIndex(iterator.Value())
+            # A seam edge lists its face twice
+            if face and face not in seen:
+                seen.add(face)
+                edge_index.append(edge - 1)
+                face_index.append(face - 1)
+            iterator.Next()
+
+    return faces, edge_faces, np.array(edge_index, dtype=np.int64), np.array(face_index, dtype=np.int64)
+
+
+# Function to turn edge-face incidence into pairs of adjacent faces
+def face_neighbour_pairs(edge_index, face_index):
+    """
+    Lists the distinct pairs of faces sharing at least one edge.
+
+    Args:
+        edge_index (ndarray): Edge of each incidence, sorted (see `edge_face_incidence`).
+        face_index (ndarray): Face of each incidence.
+
+    Returns:
+        ndarray: (n, 2) int64 array of face pairs with the smaller index first, sorted.
+    """
+    if len(edge_index) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, edge_index[1:] != edge_index[:-1]])
+    counts = np.diff(np.r_[starts, len(edge_index)])
+
+    # Manifold edges join exactly two faces; non-manifold edges join every pair of their faces
+    manifold = starts[counts == 2]
+    pairs = [np.stack([face_index[manifold], face_index[manifold + 1]], axis=1)]
+    for start, count in zip(starts[counts > 2], counts[counts > 2]):
+        edge_faces = face_index[start:start + count]
+        first, second = np.triu_indices(count, 1)
+        pairs.append(np.stack([edge_faces[first], edge_faces[second]], axis=1))
+
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
@@ -12,8 +12,6 @@ Functionality:
 """
 
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
 from OCC.Core.STEPControl import STEPControl_Reader
 from OCC.Core.BRepGProp import brepgprop_VolumeProperties
 from OCC.Core.GProp import GProp_GProps
@@ -40,30 +38,45 @@ def get_volume(file_path):
     
     return props.Mass()  # Return the computed volume
 
-# Define the folder path containing STEP files
-folder_path = "abc_0000_data"  # Modify this path as needed
+# Function to plot the volumes of several STEP files as a bar chart
+def plot_volumes(df):
+    """
+    Plots the volumes of several STEP files as a bar chart.
+
+    Args:
+        df (DataFrame): Table with a "File" and a "Volume" column.
+    """
+    import matplotlib.pyplot as plt  # Only needed for plotting
+
+    # Plot the volumes using a bar chart
+    plt.figure(figsize=(12, 6))  # Set figure size for better visibility
+    df.plot(kind="bar", x="File", y="Volume", legend=False, color='b')
+
+    # Labeling the graph
+    plt.xlabel("STEP File")
+    plt.ylabel("Volume")
+    plt.title("Volume of STEP Files")
+    plt.xticks(rotation=45, ha="right")  # Rotate x-axis labels for better readability
+
+    # Display the plot
+    plt.show()
 
-# List all STEP files in the folder
-file_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".step")]
+if __name__ == "__main__":
+    import pandas as pd
 
-# Process each STEP file and get volumes
-volumes = [get_volume(fp) for fp in file_paths]
+    # Define the folder path containing STEP files
+    folder_path = "abc_0000_data"  # Modify this path as needed
 
-# Store results in a Pandas DataFrame
-df = pd.DataFrame({"File": file_paths, "Volume": volumes})
+    # List all STEP files in the folder
+    file_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".step")]
 
-# Print the DataFrame to view results
-print(df)
+    # Process each STEP file and get volumes
+    volumes = [get_volume(fp) for fp in file_paths]
 
-# Plot the volumes using a bar chart
-plt.figure(figsize=(12, 6))  # Set figure size for better visibility
-df.plot(kind="bar", x="File", y="Volume", legend=False, color='b')
+    # Store results in a Pandas DataFrame
+    df = pd.DataFrame({"File": file_paths, "Volume": volumes})
 
-# Labeling the graph
-plt.xlabel("STEP File")
-plt.ylabel("Volume")
-plt.title("Volume of STEP Files")
-plt.xticks(rotation=45, ha="right")  # Rotate x-axis labels for better readability
+    # Print the DataFrame to view results
+    print(df)
 
-# Display the plot
-plt.show()
+    plot_volumes(df)
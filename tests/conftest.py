@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Make the `scripts` package importable when pytest is started from another folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Scripts kept from before the test suite, not pytest tests: test_analysis.py runs a selection
+# over a local S:\ data folder when imported and cuda_test.py needs torch and a GPU
+collect_ignore = ["test_analysis.py", "cuda_test.py"]
@@ -0,0 +1,65 @@
+import math
+import numpy as np
+import pytest
+
+pytest.importorskip("OCC")
+
+from scripts.assembly_analysis import rollup_components
+from scripts.online_stats import RunningMoments
+
+
+def _moments(values, weights=None):
+    moments = RunningMoments()
+    moments.add_array(values, weights)
+    return moments
+
+
+def _record(curvatures=None, **columns):
+    record = dict(columns)
+    if curvatures is not None:
+        record["Curvature Moments"] = _moments(curvatures).to_dict()
+    return record
+
+
+def test_additive_columns_are_weighted_by_instances():
+    records = [_record(**{"Total Faces": 6, "Volume": 24.0}), _record(**{"Total Faces": 10, "Surface Area": 5.0})]
+    rollup = rollup_components(records, [3, 1])
+    assert rollup["Total Faces"] == 28
+    # Columns only some components report are summed over those
+    assert rollup["Volume"] == 72.0 and rollup["Surface Area"] == 5.0
+    assert "Hole Count" not in rollup
+
+
+def test_curvature_is_merged_as_if_every_instance_was_sampled():
+    bracket, bolt = [0.0, 0.5, 1.0, 2.0], [4.0, 4.0, 5.0]
+    rollup = rollup_components([_record(bracket), _record(bolt)], [1, 4])
+    samples = bracket + bolt * 4
+    assert rollup["Mean Curvature"] == pytest.approx(np.mean(samples))
+    assert rollup["Curvature Std Dev"] == pytest.approx(np.std(samples))
+
+
+def test_weighted_curvature_samples():
+    # Area-weighted samples, as reported by the curvature field
+    values, weights = [1.0, 3.0], [1.0, 3.0]
+    record = {"Curvature Moments": _moments(values, weights).to_dict()}
+    rollup = rollup_components([record, record], [2, 3])
+    assert rollup["Mean Curvature"] == pytest.approx(np.average(values, weights=weights))
+    assert rollup["Curvature Std Dev"] == pytest.approx(_moments(values, weights).std)
+
+
+def test_hole_diameter_extremes():
+    records = [_record(**{"Min Hole Diameter": 4.0, "Max Hole Diameter": 8.0}),
+               _record(**{"Min Hole Diameter": float("nan"), "Max Hole Diameter": float("nan")}),
+               _record(**{"Min Hole Diameter": 2.5, "Max Hole Diameter": 6.0}),
+               _record()]
+    rollup = rollup_components(records, [1, 5, 2, 1])
+    assert (rollup["Min Hole Diameter"], rollup["Max Hole Diameter"]) == (2.5, 8.0)
+
+    rollup = rollup_components(records[1:2], [1])
+    assert math.isnan(rollup["Min Hole Diameter"]) and math.isnan(rollup["Max Hole Diameter"])
+
+
+def test_components_without_curvature():
+    rollup = rollup_components([_record(**{"Total Faces": 6})], [2])
+    assert rollup == {"Total Faces": 12}
+    assert rollup_components([], []) == {}
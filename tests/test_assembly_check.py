@@ -0,0 +1,73 @@
+import os
+from collections import Counter
+from scripts import assembly_check
+from scripts.assembly_check import AMBIGUOUS, CONFIDENT, LIKELY, PROBABLE, classify_files, entity_count_label
+from scripts.step_scanner import StepScan
+
+
+def _write_step(path, products=1, solids=1, usages=0):
+    lines = ["ISO-10303-21;", "HEADER;", "FILE_SCHEMA(('AUTOMOTIVE_DESIGN'));", "ENDSEC;", "DATA;"]
+    lines += [f"#{i + 1}=PRODUCT('p{i}','','',(#900));" for i in range(products)]
+    lines += [f"#{i + 100}=MANIFOLD_SOLID_BREP('',#901);" for i in range(solids)]
+    lines += [f"#{i + 200}=NEXT_ASSEMBLY_USAGE_OCCURRENCE('{i}','','',#1,#2,$);" for i in range(usages)]
+    lines += ["ENDSEC;", "END-ISO-10303-21;"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write("\n".join(lines))
+    return path
+
+
+def _label(**counts):
+    return entity_count_label(StepScan("x.step", 1, {}, Counter(counts)))
+
+
+def test_entity_count_labels():
+    assert _label(PRODUCT=1, MANIFOLD_SOLID_BREP=1) == ("Part", CONFIDENT, False)
+    assert _label(PRODUCT=1, MANIFOLD_SOLID_BREP=3) == ("Part", LIKELY, False)
+    assert _label(PRODUCT=3, MANIFOLD_SOLID_BREP=2, NEXT_ASSEMBLY_USAGE_OCCURRENCE=2) == ("Assembly", CONFIDENT, False)
+    assert _label(PRODUCT=3, MANIFOLD_SOLID_BREP=2) == ("Assembly", PROBABLE, False)
+    assert _label(PRODUCT=2, MANIFOLD_SOLID_BREP=1) == ("Assembly", AMBIGUOUS, True)
+
+
+def test_rows_in_input_order(tmp_path):
+    paths = [_write_step(str(tmp_path / "part.step")), _write_step(str(tmp_path / "asm.step"), 3, 2, 2),
+             str(tmp_path / "missing.step")]
+    rows = classify_files(paths, escalate=False)
+    assert [row["File Name"] for row in rows] == ["part.step", "asm.step", "missing.step"]
+    assert [row["Label"] for row in rows] == ["Part", "Assembly", "Unknown"]
+    assert rows[2]["Confidence"] == 0.0 and "Error" in rows[2]
+
+
+def test_pooled_scan_matches_serial_scan(tmp_path):
+    paths = [_write_step(str(tmp_path / f"{i:02}.step"), products=1 + i % 3, solids=i % 4) for i in range(20)]
+    serial = classify_files(paths, workers=1, escalate=False)
+    assert classify_files(paths, workers=2, use_threads=True, escalate=False) == serial
+    assert classify_files(paths, workers=2, escalate=False) == serial
+
+
+def _classify_by_folder(file_path):
+    # Stand-in for the OCC check: the folder decides the label
+    label = "Part" if os.path.basename(os.path.dirname(file_path)) == "parts" else "Assembly"
+    return {"File Name": os.path.basename(file_path), "Label": label, "Confidence": PROBABLE,
+            "Method": "occ_shape_type", "Ambiguous": False}
+
+
+def test_escalated_rows_match_back_by_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(assembly_check, "classify_with_occ", _classify_by_folder)
+    paths = [_write_step(str(tmp_path / folder / "same.step"), products=2, solids=1)
+             for folder in ("parts", "assemblies")]
+    paths.append(_write_step(str(tmp_path / "plain.step")))
+    rows = classify_files(paths + paths[:1], occ_workers=1)
+    assert [row["Label"] for row in rows] == ["Part", "Assembly", "Part", "Part"]
+    assert [row["Method"] for row in rows] == ["occ_shape_type", "occ_shape_type", "entity_count", "occ_shape_type"]
+    assert rows[0] is not rows[3]
+
+
+def test_failed_escalation_keeps_the_entity_count_label(tmp_path, monkeypatch):
+    def fail(file_path):
+        raise ValueError("Error reading STEP file")
+
+    monkeypatch.setattr(assembly_check, "classify_with_occ", fail)
+    rows = classify_files([_write_step(str(tmp_path / "odd.step"), products=2, solids=0)], occ_workers=1)
+    assert rows[0]["Label"] == "Assembly" and rows[0]["Confidence"] == AMBIGUOUS
+    assert rows[0]["Method"] == "entity_count (occ failed)"
@@ -0,0 +1,72 @@
+import os
+import time
+import functools
+from scripts.batch_analysis import WorkerPool, run_batch, run_lanes
+
+
+# Stand-in analysis: the file name tells the worker how to behave
+def _analyze(file_path):
+    name = os.path.basename(file_path)
+    if name.startswith("slow"):
+        time.sleep(30)
+    elif name.startswith("crash"):
+        os._exit(3)
+    elif name.startswith("fail"):
+        raise ValueError("unreadable")
+    return {"File Name": name, "pid": os.getpid()}
+
+
+def _rows(rows):
+    return {row["File Name"]: row for row in rows}
+
+
+def test_rows_of_every_file():
+    rows = _rows(run_batch([f"part{i}.step" for i in range(6)], _analyze, workers=2, timeout=None))
+    assert sorted(rows) == [f"part{i}.step" for i in range(6)]
+    assert not any("Error" in row for row in rows.values())
+
+
+def test_exceptions_become_error_rows():
+    rows = _rows(run_batch(["fail.step", "part.step"], _analyze, workers=1, timeout=None))
+    assert rows["fail.step"]["Error"] == "ValueError: unreadable"
+    assert "Error" not in rows["part.step"]
+
+
+def test_timed_out_file_is_killed_and_the_rest_continue():
+    started = time.monotonic()
+    rows = _rows(run_batch(["slow.step", "part1.step", "part2.step"], _analyze, workers=1, timeout=1))
+    assert time.monotonic() - started < 20
+    assert rows["slow.step"]["Error"] == "Timed out after 1s"
+    assert "Error" not in rows["part1.step"] and "Error" not in rows["part2.step"]
+
+
+def test_crash_only_loses_its_own_file():
+    rows = _rows(run_batch(["part1.step", "crash.step", "part2.step"], _analyze, workers=1, timeout=None))
+    assert rows["crash.step"]["Error"].startswith("Worker crashed (exit code 3)")
+    assert "Error" not in rows["part1.step"] and "Error" not in rows["part2.step"]
+
+
+def test_workers_are_replaced_after_max_files():
+    rows = run_batch([f"part{i}.step" for i in range(4)], _analyze, workers=1, timeout=None,
+                     max_files_per_worker=2)
+    assert len({row["pid"] for row in rows}) == 2
+
+
+def test_poll_paths_tells_apart_files_with_the_same_name():
+    with WorkerPool(_analyze, workers=2, timeout=None) as pool:
+        for file_path in (os.path.join("a", "part.step"), os.path.join("b", "part.step")):
+            pool.submit(file_path)
+        results = []
+        while pool.busy:
+            results.extend(pool.poll_paths())
+    assert sorted(path for path, _ in results) == [os.path.join("a", "part.step"), os.path.join("b", "part.step")]
+    assert all(row["File Name"] == "part.step" for _, row in results)
+
+
+def test_lanes_run_side_by_side():
+    slow_lane = WorkerPool(_analyze, workers=1, timeout=1)
+    fast_lane = WorkerPool(functools.partial(_analyze), workers=2, timeout=None)
+    rows = list(run_lanes([(slow_lane, ["slow.step"]), (fast_lane, ["part1.step", "part2.step"])]))
+    # The regular files finish while the slow one is still running
+    assert [row["File Name"] for row in rows][-1] == "slow.step"
+    assert len(rows) == 3
@@ -0,0 +1,92 @@
+import os
+import copy
+import shutil
+import pytest
+
+pytest.importorskip("OCC")
+
+from scripts.benchmark import _values_differ, build_corpus, build_report, compare_reports, format_report
+
+ASSEMBLY = os.path.join(os.path.dirname(__file__), "data", "assembly.step")
+
+
+def test_values_differ():
+    assert not _values_differ(1.0, 1.0 + 1e-9)
+    assert _values_differ(1.0, 1.001)
+    # The tolerance is relative to values above 1 and absolute below
+    assert not _values_differ(1e6, 1e6 + 0.5)
+    assert _values_differ(1e-3, 2e-3)
+    assert not _values_differ(float("nan"), float("nan"))
+    assert _values_differ(float("nan"), 1.0) and _values_differ(1.0, float("nan"))
+    assert not _values_differ(None, None)
+    assert _values_differ(None, 0) and _values_differ(0, None)
+    assert _values_differ(6, 7) and not _values_differ(6, 6.0)
+
+
+def _row(wall, volume=24.0, rss=100.0):
+    return {"Total Faces": 6, "Volume": volume, "Profile": {
+        "wall": wall, "cpu": wall, "peak_rss_mb": rss, "faces": 6,
+        "stages": {"read": {"wall": wall / 2, "cpu": 0.0}}}}
+
+
+def _report(rows, seconds=1.0):
+    corpus = [{"path": path, "bucket": "small/few", "sha256": path, "size": 1.0} for path in ("a.step", "b.step")]
+    return build_report(corpus, rows, {"seconds": seconds, "selected": ["a.step"]})
+
+
+def test_build_report():
+    report = _report({"a.step": _row(1.0), "b.step": {"File Name": "b.step", "Error": "Failed"}})
+    assert report["files"] == 2 and report["failed"] == ["b.step"]
+    assert report["throughput"] == {"files_per_s": 1.0, "faces_per_s": 6.0}
+    assert set(report["latency"]) == {"total", "stage:read", "bucket:small/few"}
+    assert report["results"]["a.step"]["Volume"] == 24.0 and "b.step" not in report["results"]
+    assert "Benchmarked 2 files (1 failed)" in format_report(report)
+
+
+def test_identical_reports_pass():
+    report = _report({"a.step": _row(1.0), "b.step": _row(2.0)})
+    assert compare_reports(report, copy.deepcopy(report)) == []
+
+
+def test_regressions():
+    baseline = _report({"a.step": _row(1.0), "b.step": _row(2.0)})
+    report = _report({"a.step": _row(3.0, volume=25.0, rss=200.0), "b.step": {"Error": "Timeout"}}, seconds=2.0)
+    problems = compare_reports(report, baseline)
+    assert "b.step: analysis now fails" in problems
+    assert "a.step: Volume changed from 24.0 to 25.0" in problems
+    assert any(problem.startswith("Latency stage:read p50 regressed") for problem in problems)
+    assert any(problem.startswith("Peak memory regressed") for problem in problems)
+    assert any(problem.startswith("file_selection regressed") for problem in problems)
+    # Within the tolerance
+    assert compare_reports(report, baseline, tolerance=10.0) == [
+        "b.step: analysis now fails", "a.step: Volume changed from 24.0 to 25.0"]
+
+
+def test_tiny_slowdowns_are_ignored():
+    baseline = _report({"a.step": _row(0.001), "b.step": _row(0.001)})
+    report = _report({"a.step": _row(0.004), "b.step": _row(0.004)})
+    assert compare_reports(report, baseline) == []
+
+
+def test_changed_corpus():
+    baseline = _report({"a.step": _row(1.0)})
+    report = copy.deepcopy(baseline)
+    report["corpus"][0]["sha256"] = "changed"
+    report["results"]["a.step"]["Volume"] = 1.0
+    problems = compare_reports(report, baseline)
+    assert len(problems) == 1 and problems[0].startswith("Corpus differs from the baseline (2 entries)")
+
+
+def test_build_corpus(tmp_path):
+    folder = tmp_path / "Simple_selected"
+    folder.mkdir()
+    for i in range(5):
+        shutil.copy(ASSEMBLY, folder / f"{i}.step")
+    (folder / "notes.txt").write_text("x")
+
+    corpus = build_corpus(per_bucket=3, folders=("Simple_selected",), root=str(tmp_path))
+    assert len(corpus) == 3
+    assert {entry["bucket"] for entry in corpus} == {"small/few"}
+    assert all(entry["path"].startswith("Simple_selected/") for entry in corpus)
+    # The pick does not depend on the listing order
+    assert corpus == build_corpus(per_bucket=3, folders=("Simple_selected",), root=str(tmp_path))
@@ -0,0 +1,75 @@
+import os
+import sys
+import subprocess
+import pytest
+from scripts import cli
+
+ASSEMBLY = os.path.join(os.path.dirname(__file__), "data", "assembly.step")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the subcommands load when they run, never on import
+HEAVY_MODULES = ("OCC", "pandas", "numpy", "matplotlib", "pyarrow")
+
+
+def _loaded_modules(code):
+    # Runs `code` in a fresh interpreter and returns the heavy modules it loaded
+    check = f"{code}\nimport sys\nprint(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", check], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return output.stdout.split("\n")[-2].split()
+
+
+def test_import_loads_no_heavy_module():
+    assert _loaded_modules("import scripts.cli; scripts.cli.build_parser()") == []
+
+
+def test_classify_without_escalation_loads_no_heavy_module():
+    code = f"from scripts.cli import main; main(['classify', {ASSEMBLY!r}, '--no-escalate', '--workers', '1'])"
+    assert _loaded_modules(code) == []
+
+
+@pytest.mark.parametrize("argv, handler", [
+    (["analyze", "folder"], cli._analyze),
+    (["select", "--from-results", "results.csv"], cli._select),
+    (["classify", "a.step", "folder"], cli._classify),
+    (["holes", "a.step"], cli._holes),
+    (["volume", "a.step", "--mesh"], cli._volume),
+    (["curvature", "a.step", "--corpus"], cli._curvature),
+    (["merge", "folder"], cli._merge),
+    (["watch", "folder"], cli._watch),
+    (["dedupe", "a.csv", "b.csv"], cli._dedupe),
+    (["assembly", "a.step"], cli._assembly),
+    (["organize", "rollback", "journal.jsonl"], cli._organize),
+])
+def test_subcommand_handlers(argv, handler):
+    assert cli.build_parser().parse_args(argv).handler is handler
+
+
+def test_options():
+    parser = cli.build_parser()
+    args = parser.parse_args(["analyze", "folder", "--workers", "4", "--large-file-mb", "2.5", "--keep-errors"])
+    assert (args.output, args.workers, args.large_file_mb, args.keep_errors) == ("analysis_df.csv", 4, 2.5, True)
+    assert args.large_workers is None and not args.restart
+
+    args = parser.parse_args(["dedupe", "a.csv", "b.csv", "--folders", "A", "B", "--threshold", "0.1"])
+    assert (args.results, args.folders, args.threshold) == (["a.csv", "b.csv"], ["A", "B"], 0.1)
+
+    args = parser.parse_args(["organize", "split", "folder", "--per-folder", "10", "--dry-run"])
+    assert (args.action, args.per_folder, args.dry_run, args.link_mode) == ("split", 10, True, "auto")
+    assert not hasattr(parser.parse_args(["organize", "rollback", "journal.jsonl"]), "workers")
+
+    for argv in (["select", "--bbox-mode", "box"], ["organize"], []):
+        with pytest.raises(SystemExit):
+            parser.parse_args(argv)
+
+
+def test_usage_errors(capsys):
+    assert cli.main(["select", "folder"]) == 2
+    assert cli.main(["dedupe", "a.csv", "b.csv", "--folders", "A"]) == 2
+    assert "--folders needs one folder per RESULTS_CSV" in capsys.readouterr().err
+
+
+def test_step_files(tmp_path):
+    for name in ("b.STP", "a.step", "notes.txt"):
+        (tmp_path / name).write_text("")
+    files = cli._step_files([str(tmp_path), "other.step"])
+    assert files == [str(tmp_path / "a.step"), str(tmp_path / "b.STP"), "other.step"]
@@ -0,0 +1,99 @@
+import math
+import numpy as np
+import pytest
+
+pytest.importorskip("OCC")
+
+from scripts.face_graph import CONCAVE, CONVEX, FaceGraph, build_face_graph, load_face_graph
+from scripts.topology import face_neighbour_pairs
+
+
+def _graph(face_count, pairs):
+    # CSR graph with both directions of every pair, all convex
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    rows, columns = np.r_[pairs[:, 0], pairs[:, 1]], np.r_[pairs[:, 1], pairs[:, 0]]
+    order = np.lexsort((columns, rows))
+    indptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=face_count))].astype(np.int64)
+    entries = len(rows)
+    return FaceGraph(face_count, indptr, columns[order], np.full(entries, CONVEX, dtype=np.uint8),
+                     np.full(entries, math.pi / 2), np.ones(entries, dtype=np.int32))
+
+
+def test_face_neighbour_pairs():
+    # Edges 0 and 1 join faces 0-1 twice, edge 2 joins 1-2, edge 3 is non-manifold over 2, 3 and 4
+    edge_index = np.array([0, 0, 1, 1, 2, 2, 3, 3, 3, 4])
+    face_index = np.array([1, 0, 0, 1, 2, 1, 2, 3, 4, 4])
+    pairs = face_neighbour_pairs(edge_index, face_index)
+    assert pairs.tolist() == [[0, 1], [1, 2], [2, 3], [2, 4], [3, 4]]
+    assert face_neighbour_pairs(np.empty(0, np.int64), np.empty(0, np.int64)).shape == (0, 2)
+
+
+def test_csr_neighbours_and_statistics():
+    graph = _graph(5, [(0, 1), (1, 2), (0, 2), (3, 4)])
+    assert graph.indptr.tolist() == [0, 2, 4, 6, 7, 8]
+    assert graph.neighbours(2).tolist() == [0, 1]
+    assert graph.degree.tolist() == [2, 2, 2, 1, 1]
+    assert graph.components().tolist() == [0, 0, 0, 1, 1]
+
+    statistics = graph.statistics()
+    assert statistics["pairs"] == 4 and statistics["components"] == 2
+    assert statistics["cycle_rank"] == 1
+    assert statistics["convex"] == 4 and statistics["concave"] == 0
+    assert statistics["degree_histogram"] == [0, 2, 3]
+
+
+def test_concatenate_renumbers_faces():
+    graph = FaceGraph.concatenate([_graph(3, [(0, 1), (1, 2)]), _graph(2, [(0, 1)])])
+    assert graph.face_count == 5 and graph.pair_count == 3
+    assert graph.neighbours(3).tolist() == [4]
+    assert len(np.unique(graph.components())) == 2
+    assert FaceGraph.concatenate([]).statistics()["faces"] == 0
+
+
+def test_save_and_load(tmp_path):
+    graph = _graph(3, [(0, 1), (1, 2)])
+    graph.save(str(tmp_path / "graph.npz"))
+    loaded = load_face_graph(str(tmp_path / "graph.npz"))
+    assert loaded.face_count == 3
+    assert loaded.statistics() == graph.statistics()
+
+
+def test_to_scipy():
+    pytest.importorskip("scipy")
+    matrix = _graph(3, [(0, 1), (1, 2)]).to_scipy()
+    assert (matrix != matrix.T).nnz == 0 and matrix.nnz == 4
+
+
+def test_box_graph():
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+
+    graph = build_face_graph(BRepPrimAPI_MakeBox(2.0, 3.0, 4.0).Shape())
+    statistics = graph.statistics()
+    assert statistics["faces"] == 6 and statistics["pairs"] == 12
+    assert graph.degree.tolist() == [4] * 6
+    assert statistics["convex"] == 12 and statistics["cycle_rank"] == 7
+    assert graph.dihedral == pytest.approx(np.full(24, math.pi / 2))
+    for face in range(6):
+        assert face not in graph.neighbours(face)
+
+
+def test_concave_edge_of_an_l_profile():
+    from OCC.Core.BRepAlgoAPI import BRepAlgoAPI_Cut
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+    from OCC.Core.gp import gp_Pnt
+
+    block = BRepPrimAPI_MakeBox(10.0, 10.0, 10.0).Shape()
+    notch = BRepPrimAPI_MakeBox(gp_Pnt(5.0, 5.0, -1.0), 10.0, 10.0, 12.0).Shape()
+    graph = build_face_graph(BRepAlgoAPI_Cut(block, notch).Shape())
+    statistics = graph.statistics()
+    assert statistics["faces"] == 8 and statistics["pairs"] == 18
+    assert statistics["concave"] == 1 and statistics["convex"] == 17
+    assert np.count_nonzero(graph.convexity == CONCAVE) == 2  # Both directions of the pair
+
+
+def test_seam_edges_are_not_pairs():
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeCylinder
+
+    statistics = build_face_graph(BRepPrimAPI_MakeCylinder(5.0, 10.0).Shape()).statistics()
+    assert statistics["faces"] == 3 and statistics["pairs"] == 2
+    assert statistics["convex"] == 2 and statistics["isolated_faces"] == 0
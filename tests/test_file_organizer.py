@@ -0,0 +1,147 @@
+import os
+import json
+import pytest
+from scripts.file_organizer import (
+    Operation, check_plan, execute_plan, plan_copy, plan_split, resume_journal, rollback_journal,
+)
+
+
+def _make_files(folder, names):
+    folder.mkdir(exist_ok=True)
+    for name in names:
+        (folder / name).write_text(name)
+
+
+def _tree(folder):
+    return sorted(os.path.relpath(os.path.join(root, name), folder)
+                  for root, _, names in os.walk(folder) for name in names)
+
+
+def test_split_plan(tmp_path):
+    _make_files(tmp_path, [f"p{i}.step" for i in range(3)])
+    operations = plan_split(str(tmp_path), files_per_folder=2, prefix="batch_", max_folders=1)
+    assert operations == [Operation("move", str(tmp_path / name), str(tmp_path / "batch_00" / name))
+                          for name in ("p0.step", "p1.step")]
+
+
+def test_split_and_rollback(tmp_path):
+    source = tmp_path / "parts"
+    _make_files(source, [f"p{i}.step" for i in range(5)])
+    journal = str(tmp_path / "journal.jsonl")
+
+    summary = execute_plan(plan_split(str(source), files_per_folder=2), journal_path=journal)
+    assert summary["done"] == 5
+    assert _tree(source) == [os.path.join("step_00", "p0.step"), os.path.join("step_00", "p1.step"),
+                             os.path.join("step_01", "p2.step"), os.path.join("step_01", "p3.step"),
+                             os.path.join("step_02", "p4.step")]
+
+    assert rollback_journal(journal) == {"undone": 5}
+    assert _tree(source) == [f"p{i}.step" for i in range(5)]
+    assert not any(entry.is_dir() for entry in os.scandir(source))
+
+
+def test_resume_after_interruption(tmp_path):
+    source = tmp_path / "parts"
+    _make_files(source, ["a.step", "b.step", "c.step"])
+    journal = str(tmp_path / "journal.jsonl")
+    execute_plan(plan_split(str(source)), journal_path=journal)
+
+    # Interrupted before any outcome was journaled, and one file was moved back meanwhile
+    with open(journal) as file:
+        plan_line = file.readline()
+    with open(journal, 'w') as file:
+        file.write(plan_line)
+    os.replace(source / "step_00" / "c.step", source / "c.step")
+
+    summary = resume_journal(journal)
+    assert summary["done"] == 3 and summary["skipped"] == 0
+    assert _tree(source) == [os.path.join("step_00", name) for name in ("a.step", "b.step", "c.step")]
+    assert resume_journal(journal)["skipped"] == 3
+
+
+def test_failed_operations_are_retried_on_resume(tmp_path):
+    source, destination = tmp_path / "source", tmp_path / "selected"
+    _make_files(source, ["a.step"])
+    journal = str(tmp_path / "journal.jsonl")
+
+    summary = execute_plan(plan_copy(["a.step", "b.step"], str(source), str(destination)),
+                           journal_path=journal, link_mode="copy")
+    assert summary["done"] == 1 and summary["failed"] == 1
+
+    _make_files(source, ["b.step"])
+    summary = resume_journal(journal)
+    assert summary["done"] == 1 and summary["skipped"] == 1
+    assert _tree(destination) == ["a.step", "b.step"]
+
+
+def test_rollback_removes_copies_and_keeps_replaced_files(tmp_path):
+    source, destination = tmp_path / "source", tmp_path / "selected"
+    _make_files(source, ["a.step", "b.step"])
+    _make_files(destination, ["b.step"])
+    journal = str(tmp_path / "journal.jsonl")
+
+    execute_plan(plan_copy(["a.step", "b.step"], str(source), str(destination)), journal_path=journal,
+                 link_mode="copy", overwrite=True)
+    assert rollback_journal(journal) == {"undone": 1, "kept": 1}
+    assert _tree(destination) == ["b.step"]
+    assert _tree(source) == ["a.step", "b.step"]
+
+
+def test_existing_destinations_are_skipped(tmp_path):
+    source, destination = tmp_path / "source", tmp_path / "selected"
+    _make_files(source, ["a.step"])
+    _make_files(destination, ["a.step"])
+    (destination / "a.step").write_text("kept")
+
+    summary = execute_plan(plan_copy(["a.step"], str(source), str(destination)), link_mode="copy")
+    assert summary["exists"] == 1
+    assert (destination / "a.step").read_text() == "kept"
+
+
+def test_hardlink_rerun_leaves_no_temporary_files(tmp_path):
+    source, destination = tmp_path / "source", tmp_path / "selected"
+    _make_files(source, ["a.step", "b.step"])
+    operations = plan_copy(["a.step", "b.step"], str(source), str(destination))
+
+    for _ in range(2):
+        summary = execute_plan(operations, link_mode="hardlink", overwrite=True)
+        assert summary["done"] == 2 and summary["hardlink"] == 2
+    assert _tree(destination) == ["a.step", "b.step"]
+    assert os.path.samefile(source / "a.step", destination / "a.step")
+
+
+def test_copies_are_independent_of_the_source(tmp_path):
+    source, destination = tmp_path / "source", tmp_path / "selected"
+    _make_files(source, ["a.step"])
+    summary = execute_plan(plan_copy(["a.step"], str(source), str(destination)), link_mode="copy")
+    assert summary["copy"] == 1
+    (destination / "a.step").write_text("edited")
+    assert (source / "a.step").read_text() == "a.step"
+
+
+def test_conflicting_plans_are_rejected(tmp_path):
+    a, b = str(tmp_path / "a.step"), str(tmp_path / "b.step")
+    with pytest.raises(ValueError):
+        check_plan([Operation("copy", a, str(tmp_path / "c.step")), Operation("copy", b, str(tmp_path / "c.step"))])
+    with pytest.raises(ValueError):
+        check_plan([Operation("move", a, b), Operation("move", b, a)])
+    with pytest.raises(ValueError):
+        Operation("delete", a, b)
+
+
+def test_dry_run_touches_nothing(tmp_path):
+    source = tmp_path / "parts"
+    _make_files(source, ["a.step"])
+    journal = tmp_path / "journal.jsonl"
+    assert execute_plan(plan_split(str(source)), journal_path=str(journal), dry_run=True) == {"planned": 1}
+    assert _tree(source) == ["a.step"] and not journal.exists()
+
+
+def test_journal_starts_with_the_plan(tmp_path):
+    source = tmp_path / "parts"
+    _make_files(source, ["a.step"])
+    journal = tmp_path / "journal.jsonl"
+    execute_plan(plan_split(str(source)), journal_path=str(journal))
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert entries[0]["type"] == "plan" and entries[-1] == {"type": "op", "index": 0, "method": "move",
+                                                             "status": "done"}
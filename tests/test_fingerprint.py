@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from scripts.fingerprint import (
+    FINGERPRINT_FEATURES, FingerprintIndex, duplicate_clusters, fingerprints, update_index,
+)
+
+
+def _part(name, faces, volume, **columns):
+    return {"File Name": name, "Total Faces": faces, "Curved Faces": faces // 2, "Total Edges": 2 * faces,
+            "Vertices": faces, "Hole Count": 2, "Volume": volume, "Bounding Box Volume": 2 * volume,
+            "Mean Curvature": 0.1, "Curvature Std Dev": 0.05, **columns}
+
+
+def _results():
+    return pd.DataFrame([
+        _part("bracket.step", 40, 1000.0),
+        _part("bracket_rev2.step", 40, 1000.5),
+        _part("bracket_copy.step", 40, 1000.0),
+        _part("housing.step", 400, 90000.0),
+        _part("housing_old.step", 400, 90010.0),
+        _part("shaft.step", 12, 500.0),
+        {"File Name": "broken.step"},
+    ])
+
+
+def test_fingerprints():
+    vectors = fingerprints(_results())
+    assert vectors.shape == (7, len(FINGERPRINT_FEATURES))
+    assert np.isnan(vectors[-1]).any()
+    # Without surface type columns the histogram part is zero
+    assert not vectors[0, -11:].any()
+
+
+def test_duplicate_clusters():
+    data = _results()
+    index = FingerprintIndex()
+    assert index.add(data["File Name"], fingerprints(data)) == 6  # "broken.step" has no fingerprint
+    clusters = duplicate_clusters(index)
+    assert [sorted(cluster) for cluster in clusters] == [
+        ["bracket.step", "bracket_copy.step", "bracket_rev2.step"], ["housing.step", "housing_old.step"],
+    ]
+
+
+def test_query_is_closest_first():
+    data = _results()
+    index = FingerprintIndex()
+    index.add(data["File Name"], fingerprints(data))
+    matches = index.query(fingerprints(data.iloc[[1]])[0])
+    assert [name for name, _ in matches][0] == "bracket_rev2.step"
+    assert {name for name, _ in matches} == {"bracket.step", "bracket_rev2.step", "bracket_copy.step"}
+    assert all(distance <= index.threshold for _, distance in matches)
+
+
+def test_save_and_load(tmp_path):
+    data = _results()
+    index = FingerprintIndex()
+    index.add(data["File Name"], fingerprints(data))
+    index.save(str(tmp_path / "index.npz"))
+    loaded = FingerprintIndex.load(str(tmp_path / "index.npz"))
+    assert loaded.names == index.names
+    assert duplicate_clusters(loaded) == duplicate_clusters(index)
+
+
+def test_update_index_keys_files_by_path(tmp_path):
+    data = _results().iloc[:3]
+    index_path = str(tmp_path / "index.npz")
+    assert update_index(index_path, data, folder=str(tmp_path / "a"))[1] == 3
+    assert update_index(index_path, data, folder=str(tmp_path / "a"))[1] == 0
+    # The same file names in another folder are other files
+    index, added = update_index(index_path, data, folder=str(tmp_path / "b"))
+    assert added == 3 and len(index) == 6
+    assert str(tmp_path / "b" / "bracket.step") in index
+    assert len(duplicate_clusters(index)[0]) == 6
+
+
+def test_update_index_from_results_csv(tmp_path):
+    data = _results()
+    data.loc[5, "Error"] = "Timed out after 300s"
+    for name in ("first.csv", "second.csv"):
+        data.to_csv(tmp_path / name, index=False)
+    index_path = str(tmp_path / "index.npz")
+    assert update_index(index_path, str(tmp_path / "first.csv"))[1] == 5
+    assert update_index(index_path, str(tmp_path / "first.csv"))[1] == 0
+    index, added = update_index(index_path, str(tmp_path / "second.csv"))
+    assert added == 5
+    assert f"{tmp_path / 'second.csv'}::bracket.step" in index
+
+
+def test_threshold_covers_one_changed_feature():
+    data = pd.DataFrame([
+        _part("base.step", 100, 1000.0),
+        _part("larger_volume.step", 100, 1050.0, **{"Bounding Box Volume": 2000.0}),
+        {**_part("all_larger.step", 105, 1050.0), "Total Edges": 210, "Vertices": 105, "Curved Faces": 52.5,
+         "Hole Count": 2.1},
+    ])
+    vectors = fingerprints(data)
+    assert np.linalg.norm(vectors[1] - vectors[0]) < 0.05
+    assert np.linalg.norm(vectors[2] - vectors[0]) > 0.1
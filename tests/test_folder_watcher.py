@@ -0,0 +1,119 @@
+import os
+import csv
+import time
+from scripts.folder_watcher import SIGNATURE_COLUMN, FolderWatcher, folder_snapshot
+from scripts.selection_criteria import Criterion
+
+COLUMNS = ["File Name", "Total Faces", "Error"]
+
+
+# Stand-in analysis: the file holds its face count
+def _analyze(file_path):
+    with open(file_path) as file:
+        text = file.read()
+    if text.startswith("slow"):
+        time.sleep(0.5)
+    return {"File Name": os.path.basename(file_path), "Total Faces": len(text)}
+
+
+def _watcher(folder, output, **options):
+    options = {"workers": 1, "settle_time": 0.2, "poll_interval": 0.05, "analyze": _analyze, "columns": COLUMNS,
+               "criteria": [Criterion("Total Faces", 0, 0)], **options}
+    return FolderWatcher(str(folder), str(output), **options)
+
+
+def _write(path, text):
+    with open(path, 'w') as file:
+        file.write(text)
+
+
+def _rows(output):
+    with open(output, newline='') as file:
+        return [(row["File Name"], row["Total Faces"]) for row in csv.DictReader(file)]
+
+
+def test_folder_snapshot(tmp_path):
+    _write(tmp_path / "a.step", "abc")
+    _write(tmp_path / "B.STP", "")
+    _write(tmp_path / "notes.txt", "x")
+    (tmp_path / "folder.step").mkdir()
+    snapshot = folder_snapshot(str(tmp_path))
+    assert sorted(snapshot) == ["B.STP", "a.step"]
+    assert snapshot["a.step"][0] == 3
+
+
+def test_files_settle_before_they_are_queued(tmp_path):
+    folder = tmp_path / "staging"
+    folder.mkdir()
+    with _watcher(folder, tmp_path / "results.csv") as watcher:
+        _write(folder / "a.step", "abc")
+        watcher.scan()
+        assert watcher.pending == 1 and not watcher._ready
+        time.sleep(0.3)
+        watcher.scan()
+        assert list(watcher._ready) == ["a.step"]
+        # A queued file is not queued twice
+        watcher.scan()
+        assert list(watcher._ready) == ["a.step"]
+
+
+def test_changes_while_settling_are_coalesced(tmp_path):
+    folder = tmp_path / "staging"
+    folder.mkdir()
+    output = tmp_path / "results.csv"
+    with _watcher(folder, output) as watcher:
+        _write(folder / "a.step", "a")
+        watcher.scan()
+        for text in ("ab", "abc", "abcd"):
+            time.sleep(0.1)
+            _write(folder / "a.step", text)
+            watcher.scan()
+            assert not watcher._ready
+        watcher.run(duration=10, until_idle=True)
+    assert _rows(output) == [("a.step", "4")]
+
+
+def test_backpressure_keeps_settled_files_in_the_watcher(tmp_path):
+    folder = tmp_path / "staging"
+    folder.mkdir()
+    for i in range(8):
+        _write(folder / f"{i}.step", "slow")
+    output = tmp_path / "results.csv"
+    with _watcher(folder, output, max_in_flight=2, settle_time=0) as watcher:
+        watcher.scan()
+        watcher.step(timeout=0)
+        assert watcher.pool.queued + watcher.pool.in_flight == 2
+        assert len(watcher._ready) == 6
+        watcher.run(duration=30, until_idle=True)
+        assert watcher.pending == 0
+    assert sorted(name for name, _ in _rows(output)) == [f"{i}.step" for i in range(8)]
+
+
+def test_restart_only_analyzes_files_changed_meanwhile(tmp_path):
+    folder = tmp_path / "staging"
+    folder.mkdir()
+    output = tmp_path / "results.csv"
+    _write(folder / "same.step", "abc")
+    _write(folder / "changed.step", "abc")
+    with _watcher(folder, output, settle_time=0) as watcher:
+        watcher.run(duration=10, until_idle=True)
+    with open(output, newline='') as file:
+        assert all(row[SIGNATURE_COLUMN] for row in csv.DictReader(file))
+
+    # Modified while the watcher was down
+    _write(folder / "changed.step", "abcdef")
+    with _watcher(folder, output, settle_time=0) as watcher:
+        assert set(watcher._known) == {"same.step"}
+        watcher.run(duration=10, until_idle=True)
+    assert sorted(_rows(output)) == [("changed.step", "3"), ("changed.step", "6"), ("same.step", "3")]
+
+
+def test_weighted_criteria_select_files(tmp_path):
+    folder, destination = tmp_path / "staging", tmp_path / "selected"
+    folder.mkdir()
+    _write(folder / "a.step", "abc")
+    criteria = [Criterion("Total Faces", 1, 5, weight=0.5), Criterion("Total Faces", 3, 3)]
+    with _watcher(folder, tmp_path / "results.csv", destination_folder=str(destination), settle_time=0,
+                  criteria=criteria, min_criteria_met=1.5) as watcher:
+        watcher.run(duration=10, until_idle=True)
+    assert os.listdir(destination) == ["a.step"]
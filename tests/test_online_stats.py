@@ -0,0 +1,99 @@
+import math
+import numpy as np
+import pytest
+from scripts.online_stats import RunningMoments, QuantileSketch
+
+
+def test_moments_match_numpy():
+    values = np.random.default_rng(0).normal(5.0, 2.0, 1000)
+    moments = RunningMoments()
+    for value in values:
+        moments.add(value)
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.variance == pytest.approx(values.var())
+    assert (moments.minimum, moments.maximum) == (values.min(), values.max())
+
+
+def test_merged_moments_equal_a_single_pass():
+    rng = np.random.default_rng(1)
+    values, weights = rng.normal(0.0, 3.0, 500), rng.uniform(0.1, 2.0, 500)
+    whole = RunningMoments()
+    whole.add_array(values, weights)
+
+    parts = [RunningMoments() for _ in range(3)]
+    for part, chunk in zip(parts, np.array_split(np.arange(500), 3)):
+        part.add_array(values[chunk], weights[chunk])
+    merged = RunningMoments().merge(parts[0]).merge(parts[1]).merge(parts[2])
+
+    assert merged.count == whole.count == 500
+    assert merged.weight == pytest.approx(whole.weight)
+    assert merged.mean == pytest.approx(np.average(values, weights=weights))
+    assert merged.variance == pytest.approx(whole.variance)
+    assert merged.minimum == whole.minimum and merged.maximum == whole.maximum
+
+
+def test_merge_with_empty_moments():
+    moments = RunningMoments()
+    moments.add_array([1.0, 2.0, 3.0])
+    assert RunningMoments().merge(moments).mean == pytest.approx(2.0)
+    assert moments.merge(RunningMoments()).variance == pytest.approx(2.0 / 3.0)
+
+
+def test_nan_samples_are_counted_apart():
+    moments = RunningMoments()
+    moments.add_array([1.0, float("nan"), 3.0])
+    moments.add(float("nan"))
+    assert moments.count == 2 and moments.undefined == 2
+    assert moments.mean == pytest.approx(2.0)
+
+    statistics = RunningMoments().statistics()
+    assert statistics["count"] == 0 and math.isnan(statistics["mean"]) and math.isnan(statistics["std"])
+
+
+def test_moments_round_trip_through_dict():
+    moments = RunningMoments()
+    moments.add_array([1.0, 4.0, 9.0], [1.0, 2.0, 3.0])
+    assert RunningMoments.from_dict(moments.to_dict()).statistics() == moments.statistics()
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(2).lognormal(0.0, 2.0, 10000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add_array(values)
+    for q in (0.05, 0.5, 0.95):
+        exact = np.sort(values)[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.01)
+
+
+def test_quantiles_of_signed_values_and_zeros():
+    sketch = QuantileSketch()
+    sketch.add_array([-10.0, -1.0, 0.0, 0.0, 1.0, 10.0, float("nan")])
+    assert sketch.count == 6 and sketch.undefined == 1
+    assert sketch.quantile(0.0) == pytest.approx(-10.0, rel=0.01)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(10.0, rel=0.01)
+    assert math.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_merged_sketches_equal_a_single_sketch():
+    values = np.random.default_rng(3).normal(0.0, 5.0, 2000)
+    whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    whole.add_array(values)
+    first.add_array(values[:700])
+    second.add_array(values[700:])
+    merged = first.merge(second)
+    assert merged.quantiles() == whole.quantiles()
+    assert QuantileSketch.from_dict(merged.to_dict()).quantiles() == whole.quantiles()
+
+
+def test_sketches_with_different_accuracies_do_not_merge():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.05))
+
+
+def test_collapsed_buckets_keep_the_large_quantiles():
+    sketch = QuantileSketch(max_buckets=16)
+    sketch.add_array(np.geomspace(1e-6, 1e6, 1000))
+    assert len(sketch.positive) <= 16
+    assert sketch.count == 1000
+    assert sketch.quantile(1.0) == pytest.approx(1e6, rel=0.01)
@@ -0,0 +1,79 @@
+import json
+import time
+import pytest
+
+pytest.importorskip("OCC")
+
+from scripts.profiling import ProfileLog, StageTimer, format_profile_summary, profile_file, summarize_profile
+
+
+def test_stage_timer_adds_up_repeated_stages():
+    timer = StageTimer()
+    for _ in range(2):
+        with timer.stage("read"):
+            time.sleep(0.02)
+    with pytest.raises(ValueError):
+        with timer.stage("volume"):
+            raise ValueError
+    stages = timer.as_dict()
+    assert set(stages) == {"read", "volume"}
+    assert stages["read"]["wall"] >= 0.04
+    # Sleeping takes no CPU time
+    assert stages["read"]["cpu"] < stages["read"]["wall"]
+
+
+# Stand-in for `analyze_file` with the same signature
+def _analyze(file_path, analyzers=None, options=None, timer=None):
+    with timer.stage("read"):
+        time.sleep(0.01)
+    with timer.stage("topology"):
+        pass
+    return {"File Name": file_path, "Total Faces": 6, "Total Edges": 12}
+
+
+def test_profile_file(tmp_path):
+    record = profile_file("a.step", analyze=_analyze, cprofile_dir=str(tmp_path / "prof"))
+    profile = record["Profile"]
+    assert profile["path"] == "a.step" and (profile["faces"], profile["edges"]) == (6, 12)
+    assert set(profile["stages"]) == {"read", "topology"}
+    assert profile["wall"] >= profile["stages"]["read"]["wall"]
+    assert (tmp_path / "prof" / "a.step.prof").exists()
+
+
+def _entry(name, logged, **stages):
+    return {"file": name, "logged": logged, "wall": sum(stages.values()), "cpu": 0.0, "faces": 6,
+            "stages": {stage: {"wall": wall, "cpu": 0.0} for stage, wall in stages.items()}}
+
+
+def test_summarize_profile(tmp_path):
+    path = tmp_path / "profile.jsonl"
+    with ProfileLog(str(path)) as log:
+        row = log.record({"File Name": "broken.step", "Error": "Failed to read STEP file"})
+        assert row == {"File Name": "broken.step", "Error": "Failed to read STEP file"}
+    with open(path, 'a') as file:
+        file.write(json.dumps(_entry("old.step", 0.0, read=100.0)) + "\n")
+        for i in range(1, 11):
+            file.write(json.dumps(_entry(f"{i}.step", 1e12, read=float(i), volume=1.0)) + "\n")
+
+    summary = summarize_profile(str(path), slowest=2)
+    assert (summary["files"], summary["failed"]) == (11, 1)
+    assert summary["slowest"]["file"].tolist() == ["old.step", "10.step"]
+
+    summary = summarize_profile(str(path), slowest=3, since=1.0)
+    stages = summary["stages"]
+    assert summary["files"] == 10
+    assert stages.loc["read", "p50"] == pytest.approx(5.5)
+    assert stages.loc["read", "max"] == 10.0
+    assert stages.loc["volume", "total"] == 10.0
+    assert stages.loc["total", "share"] == 1.0
+    assert stages.loc["read", "share"] == pytest.approx(55 / 65)
+    assert summary["slowest"]["file"].tolist() == ["10.step", "9.step", "8.step"]
+    assert "Profiled 10 files (1 failed)" in format_profile_summary(summary)
+
+
+def test_summary_of_an_empty_log(tmp_path):
+    path = tmp_path / "profile.jsonl"
+    path.write_text("")
+    summary = summarize_profile(str(path))
+    assert summary["files"] == 0 and summary["stages"].empty
+    assert format_profile_summary(summary) == "Profiled 0 files (0 failed)"
@@ -0,0 +1,90 @@
+import csv
+import json
+from scripts.result_writer import ResultWriter, manifest_path_for
+
+COLUMNS = ["File Name", "Volume", "Error"]
+
+
+def _read(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return [(row["File Name"], row["Volume"], row["Error"]) for row in csv.DictReader(file)]
+
+
+def test_resume_skips_written_rows(tmp_path):
+    output = str(tmp_path / "results.csv")
+    with ResultWriter(output, COLUMNS, flush_every=1) as writer:
+        writer.write({"File Name": "a.step", "Volume": 1})
+        writer.write({"File Name": "b.step", "Volume": 2})
+
+    with ResultWriter(output, COLUMNS) as writer:
+        assert writer.done == {"a.step", "b.step"}
+        assert writer.rows_written == 2
+        writer.write({"File Name": "c.step", "Volume": 3})
+    assert _read(output) == [("a.step", "1", ""), ("b.step", "2", ""), ("c.step", "3", "")]
+
+
+def test_rows_after_the_last_checkpoint_are_dropped(tmp_path):
+    output = str(tmp_path / "results.csv")
+    writer = ResultWriter(output, COLUMNS, flush_every=2)
+    for name in ("a.step", "b.step", "c.step"):
+        writer.write({"File Name": name, "Volume": 1})
+    # Interrupted: "c.step" was written after the checkpoint, plus half a row
+    writer._file.write("d.st")
+    writer._file.flush()
+    writer._file.close()
+
+    with ResultWriter(output, COLUMNS) as writer:
+        assert writer.done == {"a.step", "b.step"}
+    assert [row[0] for row in _read(output)] == ["a.step", "b.step"]
+
+
+def test_failed_rows_are_retried_on_resume(tmp_path):
+    output = str(tmp_path / "results.csv")
+    with ResultWriter(output, COLUMNS, flush_every=1) as writer:
+        writer.write({"File Name": "a.step", "Volume": 1})
+        writer.write({"File Name": "b.step", "Error": "Timed out after 300s"})
+
+    with ResultWriter(output, COLUMNS) as writer:
+        assert writer.done == {"a.step"}
+        assert writer.failed == {"b.step"}
+        assert _read(output) == [("a.step", "1", "")]
+        writer.write({"File Name": "b.step", "Volume": 2})
+    assert _read(output) == [("a.step", "1", ""), ("b.step", "2", "")]
+
+
+def test_failed_rows_are_kept_without_retry(tmp_path):
+    output = str(tmp_path / "results.csv")
+    with ResultWriter(output, COLUMNS, flush_every=1) as writer:
+        writer.write({"File Name": "a.step", "Error": "boom"})
+
+    with ResultWriter(output, COLUMNS, retry_errors=False) as writer:
+        assert writer.done == {"a.step"} and not writer.failed
+        assert writer.rows_written == 1
+    assert _read(output) == [("a.step", "", "boom")]
+
+
+def test_checkpoint_beyond_a_compacted_file(tmp_path):
+    output = str(tmp_path / "results.csv")
+    with ResultWriter(output, COLUMNS, flush_every=1) as writer:
+        writer.write({"File Name": "a.step", "Volume": 1})
+        writer.write({"File Name": "b.step", "Error": "boom"})
+    with open(manifest_path_for(output)) as file:
+        manifest = json.load(file)
+
+    # Stopped after dropping the failed row but before the new checkpoint
+    ResultWriter(output, COLUMNS)._file.close()
+    with open(manifest_path_for(output), 'w') as file:
+        json.dump(manifest, file)
+
+    with ResultWriter(output, COLUMNS) as writer:
+        assert writer.done == {"a.step"}
+    assert _read(output) == [("a.step", "1", "")]
+
+
+def test_restart_overwrites(tmp_path):
+    output = str(tmp_path / "results.csv")
+    with ResultWriter(output, COLUMNS) as writer:
+        writer.write({"File Name": "a.step", "Volume": 1})
+    with ResultWriter(output, COLUMNS, resume=False) as writer:
+        assert not writer.done
+    assert _read(output) == []
@@ -0,0 +1,76 @@
+import os
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import pyarrow.dataset as ds
+from scripts.results_store import append, import_csv_folder, merge_stores, open_results, read_results
+
+
+def _row(name, faces, **values):
+    return {"File Name": name, "Total Faces": faces, "Volume": faces * 10.0, "ispart": 1, **values}
+
+
+def test_append_and_read_columns(tmp_path):
+    root = str(tmp_path / "store")
+    shard = append(root, [_row("a.step", 6), _row("b.step", 12, ispart=0)])
+    assert os.path.dirname(shard) == os.path.join(root, "analyzer_version=1")
+    append(root, [_row("c.step", 24)])
+    assert not [name for name in os.listdir(os.path.dirname(shard)) if name.endswith(".tmp")]
+
+    data = read_results(root, columns=["File Name", "Total Faces"])
+    assert list(data.columns) == ["File Name", "Total Faces"]
+    assert sorted(data["Total Faces"].tolist()) == [6, 12, 24]
+
+    parts = read_results(root, columns=["File Name"], row_filter=ds.field("ispart") == 1)
+    assert sorted(parts["File Name"]) == ["a.step", "c.step"]
+    # Columns missing from the rows are stored as nulls
+    assert read_results(root)["Hole Count"].isna().all()
+
+
+def test_empty_results_write_no_shard(tmp_path):
+    root = str(tmp_path / "store")
+    assert append(root, []) is None
+    assert open_results(root).count_rows() == 0
+
+
+def test_error_rows(tmp_path):
+    root = str(tmp_path / "store")
+    append(root, [_row("a.step", 6), {"File Name": "broken.step", "Error": "Failed to read STEP file"}])
+    data = read_results(root).set_index("File Name")
+    assert data.loc["broken.step", "Error"] == "Failed to read STEP file"
+    assert data["Total Faces"].isna().tolist() == [False, True]
+    assert data["Error"].isna().tolist() == [True, False]
+
+
+def test_dropped_columns_are_reported(tmp_path):
+    root = str(tmp_path / "store")
+    with pytest.warns(UserWarning, match="Recognized Holes"):
+        append(root, [_row("a.step", 6, **{"Recognized Holes": 2, "Criteria Met": 8})])
+    assert "Recognized Holes" not in read_results(root).columns
+
+
+def test_merge_stores(tmp_path):
+    root, first, second = (str(tmp_path / name) for name in ("store", "first", "second"))
+    append(root, [_row("a.step", 6)])
+    append(first, [_row("b.step", 12)])
+    append(first, [_row("c.step", 24)])
+    append(second, [_row("d.step", 48)])
+
+    assert merge_stores(root, [first, second]) == 3
+    assert sorted(read_results(root)["File Name"]) == ["a.step", "b.step", "c.step", "d.step"]
+    # Shards already merged are skipped
+    assert merge_stores(root, [first]) == 0
+
+
+def test_import_csv_folder(tmp_path):
+    folder = tmp_path / "csv"
+    folder.mkdir()
+    (folder / "utf8.csv").write_text("File Name,Total Faces\na.step,6\n", encoding="utf-8-sig")
+    (folder / "utf16.csv").write_text("File Name\tTotal Faces\nb.step\t12\n", encoding="utf-16")
+    (folder / "notes.txt").write_text("x")
+
+    root = str(tmp_path / "store")
+    assert len(import_csv_folder(root, str(folder))) == 2
+    data = read_results(root, columns=["File Name", "Total Faces"]).sort_values("File Name")
+    assert data.values.tolist() == [["a.step", 6], ["b.step", 12]]
@@ -0,0 +1,149 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.selection_criteria import (
+    DEFAULT_CRITERIA, Criterion, apply_criteria, criteria_bounds, criteria_met, load_criteria,
+    refine_near_boundaries, save_criteria, select_from_results,
+)
+
+
+def _legacy_criteria_count(row):
+    # The per-row selection logic the default criteria replace
+    criteria = [
+        20 <= row["Total Faces"] <= 120,
+        5 <= row["Curved Faces"] <= 50,
+        100 <= row["Total Edges"] <= 700,
+        200 <= row["Vertices"] <= 1500,
+        1e3 <= row["Volume"] <= 1.5e5,
+        5 <= row["Hole Count"] <= 50,
+        25 <= row["size"] <= 500,
+        row["ispart"] == 1
+    ]
+    return sum(criteria)
+
+
+def _results(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "File Name": [f"{i:05}.step" for i in range(rows)],
+        "Total Faces": rng.integers(0, 200, rows),
+        "Curved Faces": rng.integers(0, 80, rows),
+        "Total Edges": rng.integers(0, 1000, rows),
+        "Vertices": rng.integers(0, 2000, rows),
+        "Volume": rng.uniform(0, 2e5, rows),
+        "Hole Count": rng.integers(0, 60, rows),
+        "size": rng.uniform(0, 700, rows),
+        "ispart": rng.integers(0, 2, rows),
+    })
+    # Bounds are inclusive
+    data.loc[0, ["Total Faces", "Curved Faces", "Total Edges", "Vertices"]] = [20, 50, 100, 1500]
+    return data
+
+
+def test_default_criteria_match_the_per_row_logic():
+    data = _results()
+    expected = data.apply(_legacy_criteria_count, axis=1)
+    met = criteria_met(data)
+    assert met.tolist() == expected.tolist()
+    assert met.dtype.kind == "i"
+    assert (met == 8).any() and (met < 8).any()
+
+
+def test_rows_keep_their_labels():
+    data = _results(20).iloc[5:15]
+    assert data.index[0] == 5
+    met = criteria_met(data)
+    assert met.index.equals(data.index)
+    selected = apply_criteria(data.copy(), min_criteria_met=6)
+    assert selected.index.isin(data.index).all()
+    assert selected["Criteria Met"].equals(met[met >= 6])
+
+
+def test_criteria_count_of_a_labelled_row():
+    pytest.importorskip("OCC")
+    from scripts.step_analysis import criteria_count
+
+    data = _results(20).iloc[5:15]
+    assert data.apply(criteria_count, axis=1).tolist() == data.apply(_legacy_criteria_count, axis=1).tolist()
+    assert criteria_count(data.loc[5]) == _legacy_criteria_count(data.loc[5])
+
+
+def test_open_ranges_and_missing_values():
+    data = pd.DataFrame({"Volume": [-5.0, 0.0, 10.0, np.nan, 1e9], "size": ["1", "bad", "3", "4", "5"]},
+                        index=[3, 1, 4, 1, 5])
+    assert Criterion("Volume", minimum=0).evaluate(data).tolist() == [False, True, True, False, True]
+    assert Criterion("Volume", maximum=10).evaluate(data).tolist() == [True, True, True, False, False]
+    assert Criterion("Volume").evaluate(data).tolist() == [True, True, True, False, True]
+    assert Criterion("size", 2).evaluate(data).tolist() == [False, False, True, True, True]
+    assert not Criterion("Hole Count", 0).evaluate(data).any()
+    assert criteria_bounds([Criterion("Volume", minimum=0)]) == {"Volume": (0, np.inf)}
+
+
+def test_weights():
+    criteria = [Criterion("Total Faces", 10, 100, weight=0.5), Criterion("Volume", 0, 1e4), Criterion("size", 0, 1)]
+    data = pd.DataFrame({"Total Faces": [50, 50, 500], "Volume": [5.0, 5e6, 5.0], "size": [10, 10, 10]},
+                        index=[7, 8, 9])
+    met = criteria_met(data, criteria)
+    assert met.tolist() == [1.5, 0.5, 1.0]
+    assert apply_criteria(data, criteria, min_criteria_met=1.5).index.tolist() == [7]
+    assert data["Criteria Met"].tolist() == [1.5, 0.5, 1.0]
+
+
+def test_json_round_trip(tmp_path):
+    path = str(tmp_path / "criteria.json")
+    criteria = [Criterion("Total Faces", 20, 120), Criterion("Recognized Holes", minimum=2, weight=2.5),
+                Criterion("Fill Ratio", maximum=0.8)]
+    save_criteria(path, criteria, min_criteria_met=3.5)
+    with open(path) as file:
+        assert json.load(file)["criteria"][1] == {"column": "Recognized Holes", "min": 2, "weight": 2.5}
+
+    loaded, min_criteria_met = load_criteria(path)
+    assert min_criteria_met == 3.5
+    assert [criterion.to_dict() for criterion in loaded] == [criterion.to_dict() for criterion in criteria]
+
+    save_criteria(path)
+    loaded, min_criteria_met = load_criteria(path)
+    assert [repr(criterion) for criterion in loaded] == [repr(criterion) for criterion in DEFAULT_CRITERIA]
+    assert min_criteria_met == 8
+
+
+def test_min_criteria_met_defaults_to_all_weights(tmp_path):
+    path = tmp_path / "criteria.json"
+    path.write_text(json.dumps({"criteria": [{"column": "size", "max": 500}, {"column": "ispart", "weight": 2}]}))
+    assert load_criteria(str(path))[1] == 3
+
+
+def test_refine_near_boundaries():
+    criteria = [Criterion("Volume", 1e3, 1.5e5)]
+    data = pd.DataFrame({"Volume": [990.0, 5e4, 1.49e5, 3e5]}, index=[10, 11, 12, 13])
+    refined_rows = []
+
+    def exact_volume(row):
+        refined_rows.append(row.name)
+        return row["Volume"] + 20.0
+
+    assert refine_near_boundaries(data, {"Volume": exact_volume}, criteria) == 2
+    assert refined_rows == [10, 12]
+    assert data["Volume"].tolist() == [1010.0, 5e4, 1.4902e5, 3e5]
+    assert refine_near_boundaries(data, {"Volume": exact_volume}, criteria, margin=0) == 0
+
+
+def test_select_from_results(tmp_path):
+    data = _results(50)
+    results_path = str(tmp_path / "results.csv")
+    data.to_csv(results_path, index=False)
+    criteria_path = str(tmp_path / "criteria.json")
+    save_criteria(criteria_path, min_criteria_met=7)
+
+    selected = select_from_results(results_path, criteria_path)
+    expected = data.apply(_legacy_criteria_count, axis=1) >= 7
+    assert selected["File Name"].tolist() == data["File Name"][expected].tolist()
+    assert "Criteria Met" not in data
+
+    source, destination = tmp_path / "source", tmp_path / "selected"
+    source.mkdir()
+    for name in data["File Name"]:
+        (source / name).write_text(name)
+    select_from_results(data, min_criteria_met=7, folder_path=str(source), destination_folder=str(destination))
+    assert sorted(path.name for path in destination.iterdir()) == selected["File Name"].tolist()
@@ -0,0 +1,70 @@
+import math
+import pytest
+
+pytest.importorskip("OCC")
+
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Transform
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from OCC.Core.TopoDS import TopoDS_Compound
+from OCC.Core.gp import gp_Ax1, gp_Dir, gp_Pnt, gp_Trsf
+from scripts.analysis_pipeline import (
+    BOUNDING_BOX_MODES, ShapeContext, analyze_shape, bounding_box_extents, bounding_box_volume,
+)
+
+
+def _box(rotated=False):
+    shape = BRepPrimAPI_MakeBox(2.0, 3.0, 4.0).Shape()
+    if not rotated:
+        return shape
+    rotation = gp_Trsf()
+    rotation.SetRotation(gp_Ax1(gp_Pnt(0.0, 0.0, 0.0), gp_Dir(1.0, 2.0, 3.0)), 0.7)
+    return BRepBuilderAPI_Transform(shape, rotation, True).Shape()
+
+
+def test_extents_of_an_axis_aligned_box():
+    assert bounding_box_extents(_box(), "optimal") == pytest.approx((4.0, 3.0, 2.0), rel=1e-6)
+    assert bounding_box_extents(_box(), "obb") == pytest.approx((4.0, 3.0, 2.0), rel=1e-6)
+    # The default box keeps a small gap around the shape
+    length, width, height = bounding_box_extents(_box())
+    assert length >= 4.0 and width >= 3.0 and height >= 2.0
+    assert bounding_box_volume(_box()) == pytest.approx(24.0, rel=1e-3)
+
+
+def test_oriented_box_does_not_depend_on_the_orientation():
+    rotated = _box(rotated=True)
+    assert bounding_box_volume(rotated, "optimal") > 1.5 * 24.0
+    assert bounding_box_extents(rotated, "obb") == pytest.approx((4.0, 3.0, 2.0), rel=1e-2)
+
+
+def test_empty_shape_and_unknown_mode():
+    compound = TopoDS_Compound()
+    BRep_Builder().MakeCompound(compound)
+    for mode in BOUNDING_BOX_MODES:
+        assert bounding_box_extents(compound, mode) == (0.0, 0.0, 0.0)
+    with pytest.raises(ValueError):
+        bounding_box_extents(_box(), "sphere")
+
+
+def test_shape_descriptors():
+    context = ShapeContext("box.step", _box(), {"bbox_mode": "obb"})
+    record = analyze_shape(context, ["curvature", "volume", "shape_descriptors"])
+    assert record["OBB Volume"] == pytest.approx(24.0, rel=1e-6)
+    assert record["Bounding Box Volume"] == record["OBB Volume"]
+    assert record["Fill Ratio"] == pytest.approx(1.0, rel=1e-6)
+    assert record["Aspect Ratio (Long/Mid)"] == pytest.approx(4 / 3)
+    assert record["Aspect Ratio (Long/Short)"] == pytest.approx(2.0)
+    assert record["Surface Area"] == pytest.approx(52.0)
+    assert record["Surface to Volume Ratio"] == pytest.approx(52.0 / 24.0)
+    # The box and the volume are computed once and shared by the analyzers
+    assert {"bounding_box:obb", "volume", "surface_area"} <= set(context.stored())
+    assert "bounding_box:aabb" not in context.stored()
+
+
+def test_descriptors_of_a_shape_without_volume():
+    compound = TopoDS_Compound()
+    BRep_Builder().MakeCompound(compound)
+    record = analyze_shape(ShapeContext("empty.step", compound), ["shape_descriptors"])
+    assert record["OBB Volume"] == 0.0
+    assert all(math.isnan(record[name]) for name in ("Fill Ratio", "Aspect Ratio (Long/Mid)",
+                                                      "Surface to Volume Ratio"))
@@ -0,0 +1,90 @@
+import os
+import shutil
+import numpy as np
+import pytest
+from scripts.step_scanner import IDENTITY_PLACEMENT, scan_folder, scan_product_structure, scan_step_file
+
+ASSEMBLY = os.path.join(os.path.dirname(__file__), "data", "assembly.step")
+
+
+def test_scan_step_file():
+    scan = scan_step_file(ASSEMBLY)
+    assert scan.file_size == os.path.getsize(ASSEMBLY)
+    assert scan.schema == ["AUTOMOTIVE_DESIGN"]
+    assert scan.header["FILE_NAME"].startswith("'assembly.step'")
+    assert scan.product_count == 4 and scan.is_assembly
+    assert scan.entity_counts["NEXT_ASSEMBLY_USAGE_OCCURRENCE"] == 5
+    assert scan.entity_counts["CARTESIAN_POINT"] == 5
+    # Complex instances count under their first entity type
+    assert scan.entity_counts["LENGTH_UNIT"] == 1
+    assert scan.entity_counts["REPRESENTATION_RELATIONSHIP"] == 5
+    assert "HEADER" not in scan.entity_counts and "FILE_SCHEMA" not in scan.entity_counts
+
+
+def _translation(placement):
+    return tuple(row[3] for row in placement)
+
+
+def test_single_part_and_empty_files(tmp_path):
+    part = tmp_path / "part.step"
+    with open(ASSEMBLY) as file:
+        part.write_text("".join(line for line in file if not line.startswith(("#2=", "#22=", "#32="))))
+    scan = scan_step_file(str(part))
+    assert scan.product_count == 1 and not scan.is_assembly
+
+    empty = tmp_path / "empty.step"
+    empty.write_text("")
+    scan = scan_step_file(str(empty))
+    assert scan.file_size == 0 and not scan.entity_counts and scan.schema == []
+
+
+def test_scan_folder(tmp_path):
+    for name in ("a.step", "b.STP", "notes.txt"):
+        shutil.copy(ASSEMBLY, tmp_path / name)
+    assert sorted(os.path.basename(scan.file_path) for scan in scan_folder(str(tmp_path))) == ["a.step", "b.STP"]
+
+
+def test_leaf_products_and_their_instances():
+    components = scan_product_structure(ASSEMBLY)
+    assert [(component.ident, component.name) for component in components] == [(14, "Part; P"), (34, "Q")]
+    # Entity numbers in the order of the DATA section
+    assert [component.rank for component in components] == [10, 24]
+
+    part, other = components
+    assert len(part.placements) == 3 and len(other.placements) == 1
+
+
+def test_placements_compose_through_sub_assemblies():
+    part, other = scan_product_structure(ASSEMBLY)
+    translated, rotated, nested = part.placements
+    assert np.array(translated) == pytest.approx(np.array([[1, 0, 0, 10], [0, 1, 0, 0], [0, 0, 1, 0]]))
+    # Reversed relationship: the part frame is turned by 90 degrees about z
+    assert np.array(rotated) == pytest.approx(np.array([[0, -1, 0, 0], [1, 0, 0, 20], [0, 0, 1, 0]]))
+    # Sub-assembly at x = 100, part at z = 5 inside it
+    assert _translation(nested) == pytest.approx((100, 0, 5))
+    assert _translation(other.placements[0]) == pytest.approx((100, 0, 0))
+
+
+def test_metre_files_are_placed_in_millimetres(tmp_path):
+    with open(ASSEMBLY) as file:
+        text = file.read().replace("SI_UNIT(.MILLI.,.METRE.)", "SI_UNIT($,.METRE.)")
+    path = tmp_path / "metres.step"
+    path.write_text(text)
+    part = scan_product_structure(str(path))[0]
+    assert _translation(part.placements[0]) == pytest.approx((10000, 0, 0))
+
+
+def test_files_without_structure(tmp_path):
+    empty = tmp_path / "empty.step"
+    empty.write_text("")
+    assert scan_product_structure(str(empty)) == []
+
+    with open(ASSEMBLY) as file:
+        lines = [line for line in file if "NEXT_ASSEMBLY_USAGE_OCCURRENCE" not in line]
+    part = tmp_path / "part.step"
+    part.write_text("".join(lines))
+    assert scan_product_structure(str(part)) == []
+
+
+def test_identity_placement():
+    assert _translation(IDENTITY_PLACEMENT) == (0, 0, 0)
@@ -0,0 +1,130 @@
+import os
+import math
+import numpy as np
+import pytest
+
+pytest.importorskip("OCC")
+
+from scripts.tessellation import MeshCache, TriangleMesh, file_mesh_metrics, tessellate_shape
+
+# Corners of the unit cube, numbered x + 2y + 4z, and its faces counter-clockwise from outside
+_CORNERS = [(x, y, z) for z in (0, 1) for y in (0, 1) for x in (0, 1)]
+_QUADS = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+
+
+def _box(size=(1.0, 1.0, 1.0), origin=(0.0, 0.0, 0.0)):
+    vertices = np.array(_CORNERS, dtype=float) * size + origin
+    triangles = [triangle for a, b, c, d in _QUADS for triangle in ((a, b, c), (a, c, d))]
+    return TriangleMesh(vertices, triangles)
+
+
+def _rotation(angle, axis):
+    x, y, z = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+    cross = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    return np.eye(3) + math.sin(angle) * cross + (1 - math.cos(angle)) * cross @ cross
+
+
+def test_box_metrics():
+    metrics = _box((2.0, 3.0, 4.0), origin=(100.0, -50.0, 7.0)).metrics()
+    assert metrics["Mesh Volume"] == pytest.approx(24.0)
+    assert metrics["Mesh Surface Area"] == pytest.approx(52.0)
+    assert metrics["Mesh Bounding Box Volume"] == pytest.approx(24.0)
+    assert metrics["Mesh OBB Volume"] == pytest.approx(24.0)
+    assert metrics["Mesh Triangles"] == 12
+
+
+def test_reversed_triangles_give_a_negative_volume():
+    box = _box()
+    assert TriangleMesh(box.vertices, box.triangles[:, ::-1]).volume() == pytest.approx(-1.0)
+
+
+def test_oriented_bounding_box_of_a_rotated_box():
+    rotation = _rotation(0.7, (1.0, 2.0, 3.0))
+    box = _box((2.0, 3.0, 4.0))
+    mesh = TriangleMesh(box.vertices @ rotation.T + [10.0, 20.0, 30.0], box.triangles)
+
+    center, axes, extents = mesh.oriented_bounding_box()
+    assert extents == pytest.approx([4.0, 3.0, 2.0], rel=1e-5)
+    assert center == pytest.approx(rotation @ [1.0, 1.5, 2.0] + [10.0, 20.0, 30.0], rel=1e-5)
+    assert abs(axes[0] @ rotation[:, 2]) == pytest.approx(1.0, rel=1e-5)
+    # The axis-aligned box of the rotated part is larger, its volume is unchanged
+    xmin, ymin, zmin, xmax, ymax, zmax = mesh.bounding_box()
+    assert (xmax - xmin) * (ymax - ymin) * (zmax - zmin) > 24.0
+    assert mesh.volume() == pytest.approx(24.0, rel=1e-5)
+
+
+def test_transformed_mesh():
+    rotation = _rotation(1.2, (0.0, 0.0, 1.0))
+    mesh = _box((2.0, 3.0, 4.0)).transformed(np.c_[rotation, [5.0, 0.0, -1.0]])
+    assert mesh.volume() == pytest.approx(24.0, rel=1e-5)
+    assert mesh.vertices[0] == pytest.approx([5.0, 0.0, -1.0])
+    assert mesh.oriented_bounding_box()[2] == pytest.approx([4.0, 3.0, 2.0], rel=1e-5)
+
+
+def test_oriented_bounding_box_ignores_tessellation_density():
+    coarse = _box((2.0, 3.0, 4.0))
+    # Split one face into many small triangles: the axes must not move towards it
+    quad = np.array([[0, 0, 0], [0, 3, 0], [2, 3, 0], [2, 0, 0]], dtype=float)
+    grid = [(quad[0] + (quad[3] - quad[0]) * i / 20, (quad[1] - quad[0]) / 20, (quad[3] - quad[0]) / 20)
+            for i in range(20)]
+    points, triangles = [], []
+    for start, step_y, step_x in grid:
+        for j in range(20):
+            corner = start + step_y * j
+            base = len(points)
+            points += [corner, corner + step_y, corner + step_y + step_x, corner + step_x]
+            triangles += [(base, base + 1, base + 2), (base, base + 2, base + 3)]
+    dense = TriangleMesh.concatenate([TriangleMesh(coarse.vertices, coarse.triangles[2:]),
+                                      TriangleMesh(points, triangles)])
+    assert dense.oriented_bounding_box()[2] == pytest.approx(coarse.oriented_bounding_box()[2], rel=1e-5)
+
+
+def test_concatenate_renumbers_vertices():
+    mesh = TriangleMesh.concatenate([_box(), _box(origin=(5.0, 0.0, 0.0))])
+    assert len(mesh) == 24 and len(mesh.vertices) == 16
+    assert mesh.volume() == pytest.approx(2.0)
+    assert len(TriangleMesh.concatenate([])) == 0
+
+
+def test_empty_mesh():
+    mesh = TriangleMesh(np.zeros((0, 3)), np.zeros((0, 3)))
+    assert mesh.volume() == 0.0 and mesh.bounding_box() == (0.0,) * 6
+    assert mesh.metrics()["Mesh OBB Volume"] == 0.0
+
+
+def test_save_and_load(tmp_path):
+    mesh = _box((2.0, 3.0, 4.0))
+    mesh.save(str(tmp_path / "mesh.npz"))
+    loaded = TriangleMesh.load(str(tmp_path / "mesh.npz"))
+    assert np.array_equal(loaded.vertices, mesh.vertices) and np.array_equal(loaded.triangles, mesh.triangles)
+    assert not [name for name in tmp_path.iterdir() if name.suffix == ".tmp"]
+
+
+def test_tessellated_shapes():
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakeCylinder
+
+    box = tessellate_shape(BRepPrimAPI_MakeBox(2.0, 3.0, 4.0).Shape())
+    assert box.volume() == pytest.approx(24.0)
+    assert box.surface_area() == pytest.approx(52.0)
+
+    # The mesh lies inside the curved surface, by at most the deflection
+    cylinder = tessellate_shape(BRepPrimAPI_MakeCylinder(10.0, 5.0).Shape(), deflection=0.01)
+    exact = math.pi * 10.0 ** 2 * 5.0
+    assert exact * 0.99 < cylinder.volume() <= exact
+
+
+def test_mesh_cache(tmp_path):
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+    from OCC.Core.STEPControl import STEPControl_Writer, STEPControl_AsIs
+
+    step_path = str(tmp_path / "box.step")
+    writer = STEPControl_Writer()
+    writer.Transfer(BRepPrimAPI_MakeBox(2.0, 3.0, 4.0).Shape(), STEPControl_AsIs)
+    writer.Write(step_path)
+
+    cache_root = str(tmp_path / "meshes")
+    metrics = file_mesh_metrics(step_path, cache_root)
+    assert metrics["File Name"] == "box.step"
+    assert metrics["Mesh Volume"] == pytest.approx(24.0)
+    assert os.path.exists(MeshCache(cache_root).path(step_path))
+    assert file_mesh_metrics(step_path, cache_root) == metrics